@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark of ChunkingEvaluator.calculate_metrics.
+
+Runs the original evaluator (substring scan of every paragraph against every
+chunk, sentence regexes per chunk), reproduced below as `legacy_metrics`,
+and the offset-based evaluator on the same chunks. It reports the time of
+each and the largest difference across metrics. The equivalence itself is
+checked by tests/unit/test_chunking_evaluator.py.
+
+Paragraph preservation is now positional: a paragraph whose text also
+appears verbatim inside another paragraph is no longer counted for chunks
+that only contain that other occurrence (the legacy substring test did).
+On prose this moves the metric by ~1e-8.
+
+Usage:
+    python scripts/benchmark_chunking_evaluator.py
+    python scripts/benchmark_chunking_evaluator.py --paragraphs 10000 --chunk-size 400
+    python scripts/benchmark_chunking_evaluator.py --file document.md
+"""
+
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import CharacterTextSplitter, RecursiveCharacterTextSplitter
+
+from ungraph.utils.chunking_master import ChunkingEvaluator, ChunkingMetrics
+
+METRICS = ("avg_sentence_completeness", "avg_paragraph_preservation", "avg_chunk_size", "std_chunk_size")
+
+
+def legacy_metrics(chunks: List[Document], original_text: str) -> Dict[str, float]:
+    """Original ChunkingEvaluator.calculate_metrics (only the compared fields)."""
+    sentence_completeness = []
+    for chunk in chunks:
+        text = chunk.page_content
+        complete_sentences = len(re.findall(r'[.!?]\s+', text))
+        total_sentences = len(re.split(r'[.!?]+', text))
+        if total_sentences > 0:
+            sentence_completeness.append(complete_sentences / total_sentences)
+
+    original_paragraphs = re.split(r'\n\s*\n', original_text)
+    paragraph_preservation = []
+    for chunk in chunks:
+        chunk_text = chunk.page_content
+        preserved = sum(1 for para in original_paragraphs if para.strip() in chunk_text)
+        paragraph_preservation.append(preserved / len(original_paragraphs))
+
+    sizes = [len(chunk.page_content) for chunk in chunks]
+    average = sum(sizes) / len(sizes)
+    return {
+        "avg_sentence_completeness": sum(sentence_completeness) / len(sentence_completeness),
+        "avg_paragraph_preservation": sum(paragraph_preservation) / len(paragraph_preservation),
+        "avg_chunk_size": average,
+        "std_chunk_size": (sum((x - average) ** 2 for x in sizes) / len(sizes)) ** 0.5,
+    }
+
+
+def synthetic_text(paragraphs: int, seed: int = 0) -> str:
+    """Paragraphs of random sentences, with some repeated boilerplate paragraphs."""
+    rng = random.Random(seed)
+    words = "data graph node chunk model query index vector text section report value".split()
+    boilerplate = ["Confidential.", "See the appendix for details.", "- item one\n- item two"]
+    result = []
+    for _ in range(paragraphs):
+        if rng.random() < 0.05:
+            result.append(rng.choice(boilerplate))
+            continue
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(4, 18)))
+            sentences.append(sentence.capitalize() + rng.choice(".!?"))
+        result.append(" ".join(sentences))
+    return "\n\n".join(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Document to evaluate (default: synthetic text)")
+    parser.add_argument("--paragraphs", type=int, default=3000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=75)
+    args = parser.parse_args()
+    # CharacterTextSplitter avisa por cada chunk que excede chunk_size
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+
+    text = args.file.read_text(encoding="utf-8") if args.file else synthetic_text(args.paragraphs)
+    splitters = {
+        "recursive": RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+        "character": CharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+    }
+
+    paragraphs = len(re.split(r'\n\s*\n', text))
+    print(f"{len(text)} characters, {paragraphs} paragraphs")
+    print(f"{'splitter':<10} {'chunks':>7} {'legacy (s)':>11} {'offsets (s)':>12} {'max diff':>10}")
+    for name, splitter in splitters.items():
+        chunks = splitter.split_documents([Document(page_content=text)])
+
+        start = time.perf_counter()
+        expected = legacy_metrics(chunks, text)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics: ChunkingMetrics = ChunkingEvaluator.calculate_metrics(chunks, text)
+        new_seconds = time.perf_counter() - start
+
+        difference = max(abs(getattr(metrics, key) - expected[key]) for key in METRICS)
+        print(f"{name:<10} {len(chunks):>7} {legacy_seconds:>11.3f} {new_seconds:>12.3f} {difference:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Regression check and benchmark of the single-pass document profiler.
+
+The original DocumentAnalyzer.detect_document_type and analyze_structure
+(independent regex passes over the joined text) are reproduced below as
+`legacy_detect` and `legacy_structure`. The script checks that the profiler
+returns the same document type and structure dictionary on a set of edge
+cases and on the benchmark text, with a small block size so that every
+block-boundary path is exercised. It then times both implementations and
+reports their peak extra memory (tracemalloc). With --prose the documents
+have no headers or lists, so the legacy detection runs every rule down to
+the narrative check.
+
+Usage:
+    python scripts/benchmark_document_profiler.py
+    python scripts/benchmark_document_profiler.py --paragraphs 50000 --documents 20
+    python scripts/benchmark_document_profiler.py --prose
+    python scripts/benchmark_document_profiler.py --file document.md
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ungraph.utils.chunking_master import DocumentAnalyzer
+from ungraph.utils.document_profiler import profile_texts
+
+EDGE_CASES = [
+    "",
+    "#\n# Title\n####### not a header\n#notaheader\n  # indented\n",
+    "text\n\n\n  \n\t\nmore text\n \n\nlast",
+    "1.\n2. item\n- bullet\n* star\n+plus\n",
+    "a <b and later > closes",
+    "def\n\n   name  (x): pass\nfrom x",
+    "Use `code` and ```fences```.",
+    "One. Two! Three? " * 20 + "\r\n\r\n" + "windows line endings\r\n",
+    "word " * 40 + ". " + "long sentence words " * 30,
+    "from here on...\n" + "padding " * 40 + "\nimport os\n" + "Long prose sentence with many words in it. " * 20,
+    "Prose first. " * 30 + "\n\n<div>late html</div>\n# late header\n",
+]
+
+
+def legacy_detect(text: str) -> str:
+    """Original DocumentAnalyzer.detect_document_type (content rules only)."""
+    if re.search(r'^#{1,6}\s+', text, re.MULTILINE):
+        return "markdown"
+    if re.search(r'<[a-z][\s\S]*>', text):
+        return "html"
+    python_keywords = ['def ', 'class ', 'import ', 'from ', 'if __name__']
+    if any(keyword in text for keyword in python_keywords):
+        if re.search(r'def\s+\w+\s*\(|class\s+\w+|import\s+\w+', text):
+            return "python"
+    if re.search(r'^\d+\.\s+|```|`\w+`', text, re.MULTILINE):
+        return "technical"
+    sentences = re.split(r'[.!?]+', text)
+    avg_sentence_length = sum(len(s.split()) for s in sentences) / max(len(sentences), 1)
+    if avg_sentence_length > 15 and len(sentences) > 5:
+        return "narrative"
+    return "unstructured"
+
+
+def legacy_structure(text: str) -> Dict[str, Any]:
+    """Original DocumentAnalyzer.analyze_structure."""
+    headers = len(re.findall(r'^#{1,6}\s+', text, re.MULTILINE))
+    paragraphs = len(re.split(r'\n\s*\n', text))
+    sentences = len(re.split(r'[.!?]+', text))
+    words = len(text.split())
+    bullet_lists = len(re.findall(r'^[\*\-\+]\s+', text, re.MULTILINE))
+    numbered_lists = len(re.findall(r'^\d+\.\s+', text, re.MULTILINE))
+    return {
+        'headers': headers,
+        'paragraphs': paragraphs,
+        'sentences': sentences,
+        'words': words,
+        'characters': len(text),
+        'bullet_lists': bullet_lists,
+        'numbered_lists': numbered_lists,
+        'structure_density': (headers + bullet_lists + numbered_lists) / max(paragraphs, 1),
+        'avg_sentence_length': words / max(sentences, 1),
+        'avg_paragraph_length': words / max(paragraphs, 1),
+    }
+
+
+def legacy_analysis(texts: List[str]) -> Tuple[str, Dict[str, Any]]:
+    full_text = "\n\n".join(texts)
+    return legacy_detect(full_text), legacy_structure(full_text)
+
+
+def profiled_analysis(texts: List[str], block_size: int = 1 << 16) -> Tuple[str, Dict[str, Any]]:
+    profile = profile_texts(texts, block_size=block_size)
+    return DocumentAnalyzer.document_type_from_profile(profile).value, profile.structure()
+
+
+def synthetic_documents(paragraphs: int, documents: int, prose: bool = False, seed: int = 0) -> List[str]:
+    """Markdown-like documents (headers, lists, prose, irregular blank lines) or prose only."""
+    rng = random.Random(seed)
+    words = "data graph node chunk model query index vector text section report value".split()
+    result = []
+    for _ in range(documents):
+        blocks = []
+        for index in range(paragraphs // documents):
+            kind = 1.0 if prose else rng.random()
+            if not prose and index % 25 == 0:
+                blocks.append("#" * rng.randint(1, 3) + " " + " ".join(rng.sample(words, 3)))
+            elif kind < 0.1:
+                blocks.append("\n".join(f"- {rng.choice(words)}" for _ in range(rng.randint(2, 5))))
+            elif kind < 0.15:
+                blocks.append("\n".join(f"{n}. {rng.choice(words)}" for n in range(1, rng.randint(3, 6))))
+            else:
+                sentences = [
+                    " ".join(rng.choice(words) for _ in range(rng.randint(4, 18))).capitalize() + rng.choice(".!?")
+                    for _ in range(rng.randint(1, 6))
+                ]
+                blocks.append(" ".join(sentences))
+        result.append("".join(block + rng.choice(["\n\n", "\n \n", "\n\n\n", "\n"]) for block in blocks))
+    return result
+
+
+def seconds(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function: Callable[[], object]) -> float:
+    """Peak traced memory (MB) allocated during a call."""
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Document to profile (default: synthetic documents)")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--prose", action="store_true", help="Synthetic prose without headers or lists")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        texts = [args.file.read_text(encoding="utf-8", errors="replace")]
+    else:
+        texts = synthetic_documents(args.paragraphs, args.documents, args.prose)
+
+    for case in EDGE_CASES + ["".join(texts)[:200_000]]:
+        for block_size in (7, 64, 1 << 16):
+            if profiled_analysis([case], block_size) != legacy_analysis([case]):
+                raise SystemExit(f"profiler differs from the legacy analysis (block_size={block_size}): {case[:60]!r}")
+    if profiled_analysis(texts) != legacy_analysis(texts):
+        raise SystemExit("profiler differs from the legacy analysis on the benchmark documents")
+
+    characters = sum(len(text) for text in texts) + 2 * (len(texts) - 1)
+    print(f"{len(texts)} documents, {characters / 1e6:.1f}M characters, best of {args.repeat}")
+    print(f"{'implementation':<28} {'seconds':>8} {'peak MB':>8}")
+    for name, function in (
+        ("legacy (join + regexes)", lambda: legacy_analysis(texts)),
+        ("single-pass profiler", lambda: profiled_analysis(texts)),
+    ):
+        print(f"{name:<28} {seconds(function, args.repeat):>8.3f} {peak_memory(function):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
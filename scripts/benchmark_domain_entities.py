@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark of per-object memory and construction time of the domain objects.
+
+Compares the slotted Chunk, Entity, Fact, Relation, Provenance and
+SearchResult classes with equivalent classes that keep a per-instance
+__dict__ (same __init__ and validations), i.e. the layout used before
+__slots__ was introduced.
+
+Usage:
+    python scripts/benchmark_domain_entities.py
+    python scripts/benchmark_domain_entities.py --objects 200000
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.entities.entity import Entity
+from ungraph.domain.entities.fact import Fact
+from ungraph.domain.entities.relation import Relation
+from ungraph.domain.services.search_service import SearchResult
+from ungraph.domain.value_objects.provenance import Provenance
+
+
+def with_dict(cls: type) -> type:
+    """Class with the same constructor as `cls` but a per-instance __dict__."""
+    namespace = {"__init__": cls.__init__}
+    if hasattr(cls, "__post_init__"):
+        namespace["__post_init__"] = cls.__post_init__
+    return type(f"{cls.__name__}WithDict", (), namespace)
+
+
+# Argumentos compartidos entre instancias: se mide solo el coste del objeto
+CASES: Dict[str, Tuple[type, Dict[str, Any]]] = {
+    "Chunk": (Chunk, dict(id="chunk_1", page_content="text", metadata={}, chunk_id_consecutive=1)),
+    "Entity": (Entity, dict(id="entity_1", name="Apple Inc.", type="ORG", mentions=[])),
+    "Fact": (Fact, dict(id="fact_1", subject="chunk_1", predicate="MENTIONS", object="Apple",
+                        confidence=0.9, provenance_ref="chunk_1")),
+    "Relation": (Relation, dict(id="rel_1", source_entity_id="e1", target_entity_id="e2",
+                                relation_type="WORKS_FOR", confidence=0.9, provenance_ref="chunk_1")),
+    "Provenance": (Provenance, dict(was_derived_from="chunk_1", timestamp="2025-01-01T00:00:00Z",
+                                    model_used="spacy")),
+    "SearchResult": (SearchResult, dict(content="text", score=0.9, chunk_id="chunk_1",
+                                        chunk_id_consecutive=1)),
+}
+
+
+def bytes_per_object(factory: Callable[[], Any], n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Descontar la lista que contiene los objetos
+    overhead = sys.getsizeof(objects)
+    del objects
+    return (after - before - overhead) / n
+
+
+def microseconds_per_object(factory: Callable[[], Any], n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        factory()
+    return (time.perf_counter() - start) * 1e6 / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{args.objects} objects per class")
+    print(f"{'class':<14} {'bytes (dict)':>13} {'bytes (slots)':>14} {'us (dict)':>10} {'us (slots)':>11}")
+    for name, (cls, kwargs) in CASES.items():
+        legacy = with_dict(cls)
+        slotted_factory = lambda: cls(**kwargs)
+        legacy_factory = lambda: legacy(**kwargs)
+        print(
+            f"{name:<14} "
+            f"{bytes_per_object(legacy_factory, args.objects):>13.1f} "
+            f"{bytes_per_object(slotted_factory, args.objects):>14.1f} "
+            f"{microseconds_per_object(legacy_factory, args.objects):>10.2f} "
+            f"{microseconds_per_object(slotted_factory, args.objects):>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
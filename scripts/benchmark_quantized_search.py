@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark of quantized embedding storage with float re-scoring.
+
+Compares the in-process vector index without quantization, with int8 and
+with binary codes: bytes kept in RAM per vector, query latency and
+recall@k against exact float32 search.
+
+Quantization trades latency for memory: the first stage converts int8
+codes to float32 block by block, so a quantized query is about as fast as
+(or slightly slower than) exact float32 search over vectors held in RAM,
+while keeping only the codes resident.
+
+The "int8-batch" row ingests the vectors in batches of --batch-size with an
+uncalibrated quantizer, as ingestion does: the calibration is provisional
+until enough vectors are seen and widens when later batches exceed it.
+
+Usage:
+    python scripts/benchmark_quantized_search.py
+    python scripts/benchmark_quantized_search.py --embeddings embeddings.npy --queries 200 --k 10
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ungraph.infrastructure.services.embedding_quantizer import EmbeddingQuantizer
+from ungraph.infrastructure.services.numpy_vector_index import NumpyVectorIndex
+
+
+def synthetic_embeddings(n: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """Clustered random vectors, closer to real embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 400, 8), dimensions))
+    labels = rng.integers(0, len(centers), n)
+    return (centers[labels] + 0.6 * rng.standard_normal((n, dimensions))).astype(np.float32)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings", type=Path, help=".npy file with a (n, d) embedding matrix")
+    parser.add_argument("--n", type=int, default=100_000, help="Synthetic vectors if --embeddings is not given")
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=256, help="Batch size of the int8-batch case")
+    args = parser.parse_args()
+
+    vectors = np.load(args.embeddings) if args.embeddings else synthetic_embeddings(args.n, args.dimensions)
+    rng = np.random.default_rng(1)
+    held_out = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[held_out] + 0.05 * rng.standard_normal((len(held_out), vectors.shape[1])).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+    print(f"{'mode':<10} {'RAM bytes/vec':>14} {'ms/query':>10} {'recall@k':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("none", "int8", "int8-batch", "binary"):
+            quantizer = None if mode == "none" else EmbeddingQuantizer(mode.split("-")[0], model_name="benchmark")
+            index = NumpyVectorIndex(quantizer=quantizer, rescore_factor=args.rescore_factor)
+            batch_size = args.batch_size if mode == "int8-batch" else len(ids)
+            for start in range(0, len(ids), batch_size):
+                index.add(ids[start:start + batch_size], vectors[start:start + batch_size])
+            index.save(Path(tmp) / mode)
+
+            start = time.perf_counter()
+            for query in queries:
+                index.search(query, k=args.k)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+            resident = index.memory_usage()["resident"] / len(index)
+            recall = index.measure_recall(queries, k=args.k)
+            print(f"{mode:<10} {resident:>14.1f} {elapsed_ms:>10.2f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark of SimpleTextCleaningService against the original regex cleaner.
+
+The original implementation (NFD + ASCII encode, a character-class regex
+built on every call and two re.sub passes) is reproduced below as
+`legacy_clean`. The "ascii" profile must return exactly the same text; the
+script checks it before timing.
+
+Usage:
+    python scripts/benchmark_text_cleaning.py
+    python scripts/benchmark_text_cleaning.py --file corpus.txt --repeat 5
+    python scripts/benchmark_text_cleaning.py --documents 5000
+"""
+
+import argparse
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ungraph.infrastructure.services.simple_text_cleaning_service import (
+    CLEANING_PROFILES,
+    SimpleTextCleaningService,
+)
+
+SAMPLE_PARAGRAPH = (
+    "Información técnica — el niño comió 3 manzanas * | ~ «citas» y ‘comillas’.\n"
+    "Plain ASCII log line: [2024-01-01 10:00:00] INFO user=42 path=/api/v1 status=200\n\n"
+)
+
+
+def legacy_clean(text: str) -> str:
+    """Original SimpleTextCleaningService.clean (default arguments)."""
+    text = unicodedata.normalize("NFD", text)
+    text = text.encode("ascii", "ignore").decode("utf-8")
+    allowed_characters = "a-zA-Z0-9áéíóúÁÉÍÓÚñÑ.,;:!?'\"()\\[\\]{}<>\\-\\_@#%&/\\s"
+    cleaned_text = re.sub(f"[^{allowed_characters}]", " ", text)
+    return re.sub(r"\s+", " ", cleaned_text).strip()
+
+
+def seconds(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Text file to clean (default: synthetic mixed text)")
+    parser.add_argument("--size-mb", type=float, default=8.0, help="Size of the synthetic text")
+    parser.add_argument("--documents", type=int, default=2000, help="Documents in the batch benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        text = args.file.read_text(encoding="utf-8", errors="replace")
+    else:
+        text = SAMPLE_PARAGRAPH * int(args.size_mb * 1e6 / len(SAMPLE_PARAGRAPH))
+    ascii_text = text.encode("ascii", "ignore").decode("ascii")
+
+    ascii_service = SimpleTextCleaningService("ascii")
+    for sample in (text, ascii_text):
+        if ascii_service.clean(sample) != legacy_clean(sample):
+            raise SystemExit("ascii profile output differs from the legacy cleaner")
+
+    print(f"{len(text) / 1e6:.1f}M characters, best of {args.repeat}")
+    print(f"{'implementation':<22} {'mixed (s)':>10} {'ascii (s)':>10}")
+    print(f"{'legacy regex':<22} "
+          f"{seconds(lambda: legacy_clean(text), args.repeat):>10.3f} "
+          f"{seconds(lambda: legacy_clean(ascii_text), args.repeat):>10.3f}")
+    for profile in CLEANING_PROFILES:
+        service = SimpleTextCleaningService(profile)
+        print(f"{'profile ' + profile:<22} "
+              f"{seconds(lambda: service.clean(text), args.repeat):>10.3f} "
+              f"{seconds(lambda: service.clean(ascii_text), args.repeat):>10.3f}")
+
+    documents: List[str] = [SAMPLE_PARAGRAPH * 3] * args.documents
+    print(f"\nbatch of {args.documents} small documents")
+    print(f"{'legacy regex (loop)':<22} {seconds(lambda: [legacy_clean(d) for d in documents], args.repeat):>10.3f}")
+    print(f"{'clean_batch (ascii)':<22} {seconds(lambda: ascii_service.clean_batch(documents), args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Regression check and benchmark of the native recursive splitter.
+
+Compares RecursiveTextSplitter (ungraph.utils.text_splitter) with
+LangChain's RecursiveCharacterTextSplitter on the same text. The chunks must
+be identical for every configuration; the script exits with status 1
+otherwise. It then times:
+
+- LangChain split_text plus the offset recovery the chunking service used
+  to do (str.find of every chunk, as add_start_index does),
+- native split_spans (offsets only, no chunk text),
+- native split_text (offsets and the chunk strings).
+
+Usage:
+    python scripts/benchmark_text_splitter.py
+    python scripts/benchmark_text_splitter.py --paragraphs 100000 --repeat 5
+    python scripts/benchmark_text_splitter.py --file document.md
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ungraph.utils.text_splitter import SENTENCE_SEPARATORS, RecursiveTextSplitter
+
+CONFIGURATIONS = [
+    {"chunk_size": 300, "chunk_overlap": 50},
+    {"chunk_size": 1000, "chunk_overlap": 200},
+    {"chunk_size": 4000, "chunk_overlap": 400},
+    {"chunk_size": 1000, "chunk_overlap": 200, "separators": SENTENCE_SEPARATORS, "keep_separator": "end"},
+]
+
+
+def synthetic_text(paragraphs: int, seed: int = 0) -> str:
+    """Prose paragraphs with a few lists, long lines and irregular blank lines."""
+    rng = random.Random(seed)
+    words = "data graph node chunk model query index vector text section report value".split()
+    blocks = []
+    for _ in range(paragraphs):
+        kind = rng.random()
+        if kind < 0.1:
+            blocks.append("\n".join(f"- {rng.choice(words)}" for _ in range(rng.randint(2, 6))))
+        elif kind < 0.12:
+            blocks.append(" ".join(rng.choice(words) for _ in range(rng.randint(300, 900))))
+        else:
+            sentences = [
+                " ".join(rng.choice(words) for _ in range(rng.randint(4, 18))).capitalize() + rng.choice(".!?")
+                for _ in range(rng.randint(1, 8))
+            ]
+            blocks.append(" ".join(sentences))
+    return "".join(block + rng.choice(["\n\n", "\n \n", "\n\n\n", "\n"]) for block in blocks)
+
+
+def langchain_with_offsets(splitter: RecursiveCharacterTextSplitter, text: str, overlap: int) -> List[Tuple[int, int]]:
+    """LangChain chunks located in the text (the previous chunking service code path)."""
+    spans = []
+    index = 0
+    previous_length = 0
+    for chunk in splitter.split_text(text):
+        index = text.find(chunk, max(0, index + previous_length - overlap))
+        spans.append((index, index + len(chunk)))
+        previous_length = len(chunk)
+    return spans
+
+
+def seconds(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Document to split (default: synthetic text)")
+    parser.add_argument("--paragraphs", type=int, default=30000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    # LangChain avisa por cada chunk que excede chunk_size
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+
+    text = args.file.read_text(encoding="utf-8", errors="replace") if args.file else synthetic_text(args.paragraphs)
+    print(f"{len(text) / 1e6:.1f}M characters, best of {args.repeat}")
+    print(f"{'configuration':<26} {'chunks':>7} {'langchain+find':>15} {'native spans':>13} {'native text':>12}")
+
+    failed = False
+    for configuration in CONFIGURATIONS:
+        langchain = RecursiveCharacterTextSplitter(**configuration)
+        native = RecursiveTextSplitter(**configuration)
+        expected = langchain.split_text(text)
+        spans = native.split_spans(text)
+        if [text[start:end] for start, end in spans] != expected:
+            print(f"chunks differ from LangChain for {configuration}")
+            failed = True
+            continue
+
+        overlap = configuration["chunk_overlap"]
+        name = f"{configuration['chunk_size']}/{overlap}" + (" sentences" if "separators" in configuration else "")
+        print(f"{name:<26} {len(spans):>7} "
+              f"{seconds(lambda: langchain_with_offsets(langchain, text, overlap), args.repeat):>15.3f} "
+              f"{seconds(lambda: native.split_spans(text), args.repeat):>13.3f} "
+              f"{seconds(lambda: native.split_text(text), args.repeat):>12.3f}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -89,7 +89,7 @@ def main():
             # Generar embedding para graph_enhanced
             embedding_service = HuggingFaceEmbeddingService()
             embedding = embedding_service.generate_embedding(args.query)
-            kwargs["query_vector"] = embedding.vector
+            kwargs["query_vector"] = embedding.to_list()
             kwargs["max_traversal_depth"] = 2
         
         if args.pattern == "local":
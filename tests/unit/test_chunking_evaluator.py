@@ -0,0 +1,123 @@
+"""
+ChunkingEvaluator.calculate_metrics frente al evaluador original.
+
+`legacy_metrics` reproduce el evaluador original (búsqueda de cada párrafo
+como subcadena de cada chunk y regex de oraciones por chunk). El evaluador
+por offsets debe dar las mismas métricas; la preservación de párrafos solo
+difiere cuando un párrafo aparece literalmente dentro de otro (~1e-8 en prosa).
+
+La comparación de tiempos está en scripts/benchmark_chunking_evaluator.py.
+"""
+
+import logging
+import random
+import re
+from typing import Dict, List
+
+import pytest
+from langchain_core.documents import Document
+from langchain_text_splitters import CharacterTextSplitter, RecursiveCharacterTextSplitter
+
+from ungraph.utils.chunking_master import ChunkingEvaluator, TextBoundaries
+
+METRICS = ("avg_sentence_completeness", "avg_paragraph_preservation", "avg_chunk_size", "std_chunk_size")
+TOLERANCE = 1e-6
+
+
+def legacy_metrics(chunks: List[Document], original_text: str) -> Dict[str, float]:
+    """ChunkingEvaluator.calculate_metrics original (solo los campos comparados)."""
+    sentence_completeness = []
+    for chunk in chunks:
+        text = chunk.page_content
+        complete_sentences = len(re.findall(r'[.!?]\s+', text))
+        total_sentences = len(re.split(r'[.!?]+', text))
+        if total_sentences > 0:
+            sentence_completeness.append(complete_sentences / total_sentences)
+
+    original_paragraphs = re.split(r'\n\s*\n', original_text)
+    paragraph_preservation = []
+    for chunk in chunks:
+        chunk_text = chunk.page_content
+        preserved = sum(1 for para in original_paragraphs if para.strip() in chunk_text)
+        paragraph_preservation.append(preserved / len(original_paragraphs))
+
+    sizes = [len(chunk.page_content) for chunk in chunks]
+    average = sum(sizes) / len(sizes)
+    return {
+        "avg_sentence_completeness": sum(sentence_completeness) / len(sentence_completeness),
+        "avg_paragraph_preservation": sum(paragraph_preservation) / len(paragraph_preservation),
+        "avg_chunk_size": average,
+        "std_chunk_size": (sum((x - average) ** 2 for x in sizes) / len(sizes)) ** 0.5,
+    }
+
+
+def synthetic_text(paragraphs: int, seed: int = 0) -> str:
+    """Párrafos de oraciones aleatorias, con algunos párrafos repetidos."""
+    rng = random.Random(seed)
+    words = "data graph node chunk model query index vector text section report value".split()
+    boilerplate = ["Confidential.", "See the appendix for details.", "- item one\n- item two"]
+    result = []
+    for _ in range(paragraphs):
+        if rng.random() < 0.05:
+            result.append(rng.choice(boilerplate))
+            continue
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(4, 18)))
+            sentences.append(sentence.capitalize() + rng.choice(".!?"))
+        result.append(" ".join(sentences))
+    return "\n\n".join(result)
+
+
+def make_splitter(name: str, chunk_size: int, chunk_overlap: int):
+    if name == "recursive":
+        return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    # CharacterTextSplitter avisa por cada chunk que excede chunk_size
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+    return CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("splitter", ["recursive", "character"])
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(500, 75), (200, 0), (1000, 200)])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_metrics_match_legacy_evaluator(splitter, chunk_size, chunk_overlap, seed):
+    text = synthetic_text(300, seed=seed)
+    chunks = make_splitter(splitter, chunk_size, chunk_overlap).split_documents([Document(page_content=text)])
+
+    expected = legacy_metrics(chunks, text)
+    metrics = ChunkingEvaluator.calculate_metrics(chunks, text)
+
+    for key in METRICS:
+        assert getattr(metrics, key) == pytest.approx(expected[key], abs=TOLERANCE), key
+
+
+@pytest.mark.unit
+def test_metrics_with_shared_boundaries():
+    text = synthetic_text(100)
+    boundaries = TextBoundaries(text)
+    chunks = make_splitter("recursive", 400, 50).split_documents([Document(page_content=text)])
+
+    expected = legacy_metrics(chunks, text)
+    metrics = ChunkingEvaluator.calculate_metrics(chunks, text, boundaries=boundaries)
+
+    for key in METRICS:
+        assert getattr(metrics, key) == pytest.approx(expected[key], abs=TOLERANCE), key
+
+
+@pytest.mark.unit
+def test_chunks_not_in_original_text():
+    text = "First sentence. Second sentence!\n\nAnother paragraph here? Yes."
+    chunks = [Document(page_content="Rewritten chunk. With two sentences."), Document(page_content=text)]
+
+    expected = legacy_metrics(chunks, text)
+    metrics = ChunkingEvaluator.calculate_metrics(chunks, text)
+
+    for key in METRICS:
+        assert getattr(metrics, key) == pytest.approx(expected[key], abs=TOLERANCE), key
+
+
+@pytest.mark.unit
+def test_no_chunks_raises():
+    with pytest.raises(ValueError):
+        ChunkingEvaluator.calculate_metrics([], "text")
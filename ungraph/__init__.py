@@ -55,6 +55,9 @@ except ImportError:
     from langchain_core.documents import Document as LangChainDocument
 
 __version__ = "0.1.4"
+
+# Estadísticas de truncado de la última ingesta (ver get_truncation_stats)
+_last_truncation_stats = None
 __all__ = [
     # Configuration functions
     "configure",
@@ -62,11 +65,14 @@ __all__ = [
     
     # Funciones de alto nivel
     "ingest_document",
+    "ingest_large_document",
     "search",
     "vector_search",
     "hybrid_search",
     "search_with_pattern",
     "suggest_chunking_strategy",
+    "get_chunking_cache_stats",
+    "get_truncation_stats",
     
     # Clases para uso avanzado
     "IngestDocumentUseCase",
@@ -96,7 +102,9 @@ def ingest_document(
     clean_text: bool = True,
     database: Optional[str] = None,
     embedding_model: Optional[str] = None,
-    pattern: Optional["GraphPattern"] = None
+    pattern: Optional["GraphPattern"] = None,
+    token_aligned: Optional[bool] = None,
+    semantic: Optional[bool] = None
 ) -> List[Chunk]:
     """
     Ingest a document into the knowledge graph.
@@ -115,9 +123,15 @@ def ingest_document(
         database: Neo4j database name (default: from global configuration)
         embedding_model: Embedding model to use (default: from global configuration)
         pattern: Optional graph pattern. If None, uses FILE_PAGE_CHUNK (default: None)
+        token_aligned: Size chunks in embedding-model tokens so they fit the model's
+            window; chunk_size/chunk_overlap then only set the overlap ratio
+            (default: from global configuration, chunking_token_aligned)
+        semantic: Split where the topic changes between sentences; chunk_size caps
+            the chunk length and sentence embeddings are reused for the chunk vectors
+            (default: from global configuration, chunking_semantic)
     
     Returns:
-        List of created Chunks
+        List of created Chunks (truncation statistics: get_truncation_stats())
     
     Raises:
         FileNotFoundError: If the file doesn't exist
@@ -177,9 +191,12 @@ def ingest_document(
     
     use_case = create_ingest_document_use_case(
         database=db_name,
-        embedding_model=emb_model
+        embedding_model=emb_model,
+        token_aligned=token_aligned,
+        semantic=semantic
     )
     
+    global _last_truncation_stats
     try:
         # Ejecutar el caso de uso
         chunks = use_case.execute(
@@ -189,6 +206,7 @@ def ingest_document(
             clean_text=clean_text,
             pattern=pattern
         )
+        _last_truncation_stats = use_case.last_truncation_stats
         return chunks
     finally:
         # Limpiar recursos
@@ -198,6 +216,84 @@ def ingest_document(
             use_case.index_service.close()
 
 
+def ingest_large_document(
+    file_path: str | Path,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    clean_text: bool = True,
+    database: Optional[str] = None,
+    embedding_model: Optional[str] = None,
+    batch_size: int = 256,
+    token_aligned: Optional[bool] = None
+) -> int:
+    """
+    Ingest a very large text or Markdown file in bounded memory.
+    
+    The file is decoded incrementally after a single encoding detection,
+    cleaned and split in a rolling window, and chunks are embedded and
+    persisted in batches. Unlike ingest_document(), chunks are not returned
+    (that would keep the whole file in memory); each chunk stores its
+    absolute character offsets as `start_index`/`end_index` metadata.
+    
+    Args:
+        file_path: Path to the file to ingest (TXT or Markdown)
+        chunk_size: Size of each chunk in characters (default: 1000)
+        chunk_overlap: Overlap between chunks in characters (default: 200)
+        clean_text: If True, cleans the text before processing (default: True)
+        database: Neo4j database name (default: from global configuration)
+        embedding_model: Embedding model to use (default: from global configuration)
+        batch_size: Chunks embedded and written per batch (default: 256)
+        token_aligned: Size chunks in embedding-model tokens (default: from global
+            configuration, chunking_token_aligned)
+    
+    Returns:
+        Number of chunks created (truncation statistics: get_truncation_stats())
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the file type can't be streamed
+        RuntimeError: If there's an error connecting to Neo4j
+    
+    Example:
+        >>> import ungraph
+        >>> count = ungraph.ingest_large_document("server.log.txt", batch_size=512)
+        >>> print(f"✅ {count} chunks created")
+    """
+    file_path = Path(file_path)
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"File does not exist: {file_path}")
+    
+    settings = get_settings()
+    
+    # Import here to avoid circular import with application.dependencies
+    from ungraph.application.dependencies import create_ingest_document_use_case
+    
+    use_case = create_ingest_document_use_case(
+        database=database or settings.neo4j_database,
+        embedding_model=embedding_model or settings.embedding_model,
+        token_aligned=token_aligned
+    )
+    
+    global _last_truncation_stats
+    try:
+        count = use_case.execute_streaming(
+            file_path=file_path,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            clean_text=clean_text,
+            batch_size=batch_size
+        )
+        _last_truncation_stats = use_case.last_truncation_stats
+        return count
+    finally:
+        # Limpiar recursos
+        if hasattr(use_case.chunk_repository, 'close'):
+            use_case.chunk_repository.close()
+        if hasattr(use_case.index_service, 'close'):
+            use_case.index_service.close()
+
+
 def search(
     query_text: str,
     limit: int = 5,
@@ -248,7 +344,15 @@ def vector_search(
     query_text: str,
     limit: int = 5,
     database: Optional[str] = None,
-    embedding_model: Optional[str] = None
+    embedding_model: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    context_window: int = 0,
+    context_same_page: bool = False,
+    context_merge_overlapping: bool = True,
+    rerank: Optional[bool] = None,
+    mmr: bool = False,
+    mmr_lambda: float = 0.5,
+    mmr_fetch_k: Optional[int] = None
 ) -> List[SearchResult]:
     """
     Vector search using semantic similarity.
@@ -262,6 +366,28 @@ def vector_search(
         limit: Maximum number of results (default: 5)
         database: Neo4j database name (default: from global configuration)
         embedding_model: Embedding model to use (default: from global configuration)
+        filters: Metadata filters applied inside the query. Keys are chunk properties,
+            `filename`/`page_number` (page), or prefixed `chunk.`/`page.`/`file.`;
+            values are scalars (equality), lists (membership) or operator dicts
+            such as `{"gte": 2, "lt": 10}`. Small filtered subsets are scored
+            exactly; larger ones over-fetch from the vector index according to
+            the filter's measured selectivity.
+        context_window: Neighbor chunks on each side of every result to add as
+            `result.context` instead of the single previous/next chunk (default: 0,
+            disabled). All windows are fetched in one batched query within the same
+            call; overlapping windows are merged into one contiguous span without
+            repeated overlap text, shared through `result.context_span_id`.
+        context_same_page: Only expand the context within the result's page
+        context_merge_overlapping: Merge overlapping windows of different results
+            into one span (default: True)
+        rerank: Rerank the top `rerank_top_n` candidates with a CPU cross-encoder
+            and return the best `limit` (default: `rerank_enabled` from configuration).
+            Reranked results carry the cross-encoder score.
+        mmr: Diversify the results with Maximal Marginal Relevance, so near-identical
+            chunks (overlapping windows, repeated boilerplate) don't take several slots
+        mmr_lambda: MMR trade-off: 1.0 ranks by relevance only, 0.0 maximizes
+            diversity (default: 0.5)
+        mmr_fetch_k: Candidates fetched before MMR selects `limit` (default: 4 × limit)
     
     Returns:
         List of SearchResults sorted by similarity score in descending order
@@ -278,6 +404,22 @@ def vector_search(
         >>> for result in results:
         ...     print(f"Score: {result.score:.3f}")
         ...     print(f"Content: {result.content[:200]}...")
+        >>> 
+        >>> # Only in some files and pages
+        >>> results = ungraph.vector_search(
+        ...     "machine learning",
+        ...     filters={"filename": ["ai_paper.md", "ml_notes.md"], "page_number": {"lte": 10}}
+        ... )
+        >>> 
+        >>> # ±3 chunks of context per result, overlapping windows merged
+        >>> results = ungraph.vector_search("machine learning", context_window=3)
+        >>> spans = {r.context_span_id: r.context for r in results}
+        >>> 
+        >>> # Top 5 of 20 candidates reranked by a cross-encoder
+        >>> results = ungraph.vector_search("machine learning", limit=5, rerank=True)
+        >>> 
+        >>> # 5 diverse results out of 20 candidates
+        >>> results = ungraph.vector_search("machine learning", limit=5, mmr=True, mmr_lambda=0.7)
     """
     if not query_text:
         raise ValueError("Query text cannot be empty")
@@ -287,15 +429,35 @@ def vector_search(
     db_name = database or settings.neo4j_database
     emb_model = embedding_model or settings.embedding_model
     
-    # Generar embedding para la consulta
-    embedding_service = HuggingFaceEmbeddingService(model_name=emb_model)
+    # Generar embedding para la consulta (modelo cargado una vez por proceso)
+    from ungraph.application.dependencies import (
+        create_embedding_service, create_reranker, create_vector_index
+    )
+    
+    embedding_service = create_embedding_service(settings, emb_model)
     query_embedding = embedding_service.generate_embedding(query_text)
     
-    # Perform vector search
-    search_service = Neo4jSearchService(database=db_name)
+    # Perform vector search (in-process index if enabled, Neo4j hydrates the hits)
+    search_service = Neo4jSearchService(
+        database=db_name,
+        vector_index=create_vector_index(settings),
+        filter_exact_threshold=settings.search_filter_exact_threshold,
+        filter_max_candidates=settings.search_filter_max_candidates,
+        reranker=create_reranker(settings, enabled=rerank)
+    )
     
     try:
-        results = search_service.vector_search(query_embedding, limit=limit)
+        results = search_service.vector_search(
+            query_embedding,
+            limit=limit,
+            filters=filters,
+            query_text=query_text,
+            mmr_lambda=mmr_lambda if mmr else None,
+            mmr_fetch_k=mmr_fetch_k,
+            context_window=context_window,
+            same_page=context_same_page,
+            merge_overlapping=context_merge_overlapping
+        )
         return results
     finally:
         search_service.close()
@@ -306,7 +468,15 @@ def hybrid_search(
     limit: int = 5,
     weights: Tuple[float, float] = (0.3, 0.7),
     database: Optional[str] = None,
-    embedding_model: Optional[str] = None
+    embedding_model: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    context_window: int = 0,
+    context_same_page: bool = False,
+    context_merge_overlapping: bool = True,
+    rerank: Optional[bool] = None,
+    mmr: bool = False,
+    mmr_lambda: float = 0.5,
+    mmr_fetch_k: Optional[int] = None
 ) -> List[SearchResult]:
     """
     Hybrid search combining text and vector similarity.
@@ -320,6 +490,20 @@ def hybrid_search(
         weights: Weights to combine scores (text_weight, vector_weight) (default: (0.3, 0.7))
         database: Neo4j database name (default: from global configuration)
         embedding_model: Embedding model to use (default: from global configuration)
+        filters: Metadata filters applied inside the query (same format as in
+            `vector_search`); the vector score of each filtered text match is
+            computed exactly
+        context_window: Neighbor chunks on each side of every result to add as
+            merged `result.context` spans (same as in `vector_search`; default: 0)
+        context_same_page: Only expand the context within the result's page
+        context_merge_overlapping: Merge overlapping windows of different results
+            into one span (default: True)
+        rerank: Rerank the top candidates with a CPU cross-encoder (same as in
+            `vector_search`; default: `rerank_enabled` from configuration)
+        mmr: Diversify the results with Maximal Marginal Relevance (same as in
+            `vector_search`)
+        mmr_lambda: MMR trade-off between relevance (1.0) and diversity (0.0)
+        mmr_fetch_k: Candidates fetched before MMR selects `limit` (default: 4 × limit)
     
     Returns:
         List of SearchResults sorted by combined score in descending order
@@ -349,19 +533,30 @@ def hybrid_search(
     db_name = database or settings.neo4j_database
     emb_model = embedding_model or settings.embedding_model
     
-    # Generar embedding para la consulta
-    embedding_service = HuggingFaceEmbeddingService(model_name=emb_model)
+    # Generar embedding para la consulta (modelo cargado una vez por proceso)
+    from ungraph.application.dependencies import create_embedding_service, create_reranker
+    
+    embedding_service = create_embedding_service(settings, emb_model)
     query_embedding = embedding_service.generate_embedding(query_text)
     
     # Perform hybrid search
-    search_service = Neo4jSearchService(database=db_name)
+    search_service = Neo4jSearchService(
+        database=db_name,
+        reranker=create_reranker(settings, enabled=rerank)
+    )
     
     try:
         results = search_service.hybrid_search(
             query_text=query_text,
             query_embedding=query_embedding,
             weights=weights,
-            limit=limit
+            limit=limit,
+            filters=filters,
+            mmr_lambda=mmr_lambda if mmr else None,
+            mmr_fetch_k=mmr_fetch_k,
+            context_window=context_window,
+            same_page=context_same_page,
+            merge_overlapping=context_merge_overlapping
         )
         return results
     finally:
@@ -374,6 +569,9 @@ def search_with_pattern(
     limit: int = 5,
     database: Optional[str] = None,
     embedding_model: Optional[str] = None,
+    mmr: bool = False,
+    mmr_lambda: float = 0.5,
+    mmr_fetch_k: Optional[int] = None,
     **kwargs
 ) -> List[SearchResult]:
     """
@@ -385,6 +583,8 @@ def search_with_pattern(
     - `basic` or `basic_retriever`: Simple full-text search
     - `metadata_filtering`: Search with metadata filters
     - `parent_child` or `parent_child_retriever`: Search in parent nodes and expand to children
+    - `hierarchical` or `hierarchical_retriever`: Vector search over the closest pages/files first,
+      then only their chunks (uses Page/File centroid embeddings stored at ingestion)
     
     **Advanced patterns** (require optional modules):
     - `local` or `local_retriever`: Search in small communities (requires ungraph[gds])
@@ -397,6 +597,10 @@ def search_with_pattern(
         limit: Maximum number of results (default: 5)
         database: Neo4j database name (default: from global configuration)
         embedding_model: Embedding model for patterns that require it (default: from configuration)
+        mmr: Diversify the results with Maximal Marginal Relevance (same as in
+            `vector_search`; embeds the query if the pattern doesn't)
+        mmr_lambda: MMR trade-off between relevance (1.0) and diversity (0.0)
+        mmr_fetch_k: Candidates fetched before MMR selects `limit` (default: 4 × limit)
         **kwargs: Pattern-specific parameters
     
     Returns:
@@ -434,6 +638,15 @@ def search_with_pattern(
         ...     limit=5
         ... )
         >>> 
+        >>> # Hierarchical search: top files, then their best pages, then chunks
+        >>> results = ungraph.search_with_pattern(
+        ...     "machine learning",
+        ...     pattern_type="hierarchical",
+        ...     level="file_page",
+        ...     file_limit=3,
+        ...     page_limit=10
+        ... )
+        >>> 
         >>> # Advanced search: Graph-Enhanced (requires ungraph[gds])
         >>> results = ungraph.search_with_pattern(
         ...     "machine learning",
@@ -448,7 +661,9 @@ def search_with_pattern(
         ...     pattern_type="local",
         ...     limit=5,
         ...     community_threshold=3,
-        ...     max_depth=1
+        ...     max_depth=1,
+        ...     fan_out=10,      # neighbors kept per node and hop (lowest degree first)
+        ...     max_nodes=100    # node budget per seed
         ... )
     """
     if not query_text:
@@ -458,13 +673,21 @@ def search_with_pattern(
     settings = get_settings()
     db_name = database or settings.neo4j_database
     
-    search_service = Neo4jSearchService(database=db_name)
+    # El embedding de la consulta se genera solo si el patrón lo necesita
+    from ungraph.application.dependencies import create_embedding_service
+    
+    search_service = Neo4jSearchService(
+        database=db_name,
+        embedding_service=create_embedding_service(settings, embedding_model) if embedding_model else None
+    )
     
     try:
         results = search_service.search_with_pattern(
             query_text=query_text,
             pattern_type=pattern_type,
             limit=limit,
+            mmr_lambda=mmr_lambda if mmr else None,
+            mmr_fetch_k=mmr_fetch_k,
             **kwargs
         )
         return results
@@ -527,7 +750,7 @@ def suggest_chunking_strategy(
     from ungraph.infrastructure.services.langchain_document_loader_service import LangChainDocumentLoaderService
     from ungraph.infrastructure.services.simple_text_cleaning_service import SimpleTextCleaningService
     
-    text_cleaning_service = SimpleTextCleaningService()
+    text_cleaning_service = SimpleTextCleaningService(profile=get_settings().text_cleaning_profile)
     loader_service = LangChainDocumentLoaderService(text_cleaning_service=text_cleaning_service)
     
     # Load document
@@ -542,39 +765,55 @@ def suggest_chunking_strategy(
     )
     
     # Create ChunkingMaster
-    master = ChunkingMaster()
+    from ungraph.application.dependencies import create_chunking_recommendation_cache
     
-    # Find best strategy
-    result: ChunkingResult = master.find_best_chunking_strategy(
-        documents=[lc_document],
-        file_path=file_path,
+    settings = get_settings()
+    master = ChunkingMaster(
+        max_workers=settings.chunking_max_workers,
+        time_budget=settings.chunking_time_budget,
+        sampling=settings.chunking_sampling,
+        recommendation_cache=create_chunking_recommendation_cache(settings)
+    )
+    
+    # Reuse the cached recommendation for this exact content, or find the best strategy
+    result: Optional[ChunkingResult] = master.cached_recommendation(
+        [lc_document],
         chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        evaluate_all=evaluate_all
+        chunk_overlap=chunk_overlap
     )
+    if result is None:
+        result = master.find_best_chunking_strategy(
+            documents=[lc_document],
+            file_path=file_path,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            evaluate_all=evaluate_all
+        )
     
     # Generate explanation
     explanation = _generate_chunking_explanation(result, master)
     
-    # Get alternatives (if multiple were evaluated)
-    alternatives = []
-    if evaluate_all:
-        # If evaluate_all=True, ChunkingMaster already evaluated multiple strategies
-        # For now, we only include the best one. In a complete implementation,
-        # we could store all evaluations
-        alternatives.append({
-            "strategy": result.strategy.value,
-            "score": master.evaluator.score_strategy(result.metrics),
-            "num_chunks": result.metrics.num_chunks,
-            "avg_chunk_size": result.metrics.avg_chunk_size
-        })
+    # Alternatives: every candidate evaluated (only metrics are kept for them).
+    # Sampled evaluations were scored on sample windows and carry a confidence interval.
+    alternatives = [
+        {
+            "strategy": evaluation.strategy.value,
+            "score": evaluation.score,
+            "num_chunks": evaluation.metrics.num_chunks,
+            "avg_chunk_size": evaluation.metrics.avg_chunk_size,
+            "sampled": evaluation.sampled,
+            "pruned": evaluation.pruned,
+            "score_interval": evaluation.score_interval
+        }
+        for evaluation in result.evaluations
+    ]
     
     return ChunkingRecommendation(
         strategy=result.strategy.value,
         chunk_size=result.config.get('chunk_size', 1000),
         chunk_overlap=result.config.get('chunk_overlap', 200),
         explanation=explanation,
-        quality_score=master.evaluator.score_strategy(result.metrics),
+        quality_score=result.score,
         alternatives=alternatives,
         metrics={
             "num_chunks": result.metrics.num_chunks,
@@ -587,6 +826,51 @@ def suggest_chunking_strategy(
     )
 
 
+def get_chunking_cache_stats() -> Dict[str, Any]:
+    """
+    Return usage statistics of the chunking recommendation cache.
+    
+    The cache is shared by suggest_chunking_strategy and smart chunking at
+    ingest time. Statistics are persisted with the cache file.
+    
+    Returns:
+        Dictionary with entries, lookups, content_hits, fingerprint_hits,
+        misses, skip_rate (fraction of selections that skipped evaluating
+        candidate strategies) and path. Empty if the cache is disabled.
+    
+    Example:
+        >>> import ungraph
+        >>> stats = ungraph.get_chunking_cache_stats()
+        >>> print(f"Strategy selection skipped {stats['skip_rate']:.0%} of the time")
+    """
+    from ungraph.application.dependencies import create_chunking_recommendation_cache
+    
+    cache = create_chunking_recommendation_cache(get_settings())
+    return cache.stats() if cache is not None else {}
+
+
+def get_truncation_stats() -> Dict[str, Any]:
+    """
+    Return the embedding truncation statistics of the last ingest in this process.
+    
+    Text beyond the embedding model's max sequence length is tokenized and
+    then discarded when encoding. These statistics show how much of it the
+    last ingest_document() / ingest_large_document() call had.
+    
+    Returns:
+        Dictionary with chunks, max_tokens, tokens, truncated_chunks,
+        truncated_tokens, longest_chunk_tokens, token_aligned and the derived
+        fractions. Empty if nothing was ingested or the model has no fast tokenizer.
+    
+    Example:
+        >>> import ungraph
+        >>> ungraph.ingest_document("report.pdf")
+        >>> stats = ungraph.get_truncation_stats()
+        >>> print(f"{stats['truncated_token_fraction']:.0%} of the tokens were discarded")
+    """
+    return _last_truncation_stats.to_dict() if _last_truncation_stats is not None else {}
+
+
 def _generate_chunking_explanation(result: ChunkingResult, master: ChunkingMaster) -> str:
     """Generate a readable explanation of why this strategy was chosen."""
     strategy_name = result.strategy.value
@@ -622,9 +906,14 @@ def _generate_chunking_explanation(result: ChunkingResult, master: ChunkingMaste
     if structure.get('paragraphs', 0) > 0:
         explanation_parts.append(f"- The document has {structure['paragraphs']} paragraphs")
     
+    if result.config.get('cache_hit') == 'content':
+        explanation_parts.append("- The same document was analyzed before (cached recommendation)")
+    elif result.config.get('cache_hit') == 'fingerprint':
+        explanation_parts.append("- A document with the same structure was analyzed before (cached strategy)")
+    
     explanation_parts.append(f"- Will generate approximately {metrics.num_chunks} chunks")
     explanation_parts.append(f"- Average chunk size: {metrics.avg_chunk_size:.0f} characters")
-    explanation_parts.append(f"- Quality score: {master.evaluator.score_strategy(metrics):.2f}/1.0")
+    explanation_parts.append(f"- Quality score: {result.score:.2f}/1.0")
     
     return "\n".join(explanation_parts)
 
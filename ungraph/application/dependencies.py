@@ -6,22 +6,239 @@ Este es el único lugar donde se crean implementaciones concretas.
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from ungraph.application.use_cases.ingest_document import IngestDocumentUseCase
 from ungraph.core.configuration import Settings
 
 # Domain - Interfaces
+from ungraph.domain.services.embedding_service import EmbeddingService
 from ungraph.domain.services.inference_service import InferenceService
+from ungraph.domain.services.reranker_service import RerankerService
+from ungraph.domain.services.vector_index_service import VectorIndexService
 
 # Infrastructure - Implementaciones concretas
 from ungraph.infrastructure.repositories.neo4j_chunk_repository import Neo4jChunkRepository
 from ungraph.infrastructure.services.langchain_document_loader_service import LangChainDocumentLoaderService
+from ungraph.infrastructure.services.pdf_page_extractor import PdfPageExtractor
 from ungraph.infrastructure.services.simple_text_cleaning_service import SimpleTextCleaningService
 from ungraph.infrastructure.services.langchain_chunking_service import LangChainChunkingService
 from ungraph.infrastructure.services.huggingface_embedding_service import HuggingFaceEmbeddingService
 from ungraph.infrastructure.services.neo4j_index_service import Neo4jIndexService
 from ungraph.infrastructure.services.spacy_inference_service import SpacyInferenceService
+from ungraph.infrastructure.services.embedding_quantizer import EmbeddingQuantizer, QUANTIZATION_MODES
+from ungraph.utils.chunking_cache import ChunkingRecommendationCache
+
+
+# Un índice por directorio y proceso: ingestión y búsqueda comparten la misma instancia
+_vector_index_cache: Dict[str, VectorIndexService] = {}
+_quantizer_cache: Dict[tuple, EmbeddingQuantizer] = {}
+_recommendation_cache: Dict[str, ChunkingRecommendationCache] = {}
+# Un reordenador por configuración y proceso: su LRU de scores sobrevive entre búsquedas
+_reranker_cache: Dict[tuple, RerankerService] = {}
+# Un servicio de embeddings por modelo y proceso: el modelo se carga una vez
+_embedding_service_cache: Dict[str, EmbeddingService] = {}
+
+
+def create_embedding_service(
+    settings: Optional[Settings] = None,
+    embedding_model: Optional[str] = None
+) -> EmbeddingService:
+    """
+    Factory: crea (o reutiliza) el servicio de embeddings de un modelo.
+
+    La instancia se cachea por proceso: la ingestión y cada búsqueda
+    comparten el modelo cargado en lugar de cargarlo en cada llamada.
+
+    Args:
+        settings: Configuration settings. If None, loads from environment.
+        embedding_model: Modelo de embeddings (default: settings.embedding_model)
+
+    Returns:
+        EmbeddingService del modelo
+    """
+    if settings is None:
+        settings = Settings()
+
+    model_name = embedding_model or settings.embedding_model
+    if model_name not in _embedding_service_cache:
+        _embedding_service_cache[model_name] = HuggingFaceEmbeddingService(model_name=model_name)
+    return _embedding_service_cache[model_name]
+
+
+def create_embedding_quantizer(
+    settings: Optional[Settings] = None,
+    embedding_model: Optional[str] = None
+) -> Optional[EmbeddingQuantizer]:
+    """
+    Factory: crea el cuantizador de embeddings calibrado para un modelo.
+
+    La instancia se comparte en el proceso, así el repositorio y el índice
+    en proceso codifican siempre con los mismos parámetros.
+
+    Args:
+        settings: Configuration settings. If None, loads from environment.
+        embedding_model: Modelo de embeddings (default: settings.embedding_model)
+
+    Returns:
+        EmbeddingQuantizer o None si settings.embedding_quantization es "none"
+
+    Raises:
+        ValueError: Si embedding_quantization no es válido
+    """
+    if settings is None:
+        settings = Settings()
+
+    mode = settings.embedding_quantization.lower()
+    if mode == "none":
+        return None
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(
+            f"Invalid embedding_quantization: '{mode}'. "
+            f"Valid options: {', '.join(QUANTIZATION_MODES)}"
+        )
+
+    model_name = embedding_model or settings.embedding_model
+    key = (model_name, mode, settings.embedding_quantization_calibration_dir)
+    if key not in _quantizer_cache:
+        _quantizer_cache[key] = EmbeddingQuantizer.for_model(
+            model_name=model_name,
+            mode=mode,
+            calibration_dir=settings.embedding_quantization_calibration_dir
+        )
+    return _quantizer_cache[key]
+
+
+def create_vector_index(settings: Optional[Settings] = None) -> Optional[VectorIndexService]:
+    """
+    Factory: crea (o reutiliza) el índice vectorial en proceso.
+
+    El índice se carga con memory-map desde settings.vector_index_path si existe,
+    y se cachea por proceso para que la ingestión y las búsquedas lo compartan.
+    Al crearlo se sincroniza con los chunks del grafo (settings.vector_index_sync);
+    hasta que la sincronización termina bien, las búsquedas usan Neo4j.
+
+    Args:
+        settings: Configuration settings. If None, loads from environment.
+
+    Returns:
+        VectorIndexService o None si settings.vector_index_enabled es False
+    """
+    if settings is None:
+        settings = Settings()
+
+    if not settings.vector_index_enabled:
+        return None
+
+    from ungraph.infrastructure.services.numpy_vector_index import NumpyVectorIndex
+
+    path = str(Path(settings.vector_index_path).expanduser())
+    if path not in _vector_index_cache:
+        options = dict(
+            ivf_threshold=settings.vector_index_ivf_threshold,
+            nprobe=settings.vector_index_nprobe,
+            quantizer=create_embedding_quantizer(settings),
+            rescore_factor=settings.embedding_quantization_rescore_factor
+        )
+        try:
+            index = NumpyVectorIndex.load(path, **options)
+        except FileNotFoundError:
+            index = NumpyVectorIndex(path=path, **options)
+        if settings.vector_index_sync:
+            _synchronize_vector_index(index, settings)
+        _vector_index_cache[path] = index
+
+    return _vector_index_cache[path]
+
+
+def _synchronize_vector_index(index: VectorIndexService, settings: Settings) -> None:
+    """Reconcilia el índice con el grafo; si falla, el índice queda sin usar."""
+    from ungraph.infrastructure.services.vector_index_synchronizer import VectorIndexSynchronizer
+
+    synchronizer = VectorIndexSynchronizer(
+        database=settings.neo4j_database,
+        quantizer=create_embedding_quantizer(settings)
+    )
+    try:
+        synchronizer.synchronize(index)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        index.synchronized = False
+        logger.warning(f"Could not synchronize the vector index with the graph, using Neo4j: {e}")
+    finally:
+        synchronizer.close()
+
+
+def create_reranker(
+    settings: Optional[Settings] = None,
+    enabled: Optional[bool] = None
+) -> Optional[RerankerService]:
+    """
+    Factory: crea (o reutiliza) el reordenador de resultados de búsqueda.
+
+    La instancia se cachea por proceso: el cross-encoder se carga una vez
+    y el LRU de scores se comparte entre búsquedas.
+
+    Args:
+        settings: Configuration settings. If None, loads from environment.
+        enabled: Forzar el reordenamiento (default: settings.rerank_enabled)
+
+    Returns:
+        RerankerService o None si el reordenamiento está desactivado
+    """
+    if settings is None:
+        settings = Settings()
+
+    if not (settings.rerank_enabled if enabled is None else enabled):
+        return None
+
+    from ungraph.infrastructure.services.cross_encoder_reranker import CrossEncoderReranker
+
+    key = (
+        settings.rerank_model,
+        settings.rerank_top_n,
+        settings.rerank_early_cutoff,
+        settings.rerank_max_length,
+        settings.rerank_cache_size
+    )
+    if key not in _reranker_cache:
+        _reranker_cache[key] = CrossEncoderReranker(
+            model_name=settings.rerank_model,
+            top_n=settings.rerank_top_n,
+            early_cutoff=settings.rerank_early_cutoff,
+            max_length=settings.rerank_max_length,
+            cache_size=settings.rerank_cache_size
+        )
+    return _reranker_cache[key]
+
+
+def create_chunking_recommendation_cache(
+    settings: Optional[Settings] = None
+) -> Optional[ChunkingRecommendationCache]:
+    """
+    Factory: crea (o reutiliza) la caché de recomendaciones de chunking.
+
+    Se comparte por archivo en el proceso, así las estadísticas cubren
+    tanto suggest_chunking_strategy como el chunking inteligente.
+
+    Args:
+        settings: Configuration settings. If None, loads from environment.
+
+    Returns:
+        ChunkingRecommendationCache o None si settings.chunking_cache_enabled es False
+    """
+    if settings is None:
+        settings = Settings()
+
+    if not settings.chunking_cache_enabled:
+        return None
+
+    path = str(Path(settings.chunking_cache_path).expanduser())
+    if path not in _recommendation_cache:
+        _recommendation_cache[path] = ChunkingRecommendationCache(path)
+    return _recommendation_cache[path]
 
 
 def create_inference_service(
@@ -155,11 +372,40 @@ def create_inference_service(
         )
 
 
+def _check_full_vectors_settings(settings: Settings) -> None:
+    """
+    Valida embedding_store_full_vectors=False.
+    
+    Sin vector float en los Chunk, solo el índice en proceso puede buscar por
+    vector, y solo si está activado y puede reconstruirse desde los códigos
+    int8 (los binarios no se decodifican).
+    
+    Raises:
+        ValueError: Si embedding_store_full_vectors=False sin vector_index_enabled
+                    o con embedding_quantization distinto de "int8"
+    """
+    if settings.embedding_store_full_vectors:
+        return
+    if not settings.vector_index_enabled:
+        raise ValueError(
+            "embedding_store_full_vectors=False requires vector_index_enabled=True: "
+            "Neo4j's vector index, hybrid search, hierarchical and MMR search, "
+            "the similarity graph and community summaries read the full vectors"
+        )
+    if settings.embedding_quantization.lower() != "int8":
+        raise ValueError(
+            "embedding_store_full_vectors=False requires embedding_quantization='int8': "
+            "the in-process index is rebuilt from int8 codes (binary codes cannot be decoded)"
+        )
+
+
 def create_ingest_document_use_case(
     settings: Optional[Settings] = None,
     database: str = "neo4j",
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
-    inference_language: str = "en"
+    inference_language: str = "en",
+    token_aligned: Optional[bool] = None,
+    semantic: Optional[bool] = None
 ) -> IngestDocumentUseCase:
     """
     Factory: crea y configura el caso de uso IngestDocumentUseCase.
@@ -174,6 +420,8 @@ def create_ingest_document_use_case(
         database: Nombre de la base de datos Neo4j (default: "neo4j")
         embedding_model: Modelo de embeddings a usar (default: all-MiniLM-L6-v2)
         inference_language: Idioma para inferencia ('en' para inglés, 'es' para español) (default: "en")
+        token_aligned: Chunking por tokens del modelo de embeddings (default: settings.chunking_token_aligned)
+        semantic: Chunking semántico (default: settings.chunking_semantic)
     
     Note:
         Inference mode is determined by settings.inference_mode:
@@ -187,27 +435,47 @@ def create_ingest_document_use_case(
     Note:
         Si inference service no puede crearse (dependencias faltantes),
         el pipeline funcionará sin fase Inference (solo ET).
+    
+    Raises:
+        ValueError: Si embedding_store_full_vectors=False sin vector_index_enabled
+                    o con embedding_quantization distinto de "int8"
     """
     if settings is None:
         settings = Settings()
     
     # Crear servicios de infraestructura
-    text_cleaning_service = SimpleTextCleaningService()
+    text_cleaning_service = SimpleTextCleaningService(profile=settings.text_cleaning_profile)
     
-    document_loader_service = LangChainDocumentLoaderService(
-        text_cleaning_service=text_cleaning_service
+    pdf_extractor = PdfPageExtractor(
+        quality_threshold=settings.pdf_text_quality_threshold,
+        max_workers=settings.pdf_max_workers,
+        text_layer_enabled=settings.pdf_text_layer_enabled,
+        docling_ocr=settings.pdf_docling_ocr,
+        docling_table_structure=settings.pdf_docling_table_structure,
+        docling_table_mode=settings.pdf_docling_table_mode
     )
     
-    chunking_service = LangChainChunkingService()
+    document_loader_service = LangChainDocumentLoaderService(
+        text_cleaning_service=text_cleaning_service,
+        pdf_extractor=pdf_extractor
+    )
     
-    embedding_service = HuggingFaceEmbeddingService(
-        model_name=embedding_model
+    chunking_service = LangChainChunkingService(
+        recommendation_cache=create_chunking_recommendation_cache(settings)
     )
     
-    index_service = Neo4jIndexService(database=database)
+    embedding_service = create_embedding_service(settings, embedding_model)
     
-    # Crear repositorio
-    chunk_repository = Neo4jChunkRepository(database=database)
+    index_service = Neo4jIndexService(database=database, vector_index=create_vector_index(settings))
+    
+    # Crear repositorio (con cuantización de embeddings si está configurada)
+    _check_full_vectors_settings(settings)
+    
+    chunk_repository = Neo4jChunkRepository(
+        database=database,
+        quantizer=create_embedding_quantizer(settings, embedding_model),
+        store_full_vectors=settings.embedding_store_full_vectors
+    )
     
     # Crear servicio de inferencia basado en settings
     inference_service = create_inference_service(
@@ -222,6 +490,12 @@ def create_ingest_document_use_case(
         embedding_service=embedding_service,
         index_service=index_service,
         chunk_repository=chunk_repository,
-        inference_service=inference_service
+        inference_service=inference_service,
+        vector_index=create_vector_index(settings),
+        token_aligned=settings.chunking_token_aligned if token_aligned is None else token_aligned,
+        token_headroom=settings.chunking_token_headroom,
+        semantic_chunking=settings.chunking_semantic if semantic is None else semantic,
+        semantic_pooled_embeddings=settings.chunking_semantic_pooled_embeddings,
+        aggregate_embeddings=settings.embedding_aggregate_enabled
     )
 
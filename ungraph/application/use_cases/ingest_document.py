@@ -10,19 +10,26 @@ Orquesta el flujo completo de ingestión de documentos siguiendo el patrón ETI:
 """
 
 import logging
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 from ungraph.domain.entities.document import Document
 from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.entities.chunk_batch import ChunkBatch
 from ungraph.domain.entities.fact import Fact
 from ungraph.domain.services.document_loader_service import DocumentLoaderService
 from ungraph.domain.services.chunking_service import ChunkingService
 from ungraph.domain.services.embedding_service import EmbeddingService
 from ungraph.domain.services.index_service import IndexService
 from ungraph.domain.services.inference_service import InferenceService
+from ungraph.domain.services.vector_index_service import VectorIndexService
 from ungraph.domain.repositories.chunk_repository import ChunkRepository
+from ungraph.domain.value_objects.document_type import DocumentType
 from ungraph.domain.value_objects.graph_pattern import GraphPattern
+from ungraph.domain.value_objects.truncation_stats import TruncationStats
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +51,13 @@ class IngestDocumentUseCase:
         embedding_service: EmbeddingService,
         index_service: IndexService,
         chunk_repository: ChunkRepository,
-        inference_service: Optional[InferenceService] = None
+        inference_service: Optional[InferenceService] = None,
+        vector_index: Optional[VectorIndexService] = None,
+        token_aligned: bool = False,
+        token_headroom: float = 0.1,
+        semantic_chunking: bool = False,
+        semantic_pooled_embeddings: bool = False,
+        aggregate_embeddings: bool = True
     ):
         """
         Inicializa el caso de uso con sus dependencias.
@@ -57,6 +70,22 @@ class IngestDocumentUseCase:
             chunk_repository: Repositorio para persistir chunks
             inference_service: Servicio de inferencia (opcional). Si se proporciona,
                               se ejecuta la fase Inference del patrón ETI.
+            vector_index: Índice vectorial en proceso (opcional). Si se proporciona,
+                          se mantiene sincronizado con los chunks persistidos.
+            token_aligned: Si True, los chunks se dimensionan en tokens del modelo de
+                           embeddings para caber en su ventana (requiere un
+                           embedding_service con tokenizador rápido)
+            token_headroom: Fracción de la ventana que se deja libre en modo
+                            token_aligned (default: 0.1)
+            semantic_chunking: Si True, chunking semántico (chunk_size limita la
+                               longitud de cada chunk); los embeddings de las
+                               oraciones se reutilizan para los chunks
+            semantic_pooled_embeddings: En chunking semántico, el vector de cada chunk
+                                        es la media de los de sus oraciones (sin
+                                        codificar el texto del chunk)
+            aggregate_embeddings: Si True, tras persistir se calculan los embeddings
+                                  agregados de Page y File del archivo (búsqueda
+                                  jerárquica; requiere un repositorio que lo soporte)
         """
         self.document_loader_service = document_loader_service
         self.chunking_service = chunking_service
@@ -64,6 +93,14 @@ class IngestDocumentUseCase:
         self.index_service = index_service
         self.chunk_repository = chunk_repository
         self.inference_service = inference_service
+        self.vector_index = vector_index
+        self.token_aligned = token_aligned
+        self.token_headroom = token_headroom
+        self.semantic_chunking = semantic_chunking
+        self.semantic_pooled_embeddings = semantic_pooled_embeddings
+        self.aggregate_embeddings = aggregate_embeddings
+        # Estadísticas de truncado de la última ingesta (None si el modelo no las permite)
+        self.last_truncation_stats: Optional[TruncationStats] = None
     
     def execute(
         self,
@@ -118,30 +155,50 @@ class IngestDocumentUseCase:
         if not documents:
             raise ValueError(f"No documents loaded from {file_path}")
         
-        # Por ahora procesamos solo el primer documento
-        # (en el futuro podríamos procesar múltiples documentos)
-        document = documents[0]
-        
-        # 2. Dividir en chunks
-        logger.info("Step 2: Chunking document")
-        chunks = self.chunking_service.chunk(
-            document,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
+        # 2. Dividir en chunks todos los documentos (p. ej. uno por página en PDF)
+        logger.info(f"Step 2: Chunking {len(documents)} document(s)")
+        semantic = self._semantic_supported()
+        token_plan = None if semantic else self._token_plan(chunk_size, chunk_overlap)
+        token_starts = None
+        if token_plan is not None:
+            # Una sola tokenización por lotes de todos los documentos
+            token_starts = self.embedding_service.token_starts([document.content for document in documents])
+        chunks: List[Chunk] = []
+        for index, document in enumerate(documents):
+            if semantic:
+                chunks.extend(self.chunking_service.chunk_semantic(
+                    document,
+                    self.embedding_service.encode_texts,
+                    max_chunk_size=chunk_size,
+                    pool_embeddings=self.semantic_pooled_embeddings
+                ))
+            elif token_starts is not None:
+                chunks.extend(self.chunking_service.chunk_by_tokens(
+                    document,
+                    token_starts[index],
+                    chunk_tokens=token_plan[0],
+                    overlap_tokens=token_plan[1]
+                ))
+            else:
+                chunks.extend(self.chunking_service.chunk(
+                    document,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap
+                ))
         
         if not chunks:
             raise ValueError("No chunks generated from document")
         
-        # 3. Generar embeddings
-        logger.info("Step 3: Generating embeddings")
-        embeddings = self.embedding_service.generate_embeddings_batch(chunks)
+        # Numeración consecutiva única en todo el archivo (NEXT_CHUNK cruza páginas)
+        for consecutive, chunk in enumerate(chunks, start=1):
+            chunk.chunk_id_consecutive = consecutive
         
-        # Asignar embeddings a chunks
-        for chunk, embedding in zip(chunks, embeddings):
-            chunk.embeddings = embedding.vector
-            chunk.embeddings_dimensions = embedding.dimensions
-            chunk.embedding_encoder_info = embedding.encoder_info
+        # 3. Generar embeddings como una matriz (n, d); los chunks pasan a ser vistas del lote
+        logger.info("Step 3: Generating embeddings")
+        batch, encoded_texts = self._embed_chunks(chunks)
+        chunks = batch.to_chunks()
+        self.last_truncation_stats = self._truncation_stats(encoded_texts, token_starts is not None)
+        self._log_truncation_stats()
         
         # 4. Inference: Extraer entidades, relaciones y facts (si está disponible)
         all_facts: List[Fact] = []
@@ -166,7 +223,9 @@ class IngestDocumentUseCase:
         # 6. Persistir chunks usando el patrón especificado
         logger.info(f"Step 6: Persisting chunks with pattern {pattern.name}")
         # Verificar si el repositorio soporta save_with_pattern
-        if hasattr(self.chunk_repository, 'save_with_pattern'):
+        if pattern.name == "FILE_PAGE_CHUNK" and hasattr(self.chunk_repository, 'save_chunk_batch'):
+            self.chunk_repository.save_chunk_batch(batch)
+        elif hasattr(self.chunk_repository, 'save_with_pattern'):
             self.chunk_repository.save_with_pattern(chunks, pattern)
         else:
             # Fallback: usar save_batch si el repositorio no soporta patrones
@@ -186,16 +245,259 @@ class IngestDocumentUseCase:
             logger.warning("Facts generated but repository does not support save_facts()")
         
         # 8. Crear relaciones entre chunks consecutivos
-        # Solo para FILE_PAGE_CHUNK por ahora
-        if pattern.name == "FILE_PAGE_CHUNK":
+        # Solo para los patrones predefinidos de documento por ahora
+        if pattern.name in ("FILE_PAGE_CHUNK", "FILE_SECTION_CHUNK"):
             logger.info("Step 8: Creating chunk relationships")
             self.chunk_repository.create_chunk_relationships()
         else:
             logger.info(f"Skipping chunk relationships for pattern {pattern.name}")
         
+        # 8b. Embeddings agregados de Page y File (búsqueda jerárquica)
+        if pattern.name == "FILE_PAGE_CHUNK":
+            self._update_aggregate_embeddings(
+                sorted({chunk.metadata.get('filename', 'unknown') for chunk in chunks})
+            )
+        
+        # 9. Sincronizar el índice vectorial en proceso (si está configurado)
+        if self.vector_index is not None:
+            logger.info("Step 9: Updating in-process vector index")
+            self.vector_index.add(batch.ids, batch.embeddings)
+            # Solo los vectores nuevos: el índice completo se compacta al superar el umbral
+            self.vector_index.flush()
+        
         logger.info(
             f"Document ingestion completed. Created {len(chunks)} chunks"
             + (f" and {len(all_facts)} facts" if all_facts else "")
         )
         return chunks
 
+
+    def execute_streaming(
+        self,
+        file_path: Path,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        clean_text: bool = True,
+        batch_size: int = 256
+    ) -> int:
+        """
+        Ingiere un archivo de texto o Markdown muy grande en memoria acotada.
+        
+        El archivo se lee por streaming y se divide con una ventana deslizante;
+        los chunks se procesan en lotes de `batch_size` (embeddings, inference,
+        persistencia e índice vectorial) y se descartan. Solo se admite el patrón
+        FILE_PAGE_CHUNK.
+        
+        Args:
+            file_path: Ruta al archivo a ingerir
+            chunk_size: Tamaño de cada chunk (default: 1000)
+            chunk_overlap: Overlap entre chunks (default: 200)
+            clean_text: Si True, limpia el texto (default: True)
+            batch_size: Chunks por lote (default: 256)
+        
+        Returns:
+            Número de chunks creados
+        
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+            ValueError: Si el archivo no admite streaming o no genera chunks
+        """
+        if not (
+            hasattr(self.document_loader_service, 'stream')
+            and hasattr(self.chunking_service, 'chunk_stream')
+        ):
+            raise ValueError("Configured loader/chunking services do not support streaming")
+        
+        logger.info(f"Starting streaming document ingestion: {file_path}")
+        if self.semantic_chunking:
+            logger.warning("Semantic chunking is not available in streaming ingestion, chunking by size")
+        
+        # 1. Configurar índices antes de la primera escritura
+        logger.info("Step 1: Setting up indexes")
+        self.index_service.setup_all_indexes()
+        
+        # 2. Extract + Transform: generador de chunks con offsets absolutos
+        logger.info("Step 2: Streaming and chunking document")
+        blocks = self.document_loader_service.stream(file_path, clean=clean_text)
+        token_plan = self._token_plan(chunk_size, chunk_overlap)
+        if token_plan is not None:
+            chunk_size, chunk_overlap = token_plan
+        chunk_stream = self.chunking_service.chunk_stream(
+            blocks,
+            filename=file_path.name,
+            file_type=DocumentType.from_filename(file_path.name).value,
+            metadata={'file_path': str(file_path)},
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            **({'tokenize': self.embedding_service.token_starts} if token_plan is not None else {})
+        )
+        
+        # 3. Embeddings, inference y persistencia por lotes
+        logger.info(f"Step 3: Embedding and persisting chunks in batches of {batch_size}")
+        total_chunks = 0
+        total_facts = 0
+        self.last_truncation_stats = None
+        while True:
+            chunks = list(islice(chunk_stream, batch_size))
+            if not chunks:
+                break
+            batch = self.embedding_service.embed_batch(ChunkBatch.from_chunks(chunks))
+            stats = self._truncation_stats(batch.texts, token_plan is not None)
+            if stats is not None:
+                previous = self.last_truncation_stats
+                self.last_truncation_stats = stats if previous is None else previous.merge(stats)
+            
+            if self.inference_service:
+                facts: List[Fact] = []
+                for chunk in batch:
+                    try:
+                        facts.extend(self.inference_service.infer_facts(chunk))
+                    except Exception as e:
+                        logger.warning(f"Error inferring facts from chunk {chunk.id}: {e}")
+                if facts and hasattr(self.chunk_repository, 'save_facts'):
+                    try:
+                        self.chunk_repository.save_facts(facts)
+                        total_facts += len(facts)
+                    except Exception as e:
+                        logger.error(f"Error persisting facts: {e}")
+            
+            self.chunk_repository.save_chunk_batch(batch)
+            if self.vector_index is not None:
+                self.vector_index.add(batch.ids, batch.embeddings)
+            
+            total_chunks += len(batch)
+            logger.info(f"Persisted {total_chunks} chunks so far")
+        
+        if total_chunks == 0:
+            raise ValueError("No chunks generated from document")
+        self._log_truncation_stats()
+        
+        # 4. Crear relaciones entre chunks consecutivos
+        logger.info("Step 4: Creating chunk relationships")
+        self.chunk_repository.create_chunk_relationships()
+        self._update_aggregate_embeddings([file_path.name])
+        
+        # 5. Guardar el índice vectorial en proceso (si está configurado)
+        if self.vector_index is not None:
+            logger.info("Step 5: Saving in-process vector index")
+            self.vector_index.flush()
+        
+        logger.info(
+            f"Streaming ingestion completed. Created {total_chunks} chunks"
+            + (f" and {total_facts} facts" if total_facts else "")
+        )
+        return total_chunks
+
+    def _update_aggregate_embeddings(self, filenames: List[str]) -> None:
+        """Recalcula los embeddings de Page y File de los archivos ingeridos (si está activo)."""
+        if not self.aggregate_embeddings or not hasattr(self.chunk_repository, 'update_aggregate_embeddings'):
+            return
+        logger.info("Updating Page/File aggregate embeddings")
+        try:
+            self.chunk_repository.update_aggregate_embeddings(filenames)
+        except Exception as e:
+            # Los chunks ya están persistidos: no fallar la ingesta
+            logger.error(f"Error updating aggregate embeddings: {e}")
+    
+    def _semantic_supported(self) -> bool:
+        """Si el chunking semántico está activo y los servicios lo soportan."""
+        if not self.semantic_chunking:
+            return False
+        if not (
+            hasattr(self.chunking_service, 'chunk_semantic')
+            and hasattr(self.embedding_service, 'encode_texts')
+        ):
+            logger.warning("Semantic chunking not supported by the configured services, chunking by size")
+            return False
+        if self.token_aligned:
+            logger.info("Semantic chunking enabled: token-aligned chunking is not applied")
+        return True
+
+    def _embed_chunks(self, chunks: List[Chunk]) -> Tuple[ChunkBatch, List[str]]:
+        """
+        Lote con los embeddings de los chunks.
+        
+        Los chunks que ya traen vector (p. ej. del chunking semántico) lo
+        conservan y cada texto distinto se codifica una sola vez; el resto se
+        codifica en una llamada por lotes.
+        
+        Returns:
+            (lote con embeddings, textos que se codificaron)
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        pending: List[Chunk] = []
+        for chunk in chunks:
+            if chunk.embeddings is not None:
+                vectors.setdefault(chunk.page_content, chunk.embeddings)
+        for chunk in chunks:
+            if chunk.embeddings is None and chunk.page_content not in vectors:
+                vectors[chunk.page_content] = None
+                pending.append(chunk)
+        if len(pending) == len(chunks):
+            batch = self.embedding_service.embed_batch(ChunkBatch.from_chunks(chunks))
+            return batch, batch.texts
+        
+        encoder_info = getattr(self.embedding_service, 'encoder_info', None)
+        if pending:
+            encoded = self.embedding_service.embed_batch(ChunkBatch.from_chunks(pending))
+            encoder_info = encoded.embedding_encoder_info
+            for chunk, row in zip(pending, encoded.embeddings):
+                vectors[chunk.page_content] = row
+        logger.info(f"Encoded {len(pending)} of {len(chunks)} chunks, reused the other vectors")
+        
+        batch = ChunkBatch.from_chunks(chunks)
+        batch.set_embeddings(np.stack([vectors[text] for text in batch.texts]), encoder_info)
+        return batch, [chunk.page_content for chunk in pending]
+
+    def _token_plan(self, chunk_size: int, chunk_overlap: int) -> Optional[Tuple[int, int]]:
+        """
+        Tamaño y overlap de chunk en tokens para el modo token_aligned.
+        
+        El tamaño es la ventana del modelo menos sus tokens especiales y el
+        margen `token_headroom`; el overlap conserva la proporción pedida
+        (chunk_overlap / chunk_size).
+        
+        Returns:
+            (chunk_tokens, overlap_tokens), o None si el modo está desactivado
+            o los servicios no lo soportan (se usa chunking por caracteres)
+        """
+        if not self.token_aligned:
+            return None
+        max_tokens = getattr(self.embedding_service, 'max_tokens', None)
+        if not (
+            max_tokens
+            and hasattr(self.embedding_service, 'token_starts')
+            and hasattr(self.chunking_service, 'chunk_by_tokens')
+        ):
+            logger.warning("Token-aligned chunking not supported by the configured services, chunking by characters")
+            return None
+        special = getattr(self.embedding_service, 'special_tokens', 0)
+        chunk_tokens = max(1, int((max_tokens - special) * (1 - self.token_headroom)))
+        overlap_tokens = int(chunk_tokens * chunk_overlap / chunk_size) if chunk_size else 0
+        logger.info(f"Token-aligned chunking: {chunk_tokens} tokens per chunk, {overlap_tokens} overlap "
+                    f"(model window {max_tokens})")
+        return chunk_tokens, min(overlap_tokens, chunk_tokens)
+
+    def _truncation_stats(self, texts: List[str], token_aligned: bool) -> Optional[TruncationStats]:
+        """Estadísticas de truncado de los textos codificados (None si el modelo no las permite)."""
+        max_tokens = getattr(self.embedding_service, 'max_tokens', None)
+        if not texts or not max_tokens or not hasattr(self.embedding_service, 'count_tokens'):
+            return None
+        counts = self.embedding_service.count_tokens(texts)
+        if counts is None:
+            return None
+        return TruncationStats.from_counts(counts, max_tokens, token_aligned=token_aligned)
+
+    def _log_truncation_stats(self) -> None:
+        stats = self.last_truncation_stats
+        if stats is None:
+            return
+        message = (
+            f"Truncation: {stats.truncated_chunks}/{stats.chunks} chunks exceed the {stats.max_tokens}-token "
+            f"window, {stats.truncated_tokens}/{stats.tokens} tokens discarded "
+            f"({stats.truncated_token_fraction:.1%})"
+        )
+        if stats.truncated_chunks and not stats.token_aligned:
+            logger.warning(message + "; consider token-aligned chunking (chunking_token_aligned)")
+        else:
+            logger.info(message)
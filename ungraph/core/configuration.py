@@ -112,6 +112,173 @@ class Settings(BaseSettings):
         default="sentence-transformers/all-MiniLM-L6-v2",
         description="Default embedding model"
     )
+    embedding_aggregate_enabled: bool = Field(
+        default=True,
+        description="Store centroid embeddings on Page and File nodes after ingestion (used by hierarchical search)"
+    )
+
+    # In-process Vector Index Configuration
+    vector_index_enabled: bool = Field(
+        default=False,
+        description="Serve vector search from an in-process NumPy index instead of Neo4j's vector index"
+    )
+    vector_index_path: str = Field(
+        default="~/.ungraph/vector_index",
+        description="Directory where the in-process vector index is persisted (memory-mapped on load)"
+    )
+    vector_index_ivf_threshold: int = Field(
+        default=50_000,
+        ge=1,
+        description="Number of vectors from which the in-process index switches from exact search to IVF"
+    )
+    vector_index_sync: bool = Field(
+        default=True,
+        description="Reconcile the in-process index with the graph's chunks when it is first created in a process (vector search uses Neo4j until this succeeds)"
+    )
+    vector_index_nprobe: int = Field(
+        default=8,
+        ge=1,
+        description="Number of IVF lists probed per query"
+    )
+
+    # Filtered Search Configuration
+    search_filter_exact_threshold: int = Field(
+        default=10_000,
+        ge=0,
+        description="Filtered vector search scores every matching chunk exactly (no vector index) when at most this many chunks match the filter"
+    )
+    search_filter_max_candidates: int = Field(
+        default=10_000,
+        ge=1,
+        description="Maximum candidates requested from the vector index by a filtered vector search before falling back to exact scoring"
+    )
+
+    # Reranking Configuration
+    rerank_enabled: bool = Field(
+        default=False,
+        description="Rerank the top vector/hybrid search candidates with a CPU cross-encoder"
+    )
+    rerank_model: str = Field(
+        default="cross-encoder/ms-marco-MiniLM-L-6-v2",
+        description="Cross-encoder model used for reranking (loaded once per process)"
+    )
+    rerank_top_n: int = Field(
+        default=20,
+        ge=1,
+        description="First-stage candidates scored by the cross-encoder in one batched forward pass"
+    )
+    rerank_early_cutoff: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Candidates whose first-stage score is below this fraction of the best one skip the cross-encoder (0 scores all)"
+    )
+    rerank_max_length: int = Field(
+        default=256,
+        ge=1,
+        description="Maximum tokens per query-chunk pair (longer pairs are truncated)"
+    )
+    rerank_cache_size: int = Field(
+        default=4096,
+        ge=0,
+        description="Number of (query, chunk_id) reranker scores kept in the LRU cache"
+    )
+
+    # Embedding Quantization Configuration
+    embedding_quantization: str = Field(
+        default="none",
+        description="Quantized embedding storage: 'none', 'int8' (1 byte/dim) or 'binary' (1 bit/dim)"
+    )
+    embedding_store_full_vectors: bool = Field(
+        default=True,
+        description="Also store full float vectors on Chunk nodes. False requires vector_index_enabled and embedding_quantization='int8'; Neo4j's vector index, hybrid search, hierarchical and MMR search, the similarity graph and community summaries need the full vectors"
+    )
+    embedding_quantization_rescore_factor: int = Field(
+        default=10,
+        ge=1,
+        description="Quantized candidates re-scored with full precision per requested result"
+    )
+    embedding_quantization_calibration_dir: str = Field(
+        default="~/.ungraph/quantization",
+        description="Directory where per-model quantization parameters are persisted"
+    )
+
+    # Text Cleaning Configuration
+    text_cleaning_profile: str = Field(
+        default="ascii",
+        description="Text cleaning profile: 'ascii' (strip accents), 'spanish' (keep Spanish accents) or 'unicode' (keep letters of any script)"
+    )
+
+    # Chunking Strategy Selection
+    chunking_max_workers: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Processes used to evaluate candidate chunking strategies (default: number of CPUs, 1 = sequential)"
+    )
+    chunking_time_budget: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Maximum seconds spent evaluating candidate chunking strategies (default: no limit)"
+    )
+    chunking_sampling: bool = Field(
+        default=True,
+        description="Score chunking strategies on stratified sample windows of large documents, evaluating the full text only when the ranking is ambiguous"
+    )
+    chunking_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse chunking strategy recommendations for identical documents and documents with the same structural fingerprint"
+    )
+    chunking_cache_path: str = Field(
+        default="~/.ungraph/chunking_cache.json",
+        description="File where chunking recommendations and cache statistics are persisted"
+    )
+    chunking_token_aligned: bool = Field(
+        default=False,
+        description="Size chunks in embedding-model tokens to fit the model's max sequence length (chunk_size/chunk_overlap then only set the overlap ratio)"
+    )
+    chunking_token_headroom: float = Field(
+        default=0.1,
+        ge=0.0,
+        lt=1.0,
+        description="Fraction of the embedding model's window left free in token-aligned chunking"
+    )
+    chunking_semantic: bool = Field(
+        default=False,
+        description="Split documents where the topic changes between sentences (semantic chunking); chunk_size then caps the chunk length in characters"
+    )
+    chunking_semantic_pooled_embeddings: bool = Field(
+        default=False,
+        description="In semantic chunking, derive each chunk vector from its sentence embeddings instead of encoding the chunk text (single-sentence and repeated chunks are always reused)"
+    )
+
+    # PDF Ingestion Configuration
+    pdf_text_layer_enabled: bool = Field(
+        default=True,
+        description="Extract PDF pages from their text layer first and only send low-quality pages to Docling"
+    )
+    pdf_text_quality_threshold: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="Minimum text-layer quality score (0-1) for a PDF page to skip Docling"
+    )
+    pdf_max_workers: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Processes used for per-page PDF text extraction (default: number of CPUs)"
+    )
+    pdf_docling_ocr: bool = Field(
+        default=True,
+        description="Run Docling OCR on PDF pages sent to the Docling fallback"
+    )
+    pdf_docling_table_structure: bool = Field(
+        default=True,
+        description="Run Docling's table structure model on PDF pages sent to the Docling fallback"
+    )
+    pdf_docling_table_mode: str = Field(
+        default="accurate",
+        description="Docling table structure mode: 'accurate' or 'fast'"
+    )
 
     # Inference Configuration
     inference_mode: str = Field(
@@ -17,11 +17,13 @@ Ejemplo de uso:
     print(chunk.page_content)  # Acceder a datos
 """
 
-from dataclasses import dataclass
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True)
 class Chunk:
     """
     Entidad que representa un chunk de texto en el dominio.
@@ -29,9 +31,10 @@ class Chunk:
     Attributes:
         id: Identificador único del chunk
         page_content: Contenido textual del chunk (nombre consistente con código existente)
-        metadata: Metadatos adicionales (filename, page_number, etc.)
+        metadata: Metadatos adicionales (filename, page_number, start_index/end_index, etc.)
         chunk_id_consecutive: Número consecutivo del chunk en el documento
-        embeddings: Vector de embeddings (opcional)
+        embeddings: Vector de embeddings float32 (opcional). Si el chunk proviene de un
+                    ChunkBatch, es una vista sobre la fila de su matriz.
         embeddings_dimensions: Dimensión del vector de embeddings
         embedding_encoder_info: Información del encoder usado
         is_unitary: Indica si el chunk es unitario (no dividido)
@@ -40,7 +43,7 @@ class Chunk:
     page_content: str
     metadata: Dict[str, Any]
     chunk_id_consecutive: Optional[int] = None
-    embeddings: Optional[List[float]] = None
+    embeddings: Optional[np.ndarray] = field(default=None, compare=False)
     embeddings_dimensions: Optional[int] = None
     embedding_encoder_info: Optional[str] = None
     is_unitary: bool = False
@@ -54,7 +57,10 @@ class Chunk:
             raise ValueError("Chunk id cannot be empty")
         if not self.page_content:
             raise ValueError("Chunk content cannot be empty")
-        if self.embeddings and self.embeddings_dimensions:
+        if self.embeddings is not None and not isinstance(self.embeddings, np.ndarray):
+            # Listas (p. ej. leídas de Neo4j) -> float32; lista vacía = sin embeddings
+            self.embeddings = np.asarray(self.embeddings, dtype=np.float32) if len(self.embeddings) else None
+        if self.embeddings is not None and self.embeddings_dimensions:
             if len(self.embeddings) != self.embeddings_dimensions:
                 raise ValueError(
                     f"Embeddings dimension mismatch: "
@@ -73,3 +79,14 @@ class Chunk:
         Método de dominio: extrae el número de página de los metadatos.
         """
         return self.metadata.get('page_number')
+    
+    def get_span(self) -> Optional[Tuple[int, int]]:
+        """
+        Método de dominio: offsets (start, end) del chunk en el texto de origen,
+        si el chunker los registró en los metadatos.
+        """
+        start = self.metadata.get('start_index')
+        end = self.metadata.get('end_index')
+        if start is None or end is None:
+            return None
+        return start, end
@@ -0,0 +1,146 @@
+"""
+Entidad de Dominio: ChunkBatch
+
+Representación columnar de un lote de chunks: los textos, IDs y metadatos
+van en listas paralelas y los embeddings en una única matriz float32 (n, d)
+contigua. Evita materializar cada vector como cientos de floats de Python.
+
+Los Chunk y Embedding que se obtienen del lote son vistas ligeras: su
+vector es la fila de la matriz, sin copia.
+
+Ejemplo de uso:
+    batch = ChunkBatch.from_chunks(chunks)
+    batch.set_embeddings(matrix, encoder_info="all-MiniLM-L6-v2")
+    for chunk in batch:
+        print(chunk.id, chunk.embeddings.shape)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.value_objects.embedding import Embedding
+
+
+@dataclass(eq=False)
+class ChunkBatch:
+    """
+    Lote columnar de chunks.
+
+    Attributes:
+        ids: Identificadores de los chunks
+        texts: Contenido textual de cada chunk
+        metadata: Metadatos de cada chunk
+        chunk_id_consecutive: Número consecutivo de cada chunk
+        is_unitary: Indica si cada chunk es unitario
+        embeddings: Matriz float32 (n, d) de embeddings (opcional)
+        embedding_encoder_info: Información del encoder usado
+    """
+    ids: List[str]
+    texts: List[str]
+    metadata: List[Dict[str, Any]]
+    chunk_id_consecutive: List[Optional[int]] = field(default_factory=list)
+    is_unitary: List[bool] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+    embedding_encoder_info: Optional[str] = None
+
+    def __post_init__(self):
+        """
+        Validaciones de consistencia entre columnas.
+        """
+        n = len(self.ids)
+        if not self.chunk_id_consecutive:
+            self.chunk_id_consecutive = [None] * n
+        if not self.is_unitary:
+            self.is_unitary = [False] * n
+
+        for name in ("texts", "metadata", "chunk_id_consecutive", "is_unitary"):
+            if len(getattr(self, name)) != n:
+                raise ValueError(
+                    f"Column length mismatch: '{name}' has {len(getattr(self, name))} items, expected {n}"
+                )
+        if self.embeddings is not None:
+            self.set_embeddings(self.embeddings, self.embedding_encoder_info)
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Chunk]) -> "ChunkBatch":
+        """
+        Crea un lote a partir de entidades Chunk.
+
+        La matriz de embeddings solo se construye si todos los chunks tienen vector.
+        """
+        embeddings = None
+        encoder_info = None
+        if chunks and all(chunk.embeddings is not None for chunk in chunks):
+            embeddings = np.stack([chunk.embeddings for chunk in chunks]).astype(np.float32, copy=False)
+            encoder_info = chunks[0].embedding_encoder_info
+
+        return cls(
+            ids=[chunk.id for chunk in chunks],
+            texts=[chunk.page_content for chunk in chunks],
+            metadata=[chunk.metadata for chunk in chunks],
+            chunk_id_consecutive=[chunk.chunk_id_consecutive for chunk in chunks],
+            is_unitary=[chunk.is_unitary for chunk in chunks],
+            embeddings=embeddings,
+            embedding_encoder_info=encoder_info
+        )
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        """Dimensión de los embeddings (None si aún no hay)."""
+        return None if self.embeddings is None else int(self.embeddings.shape[1])
+
+    def set_embeddings(self, matrix: np.ndarray, encoder_info: Optional[str]) -> None:
+        """
+        Asigna la matriz de embeddings del lote.
+
+        Args:
+            matrix: Matriz (n, d); se convierte a float32 contiguo si hace falta
+            encoder_info: Información del encoder usado
+
+        Raises:
+            ValueError: Si la forma de la matriz no corresponde al lote
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(self.ids):
+            raise ValueError(
+                f"Embeddings matrix must have shape ({len(self.ids)}, d), got {matrix.shape}"
+            )
+        self.embeddings = matrix
+        self.embedding_encoder_info = encoder_info
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Chunk:
+        """Devuelve el chunk `index` como vista (el vector no se copia)."""
+        return Chunk(
+            id=self.ids[index],
+            page_content=self.texts[index],
+            metadata=self.metadata[index],
+            chunk_id_consecutive=self.chunk_id_consecutive[index],
+            embeddings=None if self.embeddings is None else self.embeddings[index],
+            embeddings_dimensions=self.dimensions,
+            embedding_encoder_info=self.embedding_encoder_info,
+            is_unitary=self.is_unitary[index]
+        )
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def to_chunks(self) -> List[Chunk]:
+        """Lista de chunks (vistas sobre el lote)."""
+        return list(self)
+
+    def embedding(self, index: int) -> Embedding:
+        """Embedding del chunk `index` como vista sobre la matriz."""
+        if self.embeddings is None:
+            raise ValueError("Batch has no embeddings")
+        return Embedding(
+            vector=self.embeddings[index],
+            dimensions=self.dimensions,
+            encoder_info=self.embedding_encoder_info or "unknown"
+        )
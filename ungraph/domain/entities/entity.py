@@ -22,7 +22,7 @@ from dataclasses import dataclass
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Entity:
     """
     Entidad que representa una entidad nombrada extraída de texto.
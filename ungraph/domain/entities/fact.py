@@ -25,7 +25,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Fact:
     """
     Entidad que representa un hecho extraído mediante inferencia.
@@ -24,7 +24,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Relation:
     """
     Entidad que representa una relación entre dos entidades.
@@ -23,6 +23,7 @@ Ejemplo de uso:
 from abc import ABC, abstractmethod
 from typing import List, Optional
 from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.entities.chunk_batch import ChunkBatch
 
 
 class ChunkRepository(ABC):
@@ -63,6 +64,19 @@ class ChunkRepository(ABC):
         """
         pass
     
+    def save_chunk_batch(self, batch: ChunkBatch) -> None:
+        """
+        Guarda un lote columnar de chunks.
+        
+        Por defecto convierte el lote en chunks (vistas) y delega en save_batch().
+        Las implementaciones pueden sobrescribirlo para escribir directamente
+        desde la matriz de embeddings.
+        
+        Args:
+            batch: Lote de chunks a guardar
+        """
+        self.save_batch(batch.to_chunks())
+    
     @abstractmethod
     def find_by_id(self, chunk_id: str) -> Optional[Chunk]:
         """
@@ -6,7 +6,11 @@ Define las operaciones para generar embeddings de texto.
 
 from abc import ABC, abstractmethod
 from typing import List
+
+import numpy as np
+
 from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.entities.chunk_batch import ChunkBatch
 from ungraph.domain.value_objects.embedding import Embedding
 
 
@@ -52,4 +56,27 @@ class EmbeddingService(ABC):
             ValueError: Si la lista de chunks está vacía
         """
         pass
-
+    
+    def embed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """
+        Genera los embeddings de un lote columnar y los asigna como matriz (n, d).
+        
+        La implementación por defecto usa generate_embeddings_batch(); las
+        implementaciones pueden sobrescribirla para codificar directamente
+        a una matriz sin pasar por objetos intermedios.
+        
+        Args:
+            batch: Lote de chunks
+        
+        Returns:
+            El mismo lote, con `embeddings` asignado
+        
+        Raises:
+            ValueError: Si el lote está vacío
+        """
+        embeddings = self.generate_embeddings_batch(batch.to_chunks())
+        batch.set_embeddings(
+            np.stack([embedding.vector for embedding in embeddings]),
+            embeddings[0].encoder_info
+        )
+        return batch
@@ -0,0 +1,50 @@
+"""
+Interfaz de Servicio: RerankerService
+
+Define la etapa de reordenamiento de los resultados de una búsqueda.
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from ungraph.domain.services.search_service import SearchResult
+
+
+class RerankerService(ABC):
+    """
+    Interfaz que define un reordenador de resultados de búsqueda.
+
+    Recibe los candidatos de la primera etapa (full-text, vectorial o
+    híbrida) y los puntúa de nuevo contra la consulta.
+
+    Las implementaciones pueden usar diferentes modelos:
+    - Cross-encoders (consulta y chunk juntos en un solo forward)
+    - Modelos de interacción tardía
+    - LLMs
+    """
+
+    @property
+    @abstractmethod
+    def top_n(self) -> int:
+        """Candidatos que el reordenador puntúa por consulta."""
+        pass
+
+    @abstractmethod
+    def rerank(
+        self,
+        query_text: str,
+        results: List[SearchResult],
+        limit: Optional[int] = None
+    ) -> List[SearchResult]:
+        """
+        Reordena los resultados según su relevancia para la consulta.
+
+        Args:
+            query_text: Texto de la consulta
+            results: Candidatos ordenados por el score de la primera etapa
+            limit: Número máximo de resultados (default: todos)
+
+        Returns:
+            Lista de SearchResult ordenada por el score del reordenador
+        """
+        pass
@@ -5,7 +5,7 @@ Define las operaciones para buscar en el grafo de conocimiento.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from ungraph.domain.value_objects.embedding import Embedding
 
 
@@ -20,7 +20,23 @@ class SearchResult:
         chunk_id_consecutive: Número consecutivo del chunk
         previous_chunk_content: Contenido del chunk anterior (opcional)
         next_chunk_content: Contenido del chunk siguiente (opcional)
+        context: Texto del tramo contiguo de chunks alrededor del resultado,
+                 sin solapamientos (opcional, ver expand_context)
+        context_span_id: Tramo al que pertenece el resultado; los resultados
+                         con ventanas solapadas comparten tramo (opcional)
     """
+    # Sin __dict__ por instancia: las búsquedas pueden devolver muchos resultados
+    __slots__ = (
+        "content",
+        "score",
+        "chunk_id",
+        "chunk_id_consecutive",
+        "previous_chunk_content",
+        "next_chunk_content",
+        "context",
+        "context_span_id",
+    )
+    
     def __init__(
         self,
         content: str,
@@ -28,7 +44,9 @@ class SearchResult:
         chunk_id: str,
         chunk_id_consecutive: int,
         previous_chunk_content: str = None,
-        next_chunk_content: str = None
+        next_chunk_content: str = None,
+        context: Optional[str] = None,
+        context_span_id: Optional[int] = None
     ):
         self.content = content
         self.score = score
@@ -36,6 +54,8 @@ class SearchResult:
         self.chunk_id_consecutive = chunk_id_consecutive
         self.previous_chunk_content = previous_chunk_content
         self.next_chunk_content = next_chunk_content
+        self.context = context
+        self.context_span_id = context_span_id
 
 
 class SearchService(ABC):
@@ -5,7 +5,7 @@ Define las operaciones para limpiar texto removiendo caracteres no deseados.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterable, List, Optional
 
 
 class TextCleaningService(ABC):
@@ -40,4 +40,18 @@ class TextCleaningService(ABC):
             ValueError: Si el texto está vacío después de limpiar
         """
         pass
-
+    
+    def clean_batch(self, texts: Iterable[str]) -> List[str]:
+        """
+        Limpia varios textos con los parámetros por defecto.
+        
+        La implementación por defecto llama a clean() por cada texto; las
+        implementaciones pueden sobrescribirla para evitar el coste por llamada.
+        
+        Args:
+            texts: Textos a limpiar
+        
+        Returns:
+            Textos limpios, en el mismo orden
+        """
+        return [self.clean(text) for text in texts]
@@ -0,0 +1,109 @@
+"""
+Interfaz de Servicio: VectorIndexService
+
+Define las operaciones de un índice vectorial en proceso que replica
+los embeddings de los chunks del grafo.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+
+class VectorIndexService(ABC):
+    """
+    Interfaz que define las operaciones de un índice ANN en memoria.
+
+    El índice solo guarda chunk_id y vector: el contenido y los vecinos
+    se siguen leyendo del grafo para los mejores resultados.
+
+    Las implementaciones pueden usar diferentes estructuras:
+    - Búsqueda exacta (fuerza bruta)
+    - IVF (listas invertidas)
+    - HNSW
+
+    `synchronized` indica que el índice contiene exactamente los chunks con
+    embeddings del grafo (lo fija la sincronización con el grafo). Mientras
+    sea False, las búsquedas siguen usando el índice vectorial de Neo4j.
+    """
+
+    synchronized: bool = False
+
+    @abstractmethod
+    def add(self, chunk_ids: List[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Añade (o reemplaza) vectores en el índice.
+
+        Args:
+            chunk_ids: IDs de los chunks, en el mismo orden que los vectores
+            vectors: Vectores de embeddings (matriz (n, d) o lista de listas)
+
+        Raises:
+            ValueError: Si el número de IDs y vectores no coincide o la dimensión es inválida
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, chunk_ids: List[str]) -> None:
+        """
+        Elimina vectores del índice. Los IDs desconocidos se ignoran.
+
+        Args:
+            chunk_ids: IDs de los chunks a eliminar
+        """
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 5,
+        chunk_ids: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Busca los k vectores más similares a la consulta.
+
+        Args:
+            query_vector: Vector de la consulta
+            k: Número máximo de resultados (default: 5)
+            chunk_ids: Si se indica, puntúa exactamente solo estos chunks
+                       (los IDs que no están en el índice se ignoran)
+
+        Returns:
+            Lista de tuplas (chunk_id, score) ordenadas por score descendente.
+            El score usa la misma escala que el índice vectorial coseno de Neo4j.
+        """
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Número de vectores activos en el índice."""
+        pass
+
+    @abstractmethod
+    def ids(self) -> List[str]:
+        """IDs de los chunks activos en el índice."""
+        pass
+
+    @abstractmethod
+    def save(self, path: Optional[str | Path] = None) -> Path:
+        """
+        Persiste el índice completo (compactado) en disco.
+
+        Args:
+            path: Directorio destino (default: el configurado en la implementación)
+
+        Returns:
+            Directorio donde se guardó el índice
+        """
+        pass
+
+    def flush(self) -> None:
+        """
+        Persiste los cambios desde el último guardado.
+
+        La implementación por defecto guarda el índice completo; las
+        implementaciones pueden escribir solo los cambios (p. ej. un log de
+        deltas) para que la ingesta no reescriba todo el índice por documento.
+        """
+        self.save()
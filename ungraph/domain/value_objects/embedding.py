@@ -3,39 +3,68 @@ Value Object: Embedding
 
 Representa un vector de embeddings con sus metadatos.
 Es inmutable (frozen=True) porque los embeddings no deben cambiar una vez creados.
+
+El vector es un ndarray float32 de solo lectura. Cuando proviene de un
+ChunkBatch es una vista sobre la fila de su matriz (sin copia).
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence, Union
+
+import numpy as np
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Embedding:
     """
     Value Object que representa un vector de embeddings.
-    
+
     Attributes:
-        vector: Lista de números flotantes que representan el embedding
+        vector: Vector float32 de solo lectura (acepta también listas de floats)
         dimensions: Dimensión del vector (ej: 384 para all-MiniLM-L6-v2)
         encoder_info: Información del encoder usado para generar el embedding
     """
-    vector: List[float]
+    vector: Union[np.ndarray, Sequence[float]]
     dimensions: int
     encoder_info: str
-    
+
     def __post_init__(self):
         """
         Validaciones básicas del Value Object.
         """
-        if not self.vector:
+        vector = np.asarray(self.vector, dtype=np.float32)
+        if vector.ndim != 1 or vector.size == 0:
             raise ValueError("Embedding vector cannot be empty")
-        if len(self.vector) != self.dimensions:
+        if vector.shape[0] != self.dimensions:
             raise ValueError(
                 f"Vector dimension mismatch: "
-                f"expected {self.dimensions}, got {len(self.vector)}"
+                f"expected {self.dimensions}, got {vector.shape[0]}"
             )
         if self.dimensions <= 0:
             raise ValueError("Embedding dimensions must be positive")
         if not self.encoder_info:
             raise ValueError("Encoder info cannot be empty")
+        if not np.isfinite(vector).all():
+            raise ValueError("Embedding vector contains NaN or infinite values")
+
+        if vector.flags.writeable:
+            # Vista de solo lectura: no bloquea la escritura de la matriz original
+            vector = vector.view()
+            vector.flags.writeable = False
+        object.__setattr__(self, "vector", vector)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Embedding):
+            return NotImplemented
+        return (
+            self.dimensions == other.dimensions
+            and self.encoder_info == other.encoder_info
+            and np.array_equal(self.vector, other.vector)
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.dimensions, self.encoder_info, self.vector.tobytes()))
 
+    def to_list(self) -> List[float]:
+        """Convierte el vector a lista de floats (solo para drivers/serialización)."""
+        return self.vector.tolist()
@@ -3,6 +3,7 @@ Patrones de grafo predefinidos.
 
 Estos patrones reflejan estructuras comunes de grafos de conocimiento.
 El patrón FILE_PAGE_CHUNK es el patrón actual usado en el sistema.
+El patrón FILE_SECTION_CHUNK organiza los documentos Markdown por secciones.
 
 Referencias:
 - Código actual: src/utils/graph_operations.py::extract_document_structure
@@ -47,7 +48,9 @@ FILE_PAGE_CHUNK_PATTERN = GraphPattern(
             optional_properties={
                 "is_unitary": bool,
                 "chunk_id_consecutive": int,
-                "embedding_encoder_info": str
+                "embedding_encoder_info": str,
+                "start_index": int,
+                "end_index": int
             },
             indexes=["chunk_id", "chunk_id_consecutive"]
         )
@@ -76,8 +79,63 @@ FILE_PAGE_CHUNK_PATTERN = GraphPattern(
 )
 
 
-
-
-
-
-
+# Patrón jerárquico para Markdown (FILE-SECTION-CHUNK)
+# Las secciones vienen del parser nativo de Markdown (metadata de los chunks:
+# section_path, section_title, section_level). Las relaciones NEXT_CHUNK las
+# crea el caso de uso, igual que en FILE_PAGE_CHUNK.
+FILE_SECTION_CHUNK_PATTERN = GraphPattern(
+    name="FILE_SECTION_CHUNK",
+    description="Patrón jerárquico: File contiene Sections (una por encabezado Markdown), Sections contienen Chunks.",
+    node_definitions=[
+        NodeDefinition(
+            label="File",
+            required_properties={"filename": str},
+            optional_properties={},
+            indexes=["filename"]
+        ),
+        NodeDefinition(
+            label="Section",
+            required_properties={
+                "filename": str,
+                "section_path": str
+            },
+            optional_properties={
+                "section_title": str,
+                "section_level": int
+            },
+            indexes=["filename", "section_path"]
+        ),
+        NodeDefinition(
+            label="Chunk",
+            required_properties={
+                "chunk_id": str,
+                "page_content": str,
+                "embeddings": list,
+                "embeddings_dimensions": int
+            },
+            optional_properties={
+                "is_unitary": bool,
+                "chunk_id_consecutive": int,
+                "embedding_encoder_info": str,
+                "start_index": int,
+                "end_index": int
+            },
+            indexes=["chunk_id", "chunk_id_consecutive"]
+        )
+    ],
+    relationship_definitions=[
+        RelationshipDefinition(
+            from_node="File",
+            to_node="Section",
+            relationship_type="CONTAINS",
+            direction="OUTGOING"
+        ),
+        RelationshipDefinition(
+            from_node="Section",
+            to_node="Chunk",
+            relationship_type="HAS_CHUNK",
+            direction="OUTGOING"
+        )
+    ],
+    search_patterns=["basic", "hybrid"]
+)
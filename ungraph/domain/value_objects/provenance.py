@@ -23,7 +23,7 @@ from typing import Optional
 from datetime import datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Provenance:
     """
     Value Object que representa información de trazabilidad PROV-O.
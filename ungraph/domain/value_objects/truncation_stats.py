@@ -0,0 +1,115 @@
+"""
+Value Object: TruncationStats
+
+Resume cuánto texto de los chunks de una ingesta queda fuera de la ventana
+del modelo de embeddings. Lo que excede max_tokens se trunca al codificar:
+se tokeniza y procesa pero no influye en el vector.
+
+Ejemplo de uso:
+    stats = TruncationStats.from_counts([120, 310, 256], max_tokens=256)
+    stats.truncated_chunks          # 1
+    stats.truncated_token_fraction  # 54 / 686
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+
+@dataclass(frozen=True, slots=True)
+class TruncationStats:
+    """
+    Estadísticas de truncado de una ingesta.
+
+    Attributes:
+        chunks: Chunks codificados
+        max_tokens: Ventana del modelo en tokens (incluidos los especiales)
+        tokens: Tokens totales de los chunks (sin truncar)
+        truncated_chunks: Chunks que exceden la ventana
+        truncated_tokens: Tokens descartados por el truncado
+        longest_chunk_tokens: Tokens del chunk más largo
+        token_aligned: Si los chunks se dimensionaron en tokens del modelo
+    """
+    chunks: int
+    max_tokens: int
+    tokens: int
+    truncated_chunks: int
+    truncated_tokens: int
+    longest_chunk_tokens: int
+    token_aligned: bool = False
+
+    def __post_init__(self):
+        if self.max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        if self.truncated_chunks > self.chunks or self.truncated_tokens > self.tokens:
+            raise ValueError("Truncated counts cannot exceed totals")
+
+    @classmethod
+    def from_counts(
+        cls,
+        counts: Sequence[int],
+        max_tokens: int,
+        token_aligned: bool = False
+    ) -> "TruncationStats":
+        """
+        Crea las estadísticas a partir de los tokens de cada chunk.
+
+        Args:
+            counts: Tokens de cada chunk, con los especiales y sin truncar
+            max_tokens: Ventana del modelo
+            token_aligned: Si los chunks se dimensionaron en tokens
+        """
+        counts = [int(count) for count in counts]
+        excess = [count - max_tokens for count in counts if count > max_tokens]
+        return cls(
+            chunks=len(counts),
+            max_tokens=max_tokens,
+            tokens=sum(counts),
+            truncated_chunks=len(excess),
+            truncated_tokens=sum(excess),
+            longest_chunk_tokens=max(counts, default=0),
+            token_aligned=token_aligned
+        )
+
+    def merge(self, other: "TruncationStats") -> "TruncationStats":
+        """Suma las estadísticas de dos lotes de la misma ingesta."""
+        return TruncationStats(
+            chunks=self.chunks + other.chunks,
+            max_tokens=self.max_tokens,
+            tokens=self.tokens + other.tokens,
+            truncated_chunks=self.truncated_chunks + other.truncated_chunks,
+            truncated_tokens=self.truncated_tokens + other.truncated_tokens,
+            longest_chunk_tokens=max(self.longest_chunk_tokens, other.longest_chunk_tokens),
+            token_aligned=self.token_aligned
+        )
+
+    @property
+    def truncated_chunk_fraction(self) -> float:
+        """Fracción de chunks truncados."""
+        return self.truncated_chunks / self.chunks if self.chunks else 0.0
+
+    @property
+    def truncated_token_fraction(self) -> float:
+        """Fracción de los tokens que se descartan (cómputo de tokenización sin efecto)."""
+        return self.truncated_tokens / self.tokens if self.tokens else 0.0
+
+    @property
+    def window_utilization(self) -> Optional[float]:
+        """Tokens usados por chunk respecto a la ventana (1.0 = ventana llena)."""
+        if not self.chunks:
+            return None
+        return (self.tokens - self.truncated_tokens) / (self.chunks * self.max_tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con los contadores y las fracciones derivadas."""
+        return {
+            'chunks': self.chunks,
+            'max_tokens': self.max_tokens,
+            'tokens': self.tokens,
+            'truncated_chunks': self.truncated_chunks,
+            'truncated_tokens': self.truncated_tokens,
+            'longest_chunk_tokens': self.longest_chunk_tokens,
+            'token_aligned': self.token_aligned,
+            'truncated_chunk_fraction': self.truncated_chunk_fraction,
+            'truncated_token_fraction': self.truncated_token_fraction,
+            'window_utilization': self.window_utilization,
+        }
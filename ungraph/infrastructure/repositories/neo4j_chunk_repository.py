@@ -5,23 +5,32 @@ Implementa ChunkRepository usando Neo4j.
 Envuelve el código existente de graph_operations.py.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
 from neo4j import GraphDatabase
 from neo4j.exceptions import ClientError
 import logging
+import numpy as np
 
 from ungraph.domain.repositories.chunk_repository import ChunkRepository
 from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.entities.chunk_batch import ChunkBatch
 from ungraph.domain.entities.fact import Fact
 from ungraph.domain.entities.entity import Entity
 from ungraph.domain.value_objects.graph_pattern import GraphPattern
 
+if TYPE_CHECKING:
+    from ungraph.infrastructure.services.embedding_quantizer import EmbeddingQuantizer
+
 logger = logging.getLogger(__name__)
 
 # Importar funciones de graph_operations de manera lazy para evitar importaciones circulares
 # Estas funciones se importan solo cuando se necesitan, no al nivel del módulo
 try:
-    from ungraph.utils.graph_operations import graph_session, extract_document_structure, create_chunk_relationships
+    from ungraph.utils.graph_operations import (
+        graph_session,
+        extract_document_structure_batch,
+        create_chunk_relationships
+    )
 except ImportError as e:
     logger.error("Cannot import graph_operations. Ensure the package is installed or PYTHONPATH includes project root. Original error: %s", e)
     raise
@@ -37,14 +46,29 @@ class Neo4jChunkRepository(ChunkRepository):
     - Maneja la conexión a Neo4j internamente
     """
     
-    def __init__(self, database: str = "neo4j"):
+    def __init__(
+        self,
+        database: str = "neo4j",
+        quantizer: Optional["EmbeddingQuantizer"] = None,
+        store_full_vectors: bool = True
+    ):
         """
         Inicializa el repositorio.
         
         Args:
             database: Nombre de la base de datos Neo4j (default: "neo4j")
+            quantizer: Cuantizador opcional. Si se proporciona, cada Chunk guarda
+                       también `embeddings_int8` o `embeddings_binary` (byte array)
+                       y en `embeddings_calibration` el calibration_id con el que
+                       se codificaron.
+            store_full_vectors: Si False, no se escribe `embeddings` en float
+                                (requiere el índice vectorial en proceso para búsquedas).
+                                Mientras la calibración es provisional no se escriben
+                                códigos y los chunks conservan el vector float.
         """
         self.database = database
+        self.quantizer = quantizer
+        self.store_full_vectors = store_full_vectors
         self._driver = None
     
     def _get_driver(self) -> GraphDatabase:
@@ -70,36 +94,177 @@ class Neo4jChunkRepository(ChunkRepository):
         if not chunks:
             return
         
+        self.save_chunk_batch(ChunkBatch.from_chunks(chunks))
+    
+    def save_chunk_batch(self, batch: ChunkBatch, write_batch_size: int = 1000) -> None:
+        """
+        Guarda un lote columnar de chunks con escrituras UNWIND.
+        
+        Los embeddings se convierten a listas por sub-lotes, justo antes de
+        pasarlos al driver, para no materializar todos los floats a la vez.
+        
+        Args:
+            batch: Lote de chunks a guardar
+            write_batch_size: Chunks por transacción (default: 1000)
+        """
+        if len(batch) == 0:
+            return
+        
         driver = self._get_driver()
+        previous = self._final_calibration()
+        codes = self._quantize_embeddings(batch)
+        codes_key = f"embeddings_{self.quantizer.mode}" if self.quantizer else None
+        calibration_id = self.quantizer.calibration_id if codes is not None else None
+        # Sin códigos (calibración provisional), el vector float es la única copia
+        store_full_vectors = self.store_full_vectors or codes is None
+        dimensions = batch.dimensions or 384
+        encoder_info = batch.embedding_encoder_info or 'unknown'
         
         try:
             with driver.session(database=self.database) as session:
-                for chunk in chunks:
-                    # Extraer datos del chunk
-                    filename = chunk.metadata.get('filename', 'unknown')
-                    page_number = chunk.metadata.get('page_number', 1)
+                for start in range(0, len(batch), write_batch_size):
+                    end = min(start + write_batch_size, len(batch))
                     
-                    # Convertir embeddings a lista si es necesario
-                    embeddings = chunk.embeddings
-                    if embeddings is None:
-                        embeddings = []
+                    # Frontera con el driver: aquí (y solo aquí) el vector pasa a lista
+                    if batch.embeddings is None:
+                        vectors = [[] for _ in range(start, end)]
+                    elif store_full_vectors:
+                        vectors = batch.embeddings[start:end].tolist()
+                    else:
+                        vectors = [None] * (end - start)
                     
-                    session.execute_write(
-                        extract_document_structure,
-                        filename=filename,
-                        page_number=page_number,
-                        chunk_id=chunk.id,
-                        page_content=chunk.page_content,
-                        is_unitary=chunk.is_unitary,
-                        embeddings=embeddings,
-                        embeddings_dimensions=chunk.embeddings_dimensions or 384,
-                        embedding_encoder_info=chunk.embedding_encoder_info or 'unknown',
-                        chunk_id_consecutive=chunk.chunk_id_consecutive or 0
-                    )
+                    rows = []
+                    for offset, index in enumerate(range(start, end)):
+                        metadata = batch.metadata[index]
+                        row = {
+                            "filename": metadata.get('filename', 'unknown'),
+                            "page_number": metadata.get('page_number', 1),
+                            "chunk_id": batch.ids[index],
+                            "page_content": batch.texts[index],
+                            "is_unitary": batch.is_unitary[index],
+                            "embeddings": vectors[offset],
+                            "embeddings_dimensions": dimensions,
+                            "embedding_encoder_info": encoder_info,
+                            "chunk_id_consecutive": batch.chunk_id_consecutive[index] or 0,
+                            "embeddings_int8": None,
+                            "embeddings_binary": None,
+                            "embeddings_calibration": calibration_id,
+                            "start_index": metadata.get('start_index'),
+                            "end_index": metadata.get('end_index')
+                        }
+                        if codes is not None:
+                            row[codes_key] = codes[index].tobytes()
+                        rows.append(row)
+                    
+                    session.execute_write(extract_document_structure_batch, rows=rows)
+                
+                if codes is not None and (previous is None or previous.calibration_id != calibration_id):
+                    self._reencode_stale_codes(session, previous)
         except ClientError as e:
             logger.error(f"Error saving chunks to Neo4j: {e}", exc_info=True)
             raise
     
+    def _final_calibration(self) -> Optional["EmbeddingQuantizer"]:
+        """Copia de la calibración definitiva actual (None si no hay o es provisional)."""
+        if self.quantizer is None or not self.quantizer.calibrated or self.quantizer.provisional:
+            return None
+        return type(self.quantizer).from_dict(self.quantizer.to_dict())
+    
+    def _quantize_embeddings(self, batch: ChunkBatch) -> Optional[np.ndarray]:
+        """
+        Codifica en un solo lote los embeddings del batch.
+        
+        Los códigos representan el vector normalizado (similitud coseno); cada
+        fila se guarda como bytes, que Neo4j almacena como byte array compacto.
+        
+        Returns:
+            Matriz de códigos (una fila por chunk) o None si no hay cuantizador
+            o su calibración aún es provisional
+        """
+        if self.quantizer is None or batch.embeddings is None:
+            return None
+        
+        norms = np.linalg.norm(batch.embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        codes = self.quantizer.encode(batch.embeddings / norms)
+        return None if self.quantizer.provisional else codes
+    
+    def _reencode_stale_codes(
+        self,
+        session,
+        previous: Optional["EmbeddingQuantizer"],
+        batch_size: int = 5000
+    ) -> Dict[str, int]:
+        """
+        Re-codifica los chunks cuyos códigos no son de la calibración actual.
+        
+        Se ejecuta cuando la calibración cambia (se fija la definitiva o se
+        amplían los rangos int8). Cada chunk se re-codifica desde su vector
+        float o, sin él, decodificando sus códigos int8 con la calibración
+        anterior (`previous`). También codifica los chunks guardados sin
+        códigos mientras la calibración era provisional y, con
+        store_full_vectors=False, elimina entonces su vector float. Los que
+        no se pueden recuperar se dejan como están: su `embeddings_calibration`
+        no coincide y no se decodifican (ver VectorIndexSynchronizer).
+        
+        Returns:
+            Dict con chunks re-codificados y no recuperables
+        """
+        current = self.quantizer.calibration_id
+        codes_key = f"embeddings_{self.quantizer.mode}"
+        stats = {'reencoded': 0, 'unrecoverable': 0}
+        after = ""
+        while True:
+            records = list(session.run(f"""
+                MATCH (c:Chunk)
+                WHERE c.chunk_id > $after
+                  AND (c.{codes_key} IS NOT NULL OR size(coalesce(c.embeddings, [])) > 0)
+                  AND coalesce(c.embeddings_calibration, '') <> $current
+                RETURN c.chunk_id AS chunk_id, c.embeddings AS embeddings,
+                       c.{codes_key} AS codes, c.embeddings_calibration AS calibration
+                ORDER BY c.chunk_id
+                LIMIT $batch_size
+            """, after=after, current=current, batch_size=batch_size))
+            if not records:
+                break
+            after = records[-1]["chunk_id"]
+            
+            ids, vectors = [], []
+            for record in records:
+                if record["embeddings"]:
+                    vector = np.asarray(record["embeddings"], dtype=np.float32)
+                    norm = np.linalg.norm(vector)
+                    vectors.append(vector / norm if norm else vector)
+                elif (record["codes"] is not None and previous is not None and previous.mode == "int8"
+                        and record["calibration"] == previous.calibration_id):
+                    codes = np.frombuffer(bytes(record["codes"]), dtype=np.int8)
+                    vectors.append(previous.decode(codes[None, :])[0])
+                else:
+                    stats['unrecoverable'] += 1
+                    continue
+                ids.append(record["chunk_id"])
+            if not ids:
+                continue
+            
+            codes = self.quantizer.encode(np.asarray(vectors, dtype=np.float32), adapt=False)
+            session.run(f"""
+                UNWIND $rows AS row
+                MATCH (c:Chunk {{chunk_id: row.chunk_id}})
+                SET c.{codes_key} = row.codes,
+                    c.embeddings_calibration = $current,
+                    c.embeddings = CASE WHEN $store_full_vectors THEN c.embeddings ELSE null END
+            """, rows=[
+                {"chunk_id": chunk_id, "codes": codes[i].tobytes()} for i, chunk_id in enumerate(ids)
+            ], current=current, store_full_vectors=self.store_full_vectors).consume()
+            stats['reencoded'] += len(ids)
+        
+        if stats['reencoded'] or stats['unrecoverable']:
+            logger.info(
+                f"Re-encoded {stats['reencoded']} chunk codes with calibration {current} "
+                f"({stats['unrecoverable']} unrecoverable)"
+            )
+        return stats
+    
     def find_by_id(self, chunk_id: str) -> Optional[Chunk]:
         """
         Busca un chunk por su ID en Neo4j.
@@ -141,7 +306,9 @@ class Neo4jChunkRepository(ChunkRepository):
                c.embeddings_dimensions as embeddings_dimensions,
                c.embedding_encoder_info as embedding_encoder_info,
                c.filename as filename,
-               c.page_number as page_number
+               c.page_number as page_number,
+               c.start_index as start_index,
+               c.end_index as end_index
         LIMIT 1
         """
         result = tx.run(query, chunk_id=chunk_id)
@@ -186,7 +353,9 @@ class Neo4jChunkRepository(ChunkRepository):
                c.embeddings_dimensions as embeddings_dimensions,
                c.embedding_encoder_info as embedding_encoder_info,
                c.filename as filename,
-               c.page_number as page_number
+               c.page_number as page_number,
+               c.start_index as start_index,
+               c.end_index as end_index
         ORDER BY c.chunk_id_consecutive ASC
         """
         result = tx.run(query, filename=filename)
@@ -200,6 +369,9 @@ class Neo4jChunkRepository(ChunkRepository):
             'filename': record.get('filename', 'unknown'),
             'page_number': record.get('page_number', 1)
         }
+        if record.get('start_index') is not None:
+            metadata['start_index'] = record.get('start_index')
+            metadata['end_index'] = record.get('end_index')
         
         return Chunk(
             id=record.get('chunk_id', ''),
@@ -275,7 +447,7 @@ class Neo4jChunkRepository(ChunkRepository):
                 # Propiedades requeridas de Chunk
                 data['chunk_id'] = chunk.id
                 data['page_content'] = chunk.page_content
-                data['embeddings'] = chunk.embeddings or []
+                data['embeddings'] = chunk.embeddings.tolist() if chunk.embeddings is not None else []
                 data['embeddings_dimensions'] = chunk.embeddings_dimensions or 384
                 
                 # Propiedades opcionales
@@ -285,6 +457,10 @@ class Neo4jChunkRepository(ChunkRepository):
                     data['chunk_id_consecutive'] = chunk.chunk_id_consecutive or 0
                 if 'embedding_encoder_info' in node_def.optional_properties:
                     data['embedding_encoder_info'] = chunk.embedding_encoder_info or 'unknown'
+                # Offsets en el texto de origen (None si el chunker no los registró)
+                for key in ('start_index', 'end_index'):
+                    if key in node_def.optional_properties:
+                        data[key] = chunk.metadata.get(key)
             
             elif node_def.label == "File":
                 data['filename'] = filename
@@ -293,6 +469,13 @@ class Neo4jChunkRepository(ChunkRepository):
             elif node_def.label == "Page":
                 data['filename'] = filename
                 data['page_number'] = page_number
+            
+            elif node_def.label == "Section":
+                # Secciones del parser de Markdown (el preámbulo tiene ruta vacía)
+                data['filename'] = filename
+                data['section_path'] = chunk.metadata.get('section_path', '')
+                data['section_title'] = chunk.metadata.get('section_title', '')
+                data['section_level'] = chunk.metadata.get('section_level', 0)
         
         return data
     
@@ -312,6 +495,87 @@ class Neo4jChunkRepository(ChunkRepository):
             logger.error(f"Error creating chunk relationships: {e}", exc_info=True)
             raise
     
+    def update_aggregate_embeddings(
+        self,
+        filenames: Optional[List[str]] = None,
+        file_batch_size: int = 10
+    ) -> Dict[str, int]:
+        """
+        Calcula los embeddings agregados de Page y File.
+        
+        El vector de cada Page es el centroide (media de los vectores
+        normalizados, renormalizada) de sus chunks y el de cada File el de
+        todos los chunks de sus páginas. Se guardan en `embeddings` junto con
+        `chunk_count`, para los índices page_embeddings y file_embeddings de
+        la búsqueda jerárquica. Se recalcula desde los chunks guardados, así
+        que también sirve para corpus ingeridos antes (filenames=None).
+        
+        Args:
+            filenames: Archivos a actualizar (default: todos los File)
+            file_batch_size: Archivos por lote de lectura y escritura
+        
+        Returns:
+            Dict con páginas y archivos actualizados
+        """
+        stats = {'pages': 0, 'files': 0}
+        if not self.store_full_vectors:
+            logger.warning("Chunk vectors are not stored in Neo4j; skipping Page/File embeddings")
+            return stats
+        
+        driver = self._get_driver()
+        try:
+            with driver.session(database=self.database) as session:
+                if filenames is None:
+                    filenames = [
+                        record["filename"]
+                        for record in session.run("MATCH (f:File) RETURN f.filename AS filename")
+                    ]
+                for offset in range(0, len(filenames), file_batch_size):
+                    records = session.run("""
+                        UNWIND $filenames AS filename
+                        MATCH (:File {filename: filename})-[:CONTAINS]->(p:Page)-[:HAS_CHUNK]->(c:Chunk)
+                        WHERE c.embeddings IS NOT NULL
+                        RETURN filename, p.page_number AS page_number, collect(c.embeddings) AS embeddings
+                    """, filenames=filenames[offset:offset + file_batch_size])
+                    
+                    pages = []
+                    files = {}
+                    for record in records:
+                        matrix = np.asarray(record["embeddings"], dtype=np.float32)
+                        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                        norms[norms == 0] = 1.0
+                        total = (matrix / norms).sum(axis=0)
+                        pages.append({
+                            'filename': record["filename"],
+                            'page_number': record["page_number"],
+                            'embeddings': _unit_vector(total),
+                            'chunk_count': len(matrix)
+                        })
+                        file_total, file_count = files.get(record["filename"], (0.0, 0))
+                        files[record["filename"]] = (file_total + total, file_count + len(matrix))
+                    
+                    session.run("""
+                        UNWIND $pages AS row
+                        MATCH (p:Page {filename: row.filename, page_number: row.page_number})
+                        SET p.embeddings = row.embeddings, p.chunk_count = row.chunk_count
+                    """, pages=pages).consume()
+                    session.run("""
+                        UNWIND $files AS row
+                        MATCH (f:File {filename: row.filename})
+                        SET f.embeddings = row.embeddings, f.chunk_count = row.chunk_count
+                    """, files=[
+                        {'filename': filename, 'embeddings': _unit_vector(total), 'chunk_count': count}
+                        for filename, (total, count) in files.items()
+                    ]).consume()
+                    stats['pages'] += len(pages)
+                    stats['files'] += len(files)
+        except ClientError as e:
+            logger.error(f"Error updating aggregate embeddings: {e}", exc_info=True)
+            raise
+        
+        logger.info(f"Aggregate embeddings updated for {stats['pages']} pages and {stats['files']} files")
+        return stats
+    
     def save_facts(self, facts: List[Fact]) -> None:
         """
         Guarda facts en Neo4j creando nodos Fact y relaciones DERIVED_FROM.
@@ -404,3 +668,8 @@ class Neo4jChunkRepository(ChunkRepository):
             self._driver.close()
             self._driver = None
 
+
+def _unit_vector(vector: np.ndarray) -> List[float]:
+    """Vector con norma L2 unitaria, como lista para el driver."""
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm > 0 else vector).tolist()
@@ -6,7 +6,96 @@ Requieren instalar: pip install ungraph[gds]
 """
 
 import re
-from typing import Dict, Any, Tuple, List, Optional
+from typing import Dict, Any, Tuple, List, Optional, Sequence
+
+# Límites por defecto de la expansión del grafo (ver bounded_expansion_cypher)
+DEFAULT_FAN_OUT = 10
+DEFAULT_MAX_NODES = 100
+DEFAULT_MAX_DEGREE = 1000
+
+_VALID_LABEL = re.compile(r'^[A-Z][a-zA-Z0-9_]*$')
+_VALID_RELATIONSHIP = re.compile(r'^[A-Z][A-Z0-9_]*$')
+
+
+def bounded_expansion_cypher(
+    seed: str,
+    relationship_types: Sequence[str],
+    max_depth: int,
+    node_labels: Optional[Sequence[str]] = None,
+    result: str = "expansion"
+) -> str:
+    """
+    Subconsulta Cypher que expande el grafo desde `seed` salto a salto (BFS).
+
+    Cada salto es una consulta por lotes sobre toda la frontera, con límites
+    que acotan el trabajo independientemente del tamaño del grafo:
+
+    - solo relaciones de `relationship_types` (y nodos de `node_labels`),
+    - como máximo `$fan_out` vecinos por nodo y salto, los de menor grado primero,
+    - los nodos con más de `$max_degree` relaciones (hubs) se alcanzan pero no
+      se expanden,
+    - como máximo `$max_nodes` nodos alcanzados en total por semilla,
+    - cada nodo se visita una sola vez.
+
+    Args:
+        seed: Variable del nodo semilla en la consulta que la incluye
+        relationship_types: Tipos de relación que se recorren (validados)
+        max_depth: Saltos máximos
+        node_labels: Labels admitidas en los nodos alcanzados (default: cualquiera)
+        result: Variable con la lista resultante de mapas
+                {node, via, degree, depth, parent}
+
+    Returns:
+        Fragmento Cypher (usa los parámetros $fan_out, $max_nodes y $max_degree)
+    """
+    if max_depth < 1:
+        raise ValueError("max_depth must be >= 1")
+    if not relationship_types:
+        raise ValueError("relationship_types cannot be empty")
+    for relationship_type in relationship_types:
+        if not _VALID_RELATIONSHIP.match(relationship_type):
+            raise ValueError(f"Invalid relationship type: {relationship_type}")
+    for label in node_labels or []:
+        if not _VALID_LABEL.match(label):
+            raise ValueError(f"Invalid node label: {label}")
+
+    types = "|".join(relationship_types)
+    label_filter = ""
+    if node_labels:
+        label_filter = " AND (" + " OR ".join(f"m:{label}" for label in node_labels) + ")"
+
+    hops = []
+    for depth in range(1, max_depth + 1):
+        hops.append(f"""
+            CALL {{
+                WITH frontier, visited
+                UNWIND frontier AS n
+                CALL {{
+                    WITH n, visited
+                    MATCH (n)-[r:{types}]-(m)
+                    WHERE NOT m IN visited{label_filter}
+                    WITH m, type(r) AS via, COUNT {{ (m)-[:{types}]-() }} AS degree
+                    ORDER BY degree ASC
+                    LIMIT $fan_out
+                    RETURN m, via, degree
+                }}
+                WITH m, degree, head(collect(via)) AS via, head(collect(n)) AS parent
+                ORDER BY degree ASC
+                RETURN collect({{node: m, via: via, degree: degree, depth: {depth}, parent: parent}}) AS hop
+            }}
+            WITH {seed}, visited, reached, hop[..($max_nodes - size(reached))] AS hop
+            WITH {seed}, visited + [x IN hop | x.node] AS visited, reached + hop AS reached,
+                 [x IN hop WHERE x.degree <= $max_degree | x.node] AS frontier""")
+
+    return f"""
+        CALL {{
+            WITH {seed}
+            WITH {seed}, COUNT {{ ({seed})-[:{types}]-() }} AS seed_degree
+            WITH {seed}, [{seed}] AS visited, [] AS reached,
+                 CASE WHEN seed_degree <= $max_degree THEN [{seed}] ELSE [] END AS frontier
+            {"".join(hops)}
+            RETURN reached AS {result}
+        }}"""
 
 
 class AdvancedSearchPatterns:
@@ -23,7 +112,11 @@ class AdvancedSearchPatterns:
         limit: int = 5,
         max_traversal_depth: int = 2,
         entity_label: str = "Entity",
-        mentions_relationship: str = "MENTIONS"
+        mentions_relationship: str = "MENTIONS",
+        fan_out: int = DEFAULT_FAN_OUT,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_degree: int = DEFAULT_MAX_DEGREE,
+        similarity_relationship: Optional[str] = None
     ) -> Tuple[str, Dict[str, Any]]:
         """
         Graph-Enhanced Vector Search: Combina búsqueda vectorial con traversal del grafo.
@@ -32,9 +125,14 @@ class AdvancedSearchPatterns:
         
         Cómo funciona:
         1. Busca chunks similares usando embeddings
-        2. Extrae entidades mencionadas en esos chunks
-        3. Hace traversal del grafo desde esas entidades
-        4. Retorna contexto enriquecido
+        2. Expande el grafo desde cada chunk por MENTIONS y NEXT_CHUNK
+           (bounded_expansion_cypher: fan-out por salto, poda de hubs y
+           presupuesto de nodos, así la latencia no crece con el grafo)
+        3. Retorna contexto enriquecido: chunks alcanzados a través de
+           entidades o de otros chunks, y vecinos NEXT_CHUNK directos
+        4. Con `similarity_relationship` (p. ej. "SIMILAR_TO", escrito por
+           SimilarityGraphService), añade los `fan_out` vecinos kNN
+           precalculados de mayor score (un salto, sin consulta vectorial)
         
         Args:
             query_text: Texto a buscar (para full-text search)
@@ -43,6 +141,11 @@ class AdvancedSearchPatterns:
             max_traversal_depth: Profundidad máxima de traversal (1-3 recomendado)
             entity_label: Label de los nodos Entity
             mentions_relationship: Tipo de relación Chunk->Entity
+            fan_out: Vecinos máximos por nodo y salto
+            max_nodes: Nodos alcanzados máximos por chunk inicial
+            max_degree: Grado a partir del cual un nodo no se expande (hub)
+            similarity_relationship: Relación kNN entre chunks a seguir un salto
+                                     (default: ninguna)
         
         Returns:
             Tuple de (query_cypher, parameters_dict)
@@ -54,7 +157,7 @@ class AdvancedSearchPatterns:
             >>> 
             >>> query, params = AdvancedSearchPatterns.graph_enhanced_vector_search(
             ...     "machine learning",
-            ...     query_vector.vector,
+            ...     query_vector.to_list(),
             ...     limit=5,
             ...     max_traversal_depth=2
             ... )
@@ -63,52 +166,66 @@ class AdvancedSearchPatterns:
         if max_traversal_depth < 1 or max_traversal_depth > 5:
             raise ValueError("max_traversal_depth must be between 1 and 5")
         
-        valid_label_pattern = re.compile(r'^[A-Z][a-zA-Z0-9_]*$')
-        valid_rel_pattern = re.compile(r'^[A-Z][A-Z0-9_]*$')
-        
-        if not valid_label_pattern.match(entity_label):
+        if not _VALID_LABEL.match(entity_label):
             raise ValueError(f"Invalid entity_label: {entity_label}")
-        if not valid_rel_pattern.match(mentions_relationship):
+        if not _VALID_RELATIONSHIP.match(mentions_relationship):
             raise ValueError(f"Invalid mentions_relationship: {mentions_relationship}")
+        if similarity_relationship is not None and not _VALID_RELATIONSHIP.match(similarity_relationship):
+            raise ValueError(f"Invalid similarity_relationship: {similarity_relationship}")
+        
+        similar = "WITH initial_chunk, initial_score, expansion, [] AS similar_chunks"
+        if similarity_relationship:
+            similar = f"""CALL {{
+            WITH initial_chunk
+            OPTIONAL MATCH (initial_chunk)-[s:{similarity_relationship}]->(similar:Chunk)
+            WITH similar, s ORDER BY s.score DESC
+            LIMIT $fan_out
+            RETURN collect(CASE WHEN similar IS NOT NULL THEN {{
+                content: similar.page_content,
+                chunk_id: similar.chunk_id,
+                similarity: s.score
+            }} END) AS similar_chunks
+        }}"""
+        
+        expansion = bounded_expansion_cypher(
+            "initial_chunk",
+            [mentions_relationship, "NEXT_CHUNK"],
+            max_traversal_depth,
+            node_labels=["Chunk", entity_label]
+        )
         
         query = f"""
         // 1. Búsqueda vectorial inicial
         CALL db.index.vector.queryNodes('chunk_embeddings', $limit, $query_vector)
         YIELD node as initial_chunk, score as initial_score
         
-        // 2. Encontrar entidades mencionadas en chunks iniciales
-        OPTIONAL MATCH (initial_chunk)-[:{mentions_relationship}]->(entity:{entity_label})
+        // 2. Expansión acotada por entidades y chunks vecinos
+        {expansion}
         
-        // 3. Encontrar otros chunks relacionados a través de entidades
-        // Traversal de profundidad variable
-        OPTIONAL MATCH path = (entity)<-[:{mentions_relationship}]-(related_chunk:Chunk)
-        WHERE related_chunk <> initial_chunk
-        
-        // 4. Agregar contexto de chunks relacionados
-        WITH initial_chunk, initial_score, 
-             collect(DISTINCT {{
-                 chunk: related_chunk,
-                 entity: entity.text,
-                 path_length: length(path)
-             }}) as related_context
-        
-        // 5. También buscar chunks vecinos (NEXT_CHUNK)
-        OPTIONAL MATCH (initial_chunk)-[:NEXT_CHUNK]-(neighbor:Chunk)
-        
-        WITH initial_chunk, initial_score, related_context,
-             collect(DISTINCT neighbor) as neighbors
+        // 3. Vecinos kNN precalculados (opcional)
+        {similar}
         
+        // 4. Contexto: chunks alcanzados (con la entidad por la que se llegó) y vecinos directos
         RETURN {{
             central_chunk: {{
                 content: initial_chunk.page_content,
                 chunk_id: initial_chunk.chunk_id,
                 score: initial_score
             }},
-            related_chunks: related_context,
-            neighbor_chunks: [n IN neighbors | {{
-                content: n.page_content,
-                chunk_id: n.chunk_id
-            }}]
+            related_chunks: [x IN expansion
+                WHERE 'Chunk' IN labels(x.node) AND NOT (x.depth = 1 AND x.via = 'NEXT_CHUNK') | {{
+                    chunk: {{content: x.node.page_content, chunk_id: x.node.chunk_id}},
+                    entity: CASE WHEN '{entity_label}' IN labels(x.parent)
+                                 THEN coalesce(x.parent.name, x.parent.text) END,
+                    path_length: x.depth
+                }}],
+            neighbor_chunks: [x IN expansion WHERE x.depth = 1 AND x.via = 'NEXT_CHUNK' | {{
+                content: x.node.page_content,
+                chunk_id: x.node.chunk_id
+            }}],
+            entities: [x IN expansion WHERE '{entity_label}' IN labels(x.node) |
+                       coalesce(x.node.name, x.node.text)],
+            similar_chunks: similar_chunks
         }} as result
         ORDER BY initial_score DESC
         LIMIT $limit
@@ -118,7 +235,10 @@ class AdvancedSearchPatterns:
             "query_text": query_text,
             "query_vector": query_vector,
             "limit": limit,
-            "max_traversal_depth": max_traversal_depth
+            "max_traversal_depth": max_traversal_depth,
+            "fan_out": fan_out,
+            "max_nodes": max_nodes,
+            "max_degree": max_degree
         }
     
     @staticmethod
@@ -126,19 +246,42 @@ class AdvancedSearchPatterns:
         query_text: str,
         limit: int = 5,
         community_threshold: int = 3,
-        max_depth: int = 2
+        max_depth: int = 2,
+        relationship_types: Optional[List[str]] = None,
+        fan_out: int = DEFAULT_FAN_OUT,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        max_degree: int = DEFAULT_MAX_DEGREE,
+        seed_limit: Optional[int] = None,
+        summary_sentences: int = 5,
+        summary_max_characters: int = 1000
     ) -> Tuple[str, Dict[str, Any]]:
         """
         Local Retriever: Búsqueda en subgrafos relacionados (comunidades pequeñas).
         
         Similar a Community Summary pero optimizado para comunidades más pequeñas.
-        No requiere GDS, usa traversal básico de Cypher.
+        No requiere GDS, usa traversal básico de Cypher. El resumen es el
+        materializado de la comunidad GDS del chunk central si existe
+        (GDSService.detect_communities y CommunitySummaryService); si no, se
+        construye en la consulta con las primeras `summary_sentences`
+        oraciones de la comunidad local (leyendo como mucho ese número de
+        chunks), recortado a `summary_max_characters` caracteres.
+        
+        La comunidad local se obtiene con bounded_expansion_cypher: solo los
+        tipos de relación permitidos, `fan_out` vecinos por nodo y salto, sin
+        expandir hubs y con `max_nodes` nodos como máximo por chunk central.
         
         Args:
             query_text: Texto a buscar
             limit: Número máximo de resultados
             community_threshold: Tamaño mínimo de comunidad
             max_depth: Profundidad máxima de relaciones (1-3 recomendado)
+            relationship_types: Relaciones que se recorren (default: NEXT_CHUNK y MENTIONS)
+            fan_out: Vecinos máximos por nodo y salto
+            max_nodes: Nodos alcanzados máximos por chunk central
+            max_degree: Grado a partir del cual un nodo no se expande (hub)
+            seed_limit: Chunks centrales del full-text que se expanden (default: 4 * limit)
+            summary_sentences: Oraciones del resumen construido en la consulta
+            summary_max_characters: Caracteres máximos del resumen construido en la consulta
         
         Returns:
             Tuple de (query_cypher, parameters_dict)
@@ -153,31 +296,46 @@ class AdvancedSearchPatterns:
         """
         if max_depth < 1 or max_depth > 3:
             raise ValueError("max_depth must be between 1 and 3")
+        if summary_sentences < 1 or summary_max_characters < 1:
+            raise ValueError("summary_sentences and summary_max_characters must be positive")
+        
+        expansion = bounded_expansion_cypher(
+            "central_node",
+            relationship_types or ["NEXT_CHUNK", "MENTIONS"],
+            max_depth
+        )
         
         query = f"""
-        // 1. Buscar chunk central
+        // 1. Buscar chunks centrales (solo los mejores se expanden)
         CALL db.index.fulltext.queryNodes("chunk_content", $query_text)
         YIELD node as central_node, score
+        WITH central_node, score
+        ORDER BY score DESC
+        LIMIT $seed_limit
         
-        // 2. Encontrar comunidad local (chunks relacionados)
-        MATCH path = (central_node)-[*1..{max_depth}]-(community_node:Chunk)
-        WHERE community_node <> central_node
+        // 2. Encontrar comunidad local (expansión acotada)
+        {expansion}
         
-        // 3. Agrupar por chunk central y contar comunidad
+        // 3. Chunks de la comunidad y su tamaño
         WITH central_node, score,
-             collect(DISTINCT community_node) as community,
-             count(DISTINCT community_node) as community_size
+             [x IN expansion WHERE 'Chunk' IN labels(x.node) | x.node] as community
+        WITH central_node, score, community, size(community) as community_size
         
         // 4. Filtrar por threshold mínimo
         WHERE community_size >= $community_threshold
         
-        // 5. Construir resumen de comunidad
+        // 5. Resumen precalculado de la comunidad GDS del chunk central o, si no
+        //    existe, primeras oraciones de la comunidad local (acotado)
         WITH central_node, score, community, community_size,
-             reduce(
-                 summary = "",
-                 node IN community |
-                 summary + " " + coalesce(node.page_content, "")
-             ) as community_text
+             head([(central_node)-[:IN_COMMUNITY]->(c:Community) | c.summary]) as materialized
+        WITH central_node, score, community, community_size, materialized,
+             CASE WHEN materialized IS NULL THEN
+                 split(trim(reduce(
+                     text = "",
+                     n IN community[..$summary_sentences] |
+                     text + " " + coalesce(n.page_content, "")
+                 )), ". ")[..$summary_sentences]
+             ELSE [] END as sentences
         
         RETURN {{
             central_content: central_node.page_content,
@@ -188,7 +346,11 @@ class AdvancedSearchPatterns:
                 content: n.page_content,
                 chunk_id: n.chunk_id
             }}],
-            community_summary: trim(community_text)
+            community_summary: coalesce(materialized, left(trim(reduce(
+                summary = "",
+                sentence IN [x IN sentences WHERE trim(x) <> ""] |
+                summary + " " + CASE WHEN sentence =~ '(?s).*[.!?]' THEN sentence ELSE sentence + "." END
+            )), $summary_max_characters))
         }} as result
         ORDER BY score DESC, community_size DESC
         LIMIT $limit
@@ -197,7 +359,13 @@ class AdvancedSearchPatterns:
         return query, {
             "query_text": query_text,
             "limit": limit,
-            "community_threshold": community_threshold
+            "community_threshold": community_threshold,
+            "fan_out": fan_out,
+            "max_nodes": max_nodes,
+            "max_degree": max_degree,
+            "seed_limit": seed_limit or 4 * limit,
+            "summary_sentences": summary_sentences,
+            "summary_max_characters": summary_max_characters
         }
     
     @staticmethod
@@ -226,9 +394,9 @@ class AdvancedSearchPatterns:
         
         Note:
             Este query requiere que se haya ejecutado previamente:
-            1. Crear grafo proyectado en GDS
-            2. Ejecutar algoritmo de detección de comunidades
-            3. Escribir comunidades de vuelta al grafo
+            1. GDSService.detect_communities (escribe community_id en los chunks)
+            2. CommunitySummaryService.refresh_summaries (nodos Community con
+               el resumen de cada comunidad y relaciones IN_COMMUNITY)
         
         Example:
             >>> query, params = AdvancedSearchPatterns.community_summary_retriever_gds(
@@ -241,46 +409,27 @@ class AdvancedSearchPatterns:
         if algorithm not in ["louvain", "leiden"]:
             raise ValueError("algorithm must be 'louvain' or 'leiden'")
         
-        # Este query asume que las comunidades ya fueron calculadas y escritas
-        # como propiedades en los nodos Chunk (ej: chunk.community_id)
+        # Este query asume que las comunidades y sus resúmenes ya fueron
+        # materializados (Community.summary, tamaño incluido el chunk central)
         query = """
         // 1. Buscar chunk central
         CALL db.index.fulltext.queryNodes("chunk_content", $query_text)
         YIELD node as central_node, score
         
-        // 2. Encontrar comunidad del chunk central
-        // Asume que chunk.community_id fue escrito por GDS
-        MATCH (central_node:Chunk)
-        WHERE central_node.community_id IS NOT NULL
+        // 2. Comunidad del chunk central, con su resumen precalculado
+        MATCH (central_node:Chunk)-[:IN_COMMUNITY]->(community:Community)
         
-        // 3. Encontrar todos los chunks de la misma comunidad
-        MATCH (community_node:Chunk)
-        WHERE community_node.community_id = central_node.community_id
-          AND community_node <> central_node
-        
-        // 4. Agrupar y contar
-        WITH central_node, score,
-             collect(DISTINCT community_node) as community,
-             count(DISTINCT community_node) as community_size
-        
-        // 5. Filtrar por tamaño mínimo
+        // 3. Filtrar por tamaño mínimo (sin contar el chunk central)
+        WITH central_node, score, community, community.size - 1 as community_size
         WHERE community_size >= $min_community_size
         
-        // 6. Construir resumen
-        WITH central_node, score, community, community_size,
-             reduce(
-                 summary = "",
-                 node IN community |
-                 summary + " " + coalesce(node.page_content, "")
-             ) as community_text
-        
         RETURN {
             central_content: central_node.page_content,
             central_chunk_id: central_node.chunk_id,
             central_score: score,
-            community_id: central_node.community_id,
+            community_id: community.community_id,
             community_size: community_size,
-            community_summary: trim(community_text)
+            community_summary: community.summary
         } as result
         ORDER BY score DESC, community_size DESC
         LIMIT $limit
@@ -0,0 +1,339 @@
+"""
+Servicio de resúmenes de comunidades materializados en el grafo.
+
+Precalcula un resumen acotado por comunidad (la propiedad que escribe
+GDSService.detect_communities, `community_id` por defecto) y lo guarda en
+un nodo Community unido a sus chunks con IN_COMMUNITY:
+
+    (:Chunk)-[:IN_COMMUNITY]->(:Community {community_id, summary, size, ...})
+
+Los retrievers de comunidades leen `summary` en lugar de concatenar el
+texto de todos los chunks de la comunidad en cada consulta.
+
+El resumen es extractivo (las oraciones más cercanas al centroide de los
+embeddings de la comunidad) o, con un LLM (p. ej. ChatOllama local), una
+reescritura de esas oraciones. Solo se recalculan las comunidades cuya
+membresía cambió desde la última ejecución.
+
+Ejemplo de uso:
+    >>> gds_service.detect_communities(incremental=True)
+    >>> service = CommunitySummaryService()
+    >>> stats = service.refresh_summaries()
+    >>> stats["refreshed"], stats["unchanged"]
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ungraph.utils.semantic_chunker import SENTENCE_SPLIT_REGEX
+
+logger = logging.getLogger(__name__)
+
+# Propiedades que se interpolan en Cypher
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_SENTENCE_SPLIT = re.compile(SENTENCE_SPLIT_REGEX)
+
+SUMMARY_PROMPT = (
+    "Summarize the following excerpts from one topic of a document collection "
+    "in at most {max_characters} characters. Answer with the summary only.\n\n{excerpts}"
+)
+
+
+class CommunitySummaryService:
+    """
+    Calcula y persiste resúmenes de comunidades de chunks.
+
+    Requiere que los chunks tengan la propiedad de comunidad
+    (GDSService.detect_communities).
+    """
+
+    def __init__(
+        self,
+        database: str = "neo4j",
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        llm: Any = None
+    ):
+        """
+        Inicializa el servicio.
+
+        Args:
+            database: Nombre de la base de datos Neo4j
+            embed: Función textos -> matriz (n, d) para puntuar oraciones
+                   (p. ej. HuggingFaceEmbeddingService.encode_texts). Sin ella
+                   se eligen las primeras oraciones de los chunks más centrales.
+            llm: Modelo con `invoke(prompt)` (LangChain) para resúmenes
+                 abstractivos; sin él, el resumen es extractivo
+        """
+        self.database = database
+        self.embed = embed
+        self.llm = llm
+        self._driver = None
+
+    def _get_driver(self):
+        """Obtiene o crea el driver de Neo4j."""
+        if self._driver is None:
+            from ...utils.graph_operations import graph_session
+            self._driver = graph_session()
+        return self._driver
+
+    def refresh_summaries(
+        self,
+        community_property: str = "community_id",
+        min_size: int = 2,
+        max_characters: int = 1500,
+        max_sentences: int = 8,
+        candidate_chunks: int = 8,
+        batch_size: int = 50,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Crea o actualiza los nodos Community y sus resúmenes.
+
+        Args:
+            community_property: Propiedad de Chunk con la comunidad
+            min_size: Chunks mínimos para materializar una comunidad
+            max_characters: Longitud máxima de cada resumen
+            max_sentences: Oraciones máximas de un resumen extractivo
+            candidate_chunks: Chunks más cercanos al centroide de los que se
+                              toman oraciones candidatas
+            batch_size: Comunidades por lote de lectura y escritura
+            force: Recalcular también las comunidades sin cambios
+
+        Returns:
+            Dict con comunidades totales, recalculadas, sin cambios y eliminadas
+
+        Raises:
+            ValueError: Si community_property no es un identificador válido
+        """
+        if not _IDENTIFIER.match(community_property):
+            raise ValueError(f"Invalid community property: {community_property!r}")
+
+        driver = self._get_driver()
+        with driver.session(database=self.database) as session:
+            self._setup_indexes(session, community_property)
+
+            # 1. Membresía actual y huella de la última ejecución
+            memberships = {
+                record["community"]: record["members"]
+                for record in session.run(f"""
+                    MATCH (c:Chunk) WHERE c.{community_property} IS NOT NULL
+                    WITH c.{community_property} AS community, collect(c.chunk_id) AS members
+                    WHERE size(members) >= $min_size
+                    RETURN community, members
+                """, min_size=min_size)
+            }
+            stored = {
+                record["community"]: record["membership_hash"]
+                for record in session.run("""
+                    MATCH (k:Community {community_property: $property})
+                    RETURN k.community_id AS community, k.membership_hash AS membership_hash
+                """, property=community_property)
+            }
+
+            # 2. Comunidades que ya no existen (o quedaron por debajo de min_size)
+            removed = [community for community in stored if community not in memberships]
+            if removed:
+                session.run("""
+                    MATCH (k:Community {community_property: $property})
+                    WHERE k.community_id IN $removed
+                    DETACH DELETE k
+                """, property=community_property, removed=removed).consume()
+
+            # 3. Recalcular solo las comunidades cuya membresía cambió
+            hashes = {community: _membership_hash(members) for community, members in memberships.items()}
+            changed = [
+                community for community in memberships
+                if force or stored.get(community) != hashes[community]
+            ]
+            for offset in range(0, len(changed), batch_size):
+                batch = changed[offset:offset + batch_size]
+                members = self._read_members(session, community_property, batch)
+                rows = []
+                for community in batch:
+                    summary = self._summarize(
+                        members.get(community, []), max_characters, max_sentences, candidate_chunks
+                    )
+                    rows.append({
+                        'community_id': community,
+                        'members': memberships[community],
+                        'properties': {
+                            'summary': summary,
+                            'size': len(memberships[community]),
+                            'membership_hash': hashes[community],
+                            'summary_method': 'llm' if self.llm is not None else 'extractive'
+                        }
+                    })
+                self._write_communities(session, community_property, rows)
+                logger.info(f"Refreshed {min(offset + batch_size, len(changed))}/{len(changed)} community summaries")
+
+        stats = {
+            'communities': len(memberships),
+            'refreshed': len(changed),
+            'unchanged': len(memberships) - len(changed),
+            'removed': len(removed),
+            'community_property': community_property
+        }
+        logger.info(
+            f"Community summaries: {stats['refreshed']} refreshed, {stats['unchanged']} unchanged, "
+            f"{stats['removed']} removed"
+        )
+        return stats
+
+    def _setup_indexes(self, session, community_property: str) -> None:
+        """Índices para leer los miembros de cada comunidad y encontrar sus nodos."""
+        session.run(
+            f"CREATE INDEX chunk_{community_property} IF NOT EXISTS "
+            f"FOR (c:Chunk) ON (c.{community_property})"
+        ).consume()
+        session.run(
+            "CREATE INDEX community_id IF NOT EXISTS "
+            "FOR (k:Community) ON (k.community_property, k.community_id)"
+        ).consume()
+
+    def _read_members(
+        self,
+        session,
+        community_property: str,
+        communities: List[Any]
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """Texto, posición y embedding de los chunks de cada comunidad."""
+        records = session.run(f"""
+            UNWIND $communities AS community
+            MATCH (c:Chunk) WHERE c.{community_property} = community
+            RETURN community, c.page_content AS content, c.embeddings AS embeddings,
+                   c.chunk_id_consecutive AS consecutive, c.chunk_id AS chunk_id
+        """, communities=communities)
+        members: Dict[Any, List[Dict[str, Any]]] = {}
+        for record in records:
+            members.setdefault(record["community"], []).append(dict(record))
+        return members
+
+    def _write_communities(self, session, community_property: str, rows: List[Dict[str, Any]]) -> None:
+        """Crea o actualiza los nodos Community y reemplaza sus relaciones IN_COMMUNITY."""
+        session.run("""
+            UNWIND $rows AS row
+            MERGE (k:Community {community_property: $property, community_id: row.community_id})
+            SET k += row.properties, k.updated_at = datetime()
+            WITH k, row
+            CALL {
+                WITH k
+                MATCH (:Chunk)-[old:IN_COMMUNITY]->(k)
+                DELETE old
+            }
+            WITH k, row
+            UNWIND row.members AS chunk_id
+            MATCH (c:Chunk {chunk_id: chunk_id})
+            MERGE (c)-[:IN_COMMUNITY]->(k)
+        """, property=community_property, rows=rows).consume()
+
+    def _summarize(
+        self,
+        members: List[Dict[str, Any]],
+        max_characters: int,
+        max_sentences: int,
+        candidate_chunks: int
+    ) -> str:
+        """Resumen acotado de una comunidad (extractivo, o del LLM sobre el extractivo)."""
+        if not members:
+            return ""
+        # Con LLM, las oraciones extractivas son su entrada (acotada)
+        limit = max_characters * 4 if self.llm is not None else max_characters
+        sentences = self._extractive_sentences(
+            members, limit, max_sentences * (4 if self.llm is not None else 1), candidate_chunks
+        )
+        extract = " ".join(sentences)
+        if self.llm is None:
+            return extract
+        try:
+            response = self.llm.invoke(SUMMARY_PROMPT.format(max_characters=max_characters, excerpts=extract))
+            summary = str(getattr(response, "content", response)).strip()
+        except Exception as e:
+            logger.warning(f"LLM summary failed, using extractive summary: {e}")
+            return " ".join(self._truncate(sentences, max_characters))
+        return summary[:max_characters]
+
+    def _extractive_sentences(
+        self,
+        members: List[Dict[str, Any]],
+        max_characters: int,
+        max_sentences: int,
+        candidate_chunks: int
+    ) -> List[str]:
+        """
+        Oraciones más representativas de la comunidad, en el orden del documento.
+
+        Los chunks se ordenan por similitud coseno con el centroide de sus
+        embeddings; las oraciones de los `candidate_chunks` primeros se
+        puntúan contra el mismo centroide (con `embed`) o por chunk y
+        posición (primeras oraciones primero).
+        """
+        members = sorted(members, key=lambda member: member.get("consecutive") or 0)
+        vectors = [member.get("embeddings") for member in members]
+        centroid = None
+        if all(vector is not None and len(vector) for vector in vectors):
+            matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+            centroid = _normalize(matrix.mean(axis=0, keepdims=True))[0]
+            chunk_scores = matrix @ centroid
+        else:
+            chunk_scores = np.zeros(len(members), dtype=np.float32)
+        candidates = np.argsort(-chunk_scores, kind="stable")[:candidate_chunks]
+
+        # (chunk, posición, texto, score) de cada oración candidata
+        sentences: List[Tuple[int, int, str, float]] = []
+        for index in candidates:
+            content = members[index].get("content") or ""
+            for position, sentence in enumerate(s.strip() for s in _SENTENCE_SPLIT.split(content)):
+                if sentence:
+                    sentences.append((int(index), position, sentence, float(chunk_scores[index]) - 1e-3 * position))
+        if not sentences:
+            return []
+        if self.embed is not None and centroid is not None:
+            sentence_vectors = _normalize(np.asarray(self.embed([s[2] for s in sentences]), dtype=np.float32))
+            scores = sentence_vectors @ centroid
+            sentences = [(index, position, text, float(score)) for (index, position, text, _), score in zip(sentences, scores)]
+
+        selected = []
+        length = 0
+        for sentence in sorted(sentences, key=lambda s: -s[3]):
+            if len(selected) >= max_sentences:
+                break
+            if selected and length + len(sentence[2]) + 1 > max_characters:
+                continue
+            selected.append(sentence)
+            length += len(sentence[2]) + 1
+        selected.sort(key=lambda s: (s[0], s[1]))
+        return self._truncate([s[2] for s in selected], max_characters)
+
+    @staticmethod
+    def _truncate(sentences: List[str], max_characters: int) -> List[str]:
+        """Recorta la última oración si el total excede max_characters."""
+        result = []
+        length = 0
+        for sentence in sentences:
+            room = max_characters - length - (1 if result else 0)
+            if room <= 0:
+                break
+            result.append(sentence[:room])
+            length += len(result[-1]) + (1 if len(result) > 1 else 0)
+        return result
+
+    def close(self) -> None:
+        """Cierra la conexión a Neo4j."""
+        if self._driver:
+            self._driver.close()
+            self._driver = None
+
+
+def _membership_hash(members: List[str]) -> str:
+    """Huella de la membresía de una comunidad (independiente del orden)."""
+    return hashlib.sha1("\n".join(sorted(str(member) for member in members)).encode()).hexdigest()
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,203 @@
+"""
+Implementación: CrossEncoderReranker
+
+Implementa RerankerService con un cross-encoder de sentence-transformers
+en CPU.
+
+Los N mejores candidatos de la primera etapa se puntúan en un solo forward
+por lotes (consulta y chunk juntos), así el top-k final no depende de pedir
+un `limit` grande y recortar a mano. Para acotar la latencia:
+
+- El modelo se carga una vez por proceso (`_MODELS`) y se comparte entre
+  instancias.
+- Los scores de (consulta, chunk_id) se guardan en un LRU: las consultas
+  repetidas solo puntúan los candidatos nuevos.
+- El corte temprano descarta antes del forward los candidatos cuyo score
+  de primera etapa queda muy por debajo del mejor.
+- Las parejas se truncan a `max_length` tokens.
+
+Con el modelo por defecto (MiniLM de 6 capas), 20 candidatos y 256 tokens,
+el forward en CPU cuesta unas decenas de milisegundos.
+
+Ejemplo de uso:
+    >>> reranker = CrossEncoderReranker(top_n=20, early_cutoff=0.5)
+    >>> service = Neo4jSearchService(reranker=reranker)
+    >>> results = service.hybrid_search(query_text, query_embedding, limit=5)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ungraph.domain.services.reranker_service import RerankerService
+from ungraph.domain.services.search_service import SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Modelos cargados: (modelo, max_length, device) -> CrossEncoder
+_MODELS: Dict[Tuple[str, int, str], Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def _load_model(model_name: str, max_length: int, device: str) -> Any:
+    """Carga el cross-encoder una sola vez por proceso."""
+    key = (model_name, max_length, device)
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            from sentence_transformers import CrossEncoder
+
+            start = time.perf_counter()
+            _MODELS[key] = CrossEncoder(model_name, max_length=max_length, device=device)
+            logger.info(
+                f"Cross-encoder loaded: {model_name} on {device} "
+                f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+            )
+        return _MODELS[key]
+
+
+class CrossEncoderReranker(RerankerService):
+    """
+    Reordenador con un cross-encoder en CPU.
+
+    El score de cada resultado reordenado se reemplaza por el del
+    cross-encoder (más alto = más relevante).
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        top_n: int = 20,
+        early_cutoff: float = 0.0,
+        max_length: int = 256,
+        cache_size: int = 4096,
+        device: str = "cpu"
+    ):
+        """
+        Inicializa el reordenador. El modelo se carga en el primer uso.
+
+        Args:
+            model_name: Cross-encoder de HuggingFace
+            top_n: Candidatos de la primera etapa que se puntúan (default: 20)
+            early_cutoff: Fracción del mejor score de primera etapa por debajo de
+                          la cual un candidato no pasa por el cross-encoder y se
+                          queda tras los reordenados (0 = puntuar todos)
+            max_length: Tokens máximos de cada pareja consulta-chunk
+            cache_size: Scores (consulta, chunk_id) guardados en el LRU
+                        (0 = sin caché)
+            device: Dispositivo de torch (default: "cpu")
+
+        Raises:
+            ValueError: Si top_n, max_length o cache_size no son válidos,
+                        o early_cutoff no está en [0, 1]
+        """
+        if top_n < 1:
+            raise ValueError(f"top_n must be >= 1, got {top_n}")
+        if not 0.0 <= early_cutoff <= 1.0:
+            raise ValueError(f"early_cutoff must be between 0 and 1, got {early_cutoff}")
+        if max_length < 1:
+            raise ValueError(f"max_length must be >= 1, got {max_length}")
+        if cache_size < 0:
+            raise ValueError(f"cache_size must be >= 0, got {cache_size}")
+        self.model_name = model_name
+        self._top_n = top_n
+        self.early_cutoff = early_cutoff
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.device = device
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def top_n(self) -> int:
+        """Candidatos que se puntúan por consulta."""
+        return self._top_n
+
+    @property
+    def model(self) -> Any:
+        """CrossEncoder compartido en el proceso."""
+        return _load_model(self.model_name, self.max_length, self.device)
+
+    def rerank(
+        self,
+        query_text: str,
+        results: List[SearchResult],
+        limit: Optional[int] = None
+    ) -> List[SearchResult]:
+        """
+        Reordena los `top_n` primeros resultados con el cross-encoder.
+
+        Los candidatos descartados por el corte temprano y los que exceden
+        `top_n` se añaden después, en su orden y con su score original.
+
+        Args:
+            query_text: Texto de la consulta
+            results: Candidatos ordenados por el score de la primera etapa
+            limit: Número máximo de resultados (default: todos)
+
+        Returns:
+            Lista de SearchResult reordenada
+        """
+        if not results or not query_text:
+            return results[:limit] if limit is not None else results
+
+        candidates = results[:self._top_n]
+        tail = results[self._top_n:]
+        best = max(result.score for result in candidates)
+        if self.early_cutoff > 0 and best > 0:
+            cutoff = best * self.early_cutoff
+            tail = [result for result in candidates if result.score < cutoff] + tail
+            candidates = [result for result in candidates if result.score >= cutoff]
+
+        scores = self._scores(query_text, candidates)
+        for result, score in zip(candidates, scores):
+            result.score = score
+        candidates.sort(key=lambda result: result.score, reverse=True)
+
+        reranked = candidates + tail
+        return reranked[:limit] if limit is not None else reranked
+
+    def _scores(self, query_text: str, candidates: List[SearchResult]) -> List[float]:
+        """Scores del cross-encoder: del LRU o de un solo forward por lotes."""
+        keys = [(query_text, result.chunk_id or result.content) for result in candidates]
+        scores: List[Optional[float]] = [None] * len(candidates)
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        self.cache_hits += len(candidates) - len(missing)
+        self.cache_misses += len(missing)
+        if not missing:
+            return scores
+
+        start = time.perf_counter()
+        predicted = self.model.predict(
+            [(query_text, candidates[i].content or "") for i in missing],
+            batch_size=len(missing),
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        logger.debug(
+            f"Cross-encoder scored {len(missing)} pairs in "
+            f"{(time.perf_counter() - start) * 1000:.1f} ms ({len(candidates) - len(missing)} cached)"
+        )
+
+        with self._cache_lock:
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                if self.cache_size:
+                    self._cache[keys[i]] = scores[i]
+                    self._cache.move_to_end(keys[i])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scores
+
+    def clear_cache(self) -> None:
+        """Vacía el LRU de scores (p. ej. tras reingerir documentos)."""
+        with self._cache_lock:
+            self._cache.clear()
@@ -0,0 +1,343 @@
+"""
+Implementación: EmbeddingQuantizer
+
+Cuantización de embeddings para reducir memoria, almacenamiento y payload Bolt.
+
+Modos:
+- int8: 1 byte por dimensión. Rango por dimensión calibrado con percentiles.
+- binary: 1 bit por dimensión (signo respecto a la mediana por dimensión).
+
+Los parámetros se calibran por modelo de embeddings y se persisten en JSON,
+de modo que los códigos guardados en Neo4j y los del índice en proceso
+sean siempre comparables entre ingestas.
+
+La calibración debe ver una muestra suficiente (`min_calibration_size`
+vectores): calibrate() la fija explícitamente; si no, encode() calibra de
+forma provisional con los lotes que recibe (sin persistirla) hasta reunir
+la muestra. En int8, si un lote posterior excede los rangos calibrados
+(demasiados valores recortados), los rangos se amplían. Cada cambio de
+parámetros incrementa `version` y cambia `calibration_id`: quien guarde
+códigos debe re-codificarlos al detectarlo (NumpyVectorIndex compara
+`version`; en Neo4j cada Chunk guarda el `calibration_id` de sus códigos).
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Número de bits a 1 para cada byte (popcount por tabla)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Vectores mínimos para una calibración definitiva
+MIN_CALIBRATION_SIZE = 1_000
+# Vectores máximos guardados como muestra durante la calibración provisional
+_MAX_CALIBRATION_SAMPLE = 20_000
+# Fracción de valores fuera de rango (int8) a partir de la cual se amplían los rangos
+_CLIP_TOLERANCE = 0.02
+
+
+class EmbeddingQuantizer:
+    """
+    Codifica y puntúa embeddings en int8 o binario.
+
+    Ejemplo:
+        >>> quantizer = EmbeddingQuantizer("int8", model_name="all-MiniLM-L6-v2")
+        >>> quantizer.calibrate(sample_matrix)
+        >>> codes = quantizer.encode(matrix)          # (n, d) int8
+        >>> scores = quantizer.score(query, codes)    # similitud aproximada
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        model_name: str = "unknown",
+        lower: Optional[Sequence[float]] = None,
+        upper: Optional[Sequence[float]] = None,
+        threshold: Optional[Sequence[float]] = None,
+        calibration_dir: Optional[str | Path] = None,
+        min_calibration_size: int = MIN_CALIBRATION_SIZE
+    ):
+        """
+        Inicializa el cuantizador.
+
+        Args:
+            mode: "int8" o "binary"
+            model_name: Modelo de embeddings al que pertenecen los parámetros
+            lower: Límite inferior por dimensión (int8, calibrado)
+            upper: Límite superior por dimensión (int8, calibrado)
+            threshold: Umbral por dimensión (binary, calibrado)
+            calibration_dir: Directorio donde persistir la calibración (opcional)
+            min_calibration_size: Vectores mínimos para fijar la calibración
+                                  automática (default: 1000)
+
+        Raises:
+            ValueError: Si el modo no es válido
+        """
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Invalid quantization mode: '{mode}'. Valid options: 'int8', 'binary'")
+
+        self.mode = mode
+        self.model_name = model_name
+        self.lower = None if lower is None else np.asarray(lower, dtype=np.float32)
+        self.upper = None if upper is None else np.asarray(upper, dtype=np.float32)
+        self.threshold = None if threshold is None else np.asarray(threshold, dtype=np.float32)
+        self.calibration_dir = Path(calibration_dir).expanduser() if calibration_dir else None
+        self.min_calibration_size = min_calibration_size
+        # Calibración automática aún sin muestra suficiente
+        self.provisional = False
+        self._sample: list = []
+        self._sample_size = 0
+        self.version = 0
+        self._calibration_id: Optional[str] = None
+
+    @property
+    def calibrated(self) -> bool:
+        """True si el cuantizador ya tiene parámetros."""
+        if self.mode == "int8":
+            return self.lower is not None and self.upper is not None
+        return self.threshold is not None
+
+    @property
+    def calibration_id(self) -> str:
+        """Hash corto de los parámetros (permite detectar códigos incompatibles)."""
+        if self._calibration_id is None:
+            digest = hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode("utf-8"))
+            self._calibration_id = digest.hexdigest()[:12]
+        return self._calibration_id
+
+    def _parameters_changed(self) -> None:
+        self.version += 1
+        self._calibration_id = None
+
+    def code_nbytes(self, dimensions: int) -> int:
+        """Bytes por vector codificado."""
+        return dimensions if self.mode == "int8" else (dimensions + 7) // 8
+
+    # ------------------------------------------------------------------
+    # Calibración
+    # ------------------------------------------------------------------
+
+    def calibrate(self, matrix: np.ndarray, percentile: float = 0.5) -> None:
+        """
+        Calibra los parámetros a partir de una muestra de embeddings.
+
+        Es el paso explícito recomendado antes de codificar: fija (y persiste)
+        la calibración con la muestra dada, sea cual sea su tamaño.
+
+        Args:
+            matrix: Muestra (n, d) de embeddings del modelo
+            percentile: Percentil recortado en cada extremo para int8 (default: 0.5)
+        """
+        self._fit(matrix, percentile)
+        self.provisional = False
+        self._sample = []
+        self._sample_size = 0
+        if self.calibration_dir is not None:
+            self.save()
+
+    def _fit(self, matrix: np.ndarray, percentile: float = 0.5) -> None:
+        """Calcula los parámetros sobre `matrix`."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] == 0:
+            raise ValueError("Calibration requires a non-empty (n, d) matrix")
+
+        if self.mode == "int8":
+            self.lower = np.percentile(matrix, percentile, axis=0).astype(np.float32)
+            self.upper = np.percentile(matrix, 100.0 - percentile, axis=0).astype(np.float32)
+            # Dimensiones constantes: evitar escala cero
+            flat = self.upper <= self.lower
+            self.upper[flat] = self.lower[flat] + 1e-6
+        else:
+            self.threshold = np.median(matrix, axis=0).astype(np.float32)
+
+        self._parameters_changed()
+        logger.info(
+            f"Calibrated {self.mode} quantizer for model '{self.model_name}' "
+            f"on {matrix.shape[0]} vectors"
+        )
+
+    def ensure_calibrated(self, matrix: np.ndarray) -> None:
+        """
+        Calibra automáticamente con los lotes que se codifican.
+
+        Mientras la muestra acumulada no llega a `min_calibration_size`, la
+        calibración es provisional (se recalcula con cada lote y no se
+        persiste). Con una calibración definitiva no hace nada.
+        """
+        if self.calibrated and not self.provisional:
+            return
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+        if self._sample_size < _MAX_CALIBRATION_SAMPLE:
+            self._sample.append(matrix[:_MAX_CALIBRATION_SAMPLE - self._sample_size])
+            self._sample_size += len(self._sample[-1])
+        self._fit(np.concatenate(self._sample))
+        self.provisional = self._sample_size < self.min_calibration_size
+        if not self.provisional:
+            self._sample = []
+            if self.calibration_dir is not None:
+                self.save()
+
+    def _widen_ranges(self, matrix: np.ndarray, percentile: float = 0.5) -> None:
+        """Amplía los rangos int8 si `matrix` queda demasiado fuera de ellos."""
+        clipped = np.count_nonzero((matrix < self.lower) | (matrix > self.upper))
+        if clipped <= _CLIP_TOLERANCE * matrix.size:
+            return
+        self.lower = np.minimum(self.lower, np.percentile(matrix, percentile, axis=0)).astype(np.float32)
+        self.upper = np.maximum(self.upper, np.percentile(matrix, 100.0 - percentile, axis=0)).astype(np.float32)
+        self._parameters_changed()
+        logger.info(
+            f"Widened int8 ranges of quantizer for model '{self.model_name}' "
+            f"({clipped / matrix.size:.1%} of values were out of range)"
+        )
+        if self.calibration_dir is not None and not self.provisional:
+            self.save()
+
+    # ------------------------------------------------------------------
+    # Codificación y puntuación
+    # ------------------------------------------------------------------
+
+    def encode(self, matrix: np.ndarray, adapt: bool = True) -> np.ndarray:
+        """
+        Codifica una matriz (n, d) de embeddings.
+
+        Con adapt=True la calibración puede cambiar durante la llamada (ver
+        ensure_calibrated y _widen_ranges); los códigos devueltos usan siempre
+        la actual. Con adapt=False se codifica con la calibración actual sin
+        modificarla (p. ej. al re-codificar códigos antiguos).
+
+        Returns:
+            int8 (n, d) para int8, uint8 (n, ceil(d / 8)) para binary
+
+        Raises:
+            ValueError: Si adapt=False y el cuantizador no está calibrado
+        """
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+        if adapt:
+            self.ensure_calibrated(matrix)
+        elif not self.calibrated:
+            raise ValueError("Quantizer is not calibrated")
+
+        if self.mode == "int8":
+            if adapt:
+                self._widen_ranges(matrix)
+            scale = (self.upper - self.lower) / 255.0
+            codes = np.rint((matrix - self.lower) / scale) - 128.0
+            return np.clip(codes, -128, 127).astype(np.int8)
+
+        return np.packbits(matrix > self.threshold, axis=1)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruye vectores aproximados a partir de códigos int8."""
+        if self.mode != "int8":
+            raise ValueError("Only int8 codes can be decoded")
+        scale = (self.upper - self.lower) / 255.0
+        return self.lower + (codes.astype(np.float32) + 128.0) * scale
+
+    def score(self, query: np.ndarray, codes: np.ndarray, block_size: int = 4096) -> np.ndarray:
+        """
+        Similitud aproximada entre una consulta y vectores codificados.
+
+        Solo sirve para ordenar candidatos: la escala no es la del coseno.
+        - int8: producto escalar con los vectores decodificados (sin materializarlos)
+        - binary: -(distancia de Hamming)
+
+        Los códigos se leen por bloques contiguos (pasar una vista, no una
+        copia indexada); cada bloque int8 se convierte a float32 en un búfer
+        que cabe en caché. Aun así la conversión cuesta: la búsqueda int8
+        ahorra memoria (1/4 de float32 en RAM), no tiempo frente a un
+        producto float32 exacto.
+
+        Args:
+            query: Vector de consulta (d,)
+            codes: Códigos devueltos por encode()
+            block_size: Filas por bloque (limita la memoria temporal)
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+
+        if self.mode == "int8":
+            scale = (self.upper - self.lower) / 255.0
+            query_scaled = query * scale
+            offset = float(query @ self.lower + 128.0 * query_scaled.sum())
+            buffer = np.empty((min(block_size, codes.shape[0]), codes.shape[1]), dtype=np.float32)
+            for start in range(0, codes.shape[0], block_size):
+                block = codes[start:start + block_size]
+                converted = buffer[:block.shape[0]]
+                np.copyto(converted, block, casting="unsafe")
+                np.matmul(converted, query_scaled, out=scores[start:start + block.shape[0]])
+            scores += offset
+            return scores
+
+        query_bits = np.packbits(query > self.threshold)
+        for start in range(0, codes.shape[0], block_size):
+            xor = np.bitwise_xor(codes[start:start + block_size], query_bits)
+            scores[start:start + block_size] = -_POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+        return scores
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa modo, modelo y parámetros."""
+        return {
+            "mode": self.mode,
+            "model_name": self.model_name,
+            "lower": None if self.lower is None else self.lower.tolist(),
+            "upper": None if self.upper is None else self.upper.tolist(),
+            "threshold": None if self.threshold is None else self.threshold.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], calibration_dir: Optional[str | Path] = None) -> "EmbeddingQuantizer":
+        """Crea un cuantizador desde to_dict()."""
+        return cls(
+            mode=data["mode"],
+            model_name=data.get("model_name", "unknown"),
+            lower=data.get("lower"),
+            upper=data.get("upper"),
+            threshold=data.get("threshold"),
+            calibration_dir=calibration_dir
+        )
+
+    @staticmethod
+    def _calibration_file(calibration_dir: Path, model_name: str, mode: str) -> Path:
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        return calibration_dir / f"{slug}.{mode}.json"
+
+    def save(self, calibration_dir: Optional[str | Path] = None) -> Path:
+        """Persiste la calibración en `<dir>/<modelo>.<modo>.json`."""
+        directory = Path(calibration_dir).expanduser() if calibration_dir else self.calibration_dir
+        if directory is None:
+            raise ValueError("No calibration directory configured")
+        directory.mkdir(parents=True, exist_ok=True)
+        path = self._calibration_file(directory, self.model_name, self.mode)
+        path.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        return path
+
+    @classmethod
+    def for_model(
+        cls,
+        model_name: str,
+        mode: str,
+        calibration_dir: str | Path
+    ) -> "EmbeddingQuantizer":
+        """
+        Devuelve el cuantizador calibrado de un modelo, o uno vacío que se
+        calibrará (y persistirá) con el primer lote que codifique.
+        """
+        directory = Path(calibration_dir).expanduser()
+        path = cls._calibration_file(directory, model_name, mode)
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return cls.from_dict(data, calibration_dir=directory)
+        return cls(mode=mode, model_name=model_name, calibration_dir=directory)
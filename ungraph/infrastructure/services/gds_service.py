@@ -5,12 +5,17 @@ Este servicio proporciona funcionalidades avanzadas de análisis de grafos
 usando Neo4j Graph Data Science Library.
 """
 
+import hashlib
 import logging
+import re
 from typing import Optional, Dict, Any, List
 from neo4j import GraphDatabase
 
 logger = logging.getLogger(__name__)
 
+# Tipos de relación y propiedades que se interpolan en Cypher
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 
 class GDSService:
     """
@@ -60,23 +65,41 @@ class GDSService:
         graph_name: str = "chunk-graph",
         algorithm: str = "louvain",
         relationship_types: List[str] = None,
-        write_property: str = "community_id"
+        write_property: str = "community_id",
+        seed_property: Optional[str] = None,
+        incremental: bool = False,
+        max_heap_percentage: float = 90.0,
+        keep_projection: bool = False
     ) -> Dict[str, Any]:
         """
         Detecta comunidades en el grafo usando GDS.
         
+        El algoritmo se ejecuta una sola vez (modo write). La proyección se
+        nombra con la generación del grafo (`<graph_name>-g<generación>`),
+        así una proyección de un grafo que ya cambió no se reutiliza, y se
+        elimina al terminar salvo con `keep_projection`. Antes de proyectar
+        se estima la memoria (gds.<algoritmo>.write.estimate).
+        
         Args:
-            graph_name: Nombre del grafo proyectado en GDS
+            graph_name: Prefijo del nombre del grafo proyectado en GDS
             algorithm: Algoritmo a usar ("louvain" o "leiden")
             relationship_types: Tipos de relaciones a incluir (default: ["NEXT_CHUNK", "MENTIONS"])
             write_property: Nombre de la propiedad donde escribir el community_id
+            seed_property: Propiedad con comunidades iniciales (seedProperty de GDS)
+            incremental: Partir de las comunidades de la ejecución anterior
+                         (seed_property = write_property); los nodos nuevos
+                         reciben comunidad propia
+            max_heap_percentage: Máximo del heap de Neo4j que puede requerir la
+                                 proyección más el algoritmo, según la estimación
+            keep_projection: Conservar la proyección para ejecuciones sin semilla
+                             sobre la misma generación del grafo
         
         Returns:
             Dict con estadísticas de las comunidades detectadas
         
         Raises:
-            RuntimeError: Si GDS no está disponible
-            ValueError: Si el algoritmo no es válido
+            RuntimeError: Si GDS no está disponible o la estimación excede max_heap_percentage
+            ValueError: Si el algoritmo o un tipo de relación no es válido
         """
         if not self._check_gds_available():
             raise RuntimeError(
@@ -89,85 +112,184 @@ class GDSService:
         
         if relationship_types is None:
             relationship_types = ["NEXT_CHUNK", "MENTIONS"]
+        for name in [*relationship_types, write_property, *([seed_property] if seed_property else [])]:
+            if not _IDENTIFIER.match(name):
+                raise ValueError(f"Invalid relationship type or property name: {name!r}")
+        if incremental:
+            seed_property = seed_property or write_property
         
         driver = self._get_driver()
         
         try:
             with driver.session(database=self.database) as session:
-                # 1. Crear grafo proyectado si no existe
-                self._create_graph_projection(session, graph_name, relationship_types)
-                
-                # 2. Ejecutar algoritmo de detección de comunidades
-                if algorithm == "louvain":
-                    query = f"""
-                    CALL gds.louvain.stream('{graph_name}')
-                    YIELD nodeId, communityId
-                    RETURN gds.util.asNode(nodeId) as node, communityId
-                    """
-                else:  # leiden
-                    query = f"""
-                    CALL gds.leiden.stream('{graph_name}')
-                    YIELD nodeId, communityId
-                    RETURN gds.util.asNode(nodeId) as node, communityId
-                    """
+                # La semilla solo existe en el grafo tras una ejecución anterior
+                if seed_property and not self._property_exists(session, seed_property):
+                    logger.info(f"Seed property '{seed_property}' not found, running without seed")
+                    seed_property = None
                 
-                result = session.run(query)
+                # 1. Proyección con el nombre de la generación actual del grafo
+                generation = self._graph_generation(session, relationship_types)
+                projection = f"{graph_name}-g{generation}" + ("-seeded" if seed_property else "")
+                projection_config = self._projection_config(relationship_types, seed_property)
+                algorithm_config: Dict[str, Any] = {'writeProperty': write_property}
+                if seed_property:
+                    algorithm_config['seedProperty'] = seed_property
                 
-                # 3. Escribir community_id de vuelta a los nodos
-                write_query = f"""
-                CALL gds.{algorithm}.write('{graph_name}', {{
-                    writeProperty: '{write_property}'
-                }})
-                YIELD communityCount, ranIterations, didConverge
-                RETURN communityCount, ranIterations, didConverge
-                """
+                reuse = keep_projection and not seed_property and self._projection_exists(session, projection)
+                if not reuse:
+                    # 2. Estimar memoria antes de proyectar
+                    estimate = self._estimate_memory(session, algorithm, projection_config, algorithm_config)
+                    if estimate['heap_percentage'] > max_heap_percentage:
+                        raise RuntimeError(
+                            f"Community detection would need {estimate['required_memory']} "
+                            f"({estimate['heap_percentage']:.1f}% of the heap, "
+                            f"limit {max_heap_percentage:.1f}%)"
+                        )
+                    self._drop_stale_projections(session, graph_name, projection)
+                    self._create_graph_projection(session, projection, projection_config)
+                else:
+                    logger.info(f"Reusing graph projection '{projection}' (graph unchanged)")
                 
-                write_result = session.run(write_query)
-                stats = write_result.single()
+                try:
+                    # 3. Una sola ejecución del algoritmo, que escribe el community_id
+                    write_query = f"""
+                    CALL gds.{algorithm}.write($graph_name, $config)
+                    YIELD communityCount, ranIterations, didConverge, modularity,
+                          nodePropertiesWritten, computeMillis, writeMillis
+                    RETURN communityCount, ranIterations, didConverge, modularity,
+                           nodePropertiesWritten, computeMillis, writeMillis
+                    """
+                    stats = session.run(write_query, graph_name=projection, config=algorithm_config).single()
+                finally:
+                    if not (keep_projection and not seed_property):
+                        self._drop_projection(session, projection)
                 
-                logger.info(f"Detected {stats['communityCount']} communities using {algorithm}")
+                logger.info(
+                    f"Detected {stats['communityCount']} communities using {algorithm}"
+                    + (f" seeded from '{seed_property}'" if seed_property else "")
+                )
                 
                 return {
                     "algorithm": algorithm,
                     "community_count": stats["communityCount"],
                     "iterations": stats["ranIterations"],
                     "converged": stats["didConverge"],
-                    "write_property": write_property
+                    "modularity": stats["modularity"],
+                    "nodes_written": stats["nodePropertiesWritten"],
+                    "compute_millis": stats["computeMillis"],
+                    "write_millis": stats["writeMillis"],
+                    "write_property": write_property,
+                    "seed_property": seed_property,
+                    "projection": projection,
+                    "generation": generation,
+                    "projection_reused": reuse
                 }
         except Exception as e:
             logger.error(f"Error detecting communities: {e}", exc_info=True)
             raise
     
+    def _graph_generation(self, session, relationship_types: List[str]) -> str:
+        """
+        Marcador de la generación del grafo que se proyecta.
+        
+        Se calcula con los contadores de Neo4j (nodos Chunk y relaciones de
+        cada tipo, sin recorrer el grafo): cambia al ingerir o borrar chunks
+        o relaciones.
+        """
+        counts = [session.run("MATCH (c:Chunk) RETURN count(c) AS count").single()["count"]]
+        for relationship_type in relationship_types:
+            query = f"MATCH ()-[r:{relationship_type}]->() RETURN count(r) AS count"
+            counts.append(session.run(query).single()["count"])
+        marker = ",".join(str(count) for count in counts)
+        return hashlib.sha1(f"{marker}|{','.join(relationship_types)}".encode()).hexdigest()[:12]
+    
+    def _projection_config(
+        self,
+        relationship_types: List[str],
+        seed_property: Optional[str]
+    ) -> Dict[str, Any]:
+        """Proyección nativa de los chunks (relaciones no dirigidas, como requiere Leiden)."""
+        config: Dict[str, Any] = {
+            'nodeProjection': 'Chunk',
+            'relationshipProjection': {
+                relationship_type: {'type': relationship_type, 'orientation': 'UNDIRECTED'}
+                for relationship_type in relationship_types
+            }
+        }
+        if seed_property:
+            config['nodeProperties'] = [seed_property]
+        return config
+    
+    def _estimate_memory(
+        self,
+        session,
+        algorithm: str,
+        projection_config: Dict[str, Any],
+        algorithm_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Memoria de la proyección más el algoritmo, estimada sin proyectar."""
+        query = f"""
+        CALL gds.{algorithm}.write.estimate($projection, $config)
+        YIELD requiredMemory, bytesMax, heapPercentageMax
+        RETURN requiredMemory, bytesMax, heapPercentageMax
+        """
+        record = session.run(query, projection=projection_config, config=algorithm_config).single()
+        logger.info(
+            f"Estimated memory for {algorithm}: {record['requiredMemory']} "
+            f"({record['heapPercentageMax']:.1f}% of the heap)"
+        )
+        return {
+            'required_memory': record['requiredMemory'],
+            'bytes_max': record['bytesMax'],
+            'heap_percentage': record['heapPercentageMax']
+        }
+    
+    def _property_exists(self, session, property_name: str) -> bool:
+        """Si algún nodo Chunk tiene la propiedad."""
+        query = f"MATCH (c:Chunk) WHERE c.{property_name} IS NOT NULL RETURN c LIMIT 1"
+        return session.run(query).single() is not None
+    
+    def _projection_exists(self, session, graph_name: str) -> bool:
+        result = session.run("CALL gds.graph.exists($graph_name) YIELD exists", graph_name=graph_name)
+        return result.single()["exists"]
+    
+    def _drop_stale_projections(self, session, graph_name: str, current: str) -> None:
+        """Elimina proyecciones de generaciones anteriores del mismo grafo."""
+        query = """
+        CALL gds.graph.list() YIELD graphName
+        WHERE graphName STARTS WITH $prefix AND graphName <> $current
+        RETURN graphName
+        """
+        for record in session.run(query, prefix=f"{graph_name}-g", current=current):
+            self._drop_projection(session, record["graphName"])
+    
+    def _drop_projection(self, session, graph_name: str) -> None:
+        """Libera la proyección del heap de GDS (sin error si no existe)."""
+        session.run("CALL gds.graph.drop($graph_name, false) YIELD graphName", graph_name=graph_name).consume()
+        logger.info(f"Dropped graph projection '{graph_name}'")
+    
     def _create_graph_projection(
         self,
         session,
         graph_name: str,
-        relationship_types: List[str]
+        projection_config: Dict[str, Any]
     ) -> None:
-        """Crea un grafo proyectado en GDS si no existe."""
-        # Verificar si el grafo ya existe
-        check_query = "CALL gds.graph.exists($graph_name) YIELD exists"
-        result = session.run(check_query, graph_name=graph_name)
-        exists = result.single()["exists"]
-        
-        if exists:
-            logger.info(f"Graph projection '{graph_name}' already exists")
-            return
-        
-        # Crear grafo proyectado
-        rel_types_str = ", ".join([f"'{rt}'" for rt in relationship_types])
-        
-        create_query = f"""
-        CALL gds.graph.project(
-            '{graph_name}',
-            'Chunk',
-            [{rel_types_str}]
-        )
+        """Crea el grafo proyectado en GDS."""
+        create_query = """
+        CALL gds.graph.project($graph_name, $node_projection, $relationship_projection, $configuration)
         YIELD graphName, nodeCount, relationshipCount
         RETURN graphName, nodeCount, relationshipCount
         """
-        
-        result = session.run(create_query)
+        configuration = {}
+        if 'nodeProperties' in projection_config:
+            configuration['nodeProperties'] = projection_config['nodeProperties']
+        result = session.run(
+            create_query,
+            graph_name=graph_name,
+            node_projection=projection_config['nodeProjection'],
+            relationship_projection=projection_config['relationshipProjection'],
+            configuration=configuration
+        )
         stats = result.single()
         logger.info(
             f"Created graph projection '{graph_name}': "
@@ -12,6 +12,8 @@ Referencias:
 import re
 from typing import Dict, Any, Tuple, List
 
+from ungraph.infrastructure.services.search_filters import MetadataFilter
+
 
 class GraphRAGSearchPatterns:
     """
@@ -73,7 +75,9 @@ class GraphRAGSearchPatterns:
         
         Args:
             query_text: Texto a buscar
-            metadata_filters: Dict con propiedades a filtrar (ej: {"filename": "doc.md"})
+            metadata_filters: Dict de filtros (ej: {"filename": "doc.md"}); admite
+                              listas, rangos ({"gte": 1, "lt": 5}) y prefijos
+                              chunk./page./file. (ver MetadataFilter)
             limit: Número máximo de resultados
         
         Returns:
@@ -85,21 +89,14 @@ class GraphRAGSearchPatterns:
             ...     {"filename": "ai_paper.md", "page_number": 1}
             ... )
         """
-        # Validar nombres de propiedades (solo alfanuméricos y underscore)
-        valid_prop_pattern = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
-        for key in metadata_filters.keys():
-            if not valid_prop_pattern.match(key):
-                raise ValueError(f"Invalid property name: {key}")
-        
-        # Construir condiciones de filtro usando parámetros
-        filter_conditions = " AND ".join([
-            f"node.{key} = ${key}" for key in metadata_filters.keys()
-        ])
+        # Filtros validados y parametrizados (filename/page_number viven en Page)
+        metadata_filter = MetadataFilter(metadata_filters)
         
         query = f"""
         CALL db.index.fulltext.queryNodes("chunk_content", $query_text)
         YIELD node, score
-        WHERE {filter_conditions}
+        {metadata_filter.cypher("node")}
+        WITH DISTINCT node, score
         RETURN node.page_content as content,
                score,
                node.chunk_id as chunk_id,
@@ -111,7 +108,7 @@ class GraphRAGSearchPatterns:
         params = {
             "query_text": query_text,
             "limit": limit,
-            **metadata_filters
+            **metadata_filter.params
         }
         return query, params
     
@@ -184,3 +181,88 @@ class GraphRAGSearchPatterns:
             "limit": limit
         }
 
+    
+    @staticmethod
+    def hierarchical_retriever(
+        query_text: str,
+        query_vector: List[float],
+        level: str = "page",
+        file_limit: int = 5,
+        page_limit: int = 20,
+        limit: int = 5
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Búsqueda vectorial jerárquica (de grueso a fino): File/Page y luego Chunk.
+        
+        Primero se eligen los archivos o páginas más cercanos a la query con los
+        índices vectoriales de sus embeddings agregados (page_embeddings,
+        file_embeddings) y después solo sus chunks se puntúan contra la query.
+        El número de candidatos por consulta depende de file_limit/page_limit y
+        no del tamaño del corpus.
+        
+        Requiere los embeddings agregados de Page y File
+        (Neo4jChunkRepository.update_aggregate_embeddings, automático al ingerir)
+        y Neo4j 5.18+ (vector.similarity.cosine).
+        
+        Args:
+            query_text: Texto a buscar (solo informativo)
+            query_vector: Vector de embedding de la query
+            level: "page" (páginas -> chunks), "file" (archivos -> chunks) o
+                   "file_page" (archivos -> páginas -> chunks)
+            file_limit: Archivos candidatos (niveles "file" y "file_page")
+            page_limit: Páginas candidatas (niveles "page" y "file_page")
+            limit: Número máximo de resultados
+        
+        Returns:
+            Tuple de (query_cypher, parameters_dict)
+        
+        Example:
+            >>> query, params = GraphRAGSearchPatterns.hierarchical_retriever(
+            ...     "machine learning",
+            ...     query_vector,
+            ...     level="file_page",
+            ...     file_limit=3
+            ... )
+        """
+        if level == "page":
+            candidates = """
+        CALL db.index.vector.queryNodes('page_embeddings', $page_limit, $query_vector)
+        YIELD node AS page
+        MATCH (page)-[:HAS_CHUNK]->(node:Chunk)"""
+        elif level == "file":
+            candidates = """
+        CALL db.index.vector.queryNodes('file_embeddings', $file_limit, $query_vector)
+        YIELD node AS file
+        MATCH (file)-[:CONTAINS]->(:Page)-[:HAS_CHUNK]->(node:Chunk)"""
+        elif level == "file_page":
+            candidates = """
+        CALL db.index.vector.queryNodes('file_embeddings', $file_limit, $query_vector)
+        YIELD node AS file
+        MATCH (file)-[:CONTAINS]->(page:Page)
+        WHERE page.embeddings IS NOT NULL
+        WITH page, vector.similarity.cosine(page.embeddings, $query_vector) AS page_score
+        ORDER BY page_score DESC
+        LIMIT $page_limit
+        MATCH (page)-[:HAS_CHUNK]->(node:Chunk)"""
+        else:
+            raise ValueError(f"Invalid level: {level}. Use 'page', 'file' or 'file_page'")
+        
+        query = f"""{candidates}
+        WHERE node.embeddings IS NOT NULL
+        WITH DISTINCT node
+        WITH node, vector.similarity.cosine(node.embeddings, $query_vector) AS score
+        RETURN node.page_content as content,
+               score,
+               node.chunk_id as chunk_id,
+               node.chunk_id_consecutive as chunk_id_consecutive
+        ORDER BY score DESC
+        LIMIT $limit
+        """
+        
+        return query, {
+            "query_text": query_text,
+            "query_vector": query_vector,
+            "file_limit": file_limit,
+            "page_limit": page_limit,
+            "limit": limit
+        }
@@ -6,11 +6,13 @@ Envuelve el código existente del notebook.
 """
 
 import logging
-from typing import List
+from typing import List, Optional
+import numpy as np
 import torch
 
 from ungraph.domain.services.embedding_service import EmbeddingService
 from ungraph.domain.entities.chunk import Chunk
+from ungraph.domain.entities.chunk_batch import ChunkBatch
 from ungraph.domain.value_objects.embedding import Embedding
 
 # LangChain puede estar deprecado, pero usamos lo que existe
@@ -21,6 +23,11 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Caracteres por bloque al tokenizar documentos largos (cortes en espacios)
+TOKENIZE_BLOCK_CHARACTERS = 1 << 16
+# Bloques por llamada al tokenizador
+TOKENIZE_BATCH_BLOCKS = 64
+
 
 class HuggingFaceEmbeddingService(EmbeddingService):
     """
@@ -29,14 +36,20 @@ class HuggingFaceEmbeddingService(EmbeddingService):
     Usa sentence-transformers/all-MiniLM-L6-v2 por defecto (384 dimensiones).
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 64
+    ):
         """
         Inicializa el servicio de embeddings.
         
         Args:
             model_name: Nombre del modelo de HuggingFace (default: all-MiniLM-L6-v2)
+            batch_size: Textos por lote en la codificación por lotes (default: 64)
         """
         self.model_name = model_name
+        self.batch_size = batch_size
         
         # Detectar dispositivo
         if torch.cuda.is_available():
@@ -57,8 +70,135 @@ class HuggingFaceEmbeddingService(EmbeddingService):
         
         # Detectar dimensiones (384 para all-MiniLM-L6-v2)
         self.dimensions = 384  # Valor conocido para el modelo por defecto
+        model = self._sentence_transformer()
+        if model is not None and hasattr(model, "get_sentence_embedding_dimension"):
+            self.dimensions = model.get_sentence_embedding_dimension() or self.dimensions
+        self.encoder_info = str(self.encoder)
         logger.info(f"Embedding service initialized with model: {model_name}")
     
+    def _sentence_transformer(self):
+        """
+        Devuelve el SentenceTransformer subyacente de HuggingFaceEmbeddings.
+        
+        langchain_huggingface lo expone como `_client` y langchain_community
+        como `client`. Retorna None si no está accesible.
+        """
+        return getattr(self.encoder, "_client", None) or getattr(self.encoder, "client", None)
+    
+    def _fast_tokenizer(self):
+        """Tokenizador rápido (con offsets) del modelo, o None si no hay."""
+        model = self._sentence_transformer()
+        tokenizer = getattr(model, "tokenizer", None)
+        if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+            return None
+        return tokenizer
+    
+    @property
+    def max_tokens(self) -> Optional[int]:
+        """
+        Ventana del modelo en tokens (incluidos los especiales), o None si no
+        se conoce o no hay tokenizador rápido con el que medir los textos.
+        El texto que la excede se trunca al codificar.
+        """
+        if self._fast_tokenizer() is None:
+            return None
+        return getattr(self._sentence_transformer(), "max_seq_length", None)
+    
+    @property
+    def special_tokens(self) -> int:
+        """Tokens especiales que el tokenizador añade a cada texto ([CLS], [SEP]...)."""
+        tokenizer = self._fast_tokenizer()
+        return tokenizer.num_special_tokens_to_add(pair=False) if tokenizer is not None else 0
+    
+    def count_tokens(self, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Tokens de cada texto tal como se codificaría, sin truncar (con los
+        especiales). Una llamada por lote al tokenizador rápido.
+        
+        Returns:
+            Array int64 con un valor por texto, o None sin tokenizador rápido
+        """
+        tokenizer = self._fast_tokenizer()
+        if tokenizer is None:
+            return None
+        counts = np.zeros(len(texts), dtype=np.int64)
+        step = self.batch_size * 16
+        for start in range(0, len(texts), step):
+            encoded = tokenizer(
+                texts[start:start + step],
+                add_special_tokens=True,
+                truncation=False,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False
+            )
+            counts[start:start + len(encoded["input_ids"])] = [len(ids) for ids in encoded["input_ids"]]
+        return counts
+    
+    def token_starts(self, texts: List[str]) -> Optional[List[np.ndarray]]:
+        """
+        Offset (en caracteres) del inicio de cada token de cada texto.
+        
+        Los textos largos se tokenizan en bloques cortados en espacios en
+        blanco (los tokenizadores dividen por espacios antes de aplicar el
+        vocabulario, así que los tokens no cambian) y los bloques de todos
+        los textos se envían al tokenizador por lotes.
+        
+        Returns:
+            Un array int64 ordenado por texto, o None sin tokenizador rápido
+        """
+        tokenizer = self._fast_tokenizer()
+        if tokenizer is None:
+            return None
+        
+        blocks = []  # (índice del texto, offset del bloque, bloque)
+        for index, text in enumerate(texts):
+            start = 0
+            while start < len(text):
+                end = min(start + TOKENIZE_BLOCK_CHARACTERS, len(text))
+                if end < len(text):
+                    # Cortar justo después de un espacio (si no hay, el bloque sigue entero)
+                    cut = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+                    end = cut + 1 if cut > start else end
+                blocks.append((index, start, text[start:end]))
+                start = end
+        
+        parts: List[List[np.ndarray]] = [[] for _ in texts]
+        for first in range(0, len(blocks), TOKENIZE_BATCH_BLOCKS):
+            group = blocks[first:first + TOKENIZE_BATCH_BLOCKS]
+            encoded = tokenizer(
+                [block for _, _, block in group],
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False
+            )
+            for (index, offset, _), mapping in zip(group, encoded["offset_mapping"]):
+                starts = np.fromiter((token_start for token_start, _ in mapping), dtype=np.int64, count=len(mapping))
+                parts[index].append(starts + offset)
+        return [np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64) for arrays in parts]
+    
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Codifica textos directamente a una matriz float32 (n, d).
+        
+        Usa el SentenceTransformer por lotes (sin listas de floats intermedias);
+        si no está accesible, recurre a embed_documents().
+        """
+        model = self._sentence_transformer()
+        if model is not None:
+            matrix = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=False,
+                show_progress_bar=False
+            )
+        else:
+            matrix = self.encoder.embed_documents(texts)
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+    
     def generate_embedding(self, text: str) -> Embedding:
         """
         Genera un embedding para un texto.
@@ -68,34 +208,44 @@ class HuggingFaceEmbeddingService(EmbeddingService):
         if not text:
             raise ValueError("Text cannot be empty")
         
-        # Generar embedding
-        vector = self.encoder.embed_query(text)
-        
-        # Convertir a lista de floats
-        vector_list = [float(x) for x in vector]
+        # Generar embedding (float32, sin conversión a lista)
+        vector = np.asarray(self.encoder.embed_query(text), dtype=np.float32)
         
         return Embedding(
-            vector=vector_list,
+            vector=vector,
             dimensions=self.dimensions,
-            encoder_info=str(self.encoder)
+            encoder_info=self.encoder_info
         )
     
     def generate_embeddings_batch(self, chunks: List[Chunk]) -> List[Embedding]:
         """
         Genera embeddings para múltiples chunks.
         
-        Basado en create_document_object del notebook.
+        Codifica todos los textos en una sola llamada por lotes; cada
+        Embedding es una vista sobre una fila de la matriz resultante.
         """
         if not chunks:
             raise ValueError("Chunks list cannot be empty")
         
         logger.info(f"Generating embeddings for {len(chunks)} chunks")
         
-        embeddings = []
-        for chunk in chunks:
-            embedding = self.generate_embedding(chunk.page_content)
-            embeddings.append(embedding)
+        matrix = self.encode_texts([chunk.page_content for chunk in chunks])
+        embeddings = [
+            Embedding(vector=row, dimensions=matrix.shape[1], encoder_info=self.encoder_info)
+            for row in matrix
+        ]
         
-        logger.info(f"Embeddings generation completed")
+        logger.info("Embeddings generation completed")
         return embeddings
-
+    
+    def embed_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """
+        Genera los embeddings de un lote columnar como una única matriz (n, d).
+        """
+        if len(batch) == 0:
+            raise ValueError("Chunks list cannot be empty")
+        
+        logger.info(f"Generating embeddings for {len(batch)} chunks")
+        batch.set_embeddings(self.encode_texts(batch.texts), self.encoder_info)
+        logger.info("Embeddings generation completed")
+        return batch
@@ -1,17 +1,24 @@
 """
 Implementación: LangChainChunkingService
 
-Implementa ChunkingService usando LangChain RecursiveCharacterTextSplitter.
+Implementa ChunkingService con RecursiveTextSplitter (divisor recursivo
+nativo, mismos chunks que RecursiveCharacterTextSplitter de LangChain),
+también por tokens del modelo de embeddings, SemanticTextSplitter para
+chunking semántico y ChunkingMaster para smart_chunk.
 """
 
 import logging
-from typing import List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 import uuid
 
+import numpy as np
+
 from ungraph.domain.services.chunking_service import ChunkingService
 from ungraph.domain.entities.document import Document
 from ungraph.domain.entities.chunk import Chunk
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from ungraph.utils.markdown_parser import MARKDOWN_SECTIONS_KEY, MarkdownSection, sections_from_metadata
+from ungraph.utils.semantic_chunker import SemanticTextSplitter
+from ungraph.utils.text_splitter import RecursiveTextSplitter
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +27,21 @@ class LangChainChunkingService(ChunkingService):
     """
     Implementación de ChunkingService usando LangChain.
     
-    Usa RecursiveCharacterTextSplitter para dividir documentos.
+    chunk y chunk_stream usan RecursiveTextSplitter: los chunks son los de
+    RecursiveCharacterTextSplitter y cada uno lleva en su metadata los
+    offsets `start_index`/`end_index` en el texto de origen, calculados al
+    dividir (sin volver a buscar cada chunk en el texto).
     """
     
+    def __init__(self, recommendation_cache=None):
+        """
+        Inicializa el servicio.
+        
+        Args:
+            recommendation_cache: ChunkingRecommendationCache para smart_chunk (opcional)
+        """
+        self.recommendation_cache = recommendation_cache
+    
     def chunk(
         self,
         document: Document,
@@ -30,31 +49,76 @@ class LangChainChunkingService(ChunkingService):
         chunk_overlap: int = 200
     ) -> List[Chunk]:
         """
-        Divide un documento en chunks usando RecursiveCharacterTextSplitter.
+        Divide un documento en chunks usando RecursiveTextSplitter.
         
-        Basado en el código del notebook.
+        Basado en el código del notebook. Si el documento trae secciones
+        Markdown (metadata['markdown_sections']), divide sección a sección.
+        Cada chunk lleva sus offsets en el documento (`start_index`, `end_index`).
         """
         logger.info(f"Chunking document: {document.filename}")
         
         # Crear splitter
-        text_splitter = RecursiveCharacterTextSplitter(
+        text_splitter = RecursiveTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap
         )
+        return self._chunk_document(document, text_splitter)
+    
+    def chunk_by_tokens(
+        self,
+        document: Document,
+        token_starts: np.ndarray,
+        chunk_tokens: int,
+        overlap_tokens: int = 0
+    ) -> List[Chunk]:
+        """
+        Divide un documento en chunks de hasta `chunk_tokens` tokens.
+        
+        Mismos separadores y secciones que chunk(), pero las longitudes son
+        tokens del modelo de embeddings: el documento se tokeniza una vez
+        (`token_starts`, p. ej. HuggingFaceEmbeddingService.token_starts) y
+        cada fragmento cuenta los tokens que empiezan dentro de él.
+        
+        Args:
+            document: Documento a dividir
+            token_starts: Offsets ordenados de inicio de cada token de document.content
+            chunk_tokens: Máximo de tokens por chunk (sin los especiales del modelo)
+            overlap_tokens: Overlap entre chunks en tokens (default: 0)
+        """
+        logger.info(f"Chunking document by tokens: {document.filename} ({chunk_tokens} tokens per chunk)")
+        text_splitter = RecursiveTextSplitter(
+            chunk_size=chunk_tokens,
+            chunk_overlap=overlap_tokens
+        )
+        return self._chunk_document(document, text_splitter, token_starts)
+    
+    def _chunk_document(
+        self,
+        document: Document,
+        text_splitter: RecursiveTextSplitter,
+        token_starts: Optional[np.ndarray] = None
+    ) -> List[Chunk]:
+        metadata = {k: v for k, v in document.metadata.items() if k != MARKDOWN_SECTIONS_KEY}
+        sections = sections_from_metadata(document.metadata)
+        if sections:
+            return self._chunk_sections(document, sections, metadata, text_splitter, token_starts)
         
         # Dividir el contenido
-        texts = text_splitter.split_text(document.content)
+        content = document.content
+        spans = text_splitter.split_spans(content, token_starts=token_starts)
         
         # Convertir a entidades Chunk del dominio
         chunks = []
-        for i, text in enumerate(texts, start=1):
+        for i, (start, end) in enumerate(spans, start=1):
             chunk = Chunk(
                 id=f"{document.filename}_{uuid.uuid4()}",
-                page_content=text,
+                page_content=content[start:end],
                 metadata={
                     'filename': document.filename,
                     'file_type': document.file_type,
-                    **document.metadata
+                    **metadata,
+                    'start_index': start,
+                    'end_index': end
                 },
                 chunk_id_consecutive=i
             )
@@ -63,6 +127,241 @@ class LangChainChunkingService(ChunkingService):
         logger.info(f"Document divided into {len(chunks)} chunks")
         return chunks
 
+    def _chunk_sections(
+        self,
+        document: Document,
+        sections: List[MarkdownSection],
+        metadata: Dict[str, Any],
+        text_splitter: RecursiveTextSplitter,
+        token_starts: Optional[np.ndarray] = None
+    ) -> List[Chunk]:
+        """
+        Divide un documento Markdown sección a sección.
+
+        Ningún chunk cruza un encabezado. Una sección sin cuerpo (solo el
+        encabezado) se une a la siguiente para no generar chunks de un título.
+        Cada chunk lleva la sección de origen y sus offsets en el documento.
+        """
+        content = document.content
+        chunks: List[Chunk] = []
+        pending_start: Optional[int] = None
+
+        for index, section in enumerate(sections):
+            start = section.start if pending_start is None else pending_start
+            if not content[section.body_start:section.end].strip() and index + 1 < len(sections):
+                pending_start = start
+                continue
+            pending_start = None
+
+            for chunk_start, chunk_end in text_splitter.split_spans(content, start, section.end, token_starts):
+                chunks.append(Chunk(
+                    id=f"{document.filename}_{uuid.uuid4()}",
+                    page_content=content[chunk_start:chunk_end],
+                    metadata={
+                        'filename': document.filename,
+                        'file_type': document.file_type,
+                        **metadata,
+                        'section_title': section.title,
+                        'section_path': " > ".join(section.path),
+                        'section_level': section.level,
+                        'start_index': chunk_start,
+                        'end_index': chunk_end
+                    },
+                    chunk_id_consecutive=len(chunks) + 1
+                ))
+
+        logger.info(f"Document divided into {len(chunks)} chunks across {len(sections)} sections")
+        return chunks
+
+    def chunk_semantic(
+        self,
+        document: Document,
+        embed: Callable[[List[str]], np.ndarray],
+        max_chunk_size: Optional[int] = None,
+        breakpoint_threshold_type: str = "percentile",
+        breakpoint_threshold_amount: Optional[float] = None,
+        pool_embeddings: bool = False
+    ) -> List[Chunk]:
+        """
+        Divide un documento en chunks semánticos (cortes en cambios de tema).
+        
+        Las oraciones se codifican una vez con `embed` y sus vectores se
+        reutilizan para los chunks: con `pool_embeddings` cada chunk recibe la
+        media de los vectores de sus oraciones; si no, solo los chunks de una
+        oración reciben su vector exacto y el resto queda con embeddings=None
+        para codificarlo después. Si el documento trae secciones Markdown,
+        ningún chunk cruza un encabezado.
+        
+        Args:
+            document: Documento a dividir
+            embed: Función textos -> matriz (n, d) (p. ej. HuggingFaceEmbeddingService.encode_texts)
+            max_chunk_size: Máximo de caracteres por chunk (default: sin límite)
+            breakpoint_threshold_type: Tipo de umbral de corte (ver SemanticTextSplitter)
+            breakpoint_threshold_amount: Umbral de corte (default: según el tipo)
+            pool_embeddings: Derivar el vector de cada chunk de los de sus oraciones
+        """
+        logger.info(f"Semantic chunking document: {document.filename}")
+        splitter = SemanticTextSplitter(
+            embed,
+            breakpoint_threshold_type=breakpoint_threshold_type,
+            breakpoint_threshold_amount=breakpoint_threshold_amount,
+            max_chunk_size=max_chunk_size
+        )
+        content = document.content
+        metadata = {k: v for k, v in document.metadata.items() if k != MARKDOWN_SECTIONS_KEY}
+        
+        # Rangos a dividir: el documento, o sus secciones (las vacías se unen a la siguiente)
+        sections: List[Optional[MarkdownSection]] = []
+        ranges = []
+        pending_start: Optional[int] = None
+        all_sections = sections_from_metadata(document.metadata) or []
+        for index, section in enumerate(all_sections):
+            start = section.start if pending_start is None else pending_start
+            if not content[section.body_start:section.end].strip() and index + 1 < len(all_sections):
+                pending_start = start
+                continue
+            pending_start = None
+            sections.append(section)
+            ranges.append((start, section.end))
+        if not ranges:
+            sections.append(None)
+            ranges.append((0, len(content)))
+        
+        split = splitter.split(content, ranges)
+        if pool_embeddings:
+            vectors = list(split.pooled_embeddings())
+        else:
+            vectors = split.sentence_embeddings_for_chunks()
+        
+        chunks = []
+        for i, ((start, end), range_index, vector) in enumerate(
+            zip(split.spans, split.chunk_ranges, vectors), start=1
+        ):
+            section = sections[range_index]
+            section_metadata = {} if section is None else {
+                'section_title': section.title,
+                'section_path': " > ".join(section.path),
+                'section_level': section.level
+            }
+            chunks.append(Chunk(
+                id=f"{document.filename}_{uuid.uuid4()}",
+                page_content=content[start:end],
+                metadata={
+                    'filename': document.filename,
+                    'file_type': document.file_type,
+                    **metadata,
+                    **section_metadata,
+                    'start_index': start,
+                    'end_index': end
+                },
+                chunk_id_consecutive=i,
+                embeddings=vector,
+                embeddings_dimensions=None if vector is None else len(vector)
+            ))
+        
+        reused = sum(vector is not None for vector in vectors)
+        logger.info(
+            f"Document divided into {len(chunks)} semantic chunks from {len(split.sentence_spans)} sentences "
+            f"({reused} chunk vectors taken from sentence embeddings)"
+        )
+        return chunks
+
+    def chunk_stream(
+        self,
+        blocks: Iterable[str],
+        filename: str,
+        file_type: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        window_size: Optional[int] = None,
+        tokenize: Optional[Callable[[List[str]], List[np.ndarray]]] = None
+    ) -> Iterator[Chunk]:
+        """
+        Divide un flujo de texto en chunks con una ventana deslizante.
+
+        Los bloques se acumulan hasta `window_size` caracteres; la ventana se
+        divide con RecursiveTextSplitter, se emiten los chunks que ya
+        no pueden cambiar y la ventana conserva solo el texto desde el primer
+        chunk pendiente. La memoria queda acotada por la ventana, no por el archivo.
+
+        Cada chunk lleva en su metadata `start_index` y `end_index`: offsets
+        absolutos (en caracteres) dentro del texto completo del flujo.
+
+        Con `tokenize` (p. ej. HuggingFaceEmbeddingService.token_starts),
+        chunk_size y chunk_overlap se miden en tokens y cada ventana se
+        tokeniza una vez al dividirla.
+
+        Args:
+            blocks: Fragmentos consecutivos del texto (p. ej. DocumentLoaderService.stream)
+            filename: Nombre del archivo de origen
+            file_type: Tipo de archivo
+            metadata: Metadatos comunes a todos los chunks
+            chunk_size: Tamaño de cada chunk en caracteres (default: 1000)
+            chunk_overlap: Overlap entre chunks en caracteres (default: 200)
+            window_size: Caracteres acumulados antes de dividir (default: 64 * chunk_size,
+                         con ~4 caracteres por token si se mide en tokens)
+            tokenize: Función textos -> offsets de inicio de sus tokens (opcional)
+
+        Yields:
+            Chunks en orden, con chunk_id_consecutive empezando en 1
+        """
+        text_splitter = RecursiveTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+        window_size = window_size or 64 * chunk_size * (4 if tokenize else 1)
+        base_metadata = {'filename': filename, 'file_type': file_type, **(metadata or {})}
+
+        window = ""
+        window_start = 0  # Offset absoluto del primer carácter de la ventana
+        consecutive = 0
+
+        def split_window(final: bool):
+            nonlocal window, window_start, consecutive
+            token_starts = tokenize([window])[0] if tokenize else None
+            spans = text_splitter.split_spans(window, token_starts=token_starts)
+
+            # Los chunks del final pueden cambiar al llegar más texto: los que
+            # terminan en los últimos chunk_size caracteres (o tokens)
+            if token_starts is None:
+                stable_end = len(window) - chunk_size
+            else:
+                stable_end = int(token_starts[-chunk_size]) if len(token_starts) > chunk_size else 0
+            ready = len(spans) if final else len(spans) - 1
+            while ready > 0 and not final and spans[ready - 1][1] > stable_end:
+                ready -= 1
+
+            for start, end in spans[:ready]:
+                consecutive += 1
+                yield Chunk(
+                    id=f"{filename}_{uuid.uuid4()}",
+                    page_content=window[start:end],
+                    metadata={
+                        **base_metadata,
+                        'start_index': window_start + start,
+                        'end_index': window_start + end
+                    },
+                    chunk_id_consecutive=consecutive
+                )
+
+            if not final and ready > 0:
+                # Conservar los separadores previos: el splitter los adjunta al chunk
+                cut = spans[ready][0]
+                while cut > spans[ready - 1][0] and window[cut - 1].isspace():
+                    cut -= 1
+                window = window[cut:]
+                window_start += cut
+
+        for block in blocks:
+            window += block
+            if len(window) >= window_size:
+                yield from split_window(final=False)
+        if window:
+            yield from split_window(final=True)
+
+        logger.info(f"Stream {filename} divided into {consecutive} chunks")
+
     def smart_chunk(
         self,
         document: Document,
@@ -99,7 +398,8 @@ class LangChainChunkingService(ChunkingService):
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             preferred_strategy=preferred_strategy,
-            evaluate_all=evaluate_all
+            evaluate_all=evaluate_all,
+            recommendation_cache=self.recommendation_cache
         )
 
         # Convertir los langchain docs a domain Chunk
@@ -107,7 +407,7 @@ class LangChainChunkingService(ChunkingService):
         for i, lc in enumerate(chunks_docs, start=1):
             # lc may be a langchain Document or a dict-like
             content = getattr(lc, 'page_content', None) or getattr(lc, 'content', None) or str(lc)
-            md = getattr(lc, 'metadata', {}) or {}
+            md = {k: v for k, v in (getattr(lc, 'metadata', {}) or {}).items() if k != MARKDOWN_SECTIONS_KEY}
             chunk = Chunk(
                 id=f"{document.filename}_{uuid.uuid4()}",
                 page_content=content,
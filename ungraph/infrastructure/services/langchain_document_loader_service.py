@@ -5,7 +5,7 @@ Implementa DocumentLoaderService usando LangChain.
 Envuelve el código existente del notebook.
 """
 
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 from pathlib import Path
 import logging
 
@@ -15,7 +15,6 @@ from ungraph.domain.value_objects.document_type import DocumentType
 
 # Imports de LangChain (infrastructure puede usar frameworks)
 from langchain_community.document_loaders import (
-    UnstructuredMarkdownLoader,
     UnstructuredWordDocumentLoader,
     TextLoader
 )
@@ -27,37 +26,50 @@ try:
 except ImportError:
     DOCLING_AVAILABLE = False
 
+from ungraph.infrastructure.services.pdf_page_extractor import PdfPageExtractor, PYPDFIUM2_AVAILABLE
+
 # Importar función de detección de encoding
 from ...utils.handlers import detect_encoding
+from ...utils.markdown_parser import MARKDOWN_SECTIONS_KEY, MarkdownSection, parse_markdown
 
 logger = logging.getLogger(__name__)
 
+# Tamaño (en caracteres) de cada bloque decodificado en la carga por streaming
+STREAM_BLOCK_SIZE = 1 << 20
+
+# Separadores ASCII en los que se corta un bloque: sobreviven a la limpieza
+# (que solo colapsa espacios), así que limpiar por bloques equivale a limpiar todo
+_STREAM_CUT_CHARACTERS = ("\n", " ", "\t")
+
 
 class LangChainDocumentLoaderService(DocumentLoaderService):
     """
     Implementación de DocumentLoaderService usando LangChain.
     
     Soporta:
-    - Markdown (.md, .markdown)
+    - Markdown (.md, .markdown) con parser nativo que conserva las secciones
     - Texto plano (.txt)
     - Word (.doc, .docx)
-    - PDF (.pdf) usando langchain-docling (IBM Docling)
+    - PDF (.pdf): capa de texto por página (pypdfium2) con fallback a
+      langchain-docling (IBM Docling) para las páginas de baja calidad
     """
     
-    def __init__(self, text_cleaning_service=None):
+    def __init__(self, text_cleaning_service=None, pdf_extractor: Optional[PdfPageExtractor] = None):
         """
         Inicializa el servicio.
         
         Args:
             text_cleaning_service: Servicio opcional para limpiar texto
+            pdf_extractor: Extractor de PDF por páginas (default: PdfPageExtractor())
         """
         self.text_cleaning_service = text_cleaning_service
+        self.pdf_extractor = pdf_extractor or PdfPageExtractor()
     
     def supports(self, file_path: Path) -> bool:
         """Verifica si puede cargar el tipo de archivo."""
         suffix = file_path.suffix.lower()
         supported = ['.md', '.markdown', '.txt', '.doc', '.docx']
-        if DOCLING_AVAILABLE:
+        if DOCLING_AVAILABLE or PYPDFIUM2_AVAILABLE:
             supported.append('.pdf')
         return suffix in supported
     
@@ -84,35 +96,157 @@ class LangChainDocumentLoaderService(DocumentLoaderService):
         else:
             raise ValueError(f"Tipo de archivo no soportado: {suffix}")
     
+    def supports_streaming(self, file_path: Path) -> bool:
+        """Verifica si el archivo puede cargarse por streaming (texto plano y Markdown)."""
+        return file_path.suffix.lower() in ['.txt', '.md', '.markdown']
+    
+    def stream(
+        self,
+        file_path: Path,
+        clean: bool = True,
+        block_size: int = STREAM_BLOCK_SIZE
+    ) -> Iterator[str]:
+        """
+        Carga un archivo de texto o Markdown por bloques, sin leerlo entero.
+        
+        La codificación se detecta una sola vez (sobre una muestra) y el archivo
+        se decodifica de forma incremental. Cada bloque se corta en su último
+        separador ASCII y se limpia por separado; la concatenación de los bloques
+        emitidos es idéntica a limpiar el archivo completo.
+        
+        Un byte inválido no aborta la carga: se sustituye por U+FFFD (que la
+        limpieza elimina) y se registra un aviso.
+        
+        Args:
+            file_path: Ruta al archivo
+            clean: Si True, limpia cada bloque (default: True)
+            block_size: Caracteres decodificados por bloque
+        
+        Yields:
+            Fragmentos consecutivos del contenido
+        
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+            ValueError: Si el tipo de archivo no admite streaming
+        """
+        if not file_path.exists():
+            raise FileNotFoundError(f"El archivo no existe: {file_path}")
+        if not self.supports_streaming(file_path):
+            raise ValueError(f"Tipo de archivo no soportado para streaming: {file_path.suffix.lower()}")
+        
+        encoding = detect_encoding(file_path)
+        logger.info(f"Cargando archivo por streaming: {file_path} (codificación: {encoding})")
+        
+        cleaner = self.text_cleaning_service if clean else None
+        pending = ""
+        emitted = False
+        replaced = False
+        with open(file_path, "r", encoding=encoding, errors="replace") as handle:
+            while True:
+                block = handle.read(block_size)
+                text = pending + block
+                if not text:
+                    break
+                if block:
+                    # Retener la última palabra (puede continuar en el siguiente bloque)
+                    cut = max(text.rfind(sep) for sep in _STREAM_CUT_CHARACTERS) + 1
+                    if cut <= 0:
+                        # Bloque sin separadores: cortar igualmente para acotar memoria
+                        cut = len(text) if len(text) >= 2 * block_size else 0
+                    pending = text[cut:]
+                    text = text[:cut]
+                else:
+                    pending = ""
+                
+                if not replaced and "\ufffd" in text:
+                    replaced = True
+                    logger.warning(f"Bytes no válidos para {encoding} en {file_path}; se sustituyen")
+                if cleaner is not None:
+                    # La limpieza colapsa los espacios de los bordes: se reponen al unir
+                    text = cleaner.clean(text)
+                    if text and emitted:
+                        text = " " + text
+                if text:
+                    emitted = True
+                    yield text
+                if not block:
+                    break
+    
     def _load_markdown(self, file_path: Path, clean: bool) -> List[Document]:
-        """Carga un archivo Markdown."""
+        """
+        Carga un archivo Markdown con el parser nativo (una sola pasada).
+        
+        Conserva la estructura de encabezados: el contenido mantiene las líneas
+        de encabezado y metadata['markdown_sections'] guarda las secciones con
+        sus offsets sobre el contenido. Si se limpia el texto, la limpieza se
+        aplica por sección (título y cuerpo) para no perder los encabezados.
+        """
         logger.info(f"Cargando archivo Markdown: {file_path}")
         
-        loader = UnstructuredMarkdownLoader(str(file_path))
-        langchain_docs = loader.load()
+        encoding = detect_encoding(file_path)
+        text = file_path.read_text(encoding=encoding, errors="replace")
+        parsed = parse_markdown(text)
         
-        documents = []
-        for lc_doc in langchain_docs:
-            content = lc_doc.page_content
-            
-            # Limpiar si está habilitado
-            if clean and self.text_cleaning_service:
-                content = self.text_cleaning_service.clean(content)
-            
-            # Crear entidad Document del dominio
-            doc = Document.create(
-                content=content,
-                filename=file_path.name,
-                file_type=DocumentType.MARKDOWN.value,
-                metadata={
-                    'file_path': str(file_path),
-                    **lc_doc.metadata
-                }
-            )
-            documents.append(doc)
+        if clean and self.text_cleaning_service:
+            content, sections = self._clean_markdown_sections(text, parsed.sections)
+        else:
+            content, sections = text, parsed.sections
         
-        logger.info(f"Archivo cargado exitosamente. Documentos generados: {len(documents)}")
-        return documents
+        doc = Document.create(
+            content=content,
+            filename=file_path.name,
+            file_type=DocumentType.MARKDOWN.value,
+            metadata={
+                'file_path': str(file_path),
+                'encoding': encoding,
+                'code_blocks': parsed.count('code'),
+                'tables': parsed.count('table'),
+                'lists': parsed.count('list'),
+                MARKDOWN_SECTIONS_KEY: [section.to_dict() for section in sections]
+            }
+        )
+        
+        logger.info(f"Archivo cargado exitosamente. Secciones: {len(sections)}")
+        return [doc]
+    
+    def _clean_markdown_sections(
+        self,
+        text: str,
+        sections: List[MarkdownSection]
+    ) -> Tuple[str, List[MarkdownSection]]:
+        """
+        Limpia cada sección por separado y reconstruye el documento.
+        
+        Cada sección queda como "<#...> título" seguido de su cuerpo limpio;
+        los offsets de las secciones se recalculan sobre el texto resultante.
+        """
+        parts: List[str] = []
+        cleaned_sections: List[MarkdownSection] = []
+        offset = 0
+        for section in sections:
+            body = self.text_cleaning_service.clean(text[section.body_start:section.end])
+            heading = ""
+            if section.level > 0:
+                heading = "#" * section.level + " " + self.text_cleaning_service.clean(section.title)
+                if body:
+                    heading += "\n\n"
+            block = heading + body
+            if parts:
+                block = "\n\n" + block
+            
+            start = offset + (2 if parts else 0)
+            parts.append(block)
+            offset += len(block)
+            cleaned_sections.append(MarkdownSection(
+                level=section.level,
+                title=section.title,
+                path=section.path,
+                headers=section.headers,
+                start=start,
+                body_start=start + len(heading),
+                end=offset
+            ))
+        return "".join(parts), cleaned_sections
     
     def _load_txt(self, file_path: Path, clean: bool) -> List[Document]:
         """
@@ -222,7 +356,56 @@ class LangChainDocumentLoaderService(DocumentLoaderService):
     
     def _load_pdf(self, file_path: Path, clean: bool) -> List[Document]:
         """
-        Carga un archivo PDF usando langchain-docling (IBM Docling).
+        Carga un archivo PDF generando un Document por página.
+        
+        Usa la capa de texto de cada página (pypdfium2, en paralelo) y solo
+        envía a Docling las páginas de baja calidad. Cada Document lleva su
+        `page_number` en metadata, que llega a los chunks y a los nodos Page.
+        Sin pypdfium2 se usa DoclingLoader sobre el archivo completo.
+        
+        Args:
+            file_path: Ruta al archivo PDF
+            clean: Si True, limpia el texto antes de procesar
+        
+        Returns:
+            Lista de Document entities (una por página con texto)
+        """
+        if not PYPDFIUM2_AVAILABLE:
+            return self._load_pdf_with_docling(file_path, clean)
+        
+        logger.info(f"Cargando archivo PDF por páginas: {file_path}")
+        
+        pages = self.pdf_extractor.extract(file_path)
+        contents = [content for _, content, _ in pages]
+        
+        # Limpiar si está habilitado (todas las páginas en un lote)
+        if clean and self.text_cleaning_service:
+            contents = self.text_cleaning_service.clean_batch(contents)
+        
+        documents = []
+        for (page_number, _, method), content in zip(pages, contents):
+            if not content.strip():
+                logger.debug(f"Página {page_number} sin texto, se omite")
+                continue
+            
+            doc = Document.create(
+                content=content,
+                filename=file_path.name,
+                file_type=DocumentType.PDF.value,
+                metadata={
+                    'file_path': str(file_path),
+                    'page_number': page_number,
+                    'extraction_method': method
+                }
+            )
+            documents.append(doc)
+        
+        logger.info(f"PDF cargado exitosamente. Documentos generados: {len(documents)}")
+        return documents
+    
+    def _load_pdf_with_docling(self, file_path: Path, clean: bool) -> List[Document]:
+        """
+        Carga un archivo PDF completo usando langchain-docling (IBM Docling).
         
         Docling proporciona mejor extracción de texto y metadatos que otros loaders,
         incluyendo información sobre estructura del documento, tablas, imágenes, etc.
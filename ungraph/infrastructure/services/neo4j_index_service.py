@@ -7,9 +7,11 @@ Envuelve el código existente de graph_operations.py.
 
 import logging
 import os
+from typing import Optional
 from neo4j import GraphDatabase
 
 from ungraph.domain.services.index_service import IndexService
+from ungraph.domain.services.vector_index_service import VectorIndexService
 from ungraph.utils.graph_operations import graph_session
 
 logger = logging.getLogger(__name__) 
@@ -22,14 +24,17 @@ class Neo4jIndexService(IndexService):
     Crea índices vectoriales, full-text y regulares en Neo4j.
     """
     
-    def __init__(self, database: str = "neo4j"):
+    def __init__(self, database: str = "neo4j", vector_index: Optional[VectorIndexService] = None):
         """
         Inicializa el servicio.
         
         Args:
             database: Nombre de la base de datos Neo4j (default: "neo4j")
+            vector_index: Índice vectorial en proceso (opcional). clean_graph elimina
+                          de él los chunks borrados del grafo.
         """
         self.database = database
+        self.vector_index = vector_index
         self._driver = None
     
     def _get_driver(self) -> GraphDatabase:
@@ -182,6 +187,20 @@ class Neo4jIndexService(IndexService):
             "chunk_id_consecutive"
         )
         
+        # Índice regular para chunk_id (hidratación de resultados por ID)
+        self.setup_regular_index(
+            "chunk_id_idx",
+            "Chunk",
+            "chunk_id"
+        )
+        
+        # Índice regular para filename de Page (filtros por archivo)
+        self.setup_regular_index(
+            "page_filename_idx",
+            "Page",
+            "filename"
+        )
+        
         # Índice vectorial para embeddings
         self.setup_vector_index(
             "chunk_embeddings",
@@ -190,6 +209,20 @@ class Neo4jIndexService(IndexService):
             384
         )
         
+        # Índices vectoriales de los embeddings agregados (búsqueda jerárquica)
+        self.setup_vector_index(
+            "page_embeddings",
+            "Page",
+            "embeddings",
+            384
+        )
+        self.setup_vector_index(
+            "file_embeddings",
+            "File",
+            "embeddings",
+            384
+        )
+        
         # Índice full-text para page_content
         self.setup_fulltext_index(
             "chunk_content",
@@ -238,16 +271,20 @@ class Neo4jIndexService(IndexService):
         Elimina todos los índices creados por el sistema.
         
         Esto incluye:
-        - Índices vectoriales (chunk_embeddings)
+        - Índices vectoriales (chunk_embeddings, page_embeddings, file_embeddings)
         - Índices full-text (chunk_content)
-        - Índices regulares (chunk_consecutive_idx)
+        - Índices regulares (chunk_consecutive_idx, chunk_id_idx, page_filename_idx)
         """
         logger.info("Dropping all indexes")
         
         indexes_to_drop = [
             "chunk_embeddings",  # Vector index
+            "page_embeddings",   # Vector index
+            "file_embeddings",   # Vector index
             "chunk_content",     # Full-text index
-            "chunk_consecutive_idx"  # Regular index
+            "chunk_consecutive_idx",  # Regular index
+            "chunk_id_idx",      # Regular index
+            "page_filename_idx"  # Regular index
         ]
         
         for index_name in indexes_to_drop:
@@ -289,6 +326,11 @@ class Neo4jIndexService(IndexService):
         except Exception as e:
             logger.error(f"Error cleaning graph: {e}")
             raise
+        
+        # Los chunks borrados también salen del índice vectorial en proceso
+        if self.vector_index is not None and (not node_labels or "Chunk" in node_labels):
+            self.vector_index.remove(self.vector_index.ids())
+            self.vector_index.flush()
     
     def close(self) -> None:
         """Cierra la conexión a Neo4j."""
@@ -6,16 +6,52 @@ Envuelve el código existente de graph_rags.py.
 """
 
 import logging
-from typing import List, Tuple
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 from neo4j import GraphDatabase
 
+from ungraph.domain.services.embedding_service import EmbeddingService
+from ungraph.domain.services.reranker_service import RerankerService
 from ungraph.domain.services.search_service import SearchService, SearchResult
+from ungraph.domain.services.vector_index_service import VectorIndexService
 from ungraph.domain.value_objects.embedding import Embedding
 from ungraph.utils.graph_operations import graph_session
 from ungraph.infrastructure.services.graphrag_search_patterns import GraphRAGSearchPatterns
+from ungraph.infrastructure.services.search_filters import MetadataFilter
 
 logger = logging.getLogger(__name__)
 
+# Selectividad medida de cada filtro: (database, firma) -> entrada.
+# A nivel de módulo porque la API pública crea un servicio por búsqueda.
+_SELECTIVITY_CACHE: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+_SELECTIVITY_CACHE_SIZE = 512
+_SELECTIVITY_TTL = 300.0  # segundos (la ingesta cambia los conteos)
+
+# Forma única del resultado de las búsquedas vectorial e híbrida (todas sus
+# variantes): requiere `node` y `score` en alcance. Con `neighbors` añade el
+# contenido de los chunks anterior y siguiente; las búsquedas con
+# context_window lo omiten porque traen sus ventanas en una consulta por lotes.
+def _vector_result(neighbors: bool = True) -> str:
+    """Cláusulas finales (vecinos, RETURN, ORDER BY) de una búsqueda vectorial."""
+    matches = """
+        OPTIONAL MATCH (node)<-[:NEXT_CHUNK]-(prev)
+        OPTIONAL MATCH (node)-[:NEXT_CHUNK]->(next)
+        """ if neighbors else ""
+    return f"""{matches}
+        RETURN {{
+            score: score,
+            central_node_content: node.page_content,
+            central_node_chunk_id: node.chunk_id,
+            central_node_chunk_id_consecutive: node.chunk_id_consecutive,
+            previous_chunk_content: {"prev.page_content" if neighbors else "null"},
+            next_chunk_content: {"next.page_content" if neighbors else "null"}
+        }} as result
+        ORDER BY score DESC
+"""
+
 
 class Neo4jSearchService(SearchService):
     """
@@ -25,14 +61,49 @@ class Neo4jSearchService(SearchService):
     Basado en graph_rags.py del código existente.
     """
     
-    def __init__(self, database: str = "neo4j"):
+    # Patrones que necesitan el embedding de la consulta (query_vector)
+    _VECTOR_PATTERNS = ("graph_enhanced", "graph_enhanced_vector", "hierarchical", "hierarchical_retriever")
+    
+    def __init__(
+        self,
+        database: str = "neo4j",
+        vector_index: Optional[VectorIndexService] = None,
+        filter_exact_threshold: int = 10_000,
+        filter_max_candidates: int = 10_000,
+        filter_overfetch_margin: float = 2.0,
+        reranker: Optional[RerankerService] = None,
+        embedding_service: Optional[EmbeddingService] = None
+    ):
         """
         Inicializa el servicio.
         
         Args:
             database: Nombre de la base de datos Neo4j (default: "neo4j")
+            vector_index: Índice vectorial en proceso (opcional). Si se proporciona,
+                          está sincronizado con el grafo y no está vacío, vector_search
+                          lo usa para el ranking y Neo4j solo hidrata contenido y
+                          vecinos de los mejores resultados.
+            filter_exact_threshold: En búsquedas vectoriales filtradas, chunks que
+                                    cumplen el filtro por debajo de los cuales se
+                                    puntúan todos exactamente en lugar de usar el índice
+            filter_max_candidates: Candidatos máximos pedidos al índice vectorial en
+                                   una búsqueda filtrada
+            filter_overfetch_margin: Margen sobre limit / selectividad al pedir candidatos
+            reranker: Etapa de reordenamiento (opcional). Si se proporciona,
+                      hybrid_search y vector_search (con query_text) piden
+                      max(limit, reranker.top_n) candidatos y devuelven los
+                      `limit` mejores según el reordenador.
+            embedding_service: Servicio para el embedding de la consulta en
+                               search_with_pattern (default: el cacheado por
+                               proceso del modelo de la configuración)
         """
         self.database = database
+        self.vector_index = vector_index
+        self.filter_exact_threshold = filter_exact_threshold
+        self.filter_max_candidates = filter_max_candidates
+        self.filter_overfetch_margin = filter_overfetch_margin
+        self.reranker = reranker
+        self.embedding_service = embedding_service
         self._driver = None
     
     def _get_driver(self) -> GraphDatabase:
@@ -89,150 +160,547 @@ class Neo4jSearchService(SearchService):
     def vector_search(
         self,
         query_embedding: Embedding,
-        limit: int = 5
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_text: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+        mmr_fetch_k: Optional[int] = None,
+        context_window: int = 0,
+        same_page: bool = False,
+        merge_overlapping: bool = True,
+        chunk_overlap: int = 200
     ) -> List[SearchResult]:
         """
         Búsqueda vectorial usando embeddings.
         
         Basado en hybrid_search de graph_rags.py.
+        
+        Args:
+            query_embedding: Embedding de la consulta
+            limit: Número máximo de resultados
+            filters: Filtros de metadatos sobre chunk/page/file (ver MetadataFilter);
+                     se aplican en la consulta (_filtered_vector_search)
+            query_text: Texto de la consulta; con un reranker configurado, los
+                        candidatos se reordenan contra él
+            mmr_lambda: Si se indica, diversifica los resultados con MMR
+                        (ver diversify) sobre mmr_fetch_k candidatos
+            mmr_fetch_k: Candidatos para MMR (default: 4 × limit)
+            context_window: Si es > 0, añade a cada resultado el tramo de
+                            ±context_window chunks (ver expand_context) en
+                            lugar de los vecinos anterior y siguiente
+            same_page: Con context_window, solo vecinos de la misma Page
+            merge_overlapping: Con context_window, fusionar ventanas solapadas
+            chunk_overlap: Con context_window, chunk_overlap de la ingesta
+        
+        Raises:
+            ValueError: Si context_window está fuera de rango
         """
-        query = """
-        CALL db.index.vector.queryNodes('chunk_embeddings', toInteger($top_k), $query_vector)
-        YIELD node, score
+        _check_window(context_window)
+        results = self._vector_search(
+            query_embedding, limit, filters, query_text, mmr_lambda, mmr_fetch_k,
+            neighbors=not context_window
+        )
+        if context_window:
+            self.expand_context(results, context_window, same_page, merge_overlapping, chunk_overlap)
+        return results
+    
+    def _vector_search(
+        self,
+        query_embedding: Embedding,
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        query_text: Optional[str],
+        mmr_lambda: Optional[float],
+        mmr_fetch_k: Optional[int],
+        neighbors: bool
+    ) -> List[SearchResult]:
+        """Búsqueda vectorial sin expandir el contexto (ver vector_search)."""
+        if mmr_lambda is not None:
+            candidates = self._vector_search(
+                query_embedding, self._mmr_fetch_k(limit, mmr_fetch_k), filters, query_text,
+                None, None, neighbors
+            )
+            return self.diversify(candidates, query_embedding, limit, mmr_lambda)
         
-        OPTIONAL MATCH (node)<-[:NEXT_CHUNK]-(prev)
-        OPTIONAL MATCH (node)-[:NEXT_CHUNK]->(next)
+        if self.reranker is not None and query_text:
+            candidates = self._vector_search(
+                query_embedding, self._rerank_limit(limit), filters, None, None, None, neighbors
+            )
+            return self.reranker.rerank(query_text, candidates, limit)
         
-        RETURN {
-            score: score,
-            central_node_content: node.page_content,
-            central_node_chunk_id: node.chunk_id,
-            central_node_chunk_id_consecutive: node.chunk_id_consecutive,
-            previous_chunk_content: prev.page_content,
-            next_chunk_content: next.page_content
-        } as result
-        ORDER BY score DESC
+        metadata_filter = MetadataFilter(filters)
+        if metadata_filter:
+            return self._filtered_vector_search(query_embedding, metadata_filter, limit, neighbors)
+        
+        if self._use_local_index():
+            return self._vector_search_local(query_embedding, limit, neighbors)
+        
+        query = f"""
+        CALL db.index.vector.queryNodes('chunk_embeddings', toInteger($top_k), $query_vector)
+        YIELD node, score
+        {_vector_result(neighbors)}
         LIMIT $top_k
         """
         
         driver = self._get_driver()
-        results = []
         
         try:
             with driver.session(database=self.database) as session:
                 records = session.run(
                     query,
-                    query_vector=query_embedding.vector,
+                    query_vector=query_embedding.to_list(),
                     top_k=limit
                 )
-                
-                for record in records:
-                    result_data = record["result"]
-                    result = SearchResult(
-                        content=result_data["central_node_content"],
-                        score=float(result_data["score"]),
-                        chunk_id=result_data["central_node_chunk_id"],
-                        chunk_id_consecutive=result_data["central_node_chunk_id_consecutive"] or 0,
-                        previous_chunk_content=result_data.get("previous_chunk_content"),
-                        next_chunk_content=result_data.get("next_chunk_content")
-                    )
-                    results.append(result)
+                return self._vector_results(records)
         except Exception as e:
             logger.error(f"Error in vector search: {e}", exc_info=True)
             raise
+    
+    def _use_local_index(self) -> bool:
+        """
+        True si el índice en proceso puede servir las búsquedas: debe estar
+        sincronizado con el grafo (ver VectorIndexSynchronizer), si no le
+        faltarían los chunks que no ingirió este proceso.
+        """
+        return (
+            self.vector_index is not None
+            and self.vector_index.synchronized
+            and len(self.vector_index) > 0
+        )
+    
+    def _vector_search_local(
+        self,
+        query_embedding: Embedding,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """
+        Búsqueda vectorial con el índice en proceso.
+        
+        El ranking se hace en memoria; Neo4j solo recupera el contenido
+        y los chunks vecinos de los chunk_id ganadores en una única consulta.
+        """
+        hits = self.vector_index.search(query_embedding.vector, k=limit)
+        if not hits:
+            return []
+        
+        query = f"""
+        UNWIND $hits as hit
+        MATCH (node:Chunk {{chunk_id: hit.chunk_id}})
+        WITH node, hit.score AS score
+        {_vector_result(neighbors)}"""
+        
+        driver = self._get_driver()
+        
+        try:
+            with driver.session(database=self.database) as session:
+                records = session.run(
+                    query,
+                    hits=[{"chunk_id": chunk_id, "score": score} for chunk_id, score in hits]
+                )
+                results = self._vector_results(records)
+        except Exception as e:
+            logger.error(f"Error in local vector search: {e}", exc_info=True)
+            raise
+        
+        if len(results) < len(hits):
+            # Chunks presentes en el índice pero ya no en el grafo: se eliminan
+            # del índice y se repite la búsqueda para completar `limit`
+            found = {result.chunk_id for result in results}
+            stale = [chunk_id for chunk_id, _ in hits if chunk_id not in found]
+            logger.warning(f"Removing {len(stale)} chunks deleted from the graph from the vector index")
+            self.vector_index.remove(stale)
+            self.vector_index.flush()
+            return self._vector_search_local(query_embedding, limit, neighbors)
         
         return results
     
+    def _filtered_vector_search(
+        self,
+        query_embedding: Embedding,
+        metadata_filter: MetadataFilter,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """
+        Búsqueda vectorial restringida a los chunks que cumplen el filtro.
+        
+        La estrategia depende del tamaño del subconjunto filtrado (un conteo
+        cacheado por filtro):
+        
+        - Pequeño (<= filter_exact_threshold): se puntúan exactamente todos sus
+          chunks con vector.similarity.cosine, sin pasar por el índice.
+        - Grande: se piden al índice limit / selectividad candidatos (con
+          margen) y el filtro se aplica en la misma consulta. Si no se llega a
+          `limit`, se repite con la proporción observada hasta
+          filter_max_candidates y, si aun así faltan, se puntúa exactamente.
+          La proporción observada se guarda para el mismo filtro.
+        
+        Con el índice en proceso se siguen las mismas reglas: la puntuación
+        exacta se hace en memoria sobre los chunk_id que cumplen el filtro, y
+        los candidatos salen del índice y se filtran al hidratarlos.
+        """
+        query_vector = query_embedding.to_list()
+        local = self._use_local_index()
+        driver = self._get_driver()
+        
+        try:
+            with driver.session(database=self.database) as session:
+                stats = self._filter_selectivity(session, metadata_filter)
+                if stats["matching"] == 0:
+                    return []
+                if stats["matching"] <= self.filter_exact_threshold:
+                    logger.debug(f"Filtered vector search: exact scoring of {stats['matching']} chunks")
+                    return self._exact_filtered(session, query_embedding, metadata_filter, limit, local, neighbors)
+                
+                population = len(self.vector_index) if local else stats["total"]
+                max_candidates = min(self.filter_max_candidates, population)
+                selectivity = stats["selectivity"]
+                candidates = self._overfetch(limit, selectivity, max_candidates)
+                while True:
+                    if local:
+                        results = self._local_filtered_search(
+                            session, query_embedding, metadata_filter, candidates, limit, neighbors
+                        )
+                    else:
+                        results = self._ann_filtered_search(
+                            session, query_vector, metadata_filter, candidates, limit, neighbors
+                        )
+                    if len(results) >= limit or candidates >= max_candidates:
+                        break
+                    # Menos resultados de los esperados: el filtro es más selectivo cerca de la query
+                    selectivity = min(selectivity, max(len(results), 1) / candidates)
+                    candidates = max(min(candidates * 2, max_candidates), self._overfetch(limit, selectivity, max_candidates))
+                self._record_selectivity(metadata_filter, selectivity)
+                logger.debug(
+                    f"Filtered vector search: {candidates} candidates for {len(results)} results "
+                    f"(selectivity {selectivity:.4f})"
+                )
+                
+                if len(results) < limit and candidates < population:
+                    return self._exact_filtered(session, query_embedding, metadata_filter, limit, local, neighbors)
+                return results
+        except Exception as e:
+            logger.error(f"Error in filtered vector search: {e}", exc_info=True)
+            raise
+    
+    def _overfetch(self, limit: int, selectivity: float, max_candidates: int) -> int:
+        """Candidatos a pedir al índice para obtener `limit` resultados filtrados."""
+        wanted = math.ceil(limit / max(selectivity, 1e-9) * self.filter_overfetch_margin)
+        return max(1, min(max_candidates, max(limit, wanted)))
+    
+    def _filter_selectivity(self, session, metadata_filter: MetadataFilter) -> Dict[str, Any]:
+        """Chunks que cumplen el filtro, chunks totales y selectividad (cacheados)."""
+        key = (self.database, metadata_filter.signature)
+        entry = _SELECTIVITY_CACHE.get(key)
+        if entry is not None and time.monotonic() - entry["measured_at"] < _SELECTIVITY_TTL:
+            _SELECTIVITY_CACHE.move_to_end(key)
+            return entry
+        
+        record = session.run(f"""
+        MATCH (node:Chunk)
+        {metadata_filter.cypher("node")}
+        WITH count(DISTINCT node) AS matching
+        CALL {{
+            MATCH (chunk:Chunk)
+            RETURN count(chunk) AS total
+        }}
+        RETURN matching, total
+        """, **metadata_filter.params).single()
+        matching = record["matching"] if record else 0
+        total = record["total"] if record else 0
+        entry = {
+            "matching": matching,
+            "total": total,
+            "selectivity": matching / total if total else 0.0,
+            "measured_at": time.monotonic()
+        }
+        _SELECTIVITY_CACHE[key] = entry
+        _SELECTIVITY_CACHE.move_to_end(key)
+        while len(_SELECTIVITY_CACHE) > _SELECTIVITY_CACHE_SIZE:
+            _SELECTIVITY_CACHE.popitem(last=False)
+        return entry
+    
+    def _record_selectivity(self, metadata_filter: MetadataFilter, selectivity: float) -> None:
+        """Guarda la proporción observada para las siguientes búsquedas con el filtro."""
+        entry = _SELECTIVITY_CACHE.get((self.database, metadata_filter.signature))
+        if entry is not None:
+            entry["selectivity"] = min(entry["selectivity"], selectivity)
+    
+    def _exact_filtered(
+        self,
+        session,
+        query_embedding: Embedding,
+        metadata_filter: MetadataFilter,
+        limit: int,
+        local: bool,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Puntuación exacta del subconjunto filtrado, en Neo4j o en el índice en proceso."""
+        if local:
+            return self._local_exact_filtered_search(session, query_embedding, metadata_filter, limit, neighbors)
+        return self._exact_filtered_search(session, query_embedding.to_list(), metadata_filter, limit, neighbors)
+    
+    def _exact_filtered_search(
+        self,
+        session,
+        query_vector: List[float],
+        metadata_filter: MetadataFilter,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Puntúa exactamente todos los chunks que cumplen el filtro."""
+        query = f"""
+        MATCH (node:Chunk)
+        {metadata_filter.cypher("node", "node.embeddings IS NOT NULL")}
+        WITH DISTINCT node
+        WITH node, vector.similarity.cosine(node.embeddings, $query_vector) AS score
+        ORDER BY score DESC
+        LIMIT $top_k
+        {_vector_result(neighbors)}"""
+        records = session.run(query, query_vector=query_vector, top_k=limit, **metadata_filter.params)
+        return self._vector_results(records)
+    
+    def _ann_filtered_search(
+        self,
+        session,
+        query_vector: List[float],
+        metadata_filter: MetadataFilter,
+        candidates: int,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Candidatos del índice vectorial de Neo4j filtrados en la misma consulta."""
+        query = f"""
+        CALL db.index.vector.queryNodes('chunk_embeddings', toInteger($candidates), $query_vector)
+        YIELD node, score
+        {metadata_filter.cypher("node")}
+        WITH DISTINCT node, score
+        ORDER BY score DESC
+        LIMIT $top_k
+        {_vector_result(neighbors)}"""
+        records = session.run(
+            query, query_vector=query_vector, candidates=candidates, top_k=limit, **metadata_filter.params
+        )
+        return self._vector_results(records)
+    
+    def _local_filtered_search(
+        self,
+        session,
+        query_embedding: Embedding,
+        metadata_filter: MetadataFilter,
+        candidates: int,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Candidatos del índice en proceso filtrados al hidratarlos."""
+        hits = self.vector_index.search(query_embedding.vector, k=candidates)
+        return self._hydrate_filtered(session, hits, metadata_filter, limit, neighbors)
+    
+    def _local_exact_filtered_search(
+        self,
+        session,
+        query_embedding: Embedding,
+        metadata_filter: MetadataFilter,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Puntúa en el índice en proceso todos los chunks que cumplen el filtro."""
+        records = session.run(f"""
+        MATCH (node:Chunk)
+        {metadata_filter.cypher("node")}
+        RETURN DISTINCT node.chunk_id AS chunk_id
+        """, **metadata_filter.params)
+        chunk_ids = [record["chunk_id"] for record in records]
+        hits = self.vector_index.search(query_embedding.vector, k=limit, chunk_ids=chunk_ids)
+        return self._hydrate_filtered(session, hits, metadata_filter, limit, neighbors)
+    
+    def _hydrate_filtered(
+        self,
+        session,
+        hits: List[Tuple[str, float]],
+        metadata_filter: MetadataFilter,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Contenido y vecinos de los hits del índice en proceso que cumplen el filtro."""
+        if not hits:
+            return []
+        query = f"""
+        UNWIND $hits as hit
+        MATCH (node:Chunk {{chunk_id: hit.chunk_id}})
+        {metadata_filter.cypher("node")}
+        WITH DISTINCT node, hit.score AS score
+        ORDER BY score DESC
+        LIMIT $top_k
+        {_vector_result(neighbors)}"""
+        records = session.run(
+            query,
+            hits=[{"chunk_id": chunk_id, "score": score} for chunk_id, score in hits],
+            top_k=limit,
+            **metadata_filter.params
+        )
+        return self._vector_results(records)
+    
+    @staticmethod
+    def _vector_results(records) -> List[SearchResult]:
+        """SearchResults de registros con el mapa `result` de _vector_result."""
+        results = []
+        for record in records:
+            result_data = record["result"]
+            results.append(SearchResult(
+                content=result_data["central_node_content"],
+                score=float(result_data["score"]),
+                chunk_id=result_data["central_node_chunk_id"],
+                chunk_id_consecutive=result_data["central_node_chunk_id_consecutive"] or 0,
+                previous_chunk_content=result_data.get("previous_chunk_content"),
+                next_chunk_content=result_data.get("next_chunk_content")
+            ))
+        return results
+    
     def hybrid_search(
         self,
         query_text: str,
         query_embedding: Embedding,
         weights: Tuple[float, float] = (0.3, 0.7),
-        limit: int = 5
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        mmr_lambda: Optional[float] = None,
+        mmr_fetch_k: Optional[int] = None,
+        context_window: int = 0,
+        same_page: bool = False,
+        merge_overlapping: bool = True,
+        chunk_overlap: int = 200
     ) -> List[SearchResult]:
         """
         Búsqueda híbrida combinando texto y vectorial.
         
         Basado en hybrid_search de graph_rags.py.
+        
+        Con `filters` (ver MetadataFilter), los resultados full-text se filtran
+        en la consulta y su score vectorial se calcula exactamente
+        (vector.similarity.cosine) en lugar de cruzarlos con el índice vectorial.
+        
+        Con un reranker configurado, se piden max(limit, reranker.top_n)
+        candidatos y se devuelven los `limit` mejores según el reordenador.
+        
+        Con `mmr_lambda`, los resultados se diversifican con MMR (ver
+        diversify) sobre `mmr_fetch_k` candidatos (default: 4 × limit).
+        
+        Con `context_window` > 0, cada resultado lleva el tramo de
+        ±context_window chunks (ver expand_context, con same_page,
+        merge_overlapping y chunk_overlap) en lugar de los vecinos anterior
+        y siguiente, en la misma llamada.
         """
         if not query_text:
             raise ValueError("Query text cannot be empty")
         
         if len(weights) != 2:
             raise ValueError("Weights must be a tuple of 2 floats")
+        _check_window(context_window)
+        neighbors = not context_window
         
+        if mmr_lambda is not None:
+            candidates = self._reranked_hybrid_search(
+                query_text, query_embedding, weights, self._mmr_fetch_k(limit, mmr_fetch_k), filters, neighbors
+            )
+            results = self.diversify(candidates, query_embedding, limit, mmr_lambda)
+        else:
+            results = self._reranked_hybrid_search(query_text, query_embedding, weights, limit, filters, neighbors)
+        
+        if context_window:
+            self.expand_context(results, context_window, same_page, merge_overlapping, chunk_overlap)
+        return results
+    
+    def _reranked_hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        weights: Tuple[float, float],
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        neighbors: bool
+    ) -> List[SearchResult]:
+        """Búsqueda híbrida, reordenada si hay reranker (ver hybrid_search)."""
+        if self.reranker is not None:
+            candidates = self._hybrid_search(
+                query_text, query_embedding, weights, self._rerank_limit(limit), filters, neighbors
+            )
+            return self.reranker.rerank(query_text, candidates, limit)
+        return self._hybrid_search(query_text, query_embedding, weights, limit, filters, neighbors)
+    
+    @staticmethod
+    def _mmr_fetch_k(limit: int, fetch_k: Optional[int]) -> int:
+        """Candidatos de la primera etapa cuando se diversifica con MMR."""
+        return max(limit, fetch_k if fetch_k is not None else 4 * limit)
+    
+    def _rerank_limit(self, limit: int) -> int:
+        """Candidatos de la primera etapa cuando hay reranker."""
+        return max(limit, self.reranker.top_n)
+    
+    def _hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        weights: Tuple[float, float],
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Búsqueda híbrida sin reordenar (ver hybrid_search)."""
         text_weight, vector_weight = weights
         
-        query = """
+        metadata_filter = MetadataFilter(filters)
+        if metadata_filter:
+            return self._filtered_hybrid_search(
+                query_text, query_embedding, text_weight, vector_weight, metadata_filter, limit, neighbors
+            )
+        
+        query = f"""
         // Búsqueda fulltext
         CALL db.index.fulltext.queryNodes("chunk_content", $query_text)
         YIELD node as text_node, score as text_score
         
         // Combinar con búsqueda vectorial
-        CALL {
+        CALL {{
             WITH text_node
             CALL db.index.vector.queryNodes('chunk_embeddings', toInteger($top_k), $query_vector)
             YIELD node as vec_node, score as vec_score
             WHERE text_node = vec_node
             RETURN vec_node, vec_score
-        }
+        }}
         
         // Calcular score combinado
-        WITH text_node as node, text_score, vec_score,
-             (text_score * $text_weight + vec_score * $vector_weight) as combined_score
-        
-        // Obtener contexto
-        OPTIONAL MATCH (node)<-[:NEXT_CHUNK]-(prev)
-        OPTIONAL MATCH (node)-[:NEXT_CHUNK]->(next)
-        
-        RETURN {
-            score: combined_score,
-            central_node_content: node.page_content,
-            central_node_chunk_id: node.chunk_id,
-            central_node_chunk_id_consecutive: node.chunk_id_consecutive,
-            previous_chunk_content: prev.page_content,
-            next_chunk_content: next.page_content
-        } as result
-        ORDER BY combined_score DESC
+        WITH text_node as node,
+             (text_score * $text_weight + vec_score * $vector_weight) as score
+        {_vector_result(neighbors)}
         LIMIT $top_k
         """
         
         driver = self._get_driver()
-        results = []
         
         try:
             with driver.session(database=self.database) as session:
                 records = session.run(
                     query,
                     query_text=query_text,
-                    query_vector=query_embedding.vector,
+                    query_vector=query_embedding.to_list(),
                     text_weight=text_weight,
                     vector_weight=vector_weight,
                     top_k=limit
                 )
-                
-                for record in records:
-                    result_data = record["result"]
-                    result = SearchResult(
-                        content=result_data["central_node_content"],
-                        score=float(result_data["score"]),
-                        chunk_id=result_data["central_node_chunk_id"],
-                        chunk_id_consecutive=result_data["central_node_chunk_id_consecutive"] or 0,
-                        previous_chunk_content=result_data.get("previous_chunk_content"),
-                        next_chunk_content=result_data.get("next_chunk_content")
-                    )
-                    results.append(result)
+                return self._vector_results(records)
         except Exception as e:
             logger.error(f"Error in hybrid search: {e}", exc_info=True)
             raise
-        
-        return results
     
     def search_with_pattern(
         self,
         query_text: str,
         pattern_type: str,
         limit: int = 5,
+        mmr_lambda: Optional[float] = None,
+        mmr_fetch_k: Optional[int] = None,
         **kwargs
     ) -> List[SearchResult]:
         """
@@ -240,8 +708,11 @@ class Neo4jSearchService(SearchService):
         
         Args:
             query_text: Texto a buscar
-            pattern_type: Tipo de patrón ("metadata_filtering", "parent_child")
+            pattern_type: Tipo de patrón ("metadata_filtering", "parent_child", "hierarchical", ...)
             limit: Número máximo de resultados
+            mmr_lambda: Si se indica, diversifica los resultados con MMR (ver
+                        diversify) sobre mmr_fetch_k candidatos
+            mmr_fetch_k: Candidatos para MMR (default: 4 × limit)
             **kwargs: Parámetros específicos del patrón
         
         Returns:
@@ -269,6 +740,18 @@ class Neo4jSearchService(SearchService):
         if not query_text:
             raise ValueError("Query text cannot be empty")
         
+        if mmr_lambda is not None:
+            query_vector = kwargs.get("query_vector")
+            if query_vector is None:
+                query_vector = self._query_vector(query_text)
+                # Los patrones vectoriales reutilizan el mismo embedding
+                if pattern_type in self._VECTOR_PATTERNS:
+                    kwargs["query_vector"] = query_vector
+            candidates = self.search_with_pattern(
+                query_text, pattern_type, self._mmr_fetch_k(limit, mmr_fetch_k), **kwargs
+            )
+            return self.diversify(candidates, query_vector, limit, mmr_lambda)
+        
         # Mapear nombres de patrones a métodos (más explícito y seguro)
         pattern_map = {
             "basic": GraphRAGSearchPatterns.basic_retriever,
@@ -276,6 +759,8 @@ class Neo4jSearchService(SearchService):
             "metadata_filtering": GraphRAGSearchPatterns.metadata_filtering,
             "parent_child": GraphRAGSearchPatterns.parent_child_retriever,
             "parent_child_retriever": GraphRAGSearchPatterns.parent_child_retriever,  # Alias
+            "hierarchical": GraphRAGSearchPatterns.hierarchical_retriever,
+            "hierarchical_retriever": GraphRAGSearchPatterns.hierarchical_retriever,  # Alias
         }
         
         # Patrones avanzados (requieren módulos opcionales)
@@ -301,17 +786,15 @@ class Neo4jSearchService(SearchService):
             )
         
         # Generar query y parámetros
-        # Para graph_enhanced, necesita query_vector que debe generarse
-        if pattern_type in ["graph_enhanced", "graph_enhanced_vector"]:
+        # Para graph_enhanced y hierarchical, necesita query_vector que debe generarse
+        if pattern_type in self._VECTOR_PATTERNS:
             if "query_vector" not in kwargs:
                 # Generar embedding si no se proporciona
-                from ungraph.infrastructure.services.huggingface_embedding_service import HuggingFaceEmbeddingService
-                from ungraph.core.configuration import get_settings
-                settings = get_settings()
-                embedding_service = HuggingFaceEmbeddingService(model_name=settings.embedding_model)
-                embedding = embedding_service.generate_embedding(query_text)
-                kwargs["query_vector"] = embedding.vector
-        
+                kwargs["query_vector"] = self._query_vector(query_text)
+            elif hasattr(kwargs["query_vector"], "tolist"):
+                # Vector NumPy (Embedding.vector): el driver espera una lista
+                kwargs["query_vector"] = kwargs["query_vector"].tolist()
+
         query, params = pattern_method(query_text, limit=limit, **kwargs)
         
         # Ejecutar query
@@ -324,7 +807,7 @@ class Neo4jSearchService(SearchService):
                 
                 for record in records:
                     # Manejar diferentes formatos de resultado según el patrón
-                    if pattern_type in ["basic", "basic_retriever"]:
+                    if pattern_type in ["basic", "basic_retriever", "hierarchical", "hierarchical_retriever"]:
                         result = SearchResult(
                             content=record["content"],
                             score=float(record["score"]),
@@ -360,15 +843,22 @@ class Neo4jSearchService(SearchService):
                         # Graph-Enhanced retorna estructura compleja
                         result_data = record["result"]
                         central = result_data["central_chunk"]
+                        # Los mapas pueden traer nulls (chunk sin contenido)
                         related_text = " ".join([
-                            ctx.get("chunk", {}).get("content", "") 
-                            for ctx in result_data.get("related_chunks", [])
+                            (ctx.get("chunk") or {}).get("content") or ""
+                            for ctx in result_data.get("related_chunks") or []
                         ])
                         neighbor_text = " ".join([
-                            n.get("content", "") 
-                            for n in result_data.get("neighbor_chunks", [])
+                            n.get("content") or ""
+                            for n in result_data.get("neighbor_chunks") or []
                         ])
-                        full_context = f"{related_text} {neighbor_text}".strip()
+                        similar_text = " ".join([
+                            n.get("content") or ""
+                            for n in result_data.get("similar_chunks") or []
+                        ])
+                        full_context = " ".join(
+                            text for text in (related_text, neighbor_text, similar_text) if text
+                        )
                         
                         result = SearchResult(
                             content=central["content"],
@@ -428,9 +918,349 @@ class Neo4jSearchService(SearchService):
         
         return results
     
+    def _query_vector(self, query_text: str) -> List[float]:
+        """Embedding de la consulta (sin cargar el modelo en cada llamada)."""
+        if self.embedding_service is None:
+            from ungraph.application.dependencies import create_embedding_service
+            from ungraph.core.configuration import get_settings
+            self.embedding_service = create_embedding_service(get_settings())
+        return self.embedding_service.generate_embedding(query_text).to_list()
+    
+    def _filtered_hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        text_weight: float,
+        vector_weight: float,
+        metadata_filter: MetadataFilter,
+        limit: int,
+        neighbors: bool = True
+    ) -> List[SearchResult]:
+        """Full-text filtrado en la consulta + score vectorial exacto de cada candidato."""
+        query = f"""
+        CALL db.index.fulltext.queryNodes("chunk_content", $query_text)
+        YIELD node, score as text_score
+        {metadata_filter.cypher("node", "node.embeddings IS NOT NULL")}
+        WITH DISTINCT node, text_score
+        WITH node, text_score * $text_weight
+                   + vector.similarity.cosine(node.embeddings, $query_vector) * $vector_weight AS score
+        ORDER BY score DESC
+        LIMIT $top_k
+        {_vector_result(neighbors)}"""
+        
+        driver = self._get_driver()
+        try:
+            with driver.session(database=self.database) as session:
+                records = session.run(
+                    query,
+                    query_text=query_text,
+                    query_vector=query_embedding.to_list(),
+                    text_weight=text_weight,
+                    vector_weight=vector_weight,
+                    top_k=limit,
+                    **metadata_filter.params
+                )
+                return self._vector_results(records)
+        except Exception as e:
+            logger.error(f"Error in filtered hybrid search: {e}", exc_info=True)
+            raise
+    
+    def expand_context(
+        self,
+        results: List[SearchResult],
+        window: int = 1,
+        same_page: bool = False,
+        merge_overlapping: bool = True,
+        chunk_overlap: int = 200
+    ) -> List[SearchResult]:
+        """
+        Añade a cada resultado el texto de los chunks vecinos (±window).
+        
+        Todas las ventanas se obtienen en una sola consulta por lotes (por
+        chunk_id, siguiendo NEXT_CHUNK dentro del mismo archivo), y cada chunk
+        vecino viaja una sola vez aunque aparezca en varias ventanas. Las
+        ventanas que comparten chunks se fusionan en un mismo tramo contiguo;
+        el solapamiento entre chunks consecutivos (chunk_overlap) se elimina
+        con sus offsets start_index/end_index o, si no los tienen, buscando el
+        prefijo del siguiente al final del anterior (como mucho chunk_overlap
+        caracteres).
+        
+        Args:
+            results: Resultados de una búsqueda (se modifican y se devuelven)
+            window: Chunks a cada lado de cada resultado (0-10)
+            same_page: Solo vecinos de la misma Page que el resultado
+            merge_overlapping: Fusionar ventanas solapadas en un tramo
+            chunk_overlap: chunk_overlap usado en la ingesta (default: 200); acota
+                           el solapamiento buscado en chunks sin offsets
+        
+        Returns:
+            Los mismos resultados con `context` (texto del tramo) y
+            `context_span_id` (resultados del mismo tramo comparten id)
+        
+        Raises:
+            ValueError: Si window está fuera de rango
+        """
+        _check_window(window)
+        chunk_ids = list(dict.fromkeys(result.chunk_id for result in results if result.chunk_id))
+        if not chunk_ids:
+            return results
+        
+        # La longitud de un patrón variable no admite parámetros: window ya está validado
+        query = f"""
+        UNWIND $chunk_ids AS chunk_id
+        MATCH (hit:Chunk {{chunk_id: chunk_id}})
+        OPTIONAL MATCH (page:Page)-[:HAS_CHUNK]->(hit)
+        OPTIONAL MATCH (file:File)-[:CONTAINS]->(page)
+        CALL {{
+            WITH hit
+            MATCH (hit)-[:NEXT_CHUNK*0..{window}]->(n:Chunk)
+            RETURN n
+            UNION
+            WITH hit
+            MATCH (n:Chunk)-[:NEXT_CHUNK*1..{window}]->(hit)
+            RETURN n
+        }}
+        WITH chunk_id, page, file, n
+        WHERE (NOT $same_page OR page IS NULL OR EXISTS {{ (page)-[:HAS_CHUNK]->(n) }})
+          AND (file IS NULL OR EXISTS {{ (file)-[:CONTAINS]->(:Page)-[:HAS_CHUNK]->(n) }})
+        WITH chunk_id, collect(DISTINCT n) AS window_nodes
+        WITH collect({{hit: chunk_id, ids: [x IN window_nodes | x.chunk_id]}}) AS windows,
+             collect(window_nodes) AS groups
+        UNWIND groups AS window_group
+        UNWIND window_group AS n
+        WITH windows, collect(DISTINCT n) AS nodes
+        UNWIND nodes AS n
+        OPTIONAL MATCH (n_page:Page)-[:HAS_CHUNK]->(n)
+        WITH windows, n, head(collect(n_page)) AS n_page
+        RETURN windows, collect({{
+            chunk_id: n.chunk_id,
+            consecutive: n.chunk_id_consecutive,
+            content: n.page_content,
+            start_index: n.start_index,
+            end_index: n.end_index,
+            source: CASE WHEN n_page IS NULL THEN null
+                         ELSE n_page.filename + '#' + toString(n_page.page_number) END
+        }}) AS chunks
+        """
+        
+        driver = self._get_driver()
+        try:
+            with driver.session(database=self.database) as session:
+                record = session.run(
+                    query, chunk_ids=chunk_ids, same_page=same_page
+                ).single()
+        except Exception as e:
+            logger.error(f"Error expanding search context: {e}", exc_info=True)
+            raise
+        if record is None:
+            return results
+        
+        chunks = {chunk["chunk_id"]: chunk for chunk in record["chunks"]}
+        windows = {
+            window_data["hit"]: [chunk_id for chunk_id in window_data["ids"] if chunk_id in chunks]
+            for window_data in record["windows"]
+        }
+        
+        # Tramos: unión de las ventanas que comparten algún chunk
+        hits = [chunk_id for chunk_id in chunk_ids if windows.get(chunk_id)]
+        parent = {hit: hit for hit in hits}
+        
+        def find(hit: str) -> str:
+            while parent[hit] != hit:
+                parent[hit] = parent[parent[hit]]
+                hit = parent[hit]
+            return hit
+        
+        if merge_overlapping:
+            owner: Dict[str, str] = {}
+            for hit in hits:
+                for chunk_id in windows[hit]:
+                    if chunk_id in owner:
+                        parent[find(hit)] = find(owner[chunk_id])
+                    else:
+                        owner[chunk_id] = hit
+        
+        span_ids: Dict[str, int] = {}
+        span_texts: Dict[int, str] = {}
+        span_members: Dict[str, List[str]] = {}
+        for hit in hits:
+            span_members.setdefault(find(hit), []).extend(windows[hit])
+        for root, members in span_members.items():
+            span_id = len(span_texts)
+            ordered = sorted(
+                (chunks[chunk_id] for chunk_id in set(members)),
+                key=lambda chunk: (chunk.get("consecutive") or 0)
+            )
+            span_texts[span_id] = _merge_chunk_texts(ordered, max_overlap=chunk_overlap)
+            span_ids[root] = span_id
+        
+        for result in results:
+            if result.chunk_id in parent:
+                span_id = span_ids[find(result.chunk_id)]
+                result.context = span_texts[span_id]
+                result.context_span_id = span_id
+        return results
+    
+    def diversify(
+        self,
+        results: List[SearchResult],
+        query_embedding: Any,
+        limit: int = 5,
+        lambda_mult: float = 0.5
+    ) -> List[SearchResult]:
+        """
+        Selecciona `limit` resultados con Maximal Marginal Relevance (MMR).
+        
+        Cada paso elige el candidato que maximiza
+        lambda_mult · sim(consulta, c) - (1 - lambda_mult) · max sim(c, elegidos),
+        así los chunks casi idénticos (ventanas solapadas, texto repetido)
+        no ocupan varios puestos. Los embeddings de los candidatos se leen en
+        una sola consulta por chunk_id y la selección usa operaciones de
+        matrices de NumPy (ver _mmr).
+        
+        Args:
+            results: Candidatos de una búsqueda
+            query_embedding: Embedding de la consulta (Embedding o secuencia)
+            limit: Número de resultados a seleccionar
+            lambda_mult: 1.0 = solo relevancia, 0.0 = máxima diversidad
+        
+        Returns:
+            Resultados seleccionados, en orden de selección. Los candidatos sin
+            embedding completan la lista si faltan resultados.
+        
+        Raises:
+            ValueError: Si lambda_mult no está en [0, 1]
+        """
+        if not 0.0 <= lambda_mult <= 1.0:
+            raise ValueError(f"lambda_mult must be between 0 and 1, got {lambda_mult}")
+        chunk_ids = list(dict.fromkeys(result.chunk_id for result in results if result.chunk_id))
+        if len(results) <= 1 or not chunk_ids:
+            return results[:limit]
+        
+        query = """
+        UNWIND $chunk_ids AS chunk_id
+        MATCH (c:Chunk {chunk_id: chunk_id})
+        WHERE c.embeddings IS NOT NULL
+        RETURN chunk_id, c.embeddings AS embeddings
+        """
+        
+        driver = self._get_driver()
+        try:
+            with driver.session(database=self.database) as session:
+                vectors = {
+                    record["chunk_id"]: record["embeddings"]
+                    for record in session.run(query, chunk_ids=chunk_ids)
+                }
+        except Exception as e:
+            logger.error(f"Error reading embeddings for MMR: {e}", exc_info=True)
+            raise
+        
+        embedded = [result for result in results if result.chunk_id in vectors]
+        if not embedded:
+            return results[:limit]
+        query_vector = np.asarray(getattr(query_embedding, "vector", query_embedding), dtype=np.float32)
+        matrix = np.asarray([vectors[result.chunk_id] for result in embedded], dtype=np.float32)
+        selected = [embedded[i] for i in _mmr(query_vector, matrix, limit, lambda_mult)]
+        if len(selected) < limit:
+            selected.extend([result for result in results if result.chunk_id not in vectors][:limit - len(selected)])
+        return selected
+    
     def close(self) -> None:
         """Cierra la conexión a Neo4j."""
         if self._driver:
             self._driver.close()
             self._driver = None
 
+
+def _mmr(query_vector: np.ndarray, matrix: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Índices de las filas de `matrix` elegidas por MMR, en orden de selección.
+    
+    Las similitudes coseno consulta-candidato y candidato-candidato se
+    calculan una vez como productos de matrices; en cada paso solo se
+    actualiza, con un máximo elemento a elemento, la similitud de cada
+    candidato con lo ya elegido.
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+    query_norm = np.linalg.norm(query_vector)
+    relevance = matrix @ (query_vector / query_norm if query_norm else query_vector)
+    similarity = matrix @ matrix.T
+    
+    k = min(k, len(matrix))
+    if k <= 0:
+        return []
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(len(matrix), dtype=bool)
+    available[selected[0]] = False
+    redundancy = similarity[selected[0]].copy()
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(redundancy, similarity[chosen], out=redundancy)
+    return selected
+
+
+def _check_window(window: int) -> None:
+    """Valida la ventana de contexto (chunks a cada lado, 0-10)."""
+    if not isinstance(window, int) or window < 0 or window > 10:
+        raise ValueError("window must be an integer between 0 and 10")
+
+
+def _merge_chunk_texts(
+    chunks: List[Dict[str, Any]],
+    min_overlap: int = 20,
+    max_overlap: int = 200
+) -> str:
+    """
+    Une chunks consecutivos en un texto contiguo sin repetir su solapamiento.
+    
+    Con offsets del mismo origen (Page) se recorta exactamente lo que el
+    siguiente chunk repite; sin ellos se busca el mayor prefijo del
+    siguiente que termina el texto anterior, entre min_overlap y
+    max_overlap (el chunk_overlap de la ingesta) caracteres y nunca el chunk
+    entero: en texto periódico un prefijo más largo también coincidiría y
+    se perderían caracteres. Si no hay solapamiento, los chunks se separan
+    con "\n".
+    """
+    text = ""
+    previous = None
+    for chunk in chunks:
+        content = chunk.get("content") or ""
+        if previous is None:
+            text = content
+        else:
+            overlap = _chunk_overlap(previous, chunk, text, content, min_overlap, max_overlap)
+            if overlap is None:
+                text += "\n" + content
+            else:
+                text += content[overlap:]
+        previous = chunk
+    return text
+
+
+def _chunk_overlap(
+    previous: Dict[str, Any],
+    chunk: Dict[str, Any],
+    text: str,
+    content: str,
+    min_overlap: int,
+    max_overlap: int
+) -> Optional[int]:
+    """Caracteres iniciales de `content` ya presentes al final de `text` (None: ninguno)."""
+    offsets = (previous.get("end_index"), chunk.get("start_index"), chunk.get("end_index"))
+    if previous.get("source") is not None and previous.get("source") == chunk.get("source") \
+            and None not in offsets:
+        overlap = offsets[0] - offsets[1]
+        if overlap <= 0:
+            return 0 if overlap == 0 else None
+        return min(overlap, len(content))
+    
+    for size in range(min(len(text), len(content) - 1, max_overlap), min_overlap - 1, -1):
+        if text.endswith(content[:size]):
+            return size
+    return None
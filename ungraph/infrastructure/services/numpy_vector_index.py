@@ -0,0 +1,697 @@
+"""
+Implementación: NumpyVectorIndex
+
+Implementa VectorIndexService con NumPy, en el mismo proceso que la aplicación.
+
+- Corpus pequeños: búsqueda exacta con un único producto matriz-vector.
+- Corpus grandes: IVF (k-means esférico + listas invertidas) sondeando
+  solo las `nprobe` listas más cercanas a la consulta.
+- Cuantización opcional (int8 / binary): los códigos viven en RAM y los
+  vectores float32 quedan en disco (memory-map) solo para re-puntuar los
+  mejores candidatos.
+- Persistencia en un directorio con `vectors.npy` (cargado con memory-map
+  para arrancar rápido), `ids.json` y, si existen, `ivf.npz` y `codes.npy`.
+  flush() solo añade los cambios desde el último guardado como segmentos
+  `delta-<n>.npz`; save() (o la carga, si hay deltas) compacta todo en una
+  nueva instantánea.
+
+Los scores siguen la escala del índice coseno de Neo4j ((1 + cos) / 2),
+así los resultados son intercambiables con `db.index.vector.queryNodes`.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ungraph.domain.services.vector_index_service import VectorIndexService
+from ungraph.infrastructure.services.embedding_quantizer import EmbeddingQuantizer
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILE = "vectors.npy"
+_IDS_FILE = "ids.json"
+_IVF_FILE = "ivf.npz"
+_CODES_FILE = "codes.npy"
+_DELTA_PREFIX = "delta-"
+# Filas en deltas (respecto a la instantánea) a partir de las cuales flush() compacta
+_COMPACT_RATIO = 0.5
+_COMPACT_MIN_ROWS = 10_000
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normaliza filas a norma L2 unitaria (las filas nulas se dejan a cero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Posiciones de los k mayores scores, ordenadas de mayor a menor."""
+    k = min(k, scores.shape[0])
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class NumpyVectorIndex(VectorIndexService):
+    """
+    Índice vectorial en memoria basado en NumPy.
+
+    Ejemplo:
+        >>> index = NumpyVectorIndex(path="~/.ungraph/vector_index")
+        >>> index.add(["chunk_1", "chunk_2"], vectors)
+        >>> index.save()
+        >>> index.search(query_vector, k=5)
+        [('chunk_2', 0.91), ('chunk_1', 0.64)]
+    """
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        path: Optional[str | Path] = None,
+        ivf_threshold: int = 50_000,
+        nprobe: int = 8,
+        quantizer: Optional[EmbeddingQuantizer] = None,
+        rescore_factor: int = 10
+    ):
+        """
+        Inicializa un índice vacío.
+
+        Args:
+            dimensions: Dimensión de los vectores (se infiere del primer add si es None)
+            path: Directorio de persistencia usado por save() (opcional)
+            ivf_threshold: Número de vectores a partir del cual se usa IVF (default: 50000)
+            nprobe: Listas IVF a sondear por consulta (default: 8)
+            quantizer: Cuantizador para la búsqueda en dos etapas (opcional)
+            rescore_factor: Candidatos re-puntuados en float32 = k * rescore_factor (default: 10)
+        """
+        if ivf_threshold < 1:
+            raise ValueError("ivf_threshold must be positive")
+        if nprobe < 1:
+            raise ValueError("nprobe must be positive")
+        if rescore_factor < 1:
+            raise ValueError("rescore_factor must be positive")
+
+        self.dimensions = dimensions
+        self.path = Path(path).expanduser() if path else None
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.quantizer = quantizer
+        self.rescore_factor = rescore_factor
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, dimensions or 0), dtype=np.float32)
+        self._codes: Optional[np.ndarray] = None
+        # Versión de la calibración con la que se codificó self._codes
+        self._codes_version = -1
+        self._size = 0
+        self._alive = np.empty(0, dtype=bool)
+        self._num_alive = 0
+
+        # Estado IVF
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._list_order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        self._trained_size = 0
+
+        # Persistencia incremental: IDs cambiados desde el último guardado
+        self._pending: Dict[str, None] = {}
+        self._delta_seq = 0
+        self._delta_rows = 0
+        self._base_size = 0
+
+    def __len__(self) -> int:
+        return self._num_alive
+
+    def __contains__(self, chunk_id: str) -> bool:
+        row = self._rows.get(chunk_id)
+        return row is not None and bool(self._alive[row])
+
+    def ids(self) -> List[str]:
+        """IDs de los chunks activos."""
+        return [self._ids[row] for row in np.flatnonzero(self._alive[:self._size])]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Bytes usados por las estructuras de búsqueda.
+
+        Returns:
+            Diccionario con "resident" (RAM) y "mapped" (vectores en memory-map)
+        """
+        resident = self._alive.nbytes + self._assignments.nbytes
+        if self._codes is not None:
+            resident += self._codes[:self._size].nbytes
+        if self._centroids is not None:
+            resident += self._centroids.nbytes
+        vectors = self._vectors[:self._size].nbytes
+        if isinstance(self._vectors, np.memmap):
+            return {"resident": resident, "mapped": vectors}
+        return {"resident": resident + vectors, "mapped": 0}
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def add(self, chunk_ids: List[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Añade o reemplaza vectores. Los vectores se guardan normalizados en float32."""
+        if not chunk_ids:
+            return
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(chunk_ids):
+            raise ValueError(
+                f"Expected a ({len(chunk_ids)}, d) matrix, got shape {matrix.shape}"
+            )
+        if self.dimensions is None:
+            self.dimensions = matrix.shape[1]
+            self._vectors = np.empty((0, self.dimensions), dtype=np.float32)
+        if matrix.shape[1] != self.dimensions:
+            raise ValueError(
+                f"Vector dimension mismatch: expected {self.dimensions}, got {matrix.shape[1]}"
+            )
+
+        # Si un ID se repite en el mismo lote, gana la última aparición
+        last_position = {chunk_id: position for position, chunk_id in enumerate(chunk_ids)}
+        positions = sorted(last_position.values())
+        matrix = _normalize_rows(matrix[positions])
+        chunk_ids = [chunk_ids[position] for position in positions]
+        self._pending.update(dict.fromkeys(chunk_ids))
+        codes = None
+        while self.quantizer is not None:
+            codes = self.quantizer.encode(matrix)
+            version = self.quantizer.version
+            # La codificación pudo (re)calibrar: los códigos existentes se actualizan
+            self._sync_codes()
+            if self.quantizer.version == version:
+                break
+
+        new_rows = []
+        for position, chunk_id in enumerate(chunk_ids):
+            row = self._rows.get(chunk_id)
+            if row is None:
+                new_rows.append(position)
+                continue
+            # Reemplazo en sitio de un vector existente
+            self._ensure_writable()
+            self._vectors[row] = matrix[position]
+            if codes is not None:
+                self._codes[row] = codes[position]
+            if not self._alive[row]:
+                self._alive[row] = True
+                self._num_alive += 1
+            if self._centroids is not None:
+                self._assignments[row] = self._nearest_centroids(matrix[position:position + 1])[0]
+                self._list_order = None
+
+        if new_rows:
+            self._append(
+                [chunk_ids[position] for position in new_rows],
+                matrix[new_rows],
+                codes[new_rows] if codes is not None else None
+            )
+
+        self._maybe_train_ivf()
+
+    def remove(self, chunk_ids: List[str]) -> None:
+        """Marca vectores como eliminados; se compactan al guardar."""
+        for chunk_id in chunk_ids:
+            row = self._rows.get(chunk_id)
+            if row is not None and self._alive[row]:
+                self._alive[row] = False
+                self._num_alive -= 1
+                self._pending[chunk_id] = None
+
+    def _sync_codes(self) -> None:
+        """
+        Re-codifica los códigos si la calibración del cuantizador cambió
+        desde que se generaron (calibración provisional o rangos ampliados).
+        """
+        if self.quantizer is None:
+            return
+        if self._codes is None:
+            self._codes_version = self.quantizer.version
+            return
+        while self._codes_version != self.quantizer.version:
+            version = self.quantizer.version
+            logger.info(f"Re-encoding {self._size} vectors after quantizer recalibration")
+            for start in range(0, self._size, 65_536):
+                end = min(start + 65_536, self._size)
+                self._codes[start:end] = self.quantizer.encode(np.asarray(self._vectors[start:end]))
+            self._codes_version = version
+
+    def _ensure_writable(self) -> None:
+        """Copia a RAM los vectores cargados con memory-map antes de modificarlos."""
+        if isinstance(self._vectors, np.memmap) or not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors[:self._size], dtype=np.float32)
+
+    def _append(self, chunk_ids: List[str], matrix: np.ndarray, codes: Optional[np.ndarray]) -> None:
+        """Añade filas nuevas con crecimiento amortizado de la capacidad."""
+        self._ensure_writable()
+        needed = self._size + len(chunk_ids)
+        capacity = self._vectors.shape[0]
+        if needed > capacity:
+            new_capacity = max(needed, capacity * 2, 1024)
+            grown = np.empty((new_capacity, self.dimensions), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+
+            alive = np.zeros(new_capacity, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._alive = alive
+
+            assignments = np.zeros(new_capacity, dtype=np.int32)
+            assignments[:self._size] = self._assignments[:self._size]
+            self._assignments = assignments
+
+        if codes is not None and (self._codes is None or self._codes.shape[0] < needed):
+            grown_codes = np.zeros((self._vectors.shape[0], codes.shape[1]), dtype=codes.dtype)
+            if self._codes is not None:
+                grown_codes[:self._size] = self._codes[:self._size]
+            self._codes = grown_codes
+
+        start = self._size
+        self._vectors[start:needed] = matrix
+        if codes is not None:
+            self._codes[start:needed] = codes
+        self._alive[start:needed] = True
+        for offset, chunk_id in enumerate(chunk_ids):
+            self._rows[chunk_id] = start + offset
+        self._ids.extend(chunk_ids)
+        self._size = needed
+        self._num_alive += len(chunk_ids)
+
+        if self._centroids is not None:
+            self._assignments[start:needed] = self._nearest_centroids(matrix)
+            self._list_order = None
+
+    # ------------------------------------------------------------------
+    # IVF
+    # ------------------------------------------------------------------
+
+    def _maybe_train_ivf(self) -> None:
+        """Entrena (o re-entrena) IVF cuando el índice crece lo suficiente."""
+        if self._num_alive < self.ivf_threshold:
+            return
+        if self._centroids is not None and self._num_alive < 2 * self._trained_size:
+            return
+        self._train_ivf()
+
+    def _train_ivf(self, iterations: int = 10, seed: int = 0) -> None:
+        """K-means esférico sobre una muestra de los vectores activos."""
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        # Como mucho una lista por vector (ivf_threshold puede ser < 16)
+        nlist = min(int(np.clip(np.sqrt(len(alive_rows)), 16, 4096)), len(alive_rows))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(alive_rows), nlist * 64)
+        sample_rows = np.sort(rng.choice(alive_rows, size=sample_size, replace=False))
+        sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            # Las listas vacías se re-inicializan con puntos aleatorios
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            centroids = _normalize_rows(sums)
+
+        self._centroids = centroids.astype(np.float32)
+        if self._assignments.shape[0] < self._size:
+            self._assignments = np.zeros(self._size, dtype=np.int32)
+        self._assignments[:self._size] = self._nearest_centroids(self._vectors[:self._size])
+        self._list_order = None
+        self._trained_size = self._num_alive
+        logger.info(f"IVF trained with {nlist} lists over {self._num_alive} vectors")
+
+    def _nearest_centroids(self, matrix: np.ndarray, block_size: int = 65_536) -> np.ndarray:
+        """Asigna cada fila a su centroide más cercano, por bloques."""
+        labels = np.empty(matrix.shape[0], dtype=np.int32)
+        for start in range(0, matrix.shape[0], block_size):
+            block = matrix[start:start + block_size]
+            labels[start:start + block_size] = np.argmax(block @ self._centroids.T, axis=1)
+        return labels
+
+    def _ensure_lists(self) -> None:
+        """Reconstruye las listas invertidas (formato CSR) si hubo cambios."""
+        if self._list_order is not None:
+            return
+        assignments = self._assignments[:self._size]
+        self._list_order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(self._centroids))
+        self._list_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _ivf_candidates(self, query: np.ndarray) -> np.ndarray:
+        """Filas de las `nprobe` listas más cercanas a la consulta."""
+        self._ensure_lists()
+        nprobe = min(self.nprobe, len(self._centroids))
+        probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([
+            self._list_order[self._list_offsets[p]:self._list_offsets[p + 1]]
+            for p in probes
+        ])
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def _prepare_query(self, query_vector: Sequence[float]) -> np.ndarray:
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dimensions:
+            raise ValueError(
+                f"Query dimension mismatch: expected {self.dimensions}, got {query.shape[0]}"
+            )
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            raise ValueError("Query vector cannot be all zeros")
+        return query / norm
+
+    def _exact_rows(self, query: np.ndarray, rows: Optional[np.ndarray], k: int) -> List[Tuple[int, float]]:
+        """Top-k exacto en float32 sobre `rows` (o todo el índice si es None)."""
+        if rows is None:
+            scores = np.asarray(self._vectors[:self._size] @ query)
+            scores[~self._alive[:self._size]] = -np.inf
+            rows = np.arange(self._size)
+        else:
+            scores = np.asarray(self._vectors[rows] @ query)
+        top = [i for i in _top_k(scores, k) if np.isfinite(scores[i])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 5,
+        chunk_ids: Optional[List[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k por similitud coseno.
+
+        Con `chunk_ids`, la puntuación es exacta en float32 sobre esos chunks
+        (p. ej. el subconjunto de un filtro de metadata).
+
+        Sin cuantizador, la puntuación es exacta (sobre todo el índice o las
+        listas IVF sondeadas). Con cuantizador se hace en dos etapas: los
+        códigos seleccionan k * rescore_factor candidatos y solo esos se
+        re-puntúan con los vectores float32. La primera etapa convierte los
+        códigos a float32 por bloques, así que es algo más lenta que la
+        búsqueda exacta en RAM: la cuantización reduce la memoria residente
+        (los vectores quedan en memory-map), no la latencia.
+        """
+        if k < 1 or self._num_alive == 0:
+            return []
+
+        query = self._prepare_query(query_vector)
+        if chunk_ids is not None:
+            rows = np.unique(np.asarray(
+                [self._rows[chunk_id] for chunk_id in chunk_ids if chunk_id in self], dtype=np.int64
+            ))
+            if rows.shape[0] == 0:
+                return []
+            return [(self._ids[row], (1.0 + score) / 2.0) for row, score in self._exact_rows(query, rows, k)]
+
+        rows = self._ivf_candidates(query) if self._centroids is not None else None
+        if rows is not None:
+            rows = rows[self._alive[rows]]
+            if rows.shape[0] == 0:
+                return []
+
+        if self._codes is not None:
+            self._sync_codes()
+            if rows is None:
+                # Bloques contiguos de los códigos, sin copia indexada por consulta
+                coarse = self.quantizer.score(query, self._codes[:self._size])
+                coarse[~self._alive[:self._size]] = -np.inf
+                top = _top_k(coarse, k * self.rescore_factor)
+                candidates = np.sort(top[np.isfinite(coarse[top])])
+            else:
+                coarse = self.quantizer.score(query, self._codes[rows])
+                candidates = np.sort(rows[_top_k(coarse, k * self.rescore_factor)])
+            hits = self._exact_rows(query, candidates, k)
+        else:
+            hits = self._exact_rows(query, rows, k)
+
+        return [(self._ids[row], (1.0 + score) / 2.0) for row, score in hits]
+
+    def measure_recall(self, query_vectors: Sequence[Sequence[float]], k: int = 10) -> float:
+        """
+        Mide recall@k de search() frente a la búsqueda exacta en float32.
+
+        Útil para validar una configuración de cuantización/IVF con consultas reales.
+
+        Args:
+            query_vectors: Consultas de prueba (matriz (q, d))
+            k: Número de resultados comparados (default: 10)
+
+        Returns:
+            Fracción media de los k vecinos exactos que search() recupera
+        """
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if queries.shape[0] == 0 or self._num_alive == 0:
+            return 1.0
+
+        total = 0.0
+        for query_vector in queries:
+            exact = {row for row, _ in self._exact_rows(self._prepare_query(query_vector), None, k)}
+            found = {self._rows[chunk_id] for chunk_id, _ in self.search(query_vector, k=k)}
+            total += len(exact & found) / len(exact)
+        return total / queries.shape[0]
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def save(self, path: Optional[str | Path] = None) -> Path:
+        """
+        Persiste el índice compactado (sin filas eliminadas) en un directorio.
+
+        Los ficheros se escriben primero con sufijo temporal y luego se
+        reemplazan atómicamente, para que un lector nunca vea un índice a medias.
+        Con cuantizador, el índice se reabre después con los vectores en
+        memory-map, de modo que en RAM solo quedan los códigos.
+
+        Args:
+            path: Directorio destino (default: el path del constructor)
+
+        Returns:
+            Directorio donde se guardó el índice
+        """
+        target = Path(path).expanduser() if path else self.path
+        if target is None:
+            raise ValueError("No path configured for the vector index")
+        target.mkdir(parents=True, exist_ok=True)
+
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        ids = [self._ids[row] for row in alive_rows]
+        # Los deltas hasta delta_seq quedan incluidos en la instantánea
+        meta = {"dimensions": self.dimensions, "ids": ids, "delta_seq": self._delta_seq}
+
+        def write_array(name: str, array: np.ndarray) -> None:
+            tmp = target / f"{name}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, target / name)
+
+        write_array(_VECTORS_FILE, np.ascontiguousarray(self._vectors[alive_rows]))
+
+        codes_path = target / _CODES_FILE
+        if self._codes is not None:
+            self._sync_codes()
+            write_array(_CODES_FILE, np.ascontiguousarray(self._codes[alive_rows]))
+            meta["quantization"] = self.quantizer.mode
+            meta["calibration_id"] = self.quantizer.calibration_id
+        elif codes_path.exists():
+            codes_path.unlink()
+
+        ivf_path = target / _IVF_FILE
+        if self._centroids is not None:
+            tmp_ivf = target / f"{_IVF_FILE}.tmp"
+            with open(tmp_ivf, "wb") as f:
+                np.savez(
+                    f,
+                    centroids=self._centroids,
+                    assignments=self._assignments[alive_rows],
+                    trained_size=np.int64(self._trained_size)
+                )
+            os.replace(tmp_ivf, ivf_path)
+        elif ivf_path.exists():
+            ivf_path.unlink()
+
+        # ids.json se escribe al final: marca el índice como completo
+        tmp_ids = target / f"{_IDS_FILE}.tmp"
+        tmp_ids.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_ids, target / _IDS_FILE)
+        for _, delta_path in self._delta_files(target):
+            delta_path.unlink()
+
+        self.path = target
+        self._pending = {}
+        self._delta_rows = 0
+        self._base_size = len(ids)
+        logger.info(f"Vector index saved to {target} ({len(ids)} vectors)")
+
+        if self._codes is not None:
+            self._restore(target, mmap=True)
+        return target
+
+    def flush(self) -> None:
+        """
+        Persiste solo los cambios desde el último guardado.
+
+        Los vectores añadidos o reemplazados y los IDs eliminados se escriben
+        en un nuevo segmento `delta-<n>.npz` (coste proporcional al cambio,
+        no al índice). Si no hay instantánea, o los deltas acumulados superan
+        la mitad de ella, se compacta con save().
+        """
+        if not self._pending:
+            return
+        if self.path is None:
+            raise ValueError("No path configured for the vector index")
+        pending_rows = self._delta_rows + len(self._pending)
+        if (
+            not (self.path / _IDS_FILE).exists()
+            or pending_rows > max(_COMPACT_MIN_ROWS, _COMPACT_RATIO * self._base_size)
+        ):
+            self.save()
+            return
+
+        added = [chunk_id for chunk_id in self._pending if chunk_id in self]
+        removed = [chunk_id for chunk_id in self._pending if chunk_id not in self]
+        vectors = np.asarray(
+            self._vectors[[self._rows[chunk_id] for chunk_id in added]], dtype=np.float32
+        ).reshape(len(added), self.dimensions)
+
+        self._delta_seq += 1
+        delta_path = self.path / f"{_DELTA_PREFIX}{self._delta_seq:08d}.npz"
+        tmp = self.path / f"{delta_path.name}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=np.asarray(added, dtype=str), vectors=vectors, removed=np.asarray(removed, dtype=str))
+        os.replace(tmp, delta_path)
+
+        self._delta_rows = pending_rows
+        self._pending = {}
+        logger.info(f"Vector index delta {self._delta_seq} saved ({len(added)} added, {len(removed)} removed)")
+
+    @staticmethod
+    def _delta_files(path: Path) -> List[Tuple[int, Path]]:
+        """Segmentos delta del directorio, ordenados por secuencia."""
+        deltas = []
+        for delta_path in path.glob(f"{_DELTA_PREFIX}*.npz"):
+            try:
+                deltas.append((int(delta_path.stem[len(_DELTA_PREFIX):]), delta_path))
+            except ValueError:
+                continue
+        return sorted(deltas)
+
+    def _apply_deltas(self, path: Path, after_seq: int) -> int:
+        """Aplica los deltas posteriores a la instantánea. Retorna las filas aplicadas."""
+        applied = 0
+        self._delta_seq = after_seq
+        for seq, delta_path in self._delta_files(path):
+            if seq <= after_seq:
+                continue
+            with np.load(delta_path) as delta:
+                self.remove([str(chunk_id) for chunk_id in delta["removed"]])
+                if len(delta["ids"]):
+                    self.add([str(chunk_id) for chunk_id in delta["ids"]], delta["vectors"])
+                applied += len(delta["ids"]) + len(delta["removed"])
+            self._delta_seq = seq
+        return applied
+
+    def _restore(self, path: Path, mmap: bool) -> None:
+        """Reemplaza el estado en memoria por el guardado en `path`."""
+        vectors_path = path / _VECTORS_FILE
+        ids_path = path / _IDS_FILE
+        if not vectors_path.exists() or not ids_path.exists():
+            raise FileNotFoundError(f"No vector index found at {path}")
+
+        meta = json.loads(ids_path.read_text(encoding="utf-8"))
+        self.dimensions = meta["dimensions"]
+        self._ids = list(meta["ids"])
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+        self._size = len(self._ids)
+        self._alive = np.ones(self._size, dtype=bool)
+        self._num_alive = self._size
+        self._assignments = np.zeros(self._size, dtype=np.int32)
+        self._centroids = None
+        self._list_order = None
+        self._codes = None
+
+        ivf_path = path / _IVF_FILE
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                self._centroids = ivf["centroids"]
+                self._assignments = ivf["assignments"].astype(np.int32)
+                self._trained_size = int(ivf["trained_size"])
+
+        if self.quantizer is not None and self._size > 0:
+            codes_path = path / _CODES_FILE
+            if (
+                codes_path.exists()
+                and self.quantizer.calibrated
+                and meta.get("calibration_id") == self.quantizer.calibration_id
+            ):
+                self._codes = np.load(codes_path)
+                self._codes_version = self.quantizer.version
+            else:
+                # Calibración distinta o índice sin cuantizar: re-codificar por bloques
+                logger.info(f"Encoding {self._size} vectors with {self.quantizer.mode} quantizer")
+                self.quantizer.ensure_calibrated(np.asarray(self._vectors[:min(self._size, 100_000)]))
+                self._codes = np.empty(
+                    (self._size, self.quantizer.code_nbytes(self.dimensions)),
+                    dtype=np.int8 if self.quantizer.mode == "int8" else np.uint8
+                )
+                self._codes_version = -1
+                self._sync_codes()
+
+        self.path = path
+        self._base_size = self._size
+        self._delta_rows = self._apply_deltas(path, meta.get("delta_seq", 0))
+        self._pending = {}
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+        mmap: bool = True,
+        ivf_threshold: int = 50_000,
+        nprobe: int = 8,
+        quantizer: Optional[EmbeddingQuantizer] = None,
+        rescore_factor: int = 10
+    ) -> "NumpyVectorIndex":
+        """
+        Carga un índice guardado con save() (y los deltas de flush()).
+
+        Si hay deltas, se aplican y el índice se compacta en una nueva
+        instantánea, así el coste de los deltas se paga una vez por arranque.
+
+        Args:
+            path: Directorio del índice
+            mmap: Si True, la matriz se abre con memory-map (arranque casi instantáneo)
+            ivf_threshold: Umbral para usar IVF (default: 50000)
+            nprobe: Listas IVF a sondear por consulta (default: 8)
+            quantizer: Cuantizador para la búsqueda en dos etapas (opcional)
+            rescore_factor: Candidatos re-puntuados = k * rescore_factor (default: 10)
+
+        Raises:
+            FileNotFoundError: Si el directorio no contiene un índice
+        """
+        index = cls(
+            path=path,
+            ivf_threshold=ivf_threshold,
+            nprobe=nprobe,
+            quantizer=quantizer,
+            rescore_factor=rescore_factor
+        )
+        index._restore(Path(path).expanduser(), mmap=mmap)
+        if index._delta_rows:
+            index.save()
+            if mmap and index._codes is None:
+                index._restore(index.path, mmap=True)
+        logger.info(f"Vector index loaded from {index.path} ({index._size} vectors, mmap={mmap})")
+        return index
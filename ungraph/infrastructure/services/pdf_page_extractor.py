@@ -0,0 +1,302 @@
+"""
+Implementación: PdfPageExtractor
+
+Extrae el texto de un PDF página a página en dos niveles:
+
+1. Vía rápida: capa de texto del PDF con pypdfium2, en un pool de procesos
+   (cada tarea abre el archivo y procesa un rango de páginas). El pool se
+   crea una vez por proceso con el método de arranque "spawn" (seguro con
+   hilos y con el driver de Neo4j abierto) y se reutiliza entre documentos,
+   así el arranque de los workers se paga una sola vez. Si un worker falla,
+   el documento se extrae en serie.
+2. Fallback: solo las páginas cuya capa de texto es de baja calidad
+   (escaneadas, vacías o con texto corrupto) pasan por Docling, con las
+   opciones de OCR y estructura de tablas configuradas.
+
+Los PDF nativos con una capa de texto limpia no cargan ningún modelo.
+Docling se ejecuta en el proceso principal: sus modelos son pesados y
+cargarlos en cada worker costaría más que lo que se paraleliza.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# pypdfium2 es una dependencia de Docling (opcional, puede no estar instalado)
+try:
+    import pypdfium2 as pdfium
+    PYPDFIUM2_AVAILABLE = True
+except ImportError:
+    PYPDFIUM2_AVAILABLE = False
+
+try:
+    import docling  # noqa: F401
+    DOCLING_AVAILABLE = True
+except ImportError:
+    DOCLING_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Por debajo de este número de caracteres una página se considera vacía
+MIN_PAGE_CHARACTERS = 32
+
+# Páginas por tarea del pool (equilibrio entre reparto y coste de abrir el PDF)
+PAGES_PER_TASK = 8
+
+# Glifos sin mapa Unicode que algunos extractores emiten como "(cid:123)"
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
+
+# Pool de procesos compartido entre documentos (y entre extractores)
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def text_layer_quality(text: str) -> float:
+    """
+    Estima la calidad de la capa de texto de una página entre 0 y 1.
+
+    Penaliza páginas vacías, caracteres de sustitución y glifos sin mapear,
+    proporción baja de caracteres alfanuméricos y "palabras" anormalmente
+    largas (texto sin espacios, típico de fuentes mal codificadas).
+    """
+    stripped = text.strip()
+    if len(stripped) < MIN_PAGE_CHARACTERS:
+        return 0.0
+
+    words = stripped.split()
+    visible = sum(len(word) for word in words)
+    alphanumeric = sum(ch.isalnum() for ch in stripped)
+    broken = stripped.count("\ufffd") + len(_CID_PATTERN.findall(stripped))
+
+    score = alphanumeric / visible
+    score -= 5.0 * broken / visible
+    if visible / len(words) > 20:
+        score *= 0.4
+    return max(0.0, min(1.0, score))
+
+
+def _extract_text_layer(file_path: str, page_indices: List[int]) -> List[Tuple[int, str]]:
+    """
+    Extrae la capa de texto de un rango de páginas (se ejecuta en un worker).
+
+    Returns:
+        Lista de (índice de página base 0, texto)
+    """
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages = []
+        for index in page_indices:
+            page = pdf[index]
+            textpage = page.get_textpage()
+            text = textpage.get_text_bounded()
+            textpage.close()
+            page.close()
+            pages.append((index, text.replace("\r\n", "\n")))
+        return pages
+    finally:
+        pdf.close()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool compartido con al menos `workers` procesos (se crea una vez)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS < workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=True)
+            _POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Descarta el pool compartido si sigue siendo `pool` (p. ej. tras romperse)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+            _POOL_WORKERS = 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool() -> None:
+    """Cierra el pool compartido (se llama también al salir del proceso)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        pool, _POOL, _POOL_WORKERS = _POOL, None, 0
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+atexit.register(shutdown_pool)
+
+
+class PdfPageExtractor:
+    """
+    Extractor de texto de PDF por páginas con vía rápida y fallback a Docling.
+
+    Ejemplo:
+        >>> extractor = PdfPageExtractor(max_workers=4, docling_ocr=False)
+        >>> for page_number, text, method in extractor.extract(Path("report.pdf")):
+        ...     print(page_number, method, len(text))
+    """
+
+    def __init__(
+        self,
+        quality_threshold: float = 0.5,
+        max_workers: Optional[int] = None,
+        text_layer_enabled: bool = True,
+        docling_ocr: bool = True,
+        docling_table_structure: bool = True,
+        docling_table_mode: str = "accurate"
+    ):
+        """
+        Inicializa el extractor.
+
+        Args:
+            quality_threshold: Calidad mínima (0-1) para aceptar la capa de texto
+            max_workers: Procesos del pool (None = número de CPUs)
+            text_layer_enabled: Si False, todas las páginas pasan por Docling
+            docling_ocr: Activa el OCR de Docling en las páginas de fallback
+            docling_table_structure: Activa el modelo de estructura de tablas
+            docling_table_mode: Modo del modelo de tablas ('accurate' o 'fast')
+        """
+        if docling_table_mode not in ("accurate", "fast"):
+            raise ValueError(f"docling_table_mode must be 'accurate' or 'fast', got '{docling_table_mode}'")
+        self.quality_threshold = quality_threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.text_layer_enabled = text_layer_enabled
+        self.docling_ocr = docling_ocr
+        self.docling_table_structure = docling_table_structure
+        self.docling_table_mode = docling_table_mode
+        self._converter = None
+
+    def extract(self, file_path: Path) -> List[Tuple[int, str, str]]:
+        """
+        Extrae el texto de todas las páginas de un PDF.
+
+        Args:
+            file_path: Ruta al archivo PDF
+
+        Returns:
+            Lista ordenada de (page_number base 1, texto, método) donde el
+            método es "text_layer" o "docling"
+
+        Raises:
+            ImportError: Si pypdfium2 no está instalado
+        """
+        if not PYPDFIUM2_AVAILABLE:
+            raise ImportError(
+                "pypdfium2 no está instalado. "
+                "Instala con: pip install pypdfium2"
+            )
+
+        pdf = pdfium.PdfDocument(str(file_path))
+        page_count = len(pdf)
+        pdf.close()
+
+        texts = {index: "" for index in range(page_count)}
+        if self.text_layer_enabled:
+            texts.update(self._extract_text_layers(file_path, page_count))
+
+        low_quality = [
+            index for index in range(page_count)
+            if text_layer_quality(texts[index]) < self.quality_threshold
+        ]
+        logger.info(
+            f"PDF {file_path.name}: {page_count - len(low_quality)}/{page_count} páginas "
+            f"con capa de texto válida, {len(low_quality)} para Docling"
+        )
+
+        methods = {index: "text_layer" for index in range(page_count)}
+        if low_quality:
+            if DOCLING_AVAILABLE:
+                for index, text in self._extract_with_docling(file_path, low_quality).items():
+                    texts[index] = text
+                    methods[index] = "docling"
+            else:
+                logger.warning(
+                    "Docling no está instalado: se conserva la capa de texto "
+                    f"de {len(low_quality)} páginas de baja calidad"
+                )
+
+        return [(index + 1, texts[index], methods[index]) for index in range(page_count)]
+
+    def _extract_text_layers(self, file_path: Path, page_count: int) -> dict:
+        """
+        Capa de texto de todas las páginas, repartidas en el pool compartido.
+
+        Si un worker lanza una excepción (o el pool se rompe), el documento
+        se extrae en serie en el proceso principal.
+        """
+        ranges = [
+            list(range(start, min(start + PAGES_PER_TASK, page_count)))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        ]
+        workers = min(self.max_workers, len(ranges))
+
+        results = None
+        if workers > 1:
+            pool = _get_pool(self.max_workers)
+            try:
+                results = list(pool.map(_extract_text_layer, [str(file_path)] * len(ranges), ranges))
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    _discard_pool(pool)
+                logger.warning(f"Falló el pool de extracción para {file_path.name} ({e}): se extrae en serie")
+        if results is None:
+            results = [_extract_text_layer(str(file_path), pages) for pages in ranges]
+
+        return {index: text for pages in results for index, text in pages}
+
+    def _get_converter(self):
+        """Crea (una vez) el DocumentConverter de Docling con las opciones configuradas."""
+        if self._converter is None:
+            from docling.datamodel.base_models import InputFormat
+            from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+            from docling.document_converter import DocumentConverter, PdfFormatOption
+
+            pipeline_options = PdfPipelineOptions()
+            pipeline_options.do_ocr = self.docling_ocr
+            pipeline_options.do_table_structure = self.docling_table_structure
+            pipeline_options.table_structure_options.mode = (
+                TableFormerMode.ACCURATE if self.docling_table_mode == "accurate" else TableFormerMode.FAST
+            )
+            self._converter = DocumentConverter(
+                format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+            )
+        return self._converter
+
+    def _extract_with_docling(self, file_path: Path, page_indices: List[int]) -> dict:
+        """
+        Convierte con Docling solo las páginas indicadas.
+
+        Las páginas contiguas se agrupan en un único rango de conversión.
+        """
+        converter = self._get_converter()
+
+        runs: List[List[int]] = []
+        for index in page_indices:
+            if runs and runs[-1][-1] == index - 1:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+
+        texts = {}
+        for run in runs:
+            first, last = run[0] + 1, run[-1] + 1
+            result = converter.convert(str(file_path), page_range=(first, last))
+            for index in run:
+                texts[index] = result.document.export_to_markdown(page_no=index + 1)
+        return texts
@@ -0,0 +1,147 @@
+"""
+Filtros de metadatos para las búsquedas sobre chunks.
+
+MetadataFilter traduce un dict de filtros a un fragmento Cypher
+parametrizado (MATCH de Page/File si hace falta + condición WHERE) que se
+inserta en las consultas full-text, vectoriales e híbridas, así el
+filtrado ocurre en Neo4j y no en Python.
+
+Claves:
+    - "chunk.<prop>", "page.<prop>", "file.<prop>": propiedad del nodo indicado
+    - "filename", "page_number": propiedades de Page (donde se guardan)
+    - cualquier otra clave: propiedad del Chunk
+
+Valores:
+    - escalar: igualdad
+    - lista: pertenencia (IN)
+    - dict de operadores: {"eq", "ne", "gt", "gte", "lt", "lte", "in"}
+
+Ejemplo de uso:
+    >>> flt = MetadataFilter({"filename": ["a.md", "b.md"], "page_number": {"gte": 2, "lt": 10}})
+    >>> flt.match_clause("node")
+    'MATCH (page:Page)-[:HAS_CHUNK]->(node)'
+    >>> flt.where_clause("node")
+    '(page.filename IN $filter_0 AND page.page_number >= $filter_1 AND page.page_number < $filter_2)'
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_VALID_PROPERTY = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+# Operadores admitidos en los filtros por rango
+OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "in": "IN",
+}
+
+# Propiedades sin prefijo que viven en Page y no en Chunk
+_PAGE_PROPERTIES = {"filename", "page_number"}
+
+
+class MetadataFilter:
+    """
+    Filtro de metadatos validado y parametrizado.
+
+    Los nombres de propiedades se validan (se interpolan en Cypher); los
+    valores siempre van como parámetros.
+    """
+
+    def __init__(self, filters: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa el filtro.
+
+        Args:
+            filters: Dict de filtros (ver el módulo)
+
+        Raises:
+            ValueError: Si una clave o un operador no es válido
+        """
+        self.filters = dict(filters or {})
+        # (nodo, propiedad, operador Cypher, parámetro)
+        self._conditions: List[Tuple[str, str, str, str]] = []
+        self.params: Dict[str, Any] = {}
+        for key, value in self.filters.items():
+            node, prop = self._resolve(key)
+            if isinstance(value, dict):
+                if not value:
+                    raise ValueError(f"Empty operator dict for filter {key!r}")
+                items = list(value.items())
+            elif isinstance(value, (list, tuple, set)):
+                items = [("in", list(value))]
+            else:
+                items = [("eq", value)]
+            for operator, operand in items:
+                if operator not in OPERATORS:
+                    raise ValueError(
+                        f"Invalid operator {operator!r} for filter {key!r}. "
+                        f"Available: {', '.join(OPERATORS)}"
+                    )
+                if operator == "in":
+                    operand = list(operand)
+                name = f"filter_{len(self.params)}"
+                self.params[name] = operand
+                self._conditions.append((node, prop, OPERATORS[operator], name))
+
+    @staticmethod
+    def _resolve(key: str) -> Tuple[str, str]:
+        """Nodo ("chunk", "page" o "file") y propiedad de una clave."""
+        node, _, prop = key.rpartition(".")
+        if node:
+            if node not in ("chunk", "page", "file"):
+                raise ValueError(f"Invalid filter prefix in {key!r}: use chunk., page. or file.")
+        else:
+            node = "page" if prop in _PAGE_PROPERTIES else "chunk"
+        if not _VALID_PROPERTY.match(prop):
+            raise ValueError(f"Invalid property name: {prop}")
+        return node, prop
+
+    def __bool__(self) -> bool:
+        return bool(self._conditions)
+
+    @property
+    def nodes(self) -> set:
+        """Nodos que el filtro necesita ("chunk", "page", "file")."""
+        return {node for node, _, _, _ in self._conditions}
+
+    @property
+    def signature(self) -> str:
+        """Clave estable del filtro (para cachear su selectividad)."""
+        return repr(sorted(
+            (node, prop, operator, repr(self.params[name]))
+            for node, prop, operator, name in self._conditions
+        ))
+
+    def match_clause(self, chunk_variable: str = "node") -> str:
+        """MATCH que une el chunk con su Page/File (vacío si no hace falta)."""
+        nodes = self.nodes
+        if "file" in nodes:
+            return (
+                f"MATCH (file:File)-[:CONTAINS]->(page:Page)-[:HAS_CHUNK]->({chunk_variable})"
+            )
+        if "page" in nodes:
+            return f"MATCH (page:Page)-[:HAS_CHUNK]->({chunk_variable})"
+        return ""
+
+    def where_clause(self, chunk_variable: str = "node") -> str:
+        """Condición con todas las restricciones ("true" si no hay filtros)."""
+        if not self._conditions:
+            return "true"
+        variables = {"chunk": chunk_variable, "page": "page", "file": "file"}
+        return "(" + " AND ".join(
+            f"{variables[node]}.{prop} {operator} ${name}"
+            for node, prop, operator, name in self._conditions
+        ) + ")"
+
+    def cypher(self, chunk_variable: str = "node", extra_condition: Optional[str] = None) -> str:
+        """MATCH (si hace falta) + WHERE, para insertar tras ligar el chunk."""
+        match = self.match_clause(chunk_variable)
+        where = f"WHERE {self.where_clause(chunk_variable)}"
+        if extra_condition:
+            where += f" AND {extra_condition}"
+        return f"{match}\n        {where}" if match else where
@@ -0,0 +1,317 @@
+"""
+Servicio de aristas de similitud kNN entre chunks.
+
+Calcula los `k` vecinos más cercanos de cada chunk sobre los embeddings
+guardados en Neo4j (producto de matrices por bloques con NumPy) y los
+escribe como relaciones ponderadas:
+
+    (:Chunk)-[:SIMILAR_TO {score}]->(:Chunk)
+
+`score` es la similitud coseno. Cada chunk conserva sus `k` vecinos de
+mayor score (sus aristas salientes). Así los patrones de búsqueda pueden
+ampliar contexto con un salto barato, sin una consulta vectorial por
+resultado, y las proyecciones de GDS pueden incluir SIMILAR_TO en
+`relationship_types`.
+
+La actualización es incremental: solo se calculan los vecinos de los
+chunks sin aristas (p. ej. recién ingeridos), y los chunks existentes
+incorporan a los nuevos si superan a su k-ésimo vecino actual.
+
+Ejemplo de uso:
+    >>> service = SimilarityGraphService()
+    >>> stats = service.refresh_similarity_edges(k=10, min_similarity=0.5)
+    >>> stats["computed"], stats["updated"]
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tipos de relación que se interpolan en Cypher
+_VALID_RELATIONSHIP = re.compile(r'^[A-Z][A-Z0-9_]*$')
+
+
+class SimilarityGraphService:
+    """
+    Calcula y persiste las aristas kNN de similitud entre chunks.
+
+    Requiere que los chunks tengan la propiedad `embeddings`.
+    """
+
+    def __init__(self, database: str = "neo4j", relationship_type: str = "SIMILAR_TO"):
+        """
+        Inicializa el servicio.
+
+        Args:
+            database: Nombre de la base de datos Neo4j
+            relationship_type: Tipo de las relaciones de similitud
+
+        Raises:
+            ValueError: Si relationship_type no es un tipo de relación válido
+        """
+        if not _VALID_RELATIONSHIP.match(relationship_type):
+            raise ValueError(f"Invalid relationship type: {relationship_type!r}")
+        self.database = database
+        self.relationship_type = relationship_type
+        self._driver = None
+
+    def _get_driver(self):
+        """Obtiene o crea el driver de Neo4j."""
+        if self._driver is None:
+            from ...utils.graph_operations import graph_session
+            self._driver = graph_session()
+        return self._driver
+
+    def refresh_similarity_edges(
+        self,
+        k: int = 10,
+        min_similarity: float = 0.0,
+        block_size: int = 1024,
+        batch_size: int = 500,
+        rebuild: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Crea o actualiza las relaciones de similitud.
+
+        Los chunks pendientes son los que no tienen vecinos calculados con
+        este `k` (todos si rebuild=True). Para cada uno se reemplazan sus
+        aristas salientes por sus `k` vecinos más cercanos; los demás
+        chunks solo ganan aristas hacia chunks pendientes que entran en su
+        top-k, y se podan a `k`.
+
+        Los chunks eliminados no se reemplazan en el top-k de sus vecinos
+        hasta una reconstrucción (rebuild=True).
+
+        Args:
+            k: Vecinos por chunk
+            min_similarity: Similitud coseno mínima de una arista
+            block_size: Filas por bloque del producto de matrices
+                        (memoria: block_size x chunks float32)
+            batch_size: Chunks por lote de escritura
+            rebuild: Recalcular los vecinos de todos los chunks
+
+        Returns:
+            Dict con chunks totales, calculados, actualizados y aristas escritas
+
+        Raises:
+            ValueError: Si k o block_size no son positivos
+        """
+        if k < 1:
+            raise ValueError(f"k must be >= 1, got {k}")
+        if block_size < 1:
+            raise ValueError(f"block_size must be >= 1, got {block_size}")
+
+        driver = self._get_driver()
+        with driver.session(database=self.database) as session:
+            session.run(
+                "CREATE INDEX chunk_chunk_id IF NOT EXISTS FOR (c:Chunk) ON (c.chunk_id)"
+            ).consume()
+
+            # 1. Embeddings de todos los chunks y cuáles están pendientes
+            ids, matrix, pending = self._read_embeddings(session, k, rebuild)
+            stats = {
+                'chunks': len(ids),
+                'computed': int(pending.sum()),
+                'updated': 0,
+                'edges_written': 0,
+                'k': k,
+                'relationship_type': self.relationship_type
+            }
+            if not pending.any():
+                logger.info("Similarity edges up to date")
+                return stats
+
+            # 2. top-k de los pendientes y candidatos nuevos de los existentes
+            thresholds = self._current_thresholds(session, ids, pending, k, min_similarity)
+            pending_rows, existing_rows = self._nearest_neighbors(
+                matrix, pending, thresholds, k, min_similarity, block_size
+            )
+
+            # 3. Escritura por lotes
+            for offset in range(0, len(pending_rows), batch_size):
+                batch = [
+                    {'source': ids[i], 'neighbors': [{'id': ids[j], 'score': s} for j, s in neighbors]}
+                    for i, neighbors in pending_rows[offset:offset + batch_size]
+                ]
+                stats['edges_written'] += self._replace_edges(session, batch, k)
+            for offset in range(0, len(existing_rows), batch_size):
+                batch = [
+                    {'source': ids[i], 'neighbors': [{'id': ids[j], 'score': s} for j, s in neighbors]}
+                    for i, neighbors in existing_rows[offset:offset + batch_size]
+                ]
+                stats['edges_written'] += self._add_edges(session, batch, k)
+            stats['updated'] = len(existing_rows)
+
+        logger.info(
+            f"Similarity edges: {stats['computed']} chunks computed, {stats['updated']} updated, "
+            f"{stats['edges_written']} edges written"
+        )
+        return stats
+
+    def _read_embeddings(self, session, k: int, rebuild: bool) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Ids, embeddings normalizados (n, d) y máscara de chunks pendientes."""
+        ids: List[str] = []
+        vectors: List[Any] = []
+        pending: List[bool] = []
+        records = session.run("""
+            MATCH (c:Chunk) WHERE c.embeddings IS NOT NULL
+            RETURN c.chunk_id AS chunk_id, c.embeddings AS embeddings,
+                   c.similarity_k = $k AS computed
+        """, k=k)
+        for record in records:
+            ids.append(record["chunk_id"])
+            vectors.append(record["embeddings"])
+            pending.append(rebuild or not record["computed"])
+        if not ids:
+            return ids, np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=bool)
+        return ids, _normalize(np.asarray(vectors, dtype=np.float32)), np.asarray(pending, dtype=bool)
+
+    def _current_thresholds(
+        self,
+        session,
+        ids: List[str],
+        pending: np.ndarray,
+        k: int,
+        min_similarity: float
+    ) -> np.ndarray:
+        """
+        Score que un chunk pendiente debe superar para entrar en el top-k de
+        cada chunk existente (su k-ésimo vecino actual, o min_similarity si
+        tiene menos de k). +inf para los pendientes.
+        """
+        thresholds = np.full(len(ids), min_similarity, dtype=np.float32)
+        thresholds[pending] = np.inf
+        positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        records = session.run(f"""
+            MATCH (c:Chunk)-[r:{self.relationship_type}]->()
+            WITH c, r.score AS score ORDER BY score DESC
+            WITH c, collect(score) AS scores
+            WHERE size(scores) >= $k
+            RETURN c.chunk_id AS chunk_id, scores[$k - 1] AS kth
+        """, k=k)
+        for record in records:
+            i = positions.get(record["chunk_id"])
+            if i is not None and not pending[i]:
+                thresholds[i] = max(thresholds[i], record["kth"])
+        return thresholds
+
+    def _nearest_neighbors(
+        self,
+        matrix: np.ndarray,
+        pending: np.ndarray,
+        thresholds: np.ndarray,
+        k: int,
+        min_similarity: float,
+        block_size: int
+    ) -> Tuple[List[Tuple[int, List[Tuple[int, float]]]], List[Tuple[int, List[Tuple[int, float]]]]]:
+        """
+        top-k de cada chunk pendiente y, para cada existente, los pendientes
+        que superan su umbral (como mucho k).
+
+        Cada bloque de pendientes se multiplica contra toda la matriz:
+        las filas dan el top-k del pendiente y las columnas de los chunks
+        existentes se combinan en un top-k acumulado por columna.
+        """
+        pending_index = np.flatnonzero(pending)
+        existing_index = np.flatnonzero(~pending)
+        count = len(matrix)
+        row_k = min(k, count - 1)
+        column_k = min(k, len(pending_index))
+
+        # top-k acumulado de pendientes por chunk existente: (column_k, E)
+        best_scores = np.full((column_k, len(existing_index)), -np.inf, dtype=np.float32)
+        best_index = np.zeros((column_k, len(existing_index)), dtype=np.int64)
+
+        pending_rows = []
+        for offset in range(0, len(pending_index), block_size):
+            block = pending_index[offset:offset + block_size]
+            scores = matrix[block] @ matrix.T
+            scores[np.arange(len(block)), block] = -np.inf  # sin aristas a sí mismo
+
+            if row_k > 0:
+                top = np.argpartition(-scores, row_k - 1, axis=1)[:, :row_k]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1, kind="stable")
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+                for row, i in enumerate(block):
+                    keep = top_scores[row] >= min_similarity
+                    pending_rows.append((int(i), [
+                        (int(j), float(s)) for j, s in zip(top[row][keep], top_scores[row][keep])
+                    ]))
+            else:
+                pending_rows.extend((int(i), []) for i in block)
+
+            if len(existing_index) and column_k:
+                # Combinar el bloque con el top-k acumulado de cada columna
+                columns = scores[:, existing_index]
+                merged_scores = np.vstack([best_scores, columns])
+                merged_index = np.vstack([best_index, np.broadcast_to(block[:, None], columns.shape)])
+                top = np.argpartition(-merged_scores, column_k - 1, axis=0)[:column_k]
+                best_scores = np.take_along_axis(merged_scores, top, axis=0)
+                best_index = np.take_along_axis(merged_index, top, axis=0)
+
+        existing_rows = []
+        for column, i in enumerate(existing_index):
+            keep = best_scores[:, column] > thresholds[i]
+            if keep.any():
+                existing_rows.append((int(i), [
+                    (int(j), float(s)) for j, s in zip(best_index[keep, column], best_scores[keep, column])
+                ]))
+        return pending_rows, existing_rows
+
+    def _replace_edges(self, session, rows: List[Dict[str, Any]], k: int) -> int:
+        """Reemplaza las aristas salientes de los chunks pendientes."""
+        summary = session.run(f"""
+            UNWIND $rows AS row
+            MATCH (c:Chunk {{chunk_id: row.source}})
+            CALL {{
+                WITH c
+                MATCH (c)-[old:{self.relationship_type}]->()
+                DELETE old
+            }}
+            SET c.similarity_k = $k
+            WITH c, row
+            UNWIND row.neighbors AS neighbor
+            MATCH (n:Chunk {{chunk_id: neighbor.id}})
+            CREATE (c)-[:{self.relationship_type} {{score: neighbor.score}}]->(n)
+        """, rows=rows, k=k).consume()
+        return summary.counters.relationships_created
+
+    def _add_edges(self, session, rows: List[Dict[str, Any]], k: int) -> int:
+        """Añade aristas a chunks existentes y poda sus aristas a las k mejores."""
+        summary = session.run(f"""
+            UNWIND $rows AS row
+            MATCH (c:Chunk {{chunk_id: row.source}})
+            CALL {{
+                WITH c, row
+                UNWIND row.neighbors AS neighbor
+                MATCH (n:Chunk {{chunk_id: neighbor.id}})
+                MERGE (c)-[r:{self.relationship_type}]->(n)
+                SET r.score = neighbor.score
+            }}
+            CALL {{
+                WITH c
+                MATCH (c)-[r:{self.relationship_type}]->()
+                WITH r ORDER BY r.score DESC
+                WITH collect(r) AS edges
+                FOREACH (r IN edges[$k..] | DELETE r)
+            }}
+        """, rows=rows, k=k).consume()
+        return summary.counters.relationships_created
+
+    def close(self) -> None:
+        """Cierra la conexión a Neo4j."""
+        if self._driver:
+            self._driver.close()
+            self._driver = None
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
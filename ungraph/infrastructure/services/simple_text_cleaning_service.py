@@ -1,27 +1,127 @@
 """
 Implementación: SimpleTextCleaningService
 
-Implementa TextCleaningService usando unicodedata y regex.
+Implementa TextCleaningService usando unicodedata y tablas de str.translate.
 Envuelve el código existente del notebook.
+
+Cada perfil tiene una tabla de traducción por carácter, precalculada para
+ASCII y completada bajo demanda (memoizada) para el resto de caracteres,
+así la limpieza es un único str.translate más el colapso de espacios:
+
+- "ascii" (default): comportamiento original; quita acentos (NFD + ASCII)
+  y sustituye por un espacio los caracteres no permitidos.
+- "spanish": conserva vocales acentuadas, ñ, ü, ¿ y ¡; el resto de letras
+  acentuadas pierden el acento.
+- "unicode": conserva letras y dígitos de cualquier alfabeto (NFC).
 """
 
 import unicodedata
 import re
 import logging
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
 
 from ungraph.domain.services.text_cleaning_service import TextCleaningService
 
 logger = logging.getLogger(__name__)
 
+CLEANING_PROFILES = ("ascii", "spanish", "unicode")
+
+# Caracteres permitidos del notebook (clase de regex)
+DEFAULT_ALLOWED_CHARACTERS = "a-zA-Z0-9áéíóúÁÉÍÓÚñÑ.,;:!?'\"()\\[\\]{}<>\\-\\_@#%&/\\s"
+
+_ASCII_PUNCTUATION = ".,;:!?'\"()[]{}<>-_@#%&/"
+_SPANISH_LETTERS = "áéíóúÁÉÍÓÚñÑüÜ¿¡"
+
+
+def _strip_accents(char: str) -> str:
+    """Equivalente por carácter de NFD + encode('ascii', 'ignore')."""
+    return unicodedata.normalize("NFD", char).encode("ascii", "ignore").decode("ascii")
+
+
+def _is_allowed_ascii(char: str) -> bool:
+    return char.isascii() and (char.isalnum() or char in _ASCII_PUNCTUATION or char.isspace())
+
+
+def _translate_ascii(char: str) -> str:
+    # NFD + ASCII: los caracteres sin equivalente ASCII desaparecen (sin espacio)
+    stripped = _strip_accents(char)
+    return "".join(c if _is_allowed_ascii(c) else " " for c in stripped)
+
+
+def _translate_spanish(char: str) -> str:
+    if _is_allowed_ascii(char) or char in _SPANISH_LETTERS:
+        return char
+    if char.isspace():
+        return " "
+    return _translate_ascii(char)
+
+
+def _translate_unicode(char: str) -> str:
+    if char.isalnum() or char.isspace() or char in _ASCII_PUNCTUATION or char in "¿¡":
+        return char
+    if unicodedata.category(char).startswith("M"):
+        # Marcas combinantes sin forma precompuesta (p. ej. escrituras índicas)
+        return char
+    return " "
+
+
+class _TranslationTable(dict):
+    """Tabla para str.translate que calcula (y memoiza) cada carácter nuevo."""
+
+    def __init__(self, translate_char):
+        super().__init__()
+        self._translate_char = translate_char
+        for code in range(128):
+            self[code] = translate_char(chr(code))
+
+    def __missing__(self, code: int) -> str:
+        value = self._translate_char(chr(code))
+        self[code] = value
+        return value
+
+
+_PROFILES = {
+    "ascii": (_translate_ascii, None),
+    "spanish": (_translate_spanish, "NFC"),
+    "unicode": (_translate_unicode, "NFC"),
+}
+
+_tables: Dict[str, _TranslationTable] = {}
+
+
+def _get_table(profile: str) -> _TranslationTable:
+    """Tabla compartida por perfil (el memo crece con los caracteres vistos)."""
+    if profile not in _tables:
+        _tables[profile] = _TranslationTable(_PROFILES[profile][0])
+    return _tables[profile]
+
+
+@lru_cache(maxsize=32)
+def _disallowed_pattern(allowed_characters: str) -> "re.Pattern":
+    return re.compile(f"[^{allowed_characters}]")
+
 
 class SimpleTextCleaningService(TextCleaningService):
     """
     Implementación simple de TextCleaningService.
-    
-    Limpia texto removiendo caracteres no deseados y acentos.
+
+    Limpia texto removiendo caracteres no deseados y acentos, según el perfil.
     """
-    
+
+    def __init__(self, profile: str = "ascii"):
+        """
+        Inicializa el servicio.
+
+        Args:
+            profile: Perfil de limpieza: "ascii" (default), "spanish" o "unicode"
+        """
+        if profile not in CLEANING_PROFILES:
+            raise ValueError(f"Unknown cleaning profile '{profile}'. Expected one of {CLEANING_PROFILES}")
+        self.profile = profile
+        self._table = _get_table(profile)
+        self._normalization = _PROFILES[profile][1]
+
     def clean(
         self,
         text: str,
@@ -30,28 +130,61 @@ class SimpleTextCleaningService(TextCleaningService):
     ) -> str:
         """
         Limpia un texto removiendo caracteres no deseados.
-        
-        Basado en clean_text del notebook.
+
+        Basado en clean_text del notebook. Con los argumentos por defecto usa
+        la tabla del perfil; `allowed_characters` o `remove_accents=False`
+        (perfil "ascii") usan la ruta con regex, con el patrón cacheado.
+        """
+        if allowed_characters is not None or (not remove_accents and self.profile == "ascii"):
+            cleaned_text = self._clean_with_pattern(text, allowed_characters, remove_accents)
+        else:
+            cleaned_text = self._clean_with_table(text)
+
+        logger.debug(f"Text cleaned ({self.profile}): {len(text)} -> {len(cleaned_text)} characters")
+        return cleaned_text
+
+    def clean_batch(self, texts: Iterable[str]) -> List[str]:
         """
-        logger.info("Starting text cleaning.")
-        
-        if remove_accents:
+        Limpia varios textos con el perfil del servicio.
+
+        Args:
+            texts: Textos a limpiar
+
+        Returns:
+            Textos limpios, en el mismo orden
+        """
+        clean_with_table = self._clean_with_table
+        cleaned = [clean_with_table(text) for text in texts]
+        logger.debug(f"Cleaned batch of {len(cleaned)} texts ({self.profile})")
+        return cleaned
+
+    def _clean_with_table(self, text: str) -> str:
+        """Un único str.translate y colapso de espacios."""
+        if not text.isascii():
+            if self._normalization is None:
+                # Perfil "ascii": NFD + ASCII en C es más rápido que traducir carácter a carácter
+                text = unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("ascii")
+            else:
+                text = unicodedata.normalize(self._normalization, text)
+        # str.split() separa por los mismos espacios que \s en regex
+        return " ".join(text.translate(self._table).split())
+
+    def _clean_with_pattern(
+        self,
+        text: str,
+        allowed_characters: Optional[str],
+        remove_accents: bool
+    ) -> str:
+        """Ruta original con regex (caracteres permitidos personalizados)."""
+        if remove_accents and not text.isascii():
             # Remover acentos
             text = unicodedata.normalize("NFD", text)
             text = text.encode("ascii", "ignore").decode("utf-8")
-        
-        if allowed_characters is None:
-            allowed_characters = "a-zA-Z0-9áéíóúÁÉÍÓÚñÑ.,;:!?'\"()\\[\\]{}<>\\-\\_@#%&/\\s"
-        
-        # Crear patrón para caracteres no permitidos
-        pattern = f"[^{allowed_characters}]"
-        
+
+        pattern = _disallowed_pattern(allowed_characters or DEFAULT_ALLOWED_CHARACTERS)
+
         # Reemplazar caracteres no permitidos
-        cleaned_text = re.sub(pattern, " ", text)
-        
-        # Remover espacios duplicados
-        cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
-        
-        logger.info("Text cleaning completed.")
-        return cleaned_text
+        cleaned_text = pattern.sub(" ", text)
 
+        # Remover espacios duplicados
+        return " ".join(cleaned_text.split())
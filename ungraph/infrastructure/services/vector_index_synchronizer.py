@@ -0,0 +1,153 @@
+"""
+Sincronización del índice vectorial en proceso con el grafo.
+
+El índice en proceso solo recibe los chunks que ingiere este proceso. Los
+chunks que ya estaban en Neo4j, los que escriben otros procesos y los que
+se eliminan del grafo no le llegan. Este servicio compara los chunk_id de
+ambos lados (una sola lectura de IDs, sin vectores). Elimina del índice los
+chunks que ya no existen y añade, por lotes, los embeddings de los que
+faltan. Solo entonces marca el índice como `synchronized`, y solo entonces
+las búsquedas lo usan en lugar del índice vectorial de Neo4j.
+
+Ejemplo de uso:
+    >>> synchronizer = VectorIndexSynchronizer(database="neo4j")
+    >>> stats = synchronizer.synchronize(index)
+    >>> stats["added"], stats["removed"], index.synchronized
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ungraph.domain.services.vector_index_service import VectorIndexService
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndexSynchronizer:
+    """
+    Reconcilia un VectorIndexService con los chunks del grafo.
+
+    Los chunks guardados sin vector float (embedding_store_full_vectors=False)
+    se recuperan decodificando `embeddings_int8` si hay un cuantizador int8
+    con la misma calibración que codificó el chunk (`embeddings_calibration`);
+    con otra calibración los códigos no se decodifican. Si algún chunk no se
+    puede recuperar, el índice queda sin sincronizar.
+    """
+
+    def __init__(self, database: str = "neo4j", quantizer: Optional[Any] = None):
+        """
+        Inicializa el servicio.
+
+        Args:
+            database: Nombre de la base de datos Neo4j
+            quantizer: EmbeddingQuantizer con el que se codificaron los chunks (opcional)
+        """
+        self.database = database
+        self.quantizer = quantizer
+        self._driver = None
+
+    def _get_driver(self):
+        """Obtiene o crea el driver de Neo4j."""
+        if self._driver is None:
+            from ...utils.graph_operations import graph_session
+            self._driver = graph_session()
+        return self._driver
+
+    def synchronize(self, index: VectorIndexService, batch_size: int = 5000) -> Dict[str, Any]:
+        """
+        Elimina del índice los chunks borrados y añade los que faltan.
+
+        Args:
+            index: Índice vectorial en proceso
+            batch_size: Chunks por lote al leer embeddings
+
+        Returns:
+            Dict con chunks del grafo, añadidos, eliminados, no recuperables
+            y si el índice quedó sincronizado
+        """
+        index.synchronized = False
+        driver = self._get_driver()
+        with driver.session(database=self.database) as session:
+            graph_ids = {
+                record["chunk_id"]
+                for record in session.run("""
+                    MATCH (c:Chunk)
+                    WHERE size(coalesce(c.embeddings, [])) > 0
+                       OR c.embeddings_int8 IS NOT NULL
+                       OR c.embeddings_binary IS NOT NULL
+                    RETURN c.chunk_id AS chunk_id
+                """)
+            }
+            index_ids = set(index.ids())
+
+            removed = sorted(index_ids - graph_ids)
+            if removed:
+                index.remove(removed)
+
+            missing = sorted(graph_ids - index_ids)
+            added = 0
+            unrecoverable = 0
+            for offset in range(0, len(missing), batch_size):
+                ids, vectors = self._read_vectors(session, missing[offset:offset + batch_size])
+                unrecoverable += len(missing[offset:offset + batch_size]) - len(ids)
+                if ids:
+                    index.add(ids, vectors)
+                    added += len(ids)
+
+        if removed or added:
+            index.flush()
+        index.synchronized = unrecoverable == 0
+        stats = {
+            'graph_chunks': len(graph_ids),
+            'added': added,
+            'removed': len(removed),
+            'unrecoverable': unrecoverable,
+            'synchronized': index.synchronized
+        }
+        if unrecoverable:
+            logger.warning(
+                f"{unrecoverable} chunks have no recoverable full vector: "
+                "vector search keeps using Neo4j's vector index"
+            )
+        logger.info(
+            f"Vector index synchronized with the graph: {added} added, {len(removed)} removed "
+            f"({len(graph_ids)} chunks)"
+        )
+        return stats
+
+    def _read_vectors(self, session, chunk_ids: List[str]):
+        """IDs y vectores (float o decodificados de int8) de un lote de chunks."""
+        records = session.run("""
+            UNWIND $chunk_ids AS chunk_id
+            MATCH (c:Chunk {chunk_id: chunk_id})
+            RETURN chunk_id, c.embeddings AS embeddings, c.embeddings_int8 AS codes,
+                   c.embeddings_calibration AS calibration
+        """, chunk_ids=chunk_ids)
+        can_decode = (
+            self.quantizer is not None
+            and self.quantizer.mode == "int8"
+            and self.quantizer.calibrated
+            and not self.quantizer.provisional
+        )
+        calibration_id = self.quantizer.calibration_id if can_decode else None
+        ids: List[str] = []
+        vectors: List[np.ndarray] = []
+        for record in records:
+            if record["embeddings"]:
+                vector = np.asarray(record["embeddings"], dtype=np.float32)
+            elif record["codes"] is not None and can_decode and record["calibration"] == calibration_id:
+                codes = np.frombuffer(bytes(record["codes"]), dtype=np.int8)
+                vector = self.quantizer.decode(codes[None, :])[0]
+            else:
+                continue
+            ids.append(record["chunk_id"])
+            vectors.append(vector)
+        return ids, np.asarray(vectors, dtype=np.float32)
+
+    def close(self) -> None:
+        """Cierra la conexión a Neo4j."""
+        if self._driver:
+            self._driver.close()
+            self._driver = None
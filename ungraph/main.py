@@ -38,7 +38,7 @@ def main():
         print(f"\n✅ Documento ingerido exitosamente!")
         print(f"   Archivo: {file_path.name}")
         print(f"   Chunks creados: {len(chunks)}")
-        print(f"   Chunks con embeddings: {sum(1 for c in chunks if c.embeddings)}")
+        print(f"   Chunks con embeddings: {sum(1 for c in chunks if c.embeddings is not None)}")
         
     except Exception as e:
         print(f"\n❌ Error al ingerir documento: {e}")
@@ -0,0 +1,250 @@
+"""
+Caché persistente de recomendaciones de chunking.
+
+Guarda la estrategia elegida por ChunkingMaster con dos claves:
+
+- Hash del contenido (más el perfil de la petición): el mismo documento
+  reutiliza la decisión completa (estrategia, tamaños, tipo y estructura)
+  sin volver a analizarlo ni evaluar candidatas.
+- Huella estructural: tipo de documento y densidades de encabezados,
+  listas y párrafos agrupadas en rangos. Documentos distintos con la misma
+  plantilla (p. ej. informes mensuales) reutilizan la estrategia sin
+  evaluar candidatas; solo se analiza su estructura.
+
+El perfil incluye los parámetros que cambian la decisión (tamaños pedidos,
+límite de tokens, chunking semántico disponible, muestreo), así que
+peticiones distintas no comparten entradas.
+
+La caché es un archivo JSON escrito de forma atómica; con varios procesos
+escribiendo a la vez prevalece la última escritura. Las entradas nuevas se
+persisten en put(); las estadísticas se acumulan en memoria y se escriben
+con la siguiente entrada, cada `flush_interval` segundos o al salir. Un
+error al escribir se registra y no interrumpe el chunking.
+
+Ejemplo de uso:
+    >>> cache = ChunkingRecommendationCache("~/.ungraph/chunking_cache.json")
+    >>> master = ChunkingMaster(recommendation_cache=cache)
+    >>> result = master.find_best_chunking_strategy(documents)
+    >>> cache.stats()["skip_rate"]
+    0.0
+"""
+
+import atexit
+import bisect
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar la selección de estrategias invalida las entradas guardadas
+CACHE_VERSION = 1
+
+# Límites de los rangos de la huella estructural
+_DENSITY_EDGES = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+_PARAGRAPH_WORDS_EDGES = (10, 25, 50, 100, 200, 400)
+_SENTENCE_WORDS_EDGES = (8, 15, 25, 40)
+_DOCUMENT_WORDS_EDGES = (1_000, 10_000, 100_000, 1_000_000)
+
+_COUNTERS = ("content_hits", "fingerprint_hits", "misses")
+
+
+def structural_fingerprint(doc_type: str, structure: Dict[str, Any]) -> str:
+    """
+    Huella estructural de un documento a partir de analyze_structure.
+
+    Args:
+        doc_type: Valor de DocumentType
+        structure: Diccionario de DocumentAnalyzer.analyze_structure
+
+    Returns:
+        Cadena como "markdown|h3|l1|p4|s2|w2" (índice del rango de cada medida)
+    """
+    paragraphs = max(structure['paragraphs'], 1)
+    lists = structure['bullet_lists'] + structure['numbered_lists']
+    buckets = (
+        ('h', bisect.bisect(_DENSITY_EDGES, structure['headers'] / paragraphs)),
+        ('l', bisect.bisect(_DENSITY_EDGES, lists / paragraphs)),
+        ('p', bisect.bisect(_PARAGRAPH_WORDS_EDGES, structure['avg_paragraph_length'])),
+        ('s', bisect.bisect(_SENTENCE_WORDS_EDGES, structure['avg_sentence_length'])),
+        ('w', bisect.bisect(_DOCUMENT_WORDS_EDGES, structure['words'])),
+    )
+    return "|".join([doc_type] + [f"{name}{bucket}" for name, bucket in buckets])
+
+
+def content_hash(text: str | Iterable[str], separator: str = "\n\n") -> str:
+    """
+    Hash SHA-256 del texto, o de varios textos como si estuvieran unidos
+    con `separator` (sin unirlos).
+    """
+    texts = [text] if isinstance(text, str) else text
+    digest = hashlib.sha256()
+    for index, part in enumerate(texts):
+        if index:
+            digest.update(separator.encode("utf-8"))
+        digest.update(part.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class ChunkingRecommendationCache:
+    """
+    Caché persistente de recomendaciones de chunking con estadísticas de uso.
+
+    Las entradas son diccionarios con al menos 'strategy'; las de contenido
+    incluyen además 'chunk_size', 'chunk_overlap', 'doc_type', 'structure',
+    'score' y 'metrics'.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str | Path] = None,
+        max_entries: int = 10_000,
+        flush_interval: float = 60.0
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            path: Archivo JSON donde persistir (None = solo en memoria)
+            max_entries: Máximo de entradas (se descartan las menos usadas recientemente)
+            flush_interval: Segundos máximos que las estadísticas pendientes
+                            esperan en memoria antes de escribirse
+        """
+        self.path = Path(path).expanduser() if path else None
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._counters = dict.fromkeys(_COUNTERS, 0)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+        if self.path is not None:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def content_key(text: str | Iterable[str], profile: str) -> str:
+        return f"content:{profile}:{content_hash(text)}"
+
+    @staticmethod
+    def fingerprint_key(fingerprint: str, profile: str) -> str:
+        return f"fingerprint:{profile}:{fingerprint}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada de una clave (None si no existe); no cuenta en las estadísticas."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['last_used'] = time.time()
+            return entry
+
+    def record(self, outcome: str) -> None:
+        """
+        Registra el resultado de una selección de estrategia.
+
+        Args:
+            outcome: 'content_hits', 'fingerprint_hits' o 'misses'
+        """
+        with self._lock:
+            self._counters[outcome] += 1
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.flush_interval
+        if due:
+            self.flush()
+
+    def put(self, keys: Iterable[str], entry: Dict[str, Any]) -> None:
+        """Guarda una entrada con varias claves y persiste la caché."""
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                self._entries[key] = {**entry, 'created': now, 'last_used': now}
+            if len(self._entries) > self.max_entries:
+                ordered = sorted(self._entries, key=lambda k: self._entries[k]['last_used'])
+                for key in ordered[:len(self._entries) - self.max_entries]:
+                    del self._entries[key]
+        self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas de uso: aciertos por contenido y por huella, fallos y la
+        fracción de selecciones en las que no se evaluaron candidatas.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = sum(counters.values())
+        skipped = counters['content_hits'] + counters['fingerprint_hits']
+        return {
+            'entries': entries,
+            'lookups': lookups,
+            **counters,
+            'skip_rate': skipped / lookups if lookups else 0.0,
+            'path': str(self.path) if self.path else None,
+        }
+
+    def clear(self) -> None:
+        """Elimina todas las entradas y reinicia las estadísticas."""
+        with self._lock:
+            self._entries.clear()
+            self._counters = dict.fromkeys(_COUNTERS, 0)
+        self.save()
+
+    def flush(self) -> None:
+        """Escribe la caché solo si hay cambios sin persistir."""
+        if self._dirty:
+            self.save()
+
+    def save(self) -> None:
+        """
+        Escribe la caché en disco (escritura atómica).
+
+        Se serializa con el lock tomado y cada escritura usa su propio
+        archivo temporal, así las llamadas concurrentes no se pisan. Los
+        errores de E/S se registran sin propagarse.
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            data = json.dumps({
+                'version': CACHE_VERSION,
+                'counters': self._counters,
+                'entries': self._entries,
+            })
+            tmp = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+                tmp = None
+                self._dirty = False
+                self._last_save = time.monotonic()
+            except OSError as e:
+                logger.warning(f"No se pudo guardar la caché de chunking {self.path}: {e}")
+            finally:
+                if tmp is not None:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer la caché de chunking {self.path}: {e}")
+            return
+        if data.get('version') != CACHE_VERSION:
+            logger.info(f"Caché de chunking {self.path} de otra versión: se ignora")
+            return
+        self._entries = data.get('entries', {})
+        self._counters.update({k: v for k, v in data.get('counters', {}).items() if k in self._counters})
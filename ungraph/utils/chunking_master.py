@@ -9,14 +9,31 @@ Autor: Sistema de chunking inteligente
 Fecha: 2024
 """
 
+import atexit
+import bisect
+import itertools
 import logging
+import math
+import multiprocessing
+import os
+import pickle
 import re
-from typing import List, Dict, Optional, Tuple, Any
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Iterable, Optional, Tuple, Any
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, replace
 from enum import Enum
+from statistics import NormalDist, fmean, stdev
 
+import numpy as np
 from langchain_core.documents import Document
+from .markdown_parser import MARKDOWN_SECTIONS_KEY, MarkdownSection, sections_from_metadata
+from .chunking_cache import ChunkingRecommendationCache, structural_fingerprint
+from .document_profiler import DocumentProfile, profile_texts
 from langchain_text_splitters import (
     CharacterTextSplitter,
     RecursiveCharacterTextSplitter,
@@ -38,6 +55,21 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Patrones de las métricas de chunking (compilados una vez)
+_PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+_COMPLETE_SENTENCE = re.compile(r'[.!?]\s+')
+_SENTENCE_SPLIT = re.compile(r'[.!?]+')
+_SENTENCE_END_CODEPOINTS = np.array([ord('.'), ord('!'), ord('?')], dtype=np.uint32)
+# Mismos caracteres que \s en regex (str.isspace)
+_WHITESPACE_CODEPOINTS = np.array(
+    [code for code in range(0x3001) if chr(code).isspace()], dtype=np.uint32
+)
+# Margen de búsqueda de un chunk respecto al anterior
+_LOCATE_SLACK = 1024
+
+# Por debajo de este tamaño de texto el pool de procesos cuesta más de lo que ahorra
+PARALLEL_MIN_CHARACTERS = 200_000
+
 
 class DocumentType(Enum):
     """Tipos de documentos soportados."""
@@ -77,6 +109,18 @@ class ChunkingMetrics:
     overlap_efficiency: Optional[float] = None  # Eficiencia del overlap
 
 
+@dataclass
+class StrategyEvaluation:
+    """Evaluación de una estrategia candidata (solo métricas, sin chunks)."""
+    strategy: ChunkingStrategy
+    metrics: ChunkingMetrics
+    score: float
+    sampled: bool = False  # Evaluada sobre ventanas de muestra del texto
+    pruned: bool = False  # Descartada tras la muestra (peor que la mejor con la confianza pedida)
+    score_interval: Optional[Tuple[float, float]] = None  # Intervalo de confianza del score muestreado
+    window_scores: List[float] = field(default_factory=list)  # Score de cada ventana de muestra
+
+
 @dataclass
 class ChunkingResult:
     """Resultado de una estrategia de chunking."""
@@ -84,10 +128,22 @@ class ChunkingResult:
     chunks: List[Document]
     metrics: ChunkingMetrics
     config: Dict[str, Any]
+    score: Optional[float] = None
+    evaluations: List[StrategyEvaluation] = field(default_factory=list)
 
 
 class DocumentAnalyzer:
-    """Analiza documentos para determinar sus características."""
+    """
+    Analiza documentos para determinar sus características.
+    
+    El tipo y la estructura salen de un único perfil (document_profiler):
+    una pasada por bloques sobre los textos, sin concatenarlos.
+    """
+    
+    @staticmethod
+    def profile(texts: Iterable[str]) -> DocumentProfile:
+        """Perfil de los textos unidos con "\n\n" (sin unirlos)."""
+        return profile_texts(texts)
     
     @staticmethod
     def detect_document_type(text: str, file_path: Optional[Path] = None) -> DocumentType:
@@ -101,43 +157,61 @@ class DocumentAnalyzer:
         Returns:
             Tipo de documento detectado
         """
-        # Detectar por extensión
-        if file_path:
-            ext = file_path.suffix.lower()
-            if ext == '.md' or ext == '.markdown':
-                return DocumentType.MARKDOWN
-            elif ext == '.html' or ext == '.htm':
-                return DocumentType.HTML
-            elif ext == '.py':
-                return DocumentType.PYTHON
+        document_type = DocumentAnalyzer._type_from_extension(file_path)
+        if document_type is not None:
+            return document_type
+        return DocumentAnalyzer.document_type_from_profile(profile_texts([text]))
+    
+    @staticmethod
+    def document_type_from_profile(
+        profile: DocumentProfile,
+        file_path: Optional[Path] = None
+    ) -> DocumentType:
+        """
+        Tipo de documento a partir de un perfil ya calculado.
+        
+        Mismo orden de reglas que la detección por contenido: extensión,
+        Markdown, HTML, Python, técnico y narrativo.
+        """
+        document_type = DocumentAnalyzer._type_from_extension(file_path)
+        if document_type is not None:
+            return document_type
         
-        # Detectar por contenido
         # Markdown
-        if re.search(r'^#{1,6}\s+', text, re.MULTILINE):
+        if profile.headers:
             return DocumentType.MARKDOWN
         
         # HTML
-        if re.search(r'<[a-z][\s\S]*>', text):
+        if profile.has_html:
             return DocumentType.HTML
         
         # Python code
-        python_keywords = ['def ', 'class ', 'import ', 'from ', 'if __name__']
-        if any(keyword in text for keyword in python_keywords):
-            if re.search(r'def\s+\w+\s*\(|class\s+\w+|import\s+\w+', text):
-                return DocumentType.PYTHON
+        if profile.has_python_keyword and profile.has_python_syntax:
+            return DocumentType.PYTHON
         
         # Estructura técnica (listas numeradas, código, etc.)
-        if re.search(r'^\d+\.\s+|```|`\w+`', text, re.MULTILINE):
+        if profile.numbered_lists or profile.has_technical_markup:
             return DocumentType.TECHNICAL
         
         # Narrativo (muchas oraciones, párrafos largos)
-        sentences = re.split(r'[.!?]+', text)
-        avg_sentence_length = sum(len(s.split()) for s in sentences) / max(len(sentences), 1)
-        if avg_sentence_length > 15 and len(sentences) > 5:
+        avg_sentence_length = profile.sentence_words / max(profile.sentences, 1)
+        if avg_sentence_length > 15 and profile.sentences > 5:
             return DocumentType.NARRATIVE
         
         return DocumentType.UNSTRUCTURED
     
+    @staticmethod
+    def _type_from_extension(file_path: Optional[Path]) -> Optional[DocumentType]:
+        if file_path:
+            ext = Path(file_path).suffix.lower()
+            if ext == '.md' or ext == '.markdown':
+                return DocumentType.MARKDOWN
+            elif ext == '.html' or ext == '.htm':
+                return DocumentType.HTML
+            elif ext == '.py':
+                return DocumentType.PYTHON
+        return None
+    
     @staticmethod
     def analyze_structure(text: str) -> Dict[str, Any]:
         """
@@ -146,38 +220,14 @@ class DocumentAnalyzer:
         Returns:
             Diccionario con métricas de estructura
         """
-        # Contar elementos estructurales
-        headers = len(re.findall(r'^#{1,6}\s+', text, re.MULTILINE))
-        paragraphs = len(re.split(r'\n\s*\n', text))
-        sentences = len(re.split(r'[.!?]+', text))
-        words = len(text.split())
-        characters = len(text)
-        
-        # Detectar listas
-        bullet_lists = len(re.findall(r'^[\*\-\+]\s+', text, re.MULTILINE))
-        numbered_lists = len(re.findall(r'^\d+\.\s+', text, re.MULTILINE))
-        
-        # Calcular densidad de estructura
-        structure_density = (headers + bullet_lists + numbered_lists) / max(paragraphs, 1)
-        
-        return {
-            'headers': headers,
-            'paragraphs': paragraphs,
-            'sentences': sentences,
-            'words': words,
-            'characters': characters,
-            'bullet_lists': bullet_lists,
-            'numbered_lists': numbered_lists,
-            'structure_density': structure_density,
-            'avg_sentence_length': words / max(sentences, 1),
-            'avg_paragraph_length': words / max(paragraphs, 1),
-        }
+        return profile_texts([text]).structure()
     
     @staticmethod
     def calculate_optimal_chunk_size(
         text: str,
         model_max_tokens: Optional[int] = None,
-        target_chunks: Optional[int] = None
+        target_chunks: Optional[int] = None,
+        text_length: Optional[int] = None
     ) -> Tuple[int, int]:
         """
         Calcula el tamaño óptimo de chunk y overlap.
@@ -186,11 +236,13 @@ class DocumentAnalyzer:
             text: Texto a dividir
             model_max_tokens: Máximo de tokens del modelo (opcional)
             target_chunks: Número objetivo de chunks (opcional)
+            text_length: Longitud del texto si ya se conoce (entonces `text` no se usa)
             
         Returns:
             Tupla (chunk_size, chunk_overlap)
         """
-        text_length = len(text)
+        if text_length is None:
+            text_length = len(text)
         
         # Si hay un modelo específico, usar sus límites
         if model_max_tokens:
@@ -216,20 +268,140 @@ class DocumentAnalyzer:
         return chunk_size, chunk_overlap
 
 
+class TextBoundaries:
+    """
+    Fronteras precalculadas de un texto para evaluar chunks por offsets.
+
+    - Sumas prefijas de oraciones completas ("[.!?]" seguido de espacio) y de
+      inicios de series de "[.!?]", para contar oraciones de cualquier rango
+      en O(1).
+    - Spans de los párrafos (separados por "\\n\\s*\\n", sin espacios en los
+      bordes), ordenados, para contar párrafos contenidos con bisect.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+        codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        is_punct = np.isin(codepoints, _SENTENCE_END_CODEPOINTS)
+        is_space = np.isin(codepoints, _WHITESPACE_CODEPOINTS)
+        self.is_punct = is_punct
+
+        complete = np.zeros(len(codepoints), dtype=np.int64)
+        complete[:-1] = is_punct[:-1] & is_space[1:]
+        self.complete_prefix = np.concatenate(([0], np.cumsum(complete)))
+
+        run_start = is_punct.copy()
+        run_start[1:] &= ~is_punct[:-1]
+        self.run_start_prefix = np.concatenate(([0], np.cumsum(run_start)))
+
+        # Párrafos: spans sin espacios en los bordes (mismo criterio que para.strip())
+        self.num_paragraphs = 0
+        self.empty_paragraphs = 0
+        starts: List[int] = []
+        ends: List[int] = []
+        texts: List[str] = []
+        position = 0
+        for separator in itertools.chain(_PARAGRAPH_SEPARATOR.finditer(text), [None]):
+            end = separator.start() if separator else len(text)
+            raw = text[position:end]
+            stripped = raw.strip()
+            self.num_paragraphs += 1
+            if stripped:
+                offset = position + len(raw) - len(raw.lstrip())
+                starts.append(offset)
+                ends.append(offset + len(stripped))
+                texts.append(stripped)
+            else:
+                self.empty_paragraphs += 1
+            if separator:
+                position = separator.end()
+        self.paragraph_starts = starts
+        self.paragraph_ends = ends
+        self.paragraph_texts = texts
+
+        # Párrafos repetidos: si una aparición está en el chunk, cuentan todas
+        occurrences: Dict[str, int] = {}
+        for paragraph in texts:
+            occurrences[paragraph] = occurrences.get(paragraph, 0) + 1
+        self.repeats = [occurrences[paragraph] for paragraph in texts]
+        self.repeated_prefix = list(itertools.accumulate((count > 1 for count in self.repeats), initial=0))
+
+    def sentence_counts(self, start: int, end: int) -> Tuple[int, int]:
+        """(oraciones completas, total de oraciones) de text[start:end]."""
+        complete = int(self.complete_prefix[max(end - 1, start)] - self.complete_prefix[start])
+        runs = int(self.run_start_prefix[end] - self.run_start_prefix[min(start + 1, end)])
+        if end > start and self.is_punct[start]:
+            runs += 1
+        return complete, runs + 1
+
+    def preserved_paragraphs(self, start: int, end: int) -> int:
+        """Párrafos del texto contenidos en text[start:end]."""
+        first = bisect.bisect_left(self.paragraph_starts, start)
+        last = bisect.bisect_right(self.paragraph_ends, end)
+        preserved = self.empty_paragraphs
+        if last <= first:
+            return preserved
+        if self.repeated_prefix[last] == self.repeated_prefix[first]:
+            return preserved + last - first
+
+        seen = set()
+        for index in range(first, last):
+            if self.repeats[index] == 1:
+                preserved += 1
+            elif self.paragraph_texts[index] not in seen:
+                seen.add(self.paragraph_texts[index])
+                preserved += self.repeats[index]
+        return preserved
+
+    def locate(self, chunks: List[Document]) -> List[Optional[int]]:
+        """
+        Offset de cada chunk en el texto (None si no es una subcadena cercana).
+
+        Los chunks se buscan en orden, en una ventana a partir del chunk
+        anterior, así el coste total es proporcional al texto.
+        """
+        offsets: List[Optional[int]] = []
+        cursor = 0
+        for chunk in chunks:
+            content = chunk.page_content
+            window_end = cursor + 2 * len(content) + _LOCATE_SLACK
+            offset = self.text.find(content, cursor, window_end)
+            if offset < 0:
+                offsets.append(None)
+                cursor += len(content)
+                continue
+            offsets.append(offset)
+            cursor = offset + 1
+        return offsets
+
+
 class ChunkingEvaluator:
     """Evalúa la calidad de diferentes estrategias de chunking."""
     
     @staticmethod
     def calculate_metrics(
         chunks: List[Document],
-        original_text: str
+        original_text: str,
+        boundaries: Optional[TextBoundaries] = None
     ) -> ChunkingMetrics:
         """
         Calcula métricas de calidad para los chunks generados.
         
+        Cada chunk se ubica por offset en el texto original y sus oraciones y
+        párrafos se cuentan con las fronteras precalculadas (coste casi lineal).
+        Los chunks que no son subcadenas del original (p. ej. con líneas
+        reescritas por el splitter) se evalúan sobre su propio texto.
+        
+        Un párrafo cuenta como preservado si su span está dentro del chunk
+        (o, si está repetido, alguna de sus apariciones); ya no cuentan las
+        coincidencias casuales dentro de otro párrafo.
+        
         Args:
             chunks: Lista de chunks generados
             original_text: Texto original completo
+            boundaries: Fronteras precalculadas de original_text (opcional,
+                        permite reutilizarlas entre estrategias)
             
         Returns:
             Métricas calculadas
@@ -237,6 +409,9 @@ class ChunkingEvaluator:
         if not chunks:
             raise ValueError("No se pueden calcular métricas sin chunks")
         
+        if boundaries is None or boundaries.text is not original_text:
+            boundaries = TextBoundaries(original_text)
+        
         chunk_sizes = [len(chunk.page_content) for chunk in chunks]
         num_chunks = len(chunks)
         avg_chunk_size = sum(chunk_sizes) / num_chunks
@@ -244,32 +419,30 @@ class ChunkingEvaluator:
             sum((x - avg_chunk_size) ** 2 for x in chunk_sizes) / num_chunks
         ) ** 0.5
         
-        # Calcular completitud de oraciones
         sentence_completeness = []
-        for chunk in chunks:
+        paragraph_preservation = []
+        for chunk, offset in zip(chunks, boundaries.locate(chunks)):
             text = chunk.page_content
-            # Contar oraciones completas (terminan en . ! ?)
-            complete_sentences = len(re.findall(r'[.!?]\s+', text))
-            total_sentences = len(re.split(r'[.!?]+', text))
+            if offset is None:
+                # Contar oraciones completas (terminan en . ! ?)
+                complete_sentences = len(_COMPLETE_SENTENCE.findall(text))
+                total_sentences = len(_SENTENCE_SPLIT.split(text))
+                preserved = boundaries.empty_paragraphs + sum(
+                    1 for para in boundaries.paragraph_texts if para in text
+                )
+            else:
+                complete_sentences, total_sentences = boundaries.sentence_counts(offset, offset + len(text))
+                preserved = boundaries.preserved_paragraphs(offset, offset + len(text))
+            
             if total_sentences > 0:
-                completeness = complete_sentences / total_sentences
-                sentence_completeness.append(completeness)
+                sentence_completeness.append(complete_sentences / total_sentences)
+            paragraph_preservation.append(preserved / boundaries.num_paragraphs)
         
         avg_sentence_completeness = (
             sum(sentence_completeness) / len(sentence_completeness)
             if sentence_completeness else 0.0
         )
         
-        # Calcular preservación de párrafos
-        original_paragraphs = re.split(r'\n\s*\n', original_text)
-        paragraph_preservation = []
-        for chunk in chunks:
-            chunk_text = chunk.page_content
-            preserved = sum(1 for para in original_paragraphs if para.strip() in chunk_text)
-            if original_paragraphs:
-                preservation = preserved / len(original_paragraphs)
-                paragraph_preservation.append(preservation)
-        
         avg_paragraph_preservation = (
             sum(paragraph_preservation) / len(paragraph_preservation)
             if paragraph_preservation else 0.0
@@ -338,7 +511,14 @@ class ChunkingMaster:
         self,
         embedding_model=None,
         model_max_tokens: Optional[int] = None,
-        preferred_strategy: Optional[ChunkingStrategy] = None
+        preferred_strategy: Optional[ChunkingStrategy] = None,
+        max_workers: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        sampling: bool = True,
+        sample_windows: int = 8,
+        window_characters: int = 20_000,
+        confidence: float = 0.95,
+        recommendation_cache: Optional[ChunkingRecommendationCache] = None
     ):
         """
         Inicializa el ChunkingMaster.
@@ -347,10 +527,25 @@ class ChunkingMaster:
             embedding_model: Modelo de embeddings para chunking semántico (opcional)
             model_max_tokens: Máximo de tokens del modelo LLM objetivo (opcional)
             preferred_strategy: Estrategia preferida (opcional, si None se selecciona automáticamente)
+            max_workers: Procesos para evaluar candidatas (None = número de CPUs, 1 = secuencial)
+            time_budget: Segundos máximos de evaluación de candidatas (None = sin límite)
+            sampling: Si True, en textos grandes las candidatas se evalúan primero sobre
+                ventanas de muestra y solo se evalúan completas si el ranking es ambiguo
+            sample_windows: Número de ventanas de muestra (una por estrato del texto)
+            window_characters: Tamaño aproximado de cada ventana
+            confidence: Nivel de confianza de los intervalos y de la comparación entre candidatas
+            recommendation_cache: Caché persistente de recomendaciones (opcional)
         """
         self.embedding_model = embedding_model
         self.model_max_tokens = model_max_tokens
         self.preferred_strategy = preferred_strategy
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.sampling = sampling
+        self.sample_windows = sample_windows
+        self.window_characters = window_characters
+        self.confidence = confidence
+        self.recommendation_cache = recommendation_cache
         self.analyzer = DocumentAnalyzer()
         self.evaluator = ChunkingEvaluator()
     
@@ -512,17 +707,33 @@ class ChunkingMaster:
             evaluate_all: Si True, evalúa todas las estrategias candidatas y selecciona la mejor
             
         Returns:
-            ChunkingResult con la mejor estrategia y sus chunks
+            ChunkingResult con la mejor estrategia y sus chunks; `evaluations`
+            contiene las métricas y el score de cada candidata evaluada
         """
         if not documents:
             raise ValueError("Se requiere al menos un documento")
         
-        # Combinar todos los documentos en un solo texto para análisis
-        full_text = "\n\n".join([doc.page_content for doc in documents])
+        texts = [doc.page_content for doc in documents]
         
-        # Analizar documento
-        doc_type = self.analyzer.detect_document_type(full_text, file_path)
-        structure = self.analyzer.analyze_structure(full_text)
+        # Caché de recomendaciones: el mismo contenido reutiliza la decisión completa
+        cache = self.recommendation_cache
+        if self.preferred_strategy and not evaluate_all:
+            cache = None
+        if cache is not None:
+            cache_profile = self._cache_profile(chunk_size, chunk_overlap)
+            content_key = cache.content_key(texts, cache_profile)
+            entry = cache.get(content_key)
+            if entry is not None:
+                result = self._apply_cached(entry, documents, entry['chunk_size'], entry['chunk_overlap'],
+                                            DocumentType(entry['doc_type']), entry['structure'], "content")
+                if result is not None:
+                    cache.record("content_hits")
+                    return result
+        
+        # Analizar documento (una pasada sobre los textos, sin unirlos)
+        profile = self.analyzer.profile(texts)
+        doc_type = self.analyzer.document_type_from_profile(profile, file_path)
+        structure = profile.structure()
         
         logger.info(f"Tipo de documento detectado: {doc_type.value}")
         logger.info(f"Estructura: {structure['headers']} headers, "
@@ -532,8 +743,9 @@ class ChunkingMaster:
         # Calcular parámetros óptimos si no se proporcionan
         if chunk_size is None or chunk_overlap is None:
             chunk_size, chunk_overlap = self.analyzer.calculate_optimal_chunk_size(
-                full_text,
-                self.model_max_tokens
+                "",
+                self.model_max_tokens,
+                text_length=profile.characters
             )
             logger.info(f"Parámetros calculados: chunk_size={chunk_size}, "
                        f"chunk_overlap={chunk_overlap}")
@@ -541,7 +753,7 @@ class ChunkingMaster:
         # Si hay estrategia preferida y no se requiere evaluación completa
         if self.preferred_strategy and not evaluate_all:
             logger.info(f"Usando estrategia preferida: {self.preferred_strategy.value}")
-            return self._apply_strategy(
+            result = self._apply_strategy(
                 self.preferred_strategy,
                 documents,
                 chunk_size,
@@ -549,42 +761,172 @@ class ChunkingMaster:
                 doc_type,
                 structure
             )
+            result.score = self.evaluator.score_strategy(result.metrics)
+            return result
+        
+        # Misma huella estructural: se reutiliza la estrategia sin evaluar candidatas
+        if cache is not None:
+            fingerprint_key = cache.fingerprint_key(structural_fingerprint(doc_type.value, structure), cache_profile)
+            entry = cache.get(fingerprint_key)
+            if entry is not None:
+                result = self._apply_cached(entry, documents, chunk_size, chunk_overlap,
+                                            doc_type, structure, "fingerprint")
+                if result is not None:
+                    cache.record("fingerprint_hits")
+                    cache.put([content_key], self._cache_entry(result))
+                    return result
+        
+        # Fronteras de oraciones/párrafos compartidas por todas las estrategias
+        # (la evaluación de candidatas es lo único que necesita el texto unido)
+        boundaries = TextBoundaries("\n\n".join(texts))
         
         # Seleccionar estrategias candidatas
         candidate_strategies = self._select_candidate_strategies(doc_type, structure)
         logger.info(f"Estrategias candidatas: {[s.value for s in candidate_strategies]}")
         
-        # Evaluar estrategias
-        results = []
-        for strategy in candidate_strategies:
-            try:
-                result = self._apply_strategy(
-                    strategy,
-                    documents,
-                    chunk_size,
-                    chunk_overlap,
-                    doc_type,
-                    structure
-                )
-                results.append(result)
-                logger.info(f"Estrategia {strategy.value}: "
-                           f"{result.metrics.num_chunks} chunks, "
-                           f"score={self.evaluator.score_strategy(result.metrics):.2f}")
-            except Exception as e:
-                logger.warning(f"Error al aplicar estrategia {strategy.value}: {e}")
-                continue
-        
-        if not results:
-            raise RuntimeError("No se pudo aplicar ninguna estrategia de chunking")
-        
-        # Seleccionar la mejor estrategia basándose en el score
-        best_result = max(results, key=lambda r: self.evaluator.score_strategy(r.metrics))
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        evaluation = _CandidateEvaluation(
+            self, documents, chunk_size, chunk_overlap, doc_type, structure, boundaries
+        )
+        try:
+            evaluations, best_result, timed_out = evaluation.run(candidate_strategies, deadline)
+        finally:
+            evaluation.close()
+        
+        if best_result is None:
+            # Solo se guardan métricas de las candidatas: se aplica la ganadora
+            complete = [e for e in evaluations if not e.sampled]
+            if complete or evaluations:
+                # Sin evaluaciones completas (presupuesto agotado o una sola superviviente
+                # tras la muestra) decide el score en la muestra
+                best_strategy = max(complete or evaluations, key=lambda e: e.score).strategy
+            elif timed_out:
+                logger.warning("Presupuesto de tiempo agotado sin evaluar ninguna estrategia; "
+                               f"se usa {candidate_strategies[0].value}")
+                best_strategy = candidate_strategies[0]
+            else:
+                raise RuntimeError("No se pudo aplicar ninguna estrategia de chunking")
+            best_result = self._apply_strategy(
+                best_strategy,
+                documents,
+                chunk_size,
+                chunk_overlap,
+                doc_type,
+                structure,
+                boundaries=boundaries
+            )
+            best_result.score = self.evaluator.score_strategy(best_result.metrics)
         
+        best_result.evaluations = evaluations
         logger.info(f"Mejor estrategia seleccionada: {best_result.strategy.value} "
-                   f"(score: {self.evaluator.score_strategy(best_result.metrics):.2f})")
+                   f"(score: {best_result.score:.2f})")
+        
+        if cache is not None and not timed_out:
+            cache.record("misses")
+            cache.put([content_key, fingerprint_key], self._cache_entry(best_result))
         
         return best_result
     
+    def cached_recommendation(
+        self,
+        documents: List[Document],
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None
+    ) -> Optional[ChunkingResult]:
+        """
+        Recomendación guardada en la caché para este mismo contenido.
+        
+        No analiza el documento ni aplica la estrategia: el resultado no trae
+        chunks, solo estrategia, configuración, métricas y score guardados.
+        
+        Returns:
+            ChunkingResult sin chunks, o None si no hay caché o entrada
+        """
+        cache = self.recommendation_cache
+        if cache is None or not documents:
+            return None
+        texts = [doc.page_content for doc in documents]
+        entry = cache.get(cache.content_key(texts, self._cache_profile(chunk_size, chunk_overlap)))
+        if entry is None:
+            return None
+        cache.record("content_hits")
+        return ChunkingResult(
+            strategy=ChunkingStrategy(entry['strategy']),
+            chunks=[],
+            metrics=ChunkingMetrics(**entry['metrics']),
+            config={
+                'chunk_size': entry['chunk_size'],
+                'chunk_overlap': entry['chunk_overlap'],
+                'doc_type': entry['doc_type'],
+                'structure': entry['structure'],
+                'cache_hit': "content",
+            },
+            score=entry['score']
+        )
+    
+    def _cache_profile(self, chunk_size: Optional[int], chunk_overlap: Optional[int]) -> str:
+        """Parámetros de la petición que cambian la recomendación (parte de la clave de caché)."""
+        semantic = self.embedding_model is not None and SemanticChunker is not None
+        return (f"size={chunk_size},overlap={chunk_overlap},tokens={self.model_max_tokens},"
+                f"semantic={semantic},sampling={self.sampling}")
+    
+    def _apply_cached(
+        self,
+        entry: Dict[str, Any],
+        documents: List[Document],
+        chunk_size: int,
+        chunk_overlap: int,
+        doc_type: DocumentType,
+        structure: Dict[str, Any],
+        hit: str
+    ) -> Optional[ChunkingResult]:
+        """Aplica la estrategia de una entrada de caché (None si ya no se puede aplicar)."""
+        strategy = ChunkingStrategy(entry['strategy'])
+        try:
+            result = self._apply_strategy(strategy, documents, chunk_size, chunk_overlap, doc_type, structure)
+        except Exception as e:
+            logger.warning(f"No se pudo aplicar la estrategia en caché {strategy.value}: {e}")
+            return None
+        result.score = self.evaluator.score_strategy(result.metrics)
+        result.config['cache_hit'] = hit
+        logger.info(f"Estrategia {strategy.value} reutilizada de la caché ({hit})")
+        return result
+    
+    @staticmethod
+    def _cache_entry(result: ChunkingResult) -> Dict[str, Any]:
+        return {
+            'strategy': result.strategy.value,
+            'chunk_size': result.config['chunk_size'],
+            'chunk_overlap': result.config['chunk_overlap'],
+            'doc_type': result.config['doc_type'],
+            'structure': result.config['structure'],
+            'score': result.score,
+            'metrics': asdict(result.metrics),
+        }
+    
+    def _evaluate_strategy(
+        self,
+        strategy: ChunkingStrategy,
+        documents: List[Document],
+        chunk_size: int,
+        chunk_overlap: int,
+        doc_type: DocumentType,
+        structure: Dict[str, Any],
+        boundaries: TextBoundaries
+    ) -> ChunkingResult:
+        """Aplica una estrategia y calcula su score (los chunks se descartan si no gana)."""
+        result = self._apply_strategy(
+            strategy,
+            documents,
+            chunk_size,
+            chunk_overlap,
+            doc_type,
+            structure,
+            boundaries=boundaries
+        )
+        result.score = self.evaluator.score_strategy(result.metrics)
+        return result
+    
     def _apply_strategy(
         self,
         strategy: ChunkingStrategy,
@@ -592,7 +934,8 @@ class ChunkingMaster:
         chunk_size: int,
         chunk_overlap: int,
         doc_type: DocumentType,
-        structure: Dict[str, Any]
+        structure: Dict[str, Any],
+        boundaries: Optional[TextBoundaries] = None
     ) -> ChunkingResult:
         """Aplica una estrategia específica de chunking."""
         # Crear splitter
@@ -609,12 +952,25 @@ class ChunkingMaster:
             **splitter_kwargs
         )
         
+        # Las secciones del loader solo sirven para agrupar: no se copian a cada chunk
+        plain_documents = [
+            Document(
+                page_content=doc.page_content,
+                metadata={k: v for k, v in doc.metadata.items() if k != MARKDOWN_SECTIONS_KEY}
+            )
+            for doc in documents
+        ]
+        
         # Aplicar splitter
         if strategy == ChunkingStrategy.MARKDOWN_HEADER:
             # MarkdownHeaderTextSplitter requiere procesamiento en dos pasos
             md_splitter, recursive_splitter = splitter
-            # Primero agrupar por headers
-            header_groups = md_splitter.split_text(documents[0].page_content)
+            # Primero agrupar por headers (reutilizando las secciones del loader si existen)
+            sections = sections_from_metadata(documents[0].metadata)
+            if sections:
+                header_groups = _header_groups_from_sections(documents[0].page_content, sections)
+            else:
+                header_groups = md_splitter.split_text(documents[0].page_content)
             # Luego dividir cada grupo con el splitter recursivo
             chunks = []
             for group in header_groups:
@@ -624,20 +980,21 @@ class ChunkingMaster:
         elif strategy == ChunkingStrategy.HTML_HEADER:
             # HTMLHeaderTextSplitter también puede necesitar procesamiento especial
             try:
-                chunks = splitter.split_documents(documents)
+                chunks = splitter.split_documents(plain_documents)
             except AttributeError:
                 # Si no tiene split_documents, usar split_text
                 chunks = []
-                for doc in documents:
+                for doc in plain_documents:
                     text_chunks = splitter.split_text(doc.page_content)
                     for chunk_text in text_chunks:
                         chunks.append(Document(page_content=chunk_text, metadata=doc.metadata.copy()))
         else:
-            chunks = splitter.split_documents(documents)
+            chunks = splitter.split_documents(plain_documents)
         
         # Calcular métricas
-        full_text = "\n\n".join([doc.page_content for doc in documents])
-        metrics = self.evaluator.calculate_metrics(chunks, full_text)
+        if boundaries is None:
+            boundaries = TextBoundaries("\n\n".join([doc.page_content for doc in documents]))
+        metrics = self.evaluator.calculate_metrics(chunks, boundaries.text, boundaries)
         
         # Crear resultado
         config = {
@@ -655,6 +1012,473 @@ class ChunkingMaster:
         )
 
 
+class _CandidateEvaluation:
+    """
+    Evaluación de las estrategias candidatas de find_best_chunking_strategy.
+
+    Con `sampling` activo y un texto mayor que dos veces el total muestreado:
+
+    1. Todas las candidatas se evalúan sobre `sample_windows` ventanas de unos
+       `window_characters` caracteres, una por estrato del texto (la primera
+       sección Markdown del estrato si las hay; si no, el centro del tramo),
+       cortadas en separadores de párrafo. Las métricas de cada ventana se
+       extrapolan al texto completo; el score lleva un intervalo de confianza
+       (aproximación normal) según la dispersión entre ventanas.
+    2. Cada candidata se compara con la mejor por diferencias de score
+       pareadas por ventana y se descarta si es peor con la confianza pedida.
+       Si solo queda una, decide la muestra y el coste no depende del tamaño
+       del documento; si el ranking es ambiguo, las que quedan se evalúan
+       sobre el texto completo.
+
+    Con textos grandes las evaluaciones corren en el pool de procesos del
+    módulo (método de arranque "spawn", creado una vez por proceso y
+    reutilizado entre llamadas: la ingesta tiene vivos el driver de Neo4j y
+    los hilos de torch, que fork no copia de forma segura). La evaluación se
+    serializa una vez por llamada; cada worker la deserializa una vez y
+    devuelve únicamente las métricas. SEMANTIC se evalúa en el proceso
+    principal (el modelo de embeddings no se serializa). De las evaluaciones
+    locales solo se conservan los chunks de la mejor.
+
+    Si se agota el presupuesto de tiempo, las tareas pendientes se cancelan;
+    las que ya están en curso se detienen en el worker entre ventanas de
+    muestra (una evaluación del texto completo termina la estrategia en curso).
+    """
+
+    def __init__(
+        self,
+        master: ChunkingMaster,
+        documents: List[Document],
+        chunk_size: int,
+        chunk_overlap: int,
+        doc_type: DocumentType,
+        structure: Dict[str, Any],
+        boundaries: TextBoundaries
+    ):
+        self.master = master
+        self.model_max_tokens = master.model_max_tokens
+        self.documents = documents
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.doc_type = doc_type
+        self.structure = structure
+        self.text_length = len(boundaries.text)
+        self.windows = None
+        if master.sampling:
+            self.windows = _sample_windows(
+                documents, boundaries.text, master.sample_windows, master.window_characters
+            )
+        # Fronteras por ventana (índice) y del texto completo (None)
+        self._boundaries: Dict[Optional[int], TextBoundaries] = {None: boundaries}
+        # Evaluación serializada para los workers (una vez por llamada)
+        self._token = uuid.uuid4().hex
+        self._payload: Optional[bytes] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Lo que viaja a los workers: documentos y parámetros (sin modelo)
+        state = self.__dict__.copy()
+        state['master'] = None
+        state['_boundaries'] = {}
+        state['_payload'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.master = ChunkingMaster(model_max_tokens=self.model_max_tokens, max_workers=1)
+
+    def run(
+        self,
+        strategies: List[ChunkingStrategy],
+        deadline: Optional[float]
+    ) -> Tuple[List[StrategyEvaluation], Optional[ChunkingResult], bool]:
+        """
+        Evalúa las candidatas.
+
+        Returns:
+            (evaluaciones, mejor resultado con chunks si se calculó en este
+            proceso, True si se agotó el presupuesto de tiempo)
+        """
+        evaluations: List[StrategyEvaluation] = []
+        survivors = list(strategies)
+
+        if self.windows is not None and len(strategies) > 1:
+            sampled, _, timed_out = self._evaluate(strategies, sampled=True, deadline=deadline)
+            evaluations.extend(sampled)
+            if timed_out:
+                return evaluations, None, True
+            if sampled:
+                self._prune(sampled)
+                pruned = [e.strategy for e in sampled if e.pruned]
+                survivors = [s for s in strategies if s not in pruned]
+                if pruned:
+                    logger.info(f"Descartadas tras la muestra: {[s.value for s in pruned]}")
+            if len(survivors) == 1:
+                return evaluations, None, False
+            logger.info(f"Ranking ambiguo en la muestra: evaluación completa de "
+                        f"{[s.value for s in survivors]}")
+
+        complete, best_result, timed_out = self._evaluate(survivors, sampled=False, deadline=deadline)
+        evaluations.extend(complete)
+        if best_result is not None and any(e.score > best_result.score for e in complete):
+            # La mejor se evaluó en un worker: sus chunks se calcularán de nuevo
+            best_result = None
+        return evaluations, best_result, timed_out
+
+    def close(self) -> None:
+        self._payload = None
+
+    def metrics(self, strategy: ChunkingStrategy, sampled: bool, deadline: Optional[float] = None):
+        """
+        Métricas de una estrategia: una por ventana si `sampled`, si no las del texto completo.
+
+        `deadline` (time.time()) se comprueba entre ventanas.
+
+        Raises:
+            TimeoutError: Si se alcanza `deadline` antes de terminar las ventanas
+        """
+        if sampled:
+            metrics = []
+            for window in range(len(self.windows)):
+                if deadline is not None and time.time() >= deadline:
+                    raise TimeoutError(f"Evaluation budget exhausted for {strategy.value}")
+                metrics.append(self.apply(strategy, window).metrics)
+            return metrics
+        return self.apply(strategy).metrics
+
+    def apply(self, strategy: ChunkingStrategy, window: Optional[int] = None) -> ChunkingResult:
+        """Aplica una estrategia al texto completo o a una ventana de muestra."""
+        return self.master._evaluate_strategy(
+            strategy,
+            self._documents(window),
+            self.chunk_size,
+            self.chunk_overlap,
+            self.doc_type,
+            self.structure,
+            self._get_boundaries(window)
+        )
+
+    def _documents(self, window: Optional[int]) -> List[Document]:
+        return self.documents if window is None else self.windows[window]
+
+    def _get_boundaries(self, window: Optional[int]) -> TextBoundaries:
+        if window not in self._boundaries:
+            text = "\n\n".join(doc.page_content for doc in self._documents(window))
+            self._boundaries[window] = TextBoundaries(text)
+        return self._boundaries[window]
+
+    def _prune(self, sampled: List[StrategyEvaluation]) -> None:
+        """
+        Marca como descartadas las candidatas peores que la mejor en la muestra.
+
+        Usa la diferencia de score por ventana (pareada: elimina la variación
+        entre ventanas comunes a todas las estrategias). Las candidatas con
+        exactamente el mismo score en todas las ventanas son equivalentes y
+        también se descartan (gana la primera, como en max()).
+        """
+        best = max(sampled, key=lambda e: e.score)
+        z = NormalDist().inv_cdf(0.5 + self.master.confidence / 2)
+        for evaluation in sampled:
+            if evaluation is best:
+                continue
+            differences = [b - c for b, c in zip(best.window_scores, evaluation.window_scores)]
+            if not any(differences):
+                evaluation.pruned = True
+                continue
+            half_width = z * stdev(differences) / math.sqrt(len(differences))
+            evaluation.pruned = fmean(differences) - half_width > 0
+
+    def _evaluate(
+        self,
+        strategies: List[ChunkingStrategy],
+        sampled: bool,
+        deadline: Optional[float]
+    ) -> Tuple[List[StrategyEvaluation], Optional[ChunkingResult], bool]:
+        """Evalúa una etapa (ventanas de muestra o texto completo), en el pool si compensa."""
+        local = list(strategies)
+        futures = {}
+        pool = None
+        if self._use_pool(strategies):
+            pool = _get_evaluation_pool(self.master.max_workers)
+            if self._payload is None:
+                self._payload = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+            # Reloj de pared: el de time.monotonic() no se comparte entre procesos
+            wall_deadline = None if deadline is None else time.time() + (deadline - time.monotonic())
+            local = [s for s in strategies if s == ChunkingStrategy.SEMANTIC]
+            futures = {
+                pool.submit(
+                    _evaluate_in_worker, self._token, self._payload, strategy.value, sampled, wall_deadline
+                ): strategy
+                for strategy in strategies if strategy not in local
+            }
+
+        metrics: Dict[ChunkingStrategy, Any] = {}
+        best_result: Optional[ChunkingResult] = None
+        timed_out = False
+        for strategy in local:
+            if deadline is not None and time.monotonic() >= deadline:
+                timed_out = True
+                break
+            try:
+                if sampled:
+                    metrics[strategy] = self.metrics(strategy, sampled=True)
+                    continue
+                result = self.apply(strategy)
+            except Exception as e:
+                logger.warning(f"Error al aplicar estrategia {strategy.value}: {e}")
+                continue
+            metrics[strategy] = result.metrics
+            if best_result is None or result.score > best_result.score:
+                best_result = result
+
+        if futures:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, not_done = wait(futures, timeout=timeout)
+            for future in not_done:
+                future.cancel()
+            timed_out = timed_out or bool(not_done)
+            for future in done:
+                try:
+                    metrics[futures[future]] = future.result()
+                except TimeoutError:
+                    timed_out = True
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        _discard_evaluation_pool(pool)
+                    logger.warning(f"Error al aplicar estrategia {futures[future].value}: {e}")
+
+        if timed_out:
+            logger.warning("Presupuesto de tiempo de evaluación agotado")
+
+        evaluations = []
+        for strategy in strategies:
+            if strategy not in metrics:
+                continue
+            if sampled:
+                evaluation = self._sampled_evaluation(strategy, metrics[strategy])
+                low, high = evaluation.score_interval
+                logger.info(f"Estrategia {strategy.value} (muestra): "
+                            f"{evaluation.metrics.num_chunks} chunks estimados, "
+                            f"score={evaluation.score:.2f} [{low:.2f}, {high:.2f}]")
+            else:
+                evaluation = StrategyEvaluation(
+                    strategy=strategy,
+                    metrics=metrics[strategy],
+                    score=self.master.evaluator.score_strategy(metrics[strategy])
+                )
+                logger.info(f"Estrategia {strategy.value}: "
+                            f"{evaluation.metrics.num_chunks} chunks, score={evaluation.score:.2f}")
+            evaluations.append(evaluation)
+        return evaluations, best_result, timed_out
+
+    def _sampled_evaluation(
+        self,
+        strategy: ChunkingStrategy,
+        window_metrics: List[ChunkingMetrics]
+    ) -> StrategyEvaluation:
+        """Combina las métricas por ventana, extrapoladas al texto completo, con su intervalo."""
+        full = self._get_boundaries(None)
+        extrapolated = []
+        for window, metrics in enumerate(window_metrics):
+            boundaries = self._get_boundaries(window)
+            # Escala el número de chunks y la preservación de párrafos (relativa al total
+            # de párrafos del texto) para que el score sea comparable con el completo
+            extrapolated.append(replace(
+                metrics,
+                num_chunks=round(metrics.num_chunks * self.text_length / len(boundaries.text)),
+                avg_paragraph_preservation=(
+                    metrics.avg_paragraph_preservation * boundaries.num_paragraphs / full.num_paragraphs
+                ),
+            ))
+
+        score_strategy = self.master.evaluator.score_strategy
+        window_scores = [score_strategy(metrics) for metrics in extrapolated]
+        combined = _combine_window_metrics(window_metrics, extrapolated)
+        score = score_strategy(combined)
+        z = NormalDist().inv_cdf(0.5 + self.master.confidence / 2)
+        half_width = z * stdev(window_scores) / math.sqrt(len(window_scores)) if len(window_scores) > 1 else 0.0
+        return StrategyEvaluation(
+            strategy=strategy,
+            metrics=combined,
+            score=score,
+            sampled=True,
+            score_interval=(score - half_width, score + half_width),
+            window_scores=window_scores
+        )
+
+    def _use_pool(self, strategies: List[ChunkingStrategy]) -> bool:
+        poolable = [s for s in strategies if s != ChunkingStrategy.SEMANTIC]
+        return (
+            self.master.max_workers > 1
+            and len(poolable) > 1
+            and self.text_length >= PARALLEL_MIN_CHARACTERS
+        )
+
+
+# Pool de procesos compartido por todas las llamadas a find_best_chunking_strategy
+_EVALUATION_POOL: Optional[ProcessPoolExecutor] = None
+_EVALUATION_POOL_WORKERS = 0
+_EVALUATION_POOL_LOCK = threading.Lock()
+
+
+def _get_evaluation_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool compartido con al menos `workers` procesos (se crea una vez)."""
+    global _EVALUATION_POOL, _EVALUATION_POOL_WORKERS
+    with _EVALUATION_POOL_LOCK:
+        if _EVALUATION_POOL is None or _EVALUATION_POOL_WORKERS < workers:
+            if _EVALUATION_POOL is not None:
+                _EVALUATION_POOL.shutdown(wait=True, cancel_futures=True)
+            _EVALUATION_POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _EVALUATION_POOL_WORKERS = workers
+        return _EVALUATION_POOL
+
+
+def _discard_evaluation_pool(pool: ProcessPoolExecutor) -> None:
+    """Descarta el pool compartido si sigue siendo `pool` (p. ej. tras romperse)."""
+    global _EVALUATION_POOL, _EVALUATION_POOL_WORKERS
+    with _EVALUATION_POOL_LOCK:
+        if _EVALUATION_POOL is pool:
+            _EVALUATION_POOL = None
+            _EVALUATION_POOL_WORKERS = 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_evaluation_pool() -> None:
+    """Cierra el pool compartido (se llama también al salir del proceso)."""
+    global _EVALUATION_POOL, _EVALUATION_POOL_WORKERS
+    with _EVALUATION_POOL_LOCK:
+        pool, _EVALUATION_POOL, _EVALUATION_POOL_WORKERS = _EVALUATION_POOL, None, 0
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_evaluation_pool)
+
+# Última evaluación deserializada en este worker: (token, evaluación)
+_worker_evaluation: Optional[Tuple[str, _CandidateEvaluation]] = None
+
+
+def _evaluate_in_worker(
+    token: str,
+    payload: bytes,
+    strategy_value: str,
+    sampled: bool,
+    deadline: Optional[float]
+) -> ChunkingMetrics:
+    """Aplica una estrategia en un worker y devuelve solo sus métricas."""
+    global _worker_evaluation
+    if _worker_evaluation is None or _worker_evaluation[0] != token:
+        _worker_evaluation = (token, pickle.loads(payload))
+    return _worker_evaluation[1].metrics(ChunkingStrategy(strategy_value), sampled, deadline)
+
+
+def _sample_windows(
+    documents: List[Document],
+    text: str,
+    windows: int,
+    window_characters: int
+) -> Optional[List[List[Document]]]:
+    """
+    Ventanas de muestra estratificadas del texto (None si el texto es pequeño).
+
+    El texto se divide en `windows` estratos iguales. En cada uno la ventana
+    empieza en la primera sección Markdown del estrato (si el loader guardó
+    secciones) o, si no, en el primer párrafo a partir del centro del estrato
+    menos media ventana; termina en el último separador de párrafos antes de
+    `window_characters`.
+    """
+    if windows < 2 or len(text) <= 2 * windows * window_characters:
+        return None
+
+    sections = sections_from_metadata(documents[0].metadata) or []
+    section_starts = [section.start for section in sections if section.level > 0]
+    metadata = {k: v for k, v in documents[0].metadata.items() if k != MARKDOWN_SECTIONS_KEY}
+    stratum = len(text) / windows
+
+    result = []
+    for index in range(windows):
+        low = int(index * stratum)
+        high = int((index + 1) * stratum)
+        position = bisect.bisect_left(section_starts, low)
+        if position < len(section_starts) and section_starts[position] <= high - window_characters:
+            start = section_starts[position]
+        else:
+            start = int(low + stratum / 2 - window_characters / 2)
+            separator = text.find("\n\n", start, high - window_characters)
+            if separator != -1:
+                start = separator + 2
+        end = text.rfind("\n\n", start, start + window_characters)
+        if end <= start:
+            end = start + window_characters
+        result.append([Document(page_content=text[start:end], metadata=metadata)])
+    return result
+
+
+def _combine_window_metrics(
+    window_metrics: List[ChunkingMetrics],
+    extrapolated: List[ChunkingMetrics]
+) -> ChunkingMetrics:
+    """
+    Métricas combinadas de las ventanas de muestra.
+
+    Media y desviación de tamaños agrupadas por número de chunks real de
+    cada ventana; número de chunks y preservación de párrafos a partir de
+    las métricas extrapoladas al texto completo. `min_chunk_size` es el
+    mínimo de las ventanas, una cota superior del real: el score muestreado
+    tiende a ser algo mayor que el completo, igual para todas las candidatas.
+    """
+    counts = [metrics.num_chunks for metrics in window_metrics]
+    total = sum(counts)
+    average = sum(n * m.avg_chunk_size for n, m in zip(counts, window_metrics)) / total
+    second_moment = sum(
+        n * (m.std_chunk_size ** 2 + m.avg_chunk_size ** 2) for n, m in zip(counts, window_metrics)
+    ) / total
+    return ChunkingMetrics(
+        num_chunks=round(fmean(m.num_chunks for m in extrapolated)),
+        avg_chunk_size=average,
+        std_chunk_size=math.sqrt(max(0.0, second_moment - average ** 2)),
+        min_chunk_size=min(m.min_chunk_size for m in window_metrics),
+        max_chunk_size=max(m.max_chunk_size for m in window_metrics),
+        avg_sentence_completeness=sum(
+            n * m.avg_sentence_completeness for n, m in zip(counts, window_metrics)
+        ) / total,
+        avg_paragraph_preservation=sum(
+            n * m.avg_paragraph_preservation for n, m in zip(counts, extrapolated)
+        ) / total,
+    )
+
+
+def _header_groups_from_sections(
+    text: str,
+    sections: List[MarkdownSection],
+    max_level: int = 3
+) -> List[Document]:
+    """
+    Agrupa el texto por encabezados a partir de secciones ya analizadas.
+
+    Equivale a MarkdownHeaderTextSplitter con headers "#", "##" y "###":
+    los encabezados de nivel mayor que `max_level` quedan dentro del grupo
+    de su sección padre y los metadatos usan las claves "Header N".
+    """
+    groups: List[Document] = []
+    for section in sections:
+        if groups and section.level > max_level:
+            groups[-1].page_content += text[section.start:section.end]
+            continue
+        groups.append(Document(
+            page_content=text[section.body_start:section.end],
+            metadata={
+                f"Header {level}": title
+                for level, title in section.headers.items()
+                if level <= max_level
+            }
+        ))
+    for group in groups:
+        group.page_content = group.page_content.strip()
+    return [group for group in groups if group.page_content]
+
+
 def master_chunking_function(
     documents: List[Document],
     file_path: Optional[Path] = None,
@@ -663,7 +1487,10 @@ def master_chunking_function(
     chunk_size: Optional[int] = None,
     chunk_overlap: Optional[int] = None,
     preferred_strategy: Optional[str] = None,
-    evaluate_all: bool = False
+    evaluate_all: bool = False,
+    max_workers: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    recommendation_cache: Optional[ChunkingRecommendationCache] = None
 ) -> Tuple[List[Document], Dict[str, Any]]:
     """
     Función maestra para chunking inteligente.
@@ -680,6 +1507,9 @@ def master_chunking_function(
         chunk_overlap: Overlap deseado (opcional, se calcula automáticamente)
         preferred_strategy: Estrategia preferida como string (opcional)
         evaluate_all: Si True, evalúa todas las estrategias candidatas
+        max_workers: Procesos para evaluar candidatas (None = número de CPUs)
+        time_budget: Segundos máximos de evaluación de candidatas (opcional)
+        recommendation_cache: Caché de recomendaciones (opcional)
     
     Returns:
         Tupla (chunks, metadata) donde:
@@ -706,7 +1536,10 @@ def master_chunking_function(
     master = ChunkingMaster(
         embedding_model=embedding_model,
         model_max_tokens=model_max_tokens,
-        preferred_strategy=strategy_enum
+        preferred_strategy=strategy_enum,
+        max_workers=max_workers,
+        time_budget=time_budget,
+        recommendation_cache=recommendation_cache
     )
     
     # Encontrar mejor estrategia
@@ -727,8 +1560,18 @@ def master_chunking_function(
         'max_chunk_size': result.metrics.max_chunk_size,
         'sentence_completeness': result.metrics.avg_sentence_completeness,
         'paragraph_preservation': result.metrics.avg_paragraph_preservation,
-        'quality_score': master.evaluator.score_strategy(result.metrics),
-        'config': result.config
+        'quality_score': result.score,
+        'config': result.config,
+        'alternatives': [
+            {
+                'strategy': evaluation.strategy.value,
+                'score': evaluation.score,
+                'sampled': evaluation.sampled,
+                'pruned': evaluation.pruned,
+                'score_interval': evaluation.score_interval,
+            }
+            for evaluation in result.evaluations
+        ]
     }
     
     return result.chunks, metadata
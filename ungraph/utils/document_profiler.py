@@ -0,0 +1,222 @@
+"""
+Perfilador de documentos en una sola pasada.
+
+Calcula en un único recorrido los contadores de estructura de
+DocumentAnalyzer.analyze_structure y las señales que usa
+detect_document_type (Markdown, HTML, Python, técnico, narrativo), sobre
+un flujo de textos o líneas que no se concatena.
+
+El flujo se procesa en bloques de unas 64K caracteres cortados al final de
+una línea y fuera de una racha de espacios, así cada patrón de línea
+(encabezados, listas, separadores de párrafo, rachas de [.!?]) se cuenta
+igual que sobre el texto completo. La memoria adicional es la de un bloque
+(o la línea más larga). Como detect_document_type, las señales de tipo
+dejan de calcularse cuando una regla anterior ya decide el tipo.
+
+Dos señales pueden cruzar cortes de bloque y se tratan aparte:
+- HTML ("<" + letra minúscula y un ">" posterior en cualquier punto):
+  estado entre bloques.
+- Sintaxis Python (def/class/import seguidos de espacios y un nombre):
+  se busca con los últimos caracteres del bloque anterior delante; solo
+  se perdería una coincidencia con más de 256 caracteres de espacios
+  justo en un corte.
+
+Ejemplo de uso:
+    >>> profile = profile_texts(doc.page_content for doc in documents)
+    >>> profile.structure()['paragraphs']
+    12
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+# Mismos patrones que DocumentAnalyzer. Los de inicio de línea se anclan en
+# "\n" (búsqueda literal rápida, el inicio del bloque se comprueba aparte) y
+# el espacio final va en lookahead: cuentan igual que ^...\s+ en MULTILINE
+_HEADER = re.compile(r'#{1,6}\s')
+_BULLET = re.compile(r'[\*\-\+]\s')
+_NUMBERED = re.compile(r'\d+\.\s')
+_LINE_HEADER = re.compile(r'\n#{1,6}(?=\s)')
+_LINE_BULLET = re.compile(r'\n[\*\-\+](?=\s)')
+_LINE_NUMBERED = re.compile(r'\n\d+\.(?=\s)')
+_PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+_HTML_OPEN = re.compile(r'<[a-z]')
+_PYTHON_SYNTAX = re.compile(r'def\s+\w+\s*\(|class\s+\w+|import\s+\w+')
+_PYTHON_SYNTAX_WORDS = ('def', 'class', 'import')
+_TECHNICAL_INLINE = re.compile(r'```|`\w+`')
+_PYTHON_KEYWORDS = ('def ', 'class ', 'import ', 'from ', 'if __name__')
+
+# Las rachas de [.!?] se cuentan como puntos menos los que siguen a otro punto
+_SENTENCE_PUNCTUATION_TO_DOT = str.maketrans("!?", "..")
+_DOT_RUNS = re.compile(r'\.{2,}')
+# Las palabras de las oraciones se separan también por [.!?]
+_SENTENCE_PUNCTUATION_TO_SPACE = str.maketrans(".!?", "   ")
+
+BLOCK_SIZE = 1 << 16
+_PYTHON_CARRY = 256
+
+
+@dataclass
+class DocumentProfile:
+    """Contadores de estructura y señales de tipo de un documento."""
+    characters: int = 0
+    words: int = 0
+    headers: int = 0
+    paragraphs: int = 1
+    sentences: int = 1
+    sentence_words: int = 0  # Palabras separando también por [.!?] (solo mientras puede decidir el tipo)
+    bullet_lists: int = 0
+    numbered_lists: int = 0
+    has_html: bool = False  # Las señales de tipo se dejan de calcular cuando el tipo ya está decidido
+    has_python_keyword: bool = False
+    has_python_syntax: bool = False
+    has_technical_markup: bool = False  # ``` o `código` en línea (las listas numeradas aparte)
+
+    def structure(self) -> Dict[str, Any]:
+        """Diccionario con las mismas claves y valores que analyze_structure."""
+        structure_density = (self.headers + self.bullet_lists + self.numbered_lists) / max(self.paragraphs, 1)
+        return {
+            'headers': self.headers,
+            'paragraphs': self.paragraphs,
+            'sentences': self.sentences,
+            'words': self.words,
+            'characters': self.characters,
+            'bullet_lists': self.bullet_lists,
+            'numbered_lists': self.numbered_lists,
+            'structure_density': structure_density,
+            'avg_sentence_length': self.words / max(self.sentences, 1),
+            'avg_paragraph_length': self.words / max(self.paragraphs, 1),
+        }
+
+
+class DocumentProfiler:
+    """
+    Perfilador incremental: `feed` recibe fragmentos consecutivos del texto
+    (líneas, bloques o documentos) y `finish` devuelve el perfil.
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self.profile = DocumentProfile()
+        self._parts: List[str] = []
+        self._length = 0
+        self._flush_at = block_size
+        self._html_open = False
+        self._python_carry = ""
+
+    def feed(self, text: str) -> None:
+        """Añade el siguiente fragmento del texto."""
+        for start in range(0, len(text), self.block_size):
+            piece = text[start:start + self.block_size]
+            self._parts.append(piece)
+            self._length += len(piece)
+            if self._length >= self._flush_at:
+                self._flush(final=False)
+
+    def finish(self) -> DocumentProfile:
+        """Procesa lo pendiente y devuelve el perfil."""
+        self._flush(final=True)
+        return self.profile
+
+    def _flush(self, final: bool) -> None:
+        pending = "".join(self._parts)
+        if final:
+            cut = len(pending)
+        else:
+            # Después del último "\n" anterior al último carácter visible: es el último
+            # salto de su racha de espacios, así ningún patrón queda partido
+            cut = pending.rfind("\n", 0, len(pending.rstrip())) + 1
+            if cut == 0:
+                # Una sola línea (todavía incompleta): se sigue acumulando
+                self._parts = [pending]
+                self._flush_at = 2 * len(pending)
+                return
+        rest = pending[cut:]
+        self._parts = [rest] if rest else []
+        self._length = len(rest)
+        self._flush_at = self.block_size
+        if cut:
+            self._scan(pending[:cut])
+
+    def _scan(self, block: str) -> None:
+        profile = self.profile
+        profile.characters += len(block)
+        profile.words += len(block.split())
+        profile.headers += len(_LINE_HEADER.findall(block)) + (_HEADER.match(block) is not None)
+        profile.bullet_lists += len(_LINE_BULLET.findall(block)) + (_BULLET.match(block) is not None)
+        profile.numbered_lists += len(_LINE_NUMBERED.findall(block)) + (_NUMBERED.match(block) is not None)
+        profile.paragraphs += len(_PARAGRAPH_SEPARATOR.findall(block))
+        dots = block.translate(_SENTENCE_PUNCTUATION_TO_DOT)
+        sentences = dots.count(".")
+        if ".." in dots:
+            sentences -= sum(len(run) - 1 for run in _DOT_RUNS.findall(dots))
+        profile.sentences += sentences
+
+        # Como detect_document_type, las señales de tipo dejan de calcularse en
+        # cuanto una regla anterior decide el tipo (los encabezados, primero)
+        if profile.headers:
+            return
+        if not profile.has_html:
+            if self._html_open:
+                profile.has_html = ">" in block
+            else:
+                match = _HTML_OPEN.search(block)
+                if match:
+                    self._html_open = True
+                    profile.has_html = ">" in block[match.end():]
+        if profile.has_html:
+            return
+
+        if not profile.has_python_keyword:
+            profile.has_python_keyword = any(keyword in block for keyword in _PYTHON_KEYWORDS)
+        if not profile.has_python_syntax:
+            window = self._python_carry + block
+            if any(word in window for word in _PYTHON_SYNTAX_WORDS):
+                profile.has_python_syntax = _PYTHON_SYNTAX.search(window) is not None
+            self._python_carry = window[-_PYTHON_CARRY:]
+        if profile.has_python_keyword and profile.has_python_syntax:
+            return
+
+        if not profile.has_technical_markup and _TECHNICAL_INLINE.search(block):
+            profile.has_technical_markup = True
+        if profile.has_technical_markup or profile.numbered_lists:
+            return
+        profile.sentence_words += len(block.translate(_SENTENCE_PUNCTUATION_TO_SPACE).split())
+
+
+def profile_texts(texts: Iterable[str], separator: str = "\n\n", block_size: int = BLOCK_SIZE) -> DocumentProfile:
+    """
+    Perfil de varios textos como si estuvieran unidos con `separator`, sin unirlos.
+
+    Args:
+        texts: Textos (p. ej. page_content de cada documento)
+        separator: Separador entre textos (el de find_best_chunking_strategy)
+        block_size: Caracteres por bloque de análisis
+
+    Returns:
+        DocumentProfile del texto unido
+    """
+    profiler = DocumentProfiler(block_size)
+    for index, text in enumerate(texts):
+        if index:
+            profiler.feed(separator)
+        profiler.feed(text)
+    return profiler.finish()
+
+
+def profile_lines(lines: Iterable[str], block_size: int = BLOCK_SIZE) -> DocumentProfile:
+    """
+    Perfil de un flujo de líneas con su terminador (p. ej. un archivo abierto).
+
+    Args:
+        lines: Líneas consecutivas, cada una con su "\\n" final
+
+    Returns:
+        DocumentProfile del texto
+    """
+    profiler = DocumentProfiler(block_size)
+    for line in lines:
+        profiler.feed(line)
+    return profiler.finish()
+
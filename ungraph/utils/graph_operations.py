@@ -71,7 +71,9 @@ def extract_document_structure(tx,
                                embeddings, 
                                embeddings_dimensions, 
                                embedding_encoder_info,
-                               chunk_id_consecutive):
+                               chunk_id_consecutive,
+                               embeddings_int8=None,
+                               embeddings_binary=None):
     """
     Extrae y persiste la estructura FILE-PAGE-CHUNK en Neo4j.
     
@@ -136,7 +138,9 @@ def extract_document_structure(tx,
                               c.embeddings = $embeddings, 
                               c.embeddings_dimensions = toInteger($embeddings_dimensions),
                               c.embedding_encoder_info = $embedding_encoder_info,
-                              c.chunk_id_consecutive = toInteger($chunk_id_consecutive)
+                              c.chunk_id_consecutive = toInteger($chunk_id_consecutive),
+                              c.embeddings_int8 = $embeddings_int8,
+                              c.embeddings_binary = $embeddings_binary
 
                 MERGE (f)-[:CONTAINS]->(p)
                 MERGE (p)-[:HAS_CHUNK]->(c)
@@ -151,7 +155,9 @@ def extract_document_structure(tx,
                         embeddings=embeddings,
                         embeddings_dimensions=embeddings_dimensions,
                         embedding_encoder_info=embedding_encoder_info,
-                        chunk_id_consecutive=chunk_id_consecutive)
+                        chunk_id_consecutive=chunk_id_consecutive,
+                        embeddings_int8=embeddings_int8,
+                        embeddings_binary=embeddings_binary)
         return result
     except ClientError as e:
         logger.error("Database error", exc_info=True)
@@ -160,6 +166,52 @@ def extract_document_structure(tx,
 
 
 
+def extract_document_structure_batch(tx, rows):
+    """
+    Versión por lotes de extract_document_structure.
+    
+    Persiste la estructura File -[:CONTAINS]-> Page -[:HAS_CHUNK]-> Chunk
+    para todas las filas en una sola consulta UNWIND.
+    
+    Args:
+        tx: Transacción de Neo4j
+        rows: Lista de diccionarios con las mismas claves que los parámetros
+              de extract_document_structure (los embeddings ya como listas),
+              más `start_index`/`end_index`: offsets del chunk en el texto
+              de origen (None si el chunker no los registró) y
+              `embeddings_calibration`: calibration_id del cuantizador que
+              codificó `embeddings_int8`/`embeddings_binary` (None sin códigos)
+    """
+    try:
+        query = """
+                UNWIND $rows AS row
+                MERGE (f:File {filename: row.filename})
+                ON CREATE SET f.createdAt = timestamp()
+
+                MERGE (p:Page {filename: row.filename, page_number: toInteger(row.page_number)})
+
+                MERGE (c:Chunk {chunk_id: row.chunk_id})
+                ON CREATE SET c.page_content = row.page_content,
+                              c.is_unitary = row.is_unitary,
+                              c.embeddings = row.embeddings,
+                              c.embeddings_dimensions = toInteger(row.embeddings_dimensions),
+                              c.embedding_encoder_info = row.embedding_encoder_info,
+                              c.chunk_id_consecutive = toInteger(row.chunk_id_consecutive),
+                              c.embeddings_int8 = row.embeddings_int8,
+                              c.embeddings_binary = row.embeddings_binary,
+                              c.embeddings_calibration = row.embeddings_calibration,
+                              c.start_index = row.start_index,
+                              c.end_index = row.end_index
+
+                MERGE (f)-[:CONTAINS]->(p)
+                MERGE (p)-[:HAS_CHUNK]->(c)
+            """
+        return tx.run(query, rows=rows).consume()
+    except ClientError:
+        logger.error("Database error", exc_info=True)
+        raise
+
+
 # Creo las relaciones entre chunks consecutivos.
 def create_chunk_relationships(session):
     """Crear relaciones NEXT_CHUNK entre chunks consecutivos"""
@@ -139,18 +139,37 @@ def search_document(query_text, model="all-MiniLM-L6-v2", verbose = False):
 
 
 def gather_surrounding_context(primordial_context):
+    """
+    Texto de contexto de cada resultado, como {"subtext_i": texto}.
+
+    Acepta los resultados de hybrid_search (contenido previo, central y
+    siguiente) o SearchResult de Neo4jSearchService. Los SearchResult de una
+    búsqueda con context_window traen en `context` el tramo fusionado de
+    ±context_window chunks; los resultados de un mismo tramo
+    (context_span_id) comparten un único subtexto en lugar de repetirlo.
+    """
     # Inicializar un diccionario para almacenar los subtextos
     surrounding_context = {}
+    seen_spans = set()
+
+    for content in primordial_context:
+        if isinstance(content, dict):
+            # Concatenar cada elemento en el orden: contenido previo, central, siguiente
+            subtext = [
+                content['surrounding_context']['previous_chunk_node_content'],
+                content['central_node_content'],
+                content['surrounding_context']['next_chunk_node_content']
+            ]
+        elif content.context is not None:
+            # Tramo ya fusionado: una sola vez por tramo
+            if content.context_span_id in seen_spans:
+                continue
+            seen_spans.add(content.context_span_id)
+            subtext = [content.context]
+        else:
+            subtext = [content.previous_chunk_content, content.content, content.next_chunk_content]
+
+        # Unir los textos del subtexto actual (sin los None) con índice desde 1
+        surrounding_context[f"subtext_{len(surrounding_context) + 1}"] = "\n".join(filter(None, subtext))
 
-    # Concatenar cada elemento en el orden: contenido previo, central, siguiente
-    for index, content in enumerate(primordial_context, start=1):  # Comenzar el índice en 1
-        subtext = []  # Inicializar una lista para el subtexto actual
-        subtext.append(content['surrounding_context']['previous_chunk_node_content'])  # Contenido previo
-        subtext.append(content['central_node_content'])                                   # Contenido central
-        subtext.append(content['surrounding_context']['next_chunk_node_content'])        # Contenido siguiente
-        
-        # Unir los textos del subtexto actual y agregarlo al diccionario con el índice
-        # Filtro si son None
-        surrounding_context[f"subtext_{index}"] = "\n".join(filter(None, subtext))
-    
     return surrounding_context
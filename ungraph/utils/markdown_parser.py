@@ -0,0 +1,240 @@
+"""
+Parser nativo de Markdown en una sola pasada.
+
+Recorre el texto línea a línea y reconoce encabezados (ATX y setext),
+bloques de código con fences, tablas y listas. Devuelve los bloques y las
+secciones del documento con offsets absolutos (en caracteres), de modo que
+el chunker y los patrones jerárquicos usan la estructura sin volver a
+analizar el texto.
+
+Los encabezados dentro de bloques de código no abren secciones.
+
+Ejemplo de uso:
+    >>> parsed = parse_markdown("# Intro\\nTexto\\n## Detalle\\nMás texto\\n")
+    >>> [(s.level, s.title, s.path) for s in parsed.sections]
+    [(1, 'Intro', ('Intro',)), (2, 'Detalle', ('Intro', 'Detalle'))]
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Clave de Document.metadata con las secciones (lista de dicts de MarkdownSection)
+MARKDOWN_SECTIONS_KEY = "markdown_sections"
+
+_ATX_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_SETEXT_UNDERLINE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_TABLE_SEPARATOR = re.compile(r"^ {0,3}\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_LIST_ITEM = re.compile(r"^ {0,3}(?:[-*+]|\d{1,9}[.)])[ \t]+")
+
+
+@dataclass
+class MarkdownBlock:
+    """
+    Bloque de Markdown.
+
+    Attributes:
+        kind: 'heading', 'paragraph', 'code', 'table' o 'list'
+        start: Offset del primer carácter del bloque
+        end: Offset posterior al último carácter del bloque
+    """
+    kind: str
+    start: int
+    end: int
+
+
+@dataclass
+class MarkdownSection:
+    """
+    Sección delimitada por un encabezado (o el preámbulo, con level 0).
+
+    Attributes:
+        level: Nivel del encabezado (1-6; 0 para el texto previo al primer encabezado)
+        title: Texto del encabezado
+        path: Títulos de los encabezados ancestros y el propio
+        headers: Nivel -> título de los ancestros y el propio
+        start: Offset del encabezado
+        body_start: Offset del contenido tras el encabezado
+        end: Offset del siguiente encabezado (o fin del texto)
+    """
+    level: int
+    title: str
+    path: Tuple[str, ...]
+    headers: Dict[int, str]
+    start: int
+    body_start: int
+    end: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable (para Document.metadata)."""
+        return {
+            'level': self.level,
+            'title': self.title,
+            'path': list(self.path),
+            'headers': dict(self.headers),
+            'start': self.start,
+            'body_start': self.body_start,
+            'end': self.end,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MarkdownSection":
+        return cls(
+            level=data['level'],
+            title=data['title'],
+            path=tuple(data['path']),
+            headers={int(level): title for level, title in data['headers'].items()},
+            start=data['start'],
+            body_start=data['body_start'],
+            end=data['end'],
+        )
+
+
+@dataclass
+class ParsedMarkdown:
+    """Resultado de parse_markdown."""
+    text: str
+    blocks: List[MarkdownBlock] = field(default_factory=list)
+    sections: List[MarkdownSection] = field(default_factory=list)
+
+    def count(self, kind: str) -> int:
+        """Número de bloques de un tipo."""
+        return sum(1 for block in self.blocks if block.kind == kind)
+
+
+def parse_markdown(text: str) -> ParsedMarkdown:
+    """
+    Analiza un texto Markdown en una sola pasada.
+
+    Args:
+        text: Contenido Markdown
+
+    Returns:
+        ParsedMarkdown con bloques y secciones (offsets sobre `text`)
+    """
+    parsed = ParsedMarkdown(text=text)
+    blocks = parsed.blocks
+    headings: List[Tuple[int, str, int, int]] = []  # (level, title, start, body_start)
+
+    current: Optional[MarkdownBlock] = None
+    paragraph_lines: List[str] = []
+    fence: Optional[str] = None
+    offset = 0
+
+    def close_block():
+        nonlocal current
+        if current is not None:
+            blocks.append(current)
+            current = None
+        paragraph_lines.clear()
+
+    for line in text.splitlines(keepends=True):
+        line_start = offset
+        offset += len(line)
+        content = line.rstrip("\r\n")
+
+        # Dentro de un bloque de código solo se busca el fence de cierre
+        if fence is not None:
+            current.end = offset
+            stripped = content.strip()
+            if stripped.startswith(fence) and stripped.strip(fence[0]) == "":
+                fence = None
+                close_block()
+            continue
+
+        if not content.strip():
+            close_block()
+            continue
+
+        match = _FENCE.match(content)
+        if match:
+            close_block()
+            fence = match.group(1)
+            current = MarkdownBlock('code', line_start, offset)
+            continue
+
+        match = _ATX_HEADING.match(content)
+        if match:
+            close_block()
+            level = len(match.group(1))
+            headings.append((level, (match.group(2) or "").strip(), line_start, offset))
+            blocks.append(MarkdownBlock('heading', line_start, offset))
+            continue
+
+        match = _SETEXT_UNDERLINE.match(content)
+        if match and current is not None and current.kind == 'paragraph':
+            # El párrafo anterior es el título (nivel 1 con '=', 2 con '-')
+            level = 1 if match.group(1)[0] == "=" else 2
+            title = " ".join(part.strip() for part in paragraph_lines)
+            headings.append((level, title, current.start, offset))
+            current.kind = 'heading'
+            current.end = offset
+            close_block()
+            continue
+
+        if _TABLE_SEPARATOR.match(content) and "|" in content and current is not None \
+                and current.kind == 'paragraph' and len(paragraph_lines) == 1 and "|" in paragraph_lines[0]:
+            current.kind = 'table'
+            current.end = offset
+            continue
+
+        if current is not None and current.kind == 'table' and "|" in content:
+            current.end = offset
+            continue
+
+        if _LIST_ITEM.match(content):
+            if current is None or current.kind != 'list':
+                close_block()
+                current = MarkdownBlock('list', line_start, offset)
+            current.end = offset
+            continue
+
+        if current is not None and current.kind == 'list' and content[:1] in (" ", "\t"):
+            # Continuación indentada de un elemento de lista
+            current.end = offset
+            continue
+
+        if current is None or current.kind != 'paragraph':
+            close_block()
+            current = MarkdownBlock('paragraph', line_start, offset)
+        current.end = offset
+        paragraph_lines.append(content)
+
+    close_block()
+    parsed.sections = _build_sections(text, headings)
+    return parsed
+
+
+def _build_sections(text: str, headings: List[Tuple[int, str, int, int]]) -> List[MarkdownSection]:
+    """Convierte la lista de encabezados en secciones contiguas con su ruta."""
+    sections: List[MarkdownSection] = []
+
+    first_start = headings[0][2] if headings else len(text)
+    if text[:first_start].strip():
+        sections.append(MarkdownSection(0, "", (), {}, 0, 0, first_start))
+
+    stack: List[Tuple[int, str]] = []
+    for index, (level, title, start, body_start) in enumerate(headings):
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        end = headings[index + 1][2] if index + 1 < len(headings) else len(text)
+        sections.append(MarkdownSection(
+            level=level,
+            title=title,
+            path=tuple(item[1] for item in stack),
+            headers=dict(stack),
+            start=start,
+            body_start=body_start,
+            end=end,
+        ))
+    return sections
+
+
+def sections_from_metadata(metadata: Dict[str, Any]) -> Optional[List[MarkdownSection]]:
+    """Secciones guardadas en Document.metadata (None si no hay)."""
+    data = metadata.get(MARKDOWN_SECTIONS_KEY)
+    if not data:
+        return None
+    return [MarkdownSection.from_dict(item) for item in data]
@@ -0,0 +1,266 @@
+"""
+Chunking semántico con offsets y reutilización de embeddings.
+
+SemanticTextSplitter sigue el algoritmo de SemanticChunker de
+langchain-experimental (oraciones, ventana de `buffer_size` oraciones
+vecinas, distancia coseno entre ventanas consecutivas y corte donde la
+distancia supera un umbral), con dos diferencias:
+
+- Cada oración se codifica una sola vez, sola. El vector de una ventana es
+  la media (ponderada por longitud) de los vectores de sus oraciones, en
+  lugar de codificar el texto concatenado de la ventana.
+- La matriz de embeddings de las oraciones se conserva en el resultado
+  (SemanticSplit), así el vector de cada chunk puede derivarse de ella
+  (pooled_embeddings) o reutilizarse si el chunk es una oración
+  (sentence_embeddings_for_chunks) sin volver a codificar el texto.
+
+Los chunks son offsets (start, end) en el texto original: el texto entre
+oraciones se conserva tal cual (SemanticChunker las une con " ").
+
+Ejemplo de uso:
+    >>> splitter = SemanticTextSplitter(embedding_service.encode_texts)
+    >>> split = splitter.split(text)
+    >>> vectors = split.pooled_embeddings()   # (n_chunks, d), sin codificar los chunks
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Span = Tuple[int, int]
+
+# Umbral por defecto de cada tipo (los mismos que SemanticChunker)
+BREAKPOINT_DEFAULTS = {
+    "percentile": 95.0,
+    "standard_deviation": 3.0,
+    "interquartile": 1.5,
+    "gradient": 95.0,
+}
+SENTENCE_SPLIT_REGEX = r"(?<=[.?!])\s+"
+
+
+@dataclass
+class SemanticSplit:
+    """
+    Resultado de SemanticTextSplitter.split.
+
+    Attributes:
+        spans: Offsets (start, end) de cada chunk en el texto
+        sentence_spans: Offsets de cada oración, matriz (m, 2)
+        sentence_embeddings: Embeddings de las oraciones, matriz (m, d)
+        chunk_sentences: Oraciones [first, last) de cada chunk
+        chunk_ranges: Índice del rango de `split(ranges=...)` de cada chunk
+    """
+    spans: List[Span]
+    sentence_spans: np.ndarray
+    sentence_embeddings: np.ndarray
+    chunk_sentences: List[Tuple[int, int]]
+    chunk_ranges: List[int]
+
+    def pooled_embeddings(self) -> np.ndarray:
+        """
+        Vector de cada chunk como media de los vectores de sus oraciones.
+
+        La media se pondera por la longitud de cada oración y se reescala a la
+        norma media de esos vectores (si el modelo normaliza, el resultado
+        queda normalizado). Matriz float32 (n_chunks, d).
+        """
+        dimensions = self.sentence_embeddings.shape[1] if self.sentence_embeddings.ndim == 2 else 0
+        if not self.chunk_sentences:
+            return np.zeros((0, dimensions), dtype=np.float32)
+        vectors = self.sentence_embeddings.astype(np.float64, copy=False)
+        weights = (self.sentence_spans[:, 1] - self.sentence_spans[:, 0]).astype(np.float64)
+        norms = np.linalg.norm(vectors, axis=1)
+
+        # Sumas acumuladas: cada chunk es una resta de dos filas
+        weighted = np.vstack([np.zeros((1, dimensions)), np.cumsum(vectors * weights[:, None], axis=0)])
+        total_weight = np.concatenate([[0.0], np.cumsum(weights)])
+        total_norm = np.concatenate([[0.0], np.cumsum(norms * weights)])
+        first, last = np.asarray(self.chunk_sentences, dtype=np.int64).T
+
+        weight = np.maximum(total_weight[last] - total_weight[first], 1e-12)
+        pooled = (weighted[last] - weighted[first]) / weight[:, None]
+        target_norm = (total_norm[last] - total_norm[first]) / weight
+        pooled_norm = np.linalg.norm(pooled, axis=1)
+        scale = np.divide(target_norm, pooled_norm, out=np.zeros_like(target_norm), where=pooled_norm > 0)
+        return np.ascontiguousarray(pooled * scale[:, None], dtype=np.float32)
+
+    def sentence_embeddings_for_chunks(self) -> List[Optional[np.ndarray]]:
+        """
+        Vector exacto de cada chunk que es una sola oración (su texto es el
+        texto codificado); None para los demás.
+        """
+        return [
+            self.sentence_embeddings[first] if last - first == 1 else None
+            for first, last in self.chunk_sentences
+        ]
+
+
+class SemanticTextSplitter:
+    """
+    Divide texto en chunks en los cambios de tema entre oraciones.
+
+    Equivale a SemanticChunker(embeddings, buffer_size,
+    breakpoint_threshold_type, breakpoint_threshold_amount), con las
+    diferencias descritas en el módulo, más `max_chunk_size` opcional.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], np.ndarray],
+        buffer_size: int = 1,
+        breakpoint_threshold_type: str = "percentile",
+        breakpoint_threshold_amount: Optional[float] = None,
+        max_chunk_size: Optional[int] = None,
+        sentence_split_regex: str = SENTENCE_SPLIT_REGEX
+    ):
+        """
+        Inicializa el divisor.
+
+        Args:
+            embed: Función textos -> matriz (n, d) de embeddings (p. ej. encode_texts)
+            buffer_size: Oraciones vecinas a cada lado en la ventana de comparación
+            breakpoint_threshold_type: "percentile", "standard_deviation", "interquartile" o "gradient"
+            breakpoint_threshold_amount: Umbral (default: el de SemanticChunker para el tipo)
+            max_chunk_size: Máximo de caracteres por chunk; un grupo mayor se corta entre
+                            oraciones (default: sin límite). Una oración sola puede excederlo.
+            sentence_split_regex: Separador de oraciones
+        """
+        if breakpoint_threshold_type not in BREAKPOINT_DEFAULTS:
+            raise ValueError(
+                f"breakpoint_threshold_type must be one of {sorted(BREAKPOINT_DEFAULTS)}, "
+                f"got {breakpoint_threshold_type!r}"
+            )
+        if buffer_size < 0:
+            raise ValueError(f"buffer_size must be >= 0, got {buffer_size}")
+        if max_chunk_size is not None and max_chunk_size <= 0:
+            raise ValueError(f"max_chunk_size must be > 0, got {max_chunk_size}")
+        self.embed = embed
+        self.buffer_size = buffer_size
+        self.breakpoint_threshold_type = breakpoint_threshold_type
+        self.breakpoint_threshold_amount = (
+            BREAKPOINT_DEFAULTS[breakpoint_threshold_type]
+            if breakpoint_threshold_amount is None else breakpoint_threshold_amount
+        )
+        self.max_chunk_size = max_chunk_size
+        self._sentence_split = re.compile(sentence_split_regex)
+
+    def split_text(self, text: str) -> List[str]:
+        """Chunks como texto."""
+        return [text[start:end] for start, end in self.split(text).spans]
+
+    def split(self, text: str, ranges: Optional[Sequence[Span]] = None) -> SemanticSplit:
+        """
+        Divide text (o cada rango de `ranges`) en chunks semánticos.
+
+        Todas las oraciones de todos los rangos se codifican en una sola
+        llamada a `embed`; ningún chunk cruza el límite de un rango (p. ej.
+        secciones Markdown) y el umbral se calcula sobre las distancias de
+        todos los rangos juntos.
+
+        Args:
+            text: Texto completo
+            ranges: Rangos (start, end) a dividir (default: todo el texto)
+        """
+        ranges = [(0, len(text))] if ranges is None else list(ranges)
+        sentence_spans: List[Span] = []
+        range_bounds = [0]  # Oraciones [range_bounds[r], range_bounds[r + 1]) del rango r
+        for start, end in ranges:
+            sentence_spans.extend(self._sentences(text, start, end))
+            range_bounds.append(len(sentence_spans))
+
+        spans_array = np.asarray(sentence_spans, dtype=np.int64).reshape(-1, 2)
+        if not sentence_spans:
+            return SemanticSplit([], spans_array, np.zeros((0, 0), dtype=np.float32), [], [])
+        embeddings = np.asarray(self.embed([text[start:end] for start, end in sentence_spans]), dtype=np.float32)
+
+        # Distancia entre la ventana de cada oración y la de la siguiente (dentro de cada rango)
+        distances = self._window_distances(embeddings, (spans_array[:, 1] - spans_array[:, 0]).astype(np.float64))
+        internal = np.ones(len(distances), dtype=bool)
+        internal[[bound - 1 for bound in range_bounds[1:-1] if 0 < bound <= len(distances)]] = False
+        breaks = set(self._breakpoints(distances, internal).tolist())
+
+        chunk_sentences: List[Tuple[int, int]] = []
+        chunk_ranges: List[int] = []
+        for range_index, (lo, hi) in enumerate(zip(range_bounds, range_bounds[1:])):
+            first = lo
+            for sentence in range(lo, hi):
+                if sentence + 1 == hi or sentence in breaks:
+                    for group in self._limit_size(spans_array, first, sentence + 1):
+                        chunk_sentences.append(group)
+                        chunk_ranges.append(range_index)
+                    first = sentence + 1
+
+        spans = [(int(spans_array[first, 0]), int(spans_array[last - 1, 1])) for first, last in chunk_sentences]
+        return SemanticSplit(spans, spans_array, embeddings, chunk_sentences, chunk_ranges)
+
+    def _sentences(self, text: str, start: int, end: int) -> List[Span]:
+        """Oraciones no vacías de text[start:end], sin espacios en los extremos."""
+        spans = []
+        cursor = start
+        for match in self._sentence_split.finditer(text, start, end):
+            spans.append((cursor, match.start()))
+            cursor = match.end()
+        spans.append((cursor, end))
+        stripped = []
+        for sentence_start, sentence_end in spans:
+            while sentence_start < sentence_end and text[sentence_start].isspace():
+                sentence_start += 1
+            while sentence_end > sentence_start and text[sentence_end - 1].isspace():
+                sentence_end -= 1
+            if sentence_end > sentence_start:
+                stripped.append((sentence_start, sentence_end))
+        return stripped
+
+    def _window_distances(self, embeddings: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """1 - coseno entre las ventanas de oraciones i e i + 1 (media ponderada de vecinas)."""
+        count = len(embeddings)
+        if count < 2:
+            return np.zeros(0)
+        weighted = np.vstack([
+            np.zeros((1, embeddings.shape[1])),
+            np.cumsum(embeddings.astype(np.float64) * weights[:, None], axis=0)
+        ])
+        indices = np.arange(count)
+        lo = np.maximum(indices - self.buffer_size, 0)
+        hi = np.minimum(indices + self.buffer_size + 1, count)
+        # La escala de la media no cambia el coseno: basta con la suma ponderada
+        windows = weighted[hi] - weighted[lo]
+        norms = np.linalg.norm(windows, axis=1)
+        norms[norms == 0] = 1.0
+        windows /= norms[:, None]
+        return 1.0 - np.einsum("ij,ij->i", windows[:-1], windows[1:])
+
+    def _breakpoints(self, distances: np.ndarray, internal: np.ndarray) -> np.ndarray:
+        """Oraciones tras las que se corta (distancias de un mismo rango sobre el umbral)."""
+        values = distances[internal]
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64)
+        amount = self.breakpoint_threshold_amount
+        kind = self.breakpoint_threshold_type
+        if kind == "percentile":
+            threshold = np.percentile(values, amount)
+        elif kind == "standard_deviation":
+            threshold = np.mean(values) + amount * np.std(values)
+        elif kind == "interquartile":
+            q1, q3 = np.percentile(values, [25, 75])
+            threshold = np.mean(values) + amount * (q3 - q1)
+        else:
+            values = np.gradient(values) if len(values) > 1 else np.zeros(1)
+            threshold = np.percentile(values, amount)
+        return np.flatnonzero(internal)[values > threshold]
+
+    def _limit_size(self, spans: np.ndarray, first: int, last: int) -> List[Tuple[int, int]]:
+        """Corta el grupo de oraciones [first, last) en grupos de hasta max_chunk_size caracteres."""
+        if self.max_chunk_size is None or spans[last - 1, 1] - spans[first, 0] <= self.max_chunk_size:
+            return [(first, last)]
+        groups = []
+        start = first
+        for sentence in range(first + 1, last):
+            if spans[sentence, 1] - spans[start, 0] > self.max_chunk_size:
+                groups.append((start, sentence))
+                start = sentence
+        groups.append((start, last))
+        return groups
@@ -0,0 +1,248 @@
+"""
+Divisor recursivo de texto con offsets.
+
+RecursiveTextSplitter reproduce RecursiveCharacterTextSplitter de LangChain
+(mismos separadores, misma recursión, misma fusión con overlap y mismo
+strip de espacios), pero trabaja con posiciones: cada chunk es un par
+(start, end) de offsets en el texto original y el texto solo se copia
+cuando se pide (split_text, o text[start:end] en quien lo consuma).
+
+Diferencias con LangChain:
+- keep_separator=False no está soportado: al descartar separadores (y los
+  fragmentos vacíos entre separadores seguidos) los chunks dejan de ser
+  fragmentos del texto original.
+- Los fragmentos se fusionan con búsquedas binarias sobre sus longitudes
+  acumuladas, sin concatenar texto. Con is_separator_regex=True la
+  búsqueda se hace sobre una copia del fragmento (como LangChain) para
+  que ^ y los lookbehind se comporten igual.
+
+Con `token_starts` (offsets de inicio de cada token del texto, de un
+tokenizador rápido) chunk_size y chunk_overlap se miden en tokens: la
+longitud de un fragmento es el número de tokens que empiezan dentro de él,
+así que el texto se tokeniza una sola vez y no por fragmento.
+
+Ejemplo de uso:
+    >>> splitter = RecursiveTextSplitter(chunk_size=1000, chunk_overlap=200)
+    >>> for start, end in splitter.split_spans(text):
+    ...     print(start, end, text[start:end][:40])
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Callable, List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+# Párrafos, líneas y fin de oración antes que palabras (usar con keep_separator="end")
+SENTENCE_SEPARATORS = ["\n\n", "\n", ". ", "! ", "? ", "; ", " ", ""]
+
+Span = Tuple[int, int]
+
+
+class RecursiveTextSplitter:
+    """
+    Divisor recursivo por separadores que devuelve offsets.
+
+    Equivale a RecursiveCharacterTextSplitter(chunk_size, chunk_overlap,
+    separators, keep_separator, is_separator_regex, strip_whitespace):
+    text[start:end] de cada span es exactamente el chunk de LangChain.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        chunk_overlap: int = 200,
+        separators: Optional[Sequence[str]] = None,
+        keep_separator: Union[bool, Literal["start", "end"]] = True,
+        is_separator_regex: bool = False,
+        strip_whitespace: bool = True,
+        length_function: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Inicializa el divisor.
+
+        Args:
+            chunk_size: Tamaño máximo de cada chunk
+            chunk_overlap: Overlap máximo entre chunks consecutivos
+            separators: Separadores en orden de preferencia (default: DEFAULT_SEPARATORS)
+            keep_separator: True/"start" (el separador abre el fragmento siguiente) o "end"
+            is_separator_regex: Si los separadores son expresiones regulares
+            strip_whitespace: Quitar espacios al inicio y final de cada chunk
+            length_function: Longitud de un texto (default: caracteres, sin copiar texto)
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0:
+            raise ValueError(f"chunk_overlap must be >= 0, got {chunk_overlap}")
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+        if not keep_separator:
+            raise ValueError("keep_separator=False is not supported: chunks would not be slices of the text")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators or DEFAULT_SEPARATORS)
+        self.keep_separator = "end" if keep_separator == "end" else "start"
+        self.is_separator_regex = is_separator_regex
+        self.strip_whitespace = strip_whitespace
+        self.length_function = length_function
+        self._patterns = {
+            separator: re.compile(separator) for separator in self.separators if is_separator_regex and separator
+        }
+
+    @classmethod
+    def sentence_aware(cls, chunk_size: int = 4000, chunk_overlap: int = 200, **kwargs) -> "RecursiveTextSplitter":
+        """Divisor que prefiere cortar en fin de oración (el signo queda en el chunk)."""
+        return cls(chunk_size, chunk_overlap, separators=SENTENCE_SEPARATORS, keep_separator="end", **kwargs)
+
+    def split_text(self, text: str) -> List[str]:
+        """Chunks como texto (mismo resultado que LangChain split_text)."""
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        token_starts: Optional[np.ndarray] = None
+    ) -> List[Span]:
+        """
+        Offsets (start, end) de los chunks de text[start:end].
+
+        Los offsets son absolutos en `text`, así una sección o ventana se
+        divide sin copiarla.
+
+        Args:
+            text: Texto completo
+            start: Inicio del fragmento a dividir
+            end: Fin del fragmento (default: final del texto)
+            token_starts: Offsets ordenados de inicio de cada token de `text`; si
+                          se pasan, las longitudes se miden en tokens
+        """
+        end = len(text) if end is None else end
+        spans: List[Span] = []
+        if start < end:
+            self._split(text, start, end, self.separators, spans, token_starts)
+        return spans
+
+    def _split(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        separators: List[str],
+        spans: List[Span],
+        token_starts: Optional[np.ndarray] = None
+    ) -> None:
+        # Primer separador presente en el fragmento ("" siempre divide)
+        separator = separators[-1]
+        remaining: List[str] = []
+        for index, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if self._contains(text, start, end, candidate):
+                separator = candidate
+                remaining = separators[index + 1:]
+                break
+
+        # Fragmento i = text[bounds[i]:bounds[i + 1]]; prefix[i] = longitud acumulada hasta él
+        bounds = self._bounds(text, start, end, separator)
+        if token_starts is not None:
+            prefix = np.searchsorted(token_starts, bounds).tolist()
+        elif self.length_function is None:
+            prefix = bounds
+        else:
+            prefix = list(accumulate(
+                (self.length_function(text[a:b]) for a, b in zip(bounds, bounds[1:])), initial=0
+            ))
+        size = self.chunk_size
+        lo = 0
+        for index in [i for i, (a, b) in enumerate(zip(prefix, prefix[1:])) if b - a >= size]:
+            # Los fragmentos que no caben se dividen con los separadores siguientes
+            if index > lo:
+                self._merge(text, bounds, prefix, lo, index, spans)
+            if remaining:
+                self._split(text, bounds[index], bounds[index + 1], remaining, spans, token_starts)
+            else:
+                # Sin más separadores LangChain añade el fragmento tal cual (sin strip)
+                spans.append((bounds[index], bounds[index + 1]))
+            lo = index + 1
+        if lo < len(bounds) - 1:
+            self._merge(text, bounds, prefix, lo, len(bounds) - 1, spans)
+
+    def _contains(self, text: str, start: int, end: int, separator: str) -> bool:
+        if self.is_separator_regex:
+            return self._patterns[separator].search(text[start:end]) is not None
+        return text.find(separator, start, end) != -1
+
+    def _bounds(self, text: str, start: int, end: int, separator: str) -> List[int]:
+        """
+        Límites de los fragmentos no vacíos tras dividir por `separator`
+        (con el separador incluido según keep_separator).
+        """
+        if not separator:
+            return list(range(start, end + 1))
+
+        if self.is_separator_regex:
+            matches = self._patterns[separator].finditer(text[start:end])
+            if self.keep_separator == "end":
+                cuts = [start + match.end() for match in matches]
+            else:
+                cuts = [start + match.start() for match in matches]
+            bounds = [start]
+            for cut in cuts + [end]:
+                if cut > bounds[-1]:
+                    bounds.append(cut)
+            return bounds
+
+        # Longitudes de las partes (split en C) acumuladas: sin búsquedas en Python
+        size = len(separator)
+        lengths = map(len, text[start:end].split(separator))
+        if self.keep_separator == "end":
+            bounds = list(accumulate(map(size.__add__, lengths), initial=start))
+            bounds[-1] = end
+            if bounds[-2] == end:  # Texto terminado en separador: última parte vacía
+                bounds.pop()
+        else:
+            bounds = list(accumulate(map(size.__add__, lengths), initial=start - size))
+            bounds[0] = start
+            bounds[-1] = end
+            if bounds[1] == start:  # Texto empezado por separador: primera parte vacía
+                del bounds[1]
+        return bounds
+
+    def _merge(self, text: str, bounds: List[int], prefix: List[int], lo: int, hi: int, spans: List[Span]) -> None:
+        """
+        Une los fragmentos lo..hi-1 en chunks de hasta chunk_size con overlap.
+
+        Mismo resultado que el bucle de _merge_splits de LangChain, pero
+        saltando de chunk en chunk con búsquedas binarias sobre `prefix`.
+        """
+        size, overlap = self.chunk_size, self.chunk_overlap
+        first = lo
+        # Primer fragmento que ya no cabe en el chunk que empieza en `first`
+        current = bisect_right(prefix, prefix[first] + size, first + 2, hi + 1) - 1
+        while current < hi:
+            self._emit(text, bounds[first], bounds[current], spans)
+            # Se descartan fragmentos del inicio hasta que lo que queda es overlap
+            # y el fragmento actual cabe detrás
+            keep_from = max(
+                bisect_left(prefix, prefix[current] - overlap, first, current),
+                bisect_left(prefix, prefix[current + 1] - size, first, current)
+            )
+            first = min(keep_from, current)
+            current = bisect_right(prefix, prefix[first] + size, current + 2, hi + 1) - 1
+        self._emit(text, bounds[first], bounds[hi], spans)
+
+    def _emit(self, text: str, start: int, end: int, spans: List[Span]) -> None:
+        if self.strip_whitespace:
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+        if end > start:
+            spans.append((start, end))